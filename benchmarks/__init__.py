@@ -0,0 +1 @@
+"""Benchmarks of the numerical hot paths, run on synthetic data."""
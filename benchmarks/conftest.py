@@ -0,0 +1,97 @@
+"""Fixtures and options shared by all benchmarks."""
+
+from __future__ import annotations
+
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from benchmarks.synthetic import NUM_WAVELENGTHS, SCALES, SMALL_SCALES
+from testing import build_optimization
+from vipdopt.optimization import Device, LumericalOptimization
+from vipdopt.simulation import Monitor
+
+ROUNDS = 5
+
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption(
+        '--scale',
+        choices=('small', 'full'),
+        default='small',
+        help='Problem sizes to benchmark; "full" adds 3D designs of 150^3 voxels, '
+        'which need tens of GB of memory.',
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc):
+    """Parametrize benchmarks over problem sizes and numbers of wavelengths."""
+    if 'scale' in metafunc.fixturenames:
+        full = metafunc.config.getoption('--scale') == 'full'
+        metafunc.parametrize(
+            'scale', list(SCALES) if full else list(SMALL_SCALES), scope='module'
+        )
+    if 'num_wavelengths' in metafunc.fixturenames:
+        metafunc.parametrize('num_wavelengths', NUM_WAVELENGTHS, scope='module')
+
+
+@pytest.fixture(autouse=True)
+def _clear_monitor_cache():
+    """Don't let monitor data from one benchmark count towards another."""
+    Monitor.cache.clear()
+    yield
+    Monitor.cache.clear()
+
+
+def peak_memory(func: Callable, *args, **kwargs) -> int:
+    """Return the peak memory in bytes allocated while calling a function."""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@pytest.fixture()
+def measure(benchmark, request) -> Callable[..., Any]:
+    """Time a function and record the peak memory of a single call.
+
+    The peak memory, scale, and number of wavelengths are stored in the benchmark's
+    `extra_info`, so they are saved with the timings in the JSON results.
+    """
+
+    def run(
+        func: Callable,
+        *args,
+        setup: Callable[[], None] | None = None,
+        rounds: int = ROUNDS,
+        **kwargs,
+    ) -> Any:
+        if setup is not None:
+            setup()
+        benchmark.extra_info['peak_memory_bytes'] = peak_memory(func, *args, **kwargs)
+        for name in ('scale', 'num_wavelengths'):
+            if name in request.fixturenames:
+                benchmark.extra_info[name] = request.getfixturevalue(name)
+        return benchmark.pedantic(
+            func, args, kwargs, setup=setup, rounds=rounds, iterations=1
+        )
+
+    return run
+
+
+@pytest.fixture()
+def make_optimization(tmp_path) -> Callable[..., LumericalOptimization]:
+    """Return a function creating optimizations of a device in `tmp_path`.
+
+    Keyword arguments are passed on to `testing.build_optimization`.
+    """
+
+    def _make_optimization(device: Device, **kwargs) -> LumericalOptimization:
+        return build_optimization(tmp_path, device, **kwargs)
+
+    return _make_optimization
@@ -0,0 +1,161 @@
+"""Generators of synthetic monitor data and devices at realistic problem sizes."""
+
+from __future__ import annotations
+
+from itertools import pairwise
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from vipdopt.optimization import BayerFilterFoM, Device, SuperFoM
+from vipdopt.simulation import Monitor, Power, Profile
+
+# Design region shapes in voxels, named by the simulations they come from
+SCALES: dict[str, tuple[int, int, int]] = {
+    '2D': (150, 150, 3),
+    '3D-41': (41, 41, 41),
+    '3D-150': (150, 150, 150),
+}
+# Scales run by default; the rest need `--scale full`
+SMALL_SCALES = ('2D', '3D-41')
+NUM_WAVELENGTHS = (20, 60, 120)
+
+# Shape of the transmission monitor's fields below the device
+TRANSMISSION_SHAPE = (21, 21, 1)
+DEVICE_SIZE_UM = 2.0
+PERMITTIVITY_CONSTRAINTS = (1.5**2, 2.4**2)
+
+
+def random_field(
+    shape: tuple[int, ...], num_wavelengths: int, rng: np.random.Generator
+) -> npt.NDArray[np.complex128]:
+    """Return a random complex field with shape (3, *shape, num_wavelengths)."""
+    size = (3, *shape, num_wavelengths)
+    return rng.standard_normal(size) + 1j * rng.standard_normal(size)
+
+
+def write_monitor_data(
+    path: Path,
+    shape: tuple[int, ...],
+    num_wavelengths: int,
+    seed: int = 0,
+    transmission: bool = False,
+) -> Path:
+    """Write a monitor data file in the format of `LumericalFDTD.reformat_monitor_data`.
+
+    Arguments:
+        path (Path): The .npz file to write.
+        shape (tuple[int, ...]): The spatial shape of the monitor's fields.
+        num_wavelengths (int): The number of wavelengths the fields are saved at.
+        seed (int): Random seed for the fields. Defaults to 0.
+        transmission (bool): Whether to include transmission and power data, as
+            saved for power monitors. Defaults to False.
+
+    Returns:
+        (Path): The path of the written file.
+    """
+    rng = np.random.default_rng(seed)
+    e = random_field(shape, num_wavelengths, rng)
+    h = random_field(shape, num_wavelengths, rng)
+    sp = rng.uniform(0.5, 1.5, (num_wavelengths, 1))
+    t = rng.uniform(0.0, 1.0, num_wavelengths) if transmission else None
+    power = sp * t[:, np.newaxis] + 0j if transmission else None
+    with path.open('wb') as f:
+        np.savez(f, e=e, h=h, p=None, t=t, sp=sp, power=power)
+    return path
+
+
+def make_device(scale: str, seed: int = 0) -> Device:
+    """Create a randomly initialized device with the shape of a scale."""
+    shape = SCALES[scale]
+    coords = {
+        axis: np.linspace(-0.5 * DEVICE_SIZE_UM, 0.5 * DEVICE_SIZE_UM, n)
+        for axis, n in zip('xyz', shape, strict=True)
+    }
+    device = Device(
+        shape,
+        PERMITTIVITY_CONSTRAINTS,
+        coords,
+        randomize=True,
+        init_seed=seed,
+    )
+    device.field_shape = shape
+    return device
+
+
+def make_monitors(
+    folder: Path, scale: str, num_wavelengths: int, seed: int = 0
+) -> tuple[list[Monitor], list[Monitor]]:
+    """Write the monitor data of one forward and adjoint simulation pair.
+
+    Returns:
+        (tuple[list[Monitor], list[Monitor]]): The forward monitors (focal,
+            transmission, design E-field) and adjoint monitors (design E-field) of a
+            `BayerFilterFoM`, linked to the written data.
+    """
+    shape = SCALES[scale]
+    stem = f'{scale}_{num_wavelengths}'
+    focal = Profile(
+        'focal_monitor_0',
+        write_monitor_data(folder / f'{stem}_focal.npz', (1, 1, 1), num_wavelengths),
+    )
+    transmission = Power(
+        'transmission_monitor_0',
+        write_monitor_data(
+            folder / f'{stem}_transmission.npz',
+            TRANSMISSION_SHAPE,
+            num_wavelengths,
+            seed=seed + 1,
+            transmission=True,
+        ),
+    )
+    design_fwd = Profile(
+        'design_efield_monitor',
+        write_monitor_data(
+            folder / f'{stem}_design_fwd.npz', shape, num_wavelengths, seed=seed + 2
+        ),
+    )
+    design_adj = Profile(
+        'design_efield_monitor',
+        write_monitor_data(
+            folder / f'{stem}_design_adj.npz', shape, num_wavelengths, seed=seed + 3
+        ),
+    )
+    return [focal, transmission, design_fwd], [design_adj]
+
+
+def make_bayer_fom(
+    fwd_monitors: list[Monitor],
+    adj_monitors: list[Monitor],
+    num_wavelengths: int,
+    band: slice | None = None,
+) -> BayerFilterFoM:
+    """Create a Bayer filter FoM over a band of wavelengths."""
+    freqs = list(range(num_wavelengths))[band or slice(None)]
+    return BayerFilterFoM(
+        'TE',
+        [],
+        [],
+        fwd_monitors,
+        adj_monitors,
+        freqs,
+        [],
+        list(range(num_wavelengths)),
+        spectral_weights=np.ones(len(freqs)),
+    )
+
+
+def make_super_fom(
+    fwd_monitors: list[Monitor],
+    adj_monitors: list[Monitor],
+    num_wavelengths: int,
+    num_bands: int = 4,
+) -> SuperFoM:
+    """Create a SuperFoM of Bayer filter FoMs for several bands, as for a sensor."""
+    edges = np.linspace(0, num_wavelengths, num_bands + 1, dtype=int)
+    foms = [
+        make_bayer_fom(fwd_monitors, adj_monitors, num_wavelengths, slice(lo, hi))
+        for lo, hi in pairwise(edges)
+    ]
+    return SuperFoM([(f,) for f in foms], [1.0 / num_bands] * num_bands)
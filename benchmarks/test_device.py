@@ -0,0 +1,47 @@
+"""Benchmarks for device filtering, import, gradient interpolation, and export."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_device
+from vipdopt.optimization import Device
+from vipdopt.simulation import Import
+
+
+@pytest.fixture()
+def device(scale: str) -> Device:
+    return make_device(scale)
+
+
+@pytest.fixture()
+def gradient(device: Device) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    return rng.standard_normal(device.size) + 1j * rng.standard_normal(device.size)
+
+
+def test_filter_forward(measure, device: Device):
+    measure(device.update_density)
+
+
+def test_backpropagate(measure, device: Device, gradient: np.ndarray):
+    measure(device.backpropagate, gradient)
+
+
+def test_import_cur_index(measure, device: Device):
+    measure(device.import_cur_index, Import('design_import'))
+
+
+def test_interpolate_gradient(measure, device: Device, gradient: np.ndarray):
+    dimension = '2D' if device.size[2] == 3 else '3D'  # noqa: PLR2004
+    g = np.real(gradient[..., 0]) if dimension == '2D' else np.real(gradient)
+    measure(device.interpolate_gradient, g, dimension)
+
+
+def test_export_stl(measure, device: Device, tmp_path):
+    measure(device.export_density_as_stl, tmp_path / 'device.stl', rounds=1)
+
+
+def test_export_gds(measure, device: Device, tmp_path):
+    measure(device.export_density_as_gds, tmp_path / 'gds', rounds=1)
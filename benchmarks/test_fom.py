@@ -0,0 +1,48 @@
+"""Benchmarks for loading monitor data and evaluating FoMs."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.synthetic import make_bayer_fom, make_monitors, make_super_fom
+from vipdopt.simulation import Monitor
+
+
+@pytest.fixture(scope='module')
+def monitors(tmp_path_factory, scale: str, num_wavelengths: int):
+    folder = tmp_path_factory.mktemp('monitor_data')
+    return make_monitors(folder, scale, num_wavelengths)
+
+
+def reload(*monitors: Monitor):
+    """Drop loaded monitor data so it is read from disk again."""
+    Monitor.cache.clear()
+    for mon in monitors:
+        mon.reset()
+
+
+def test_load_source(measure, monitors):
+    design_monitor = monitors[0][2]
+    measure(design_monitor.load_source, setup=lambda: reload(design_monitor))
+
+
+def test_bayer_fom(measure, monitors, num_wavelengths: int):
+    fom = make_bayer_fom(*monitors, num_wavelengths)
+    measure(fom.fom_func)
+
+
+def test_bayer_grad(measure, monitors, num_wavelengths: int):
+    fom = make_bayer_fom(*monitors, num_wavelengths)
+    fom.fom_func()  # Computes the source weights needed for the gradient
+    measure(fom.grad_func)
+
+
+def test_super_fom_evaluate(measure, monitors, num_wavelengths: int):
+    fom = make_super_fom(*monitors, num_wavelengths)
+    measure(fom.evaluate)
+
+
+def test_super_fom_evaluate_cold(measure, monitors, num_wavelengths: int):
+    """Evaluate a SuperFoM including reading its monitor data from disk."""
+    fom = make_super_fom(*monitors, num_wavelengths)
+    measure(fom.evaluate, setup=lambda: reload(*monitors[0], *monitors[1]))
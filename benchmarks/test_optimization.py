@@ -0,0 +1,42 @@
+"""Benchmarks for optimizer steps and saving optimization histories."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_device
+from vipdopt.optimization import (
+    AdamOptimizer,
+    GradientAscentOptimizer,
+    GradientOptimizer,
+    LBFGSOptimizer,
+    MMAOptimizer,
+)
+
+NUM_ITERATIONS = 20
+
+
+@pytest.mark.parametrize(
+    'optimizer_type',
+    [GradientAscentOptimizer, AdamOptimizer, LBFGSOptimizer, MMAOptimizer],
+)
+def test_optimizer_step(measure, scale: str, optimizer_type: type[GradientOptimizer]):
+    device = make_device(scale)
+    optimizer = optimizer_type()
+    gradient = np.random.default_rng(1).standard_normal(device.size)
+    iterations = iter(range(1_000_000))
+    # Take a step first, so that optimizers with history are timed in steady state
+    optimizer.step(device, gradient, next(iterations))
+    measure(lambda: optimizer.step(device, gradient, next(iterations)))
+
+
+def test_save_histories(measure, scale: str, make_optimization):
+    device = make_device(scale)
+    optimization = make_optimization(device)
+    rng = np.random.default_rng(0)
+    for _ in range(NUM_ITERATIONS):
+        optimization.param_hist['design'].append(device.get_design_variable().copy())
+        for key in optimization.fom_hist:
+            optimization.fom_hist[key].append(rng.uniform(size=4))
+    measure(optimization.save_histories)
@@ -5,6 +5,7 @@
 
 """
 
+from testing.optimization import *
 from testing.utils import *
 
-__all__ = utils.__all__
+__all__ = utils.__all__ + optimization.__all__
@@ -0,0 +1,50 @@
+"""Construction of optimizations for use in tests and benchmarks."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from vipdopt.optimization import (
+    AdamOptimizer,
+    Device,
+    GradientOptimizer,
+    LumericalOptimization,
+    UniformMAEFoM,
+)
+from vipdopt.simulation import LumericalSimulation
+
+__all__ = ['OPTIMIZATION_DIRS', 'build_optimization']
+
+OPTIMIZATION_DIRS = ('temp', 'opt_info', 'opt_plots', 'checkpoints')
+
+
+def build_optimization(
+    folder: Path,
+    device: Device,
+    optimization_type: type[LumericalOptimization] = LumericalOptimization,
+    base_sim: LumericalSimulation | None = None,
+    optimizer: GradientOptimizer | None = None,
+    **kwargs: Any,
+) -> LumericalOptimization:
+    """Create an optimization of a device with a placeholder FoM.
+
+    Arguments:
+        folder (Path): The folder to create the optimization's directories in.
+        device (Device): The device to optimize.
+        optimization_type (type[LumericalOptimization]): The class of optimization
+            to create. Defaults to LumericalOptimization.
+        base_sim (LumericalSimulation | None): The base simulation. Defaults to an
+            empty simulation.
+        optimizer (GradientOptimizer | None): The optimizer. Defaults to Adam with
+            a step size of 0.01.
+        **kwargs: Other arguments for the optimization.
+    """
+    return optimization_type(
+        LumericalSimulation() if base_sim is None else base_sim,
+        device,
+        AdamOptimizer(step_size=1e-2) if optimizer is None else optimizer,
+        UniformMAEFoM(range(5), [], range(5), 0.5),
+        dirs={name: folder / name for name in OPTIMIZATION_DIRS},
+        **kwargs,
+    )
@@ -1,12 +1,15 @@
 """Fixtures for use in multiple tests."""
 
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 import numpy as np
 import pytest
 
+from testing import build_optimization
 from vipdopt.configuration.template import SonyBayerRenderer
-from vipdopt.optimization import Device
+from vipdopt.optimization import Device, LumericalOptimization
 
 TEST_YAML_PATH = Path('testing/config_example.yml')
 TEST_TEMPLATE_PATH = Path('jinja_templates/derived_simulation_properties.j2')
@@ -307,3 +310,45 @@ def default_device_dict() -> dict:
 def device(request, default_device_dict) -> Device:
     default_device_dict.update(request.param)
     return Device(**default_device_dict)
+
+
+@pytest.fixture()
+def make_optimization(tmp_path) -> Callable[..., LumericalOptimization]:
+    """Return a function creating optimizations of a device in `tmp_path`.
+
+    Keyword arguments, e.g. `optimization_type`, are passed on to
+    `testing.build_optimization`.
+    """
+
+    def _make_optimization(device_dict: dict, **kwargs) -> LumericalOptimization:
+        return build_optimization(tmp_path, Device(**device_dict), **kwargs)
+
+    return _make_optimization
+
+
+@pytest.fixture()
+def mock_jobs(mocker) -> Callable[..., dict[str, Any]]:
+    """Return a function replacing the simulation steps of an optimization by mocks.
+
+    The optimization's `_import_device`, `_create_jobs`, `_run_jobs`, and
+    `_extract_monitor_data` are patched, and the mocks returned by name without the
+    leading underscore. `create_jobs` is the side effect of `_create_jobs`, e.g. to
+    name the jobs or remember the design they were created with.
+    """
+
+    def _mock_jobs(
+        optimization: LumericalOptimization, create_jobs: Callable | None = None
+    ) -> dict[str, Any]:
+        mocks = {
+            name: mocker.patch.object(optimization, f'_{name}')
+            for name in (
+                'import_device',
+                'create_jobs',
+                'run_jobs',
+                'extract_monitor_data',
+            )
+        }
+        mocks['create_jobs'].side_effect = create_jobs
+        return mocks
+
+    return _mock_jobs
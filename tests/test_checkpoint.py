@@ -0,0 +1,68 @@
+"""Tests for optimization/checkpoint.py"""
+
+import numpy as np
+import pytest
+
+from testing import assert_equal
+from vipdopt.optimization.checkpoint import Checkpointer, read_checkpoint, write_atomic
+
+
+@pytest.mark.smoke()
+def test_write_atomic(tmp_path):
+    fname = tmp_path / 'state.npy'
+    write_atomic(fname, {'a': np.arange(3), 'b': 2})
+    write_atomic(fname, {'a': np.arange(4), 'b': 3})
+
+    state = read_checkpoint(fname)
+    assert_equal(state['a'], np.arange(4))
+    assert_equal(state['b'], 3)
+    # No temporary files should be left over
+    assert_equal([p.name for p in tmp_path.iterdir()], ['state.npy'])
+
+
+@pytest.mark.smoke()
+def test_checkpointer_background(tmp_path):
+    checkpointer = Checkpointer(tmp_path / 'checkpoints')
+    assert not checkpointer.exists()
+
+    for i in range(5):
+        checkpointer.save({'iteration': i})
+    # Loading waits for all pending writes
+    assert_equal(checkpointer.load()['iteration'], 4)
+    checkpointer.close()
+    assert checkpointer.exists()
+
+
+@pytest.mark.smoke()
+def test_resume(default_device_dict: dict, make_optimization):
+    default_device_dict.update({'randomize': True, 'init_seed': 0})
+    opt = make_optimization(default_device_dict)
+    assert not opt.resume()
+
+    rng = np.random.default_rng(0)
+    for _ in range(2):
+        grad = rng.normal(size=opt.device.size)
+        opt.optimizer.step(opt.device, grad, opt.iteration)
+        opt.fom_hist['transmission_overall'].append(np.ones(3) * opt.iteration)
+        opt.save_histories()
+        opt.iteration += 1
+    opt.fom.performance_weights = np.array([0.25])
+    opt.save_checkpoint(block=True)
+
+    # Progress made after the checkpoint must be discarded on resume
+    opt.fom_hist['transmission_overall'].append(np.zeros(3))
+    opt.save_histories()
+
+    resumed = make_optimization(default_device_dict)
+    assert resumed.resume()
+    assert_equal(resumed.iteration, 2)
+    assert_equal(resumed.device.w, opt.device.w)
+    assert_equal(resumed.optimizer.moments, opt.optimizer.moments)
+    assert_equal(resumed.fom.performance_weights, np.array([0.25]))
+    assert_equal(len(resumed.fom_hist['transmission_overall']), 2)
+
+    # Stepping both with the same gradient must give identical designs
+    grad = rng.normal(size=opt.device.size)
+    opt.optimizer.step(opt.device, grad, opt.iteration)
+    resumed.optimizer.step(resumed.device, grad, resumed.iteration)
+    assert_equal(resumed.device.w, opt.device.w)
@@ -1,6 +1,7 @@
 """Tests for filter.py"""
 
 from contextlib import nullcontext as does_not_raise
+from copy import copy
 from re import Pattern
 from typing import Any
 
@@ -9,7 +10,7 @@
 
 from testing import assert_close, assert_equal, assert_equal_dict
 from tests.conftest import TEST_YAML_PATH
-from vipdopt.configuration import Config, SonyBayerConfig
+from vipdopt.configuration import Config, SonyBayerConfig, SonyBayerRenderer
 
 
 @pytest.mark.smoke()
@@ -263,3 +264,100 @@ def test_bad_config(fname: str, msg: Pattern):
     cfg = SonyBayerConfig()
     with pytest.raises(ValueError, match=msg):
         cfg.read_file(fname)
+
+
+@pytest.mark.smoke()
+def test_derive_variants():
+    base = SonyBayerConfig.from_file(TEST_YAML_PATH)
+    renderer = SonyBayerRenderer('jinja_templates/')
+    renderer.set_template('derived_simulation_properties.j2')
+
+    scale = base['device_scale_um']
+    variants = [{}, {'device_scale_um': 2 * scale}, {}]
+    configs = SonyBayerConfig.derive_variants(base, variants, renderer)
+
+    # Identical variants are only rendered once
+    assert_equal((renderer.hits, renderer.misses), (1, 2))
+    assert_equal(configs[0]['device_scale_um'], scale)
+    assert_equal(configs[1]['device_scale_um'], 2 * scale)
+    assert_close(configs[1]['focal_length_um'], 2 * configs[0]['focal_length_um'])
+    assert_equal_dict(configs[2].data, configs[0].data)
+    assert 'focal_length_um' not in base
+
+    for overrides, cfg in zip(variants, configs, strict=True):
+        expected = SonyBayerConfig({**base, **overrides})
+        expected.derive_params(renderer)
+        assert_equal_dict(cfg.data, expected.data)
+
+    # Derived configs don't share mutable values
+    configs[0]['lambda_values_um'].append(0.0)
+    assert len(configs[2]['lambda_values_um']) + 1 == len(
+        configs[0]['lambda_values_um']
+    )
+
+
+@pytest.mark.smoke()
+def test_batch(mocker):
+    cfg = SonyBayerConfig({'border_optimization': True, 'num_sidewalls': 0})
+    validate = mocker.spy(cfg, '_validate')
+
+    cfg['a'] = 1
+    assert_equal(validate.call_count, 1)
+
+    with cfg.batch():
+        for i in range(10):
+            cfg[f'key_{i}'] = i
+        with cfg.batch():
+            cfg.update({'b': 2, 'c': 3})
+        del cfg['a']
+        assert_equal(validate.call_count, 1)
+    assert_equal(validate.call_count, 2)
+    assert 'a' not in cfg
+    assert_equal(cfg['key_9'], 9)
+
+    def edit(**params):
+        with cfg.batch():
+            cfg['d'] = 4
+            cfg.update(params)
+            _ = cfg['missing']
+
+    # Edits are undone together if the batch is invalid or fails
+    before = dict(cfg)
+    with pytest.raises(ValueError, match=r'border_optimization.+use_smooth_blur'):
+        edit(use_smooth_blur=True, missing=None)
+    assert_equal_dict(dict(cfg), before)
+    with pytest.raises(KeyError):
+        edit()
+    assert_equal_dict(dict(cfg), before)
+
+    # Updates are transactional too
+    with pytest.raises(ValueError, match=r'border_optimization.+num_sidewalls'):
+        cfg.update({'e': 5, 'num_sidewalls': 1})
+    assert_equal_dict(dict(cfg), before)
+
+
+@pytest.mark.smoke()
+def test_derive():
+    base = SonyBayerConfig({'a': 1, 'b': [1, 2]})
+    variant = base.derive({'a': 2}, c=3)
+    assert isinstance(variant, SonyBayerConfig)
+    assert_equal_dict(variant.data, {'a': 2, 'b': [1, 2], 'c': 3})
+    assert_equal_dict(base.data, {'a': 1, 'b': [1, 2]})
+
+    # Parameters are only copied once a config sharing them is edited
+    unchanged = base.derive()
+    assert unchanged.data is base.data
+    base['a'] = 0
+    assert_equal(base['a'], 0)
+    assert_equal(unchanged['a'], 1)
+    unchanged['d'] = 4
+    assert 'd' not in base
+
+    copied = copy(base)
+    assert copied.data is base.data
+    copied |= {'a': 5}
+    assert_equal((base['a'], copied['a']), (0, 5))
+
+    with pytest.raises(ValueError, match=r'border_optimization.+use_smooth_blur'):
+        base.derive(border_optimization=True, use_smooth_blur=True)
+    assert 'border_optimization' not in base
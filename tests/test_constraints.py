@@ -0,0 +1,72 @@
+"""Tests for optimization/constraints.py"""
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.optimization import (
+    BinarizationConstraint,
+    Constraint,
+    Device,
+    VolumeFractionConstraint,
+)
+from vipdopt.optimization.filter import Sigmoid
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'constraint',
+    [VolumeFractionConstraint(0.4), BinarizationConstraint(0.5)],
+)
+@pytest.mark.parametrize(
+    'device',
+    [
+        {
+            'randomize': True,
+            'init_seed': 0,
+            'size': (4, 4, 2),
+            'filters': [Sigmoid(0.5, 1.0)],
+        }
+    ],
+    indirect=True,
+)
+def test_gradient(constraint: Constraint, device: Device):
+    """Compare the constraint gradient to central finite differences."""
+    w0 = np.real(device.get_design_variable()).copy()
+    _, grad = constraint(device)
+
+    h = 1e-6
+    fd = np.zeros_like(w0)
+    for idx in np.ndindex(w0.shape):
+        for sign in (1, -1):
+            w = w0.copy()
+            w[idx] += sign * h
+            device.set_design_variable(w)
+            fd[idx] += sign * constraint(device)[0] / (2 * h)
+    assert_close(grad, fd, err=1e-6)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'device',
+    [{'init_density': 0.25}],
+    indirect=True,
+)
+def test_values(device: Device):
+    assert_close(VolumeFractionConstraint(0.5)(device)[0], -0.25)
+    assert_close(BinarizationConstraint(0.0)(device)[0], -0.5)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('cls', [VolumeFractionConstraint, BinarizationConstraint])
+@pytest.mark.parametrize('val', [-0.1, 1.1])
+def test_bad_bounds(cls: type[Constraint], val: float):
+    with pytest.raises(ValueError, match=r'.* must be in the range \[0, 1\].*'):
+        cls(val)
+
+
+@pytest.mark.smoke()
+def test_equality():
+    assert_equal(VolumeFractionConstraint(0.5), VolumeFractionConstraint(0.5))
+    assert VolumeFractionConstraint(0.5) != VolumeFractionConstraint(0.4)
+    assert VolumeFractionConstraint(0.5) != BinarizationConstraint(0.5)
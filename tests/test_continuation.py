@@ -0,0 +1,171 @@
+"""Tests for optimization/continuation.py"""
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.optimization import (
+    ContinuationSchedule,
+    Device,
+    ParameterRamp,
+    Scale,
+    Sigmoid,
+)
+from vipdopt.optimization.continuation import epoch_progress
+
+EPOCH_LIST = [10, 20, 40]
+
+
+@pytest.fixture()
+def device(default_device_dict: dict) -> Device:
+    return Device(**{
+        **default_device_dict,
+        'size': (4, 3, 2),
+        'randomize': True,
+        'init_seed': 0,
+        'filters': [Sigmoid(0.5, 1.0), Scale((0.0, 1.0))],
+    })
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'iteration, expected',
+    [
+        # Before the first epoch
+        (0, 0.0),
+        (5, 0.0),
+        (10, 0.0),
+        (15, 0.5),
+        (30, 1.5),
+        (40, 2.0),
+        # Past the last epoch
+        (45, 2.0),
+    ],
+)
+def test_epoch_progress(iteration: int, expected: float):
+    assert_close(epoch_progress(iteration, EPOCH_LIST), expected)
+
+
+@pytest.mark.smoke()
+def test_default_schedule(device: Device):
+    """The default schedule matches the previously hardcoded beta doubling."""
+    schedule = ContinuationSchedule.from_config({})
+    assert schedule is not None
+    epoch_list = [0, 16, 32, 48, 64, 80]
+    for iteration in range(epoch_list[-1] + 1):
+        schedule.apply(device, epoch_progress(iteration, epoch_list))
+        old_epoch = np.max(np.where(np.array(epoch_list) <= iteration))
+        assert_close(np.real(device.filters[0].beta), 0.0625 * 2**old_epoch)
+
+
+@pytest.mark.smoke()
+def test_ramps():
+    # Matches the previously hardcoded schedule
+    beta = ParameterRamp('Sigmoid', 'beta', 0.0625, rate=2.0)
+    assert_close([beta.value(t) for t in (0, 1.5, 3)], [0.0625, 0.125, 0.5])
+
+    smooth = ParameterRamp('Sigmoid', 'beta', 1.0, rate=4.0, per_iteration=True)
+    assert_close(smooth.value(0.5), 2.0)
+
+    linear = ParameterRamp('Sigmoid', 'beta', 1.0, 2.0, 'linear', maximum=4.0)
+    assert_close([linear.value(t) for t in (0, 1, 5)], [1.0, 3.0, 4.0])
+
+    steps = ParameterRamp('Sigmoid', 'eta', values=[0.5, 0.4, 0.45], kind='steps')
+    assert_close([steps.value(t) for t in (0, 1.9, 2, 10)], [0.5, 0.4, 0.45, 0.45])
+
+
+@pytest.mark.smoke()
+def test_filter_update():
+    sig = Sigmoid(0.5, 1.0)
+    assert not sig.update(beta=1.0)
+    assert sig.update(beta=8.0, eta=0.4)
+    assert_equal(sig, Sigmoid(0.4, 8.0))
+    assert_close(sig.forward(0.3), Sigmoid(0.4, 8.0).forward(0.3))
+
+    with pytest.raises(ValueError, match=r'Eta must be in the range \[0, 1\]'):
+        sig.update(eta=2.0)
+    with pytest.raises(ValueError, match=r'Unknown parameters \[\'radius\'\]'):
+        sig.update(radius=2.0)
+
+
+@pytest.mark.smoke()
+def test_apply(default_device_dict: dict, mocker):
+    device = Device(**{
+        **default_device_dict,
+        'size': (4, 3, 2),
+        'randomize': True,
+        'init_seed': 0,
+        'filters': [Sigmoid(0.5, 1.0), Sigmoid(0.5, 1.0), Scale((0.0, 1.0))],
+    })
+    schedule = ContinuationSchedule([
+        ParameterRamp('Sigmoid', 'beta', 1.0, rate=2.0),
+        {'filter': 'Sigmoid', 'index': 1, 'parameter': 'eta', 'values': [0.5, 0.4]},
+    ])
+    forwards = [mocker.spy(f, 'forward') for f in device.filters]
+
+    # Nothing changes within an epoch, so nothing is recomputed
+    assert not schedule.apply(device, 0.5)
+    assert_equal([f.call_count for f in forwards], [0, 0, 0])
+
+    assert schedule.apply(device, 2.0)
+    assert_equal(device.filters[0], Sigmoid(0.5, 4.0))
+    assert_equal(device.filters[1], Sigmoid(0.4, 1.0))
+    assert_equal([f.call_count for f in forwards], [1, 1, 1])
+
+    # Only the layers after a changed filter are recomputed
+    first_layer = device.w[..., 1].copy()
+    schedule = ContinuationSchedule([
+        {'filter': 'Sigmoid', 'index': 1, 'parameter': 'beta', 'start': 3.0},
+    ])
+    assert schedule.apply(device, 2.0)
+    assert_equal([f.call_count for f in forwards], [1, 2, 2])
+    assert_close(device.w[..., 1], first_layer)
+    expected = device.pass_through_filters(device.get_design_variable())
+    assert_close(device.get_permittivity(), expected)
+
+
+@pytest.mark.smoke()
+def test_from_config(device: Device):
+    schedule = ContinuationSchedule.from_config({})
+    assert schedule is not None
+    schedule.apply(device, 3.0)
+    assert_equal(device.filters[0], Sigmoid(0.5, 0.5))
+
+    assert ContinuationSchedule.from_config({'filter_schedule': []}) is None
+
+    # Round trip through the config representation
+    assert_equal(ContinuationSchedule(schedule.as_dict()).ramps, schedule.ramps)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'ramps, msg',
+    [
+        ([{'filter': 'Sigmoid', 'parameter': 'beta', 'kind': 'cubic'}], r'kind'),
+        ([{'filter': 'Sigmoid', 'parameter': 'beta'}], r'No start value'),
+        (
+            [{'filter': 'Sigmoid', 'parameter': 'beta', 'start': 1.0, 'rate': 0}],
+            r'positive rate',
+        ),
+        (
+            [
+                {'filter': 'Sigmoid', 'parameter': 'beta', 'start': 1.0},
+                {'filter': 'Sigmoid', 'parameter': 'beta', 'start': 2.0},
+            ],
+            r'more than once',
+        ),
+    ],
+)
+def test_invalid_schedule(ramps: list[dict], msg: str):
+    with pytest.raises(ValueError, match=msg):
+        ContinuationSchedule(ramps)
+
+
+@pytest.mark.smoke()
+def test_missing_filter(device: Device):
+    schedule = ContinuationSchedule([
+        {'filter': 'Sigmoid', 'parameter': 'beta', 'start': 1.0, 'index': 1},
+    ])
+    with pytest.raises(ValueError, match=r'has 1 Sigmoid filter'):
+        schedule.apply(device, 0.0)
+    assert_close(np.real(device.filters[0].beta), 1.0)
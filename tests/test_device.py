@@ -205,10 +205,17 @@ def test_pass_through_filters():
 
 
 @pytest.mark.smoke()
-def test_save_load(tmpdir, device_dict):
+@pytest.mark.parametrize('fname', ['device', 'device.zip', 'legacy.npy'])
+def test_save_load(tmpdir, device_dict, fname: str):
     dev1 = Device.from_source(device_dict)
-    p = tmpdir / 'device.npy'
-    dev1.save(p)
+    p = tmpdir / fname
+    if fname.endswith('.npy'):
+        # Devices saved before snapshots were a pickled dictionary and the design
+        with p.open('wb') as f:
+            np.save(f, dev1.as_dict())
+            np.save(f, dev1.get_design_variable())
+    else:
+        dev1.save(p)
 
     dev2 = Device.from_source(p)
 
@@ -223,3 +230,18 @@ def test_save_load(tmpdir, device_dict):
         assert_close(dev2.__getattribute__(attr), dev1.__getattribute__(attr))
         assert_close(dev3.__getattribute__(attr), dev1.__getattribute__(attr))
         assert_close(dev4.__getattribute__(attr), dev1.__getattribute__(attr))
+
+
+@pytest.mark.smoke()
+def test_interpolate_gradient_cropped_coords():
+    coords = {ax: np.linspace(0, 1, 5) for ax in 'xyz'}
+    device = Device((5, 5, 5), (0, 1), coords)
+
+    # Gradient sampled on a larger (padded) grid than the device, linear in x
+    field_coords = {ax: 1e-6 * np.linspace(-0.5, 1.5, 9) for ax in 'xyz'}
+    xx, _, _ = np.meshgrid(*field_coords.values(), indexing='ij')
+    g = 1e6 * xx
+
+    interpolated = device.interpolate_gradient(g, coords=field_coords)
+    expected = np.broadcast_to(coords['x'][:, None, None], (5, 5, 5))
+    assert_close(interpolated, expected)
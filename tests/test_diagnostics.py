@@ -0,0 +1,184 @@
+"""Tests for diagnostics.py"""
+
+import json
+import logging
+
+import numpy as np
+import pytest
+
+import vipdopt
+from testing import assert_close, assert_equal
+from vipdopt.diagnostics import (
+    DASHBOARD_STAGES,
+    DIAGNOSTIC,
+    DashboardFeed,
+    FeedReader,
+    JSONLinesSink,
+    MetricsStream,
+    abs_stats,
+    component_abs_mean,
+)
+
+
+@pytest.mark.smoke()
+def test_lazy_record(mocker):
+    mocker.patch.object(vipdopt, 'logger', logging.getLogger('test_diagnostics'))
+    vipdopt.logger.setLevel(logging.DEBUG)
+    stream = MetricsStream()
+    stat = mocker.Mock(return_value=1.0)
+
+    # Nobody is listening, so the statistic must not be computed
+    stream.record('stage', value=stat)
+    stat.assert_not_called()
+
+    records = []
+    stream.add_sink(lambda stage, stats: records.append((stage, stats)))
+    stream.record('stage', value=stat, iteration=3)
+    stat.assert_called_once()
+    assert_equal(records, [('stage', {'value': 1.0, 'iteration': 3})])
+
+    # Enabling the diagnostic log level also triggers computation
+    stream.remove_sink(stream._sinks[0])  # noqa: SLF001
+    vipdopt.logger.setLevel(DIAGNOSTIC)
+    stream.record('stage', value=stat)
+    assert_equal(stat.call_count, 2)
+
+
+@pytest.mark.smoke()
+def test_stage_filter(mocker):
+    stream = MetricsStream()
+    stat = mocker.Mock(return_value=1.0)
+    records = []
+    stream.add_sink(lambda stage, _stats: records.append(stage), stages=['progress'])
+
+    # Only the stages a sink listens to are computed
+    stream.record('gradient', value=stat)
+    stat.assert_not_called()
+    assert not stream.enabled('gradient')
+    stream.record('progress', value=stat)
+    stat.assert_called_once()
+    assert_equal(records, ['progress'])
+
+    stream.add_sink(lambda stage, _stats: records.append(stage))
+    stream.record('gradient', value=stat)
+    assert_equal(records, ['progress', 'gradient'])
+
+
+@pytest.mark.smoke()
+def test_dashboard_feed(tmp_path):
+    feed = DashboardFeed(tmp_path / 'feed')
+    reader = FeedReader(tmp_path / 'feed')
+    assert_equal(reader.poll(), [])
+
+    design = np.arange(6.0).reshape(2, 3)
+    feed('progress', {'iteration': 0, 'fom': np.float64(0.5), 'design': design})
+    feed('progress', {'iteration': 1, 'fom': 0.75, 'design': 2 * design})
+    records = reader.poll()
+    assert_equal([r['iteration'] for r in records], [0, 1])
+    assert_close(records[0]['fom'], 0.5)
+    # Only the latest image is kept
+    assert_equal(records[0]['design'], tmp_path / 'feed' / 'progress.design.npy')
+    assert_close(np.load(records[1]['design']), 2 * design)
+    assert_equal(reader.poll(), [])
+
+    # Records still being written are left for the next poll
+    with feed.path.open('a') as f:
+        f.write('{"stage": "progress", ')
+    assert_equal(reader.poll(), [])
+    with feed.path.open('a') as f:
+        f.write('"iteration": 2}\n')
+    assert_equal(reader.poll(), [{'stage': 'progress', 'iteration': 2}])
+
+    # A restarted feed is read from the beginning
+    feed = DashboardFeed(tmp_path / 'feed')
+    feed('focal_plane', {'iteration': 0})
+    assert_equal([r['stage'] for r in reader.poll()], ['focal_plane'])
+
+
+@pytest.mark.smoke()
+def test_optimization_feed(
+    tmp_path, default_device_dict: dict, make_optimization, mocker
+):
+    default_device_dict.update({'size': (4, 3, 2), 'randomize': True, 'init_seed': 0})
+    opt = make_optimization(default_device_dict)
+    stream = MetricsStream()
+    mocker.patch('vipdopt.optimization.optimization.metrics', stream)
+    stream.add_sink(DashboardFeed(tmp_path / 'feed'), stages=DASHBOARD_STAGES)
+
+    for key in ('intensity_overall', 'transmission_0', 'transmission_overall'):
+        opt.fom_hist[key].append(np.array([0.25, 0.75]))
+    # Fields of the focal monitor, shaped (3, nx, ny, nz, wavelengths)
+    rng = np.random.default_rng(0)
+    e = rng.normal(size=(3, 5, 4, 1, 2))
+    opt.fom.foms[0][0].fwd_monitors = [mocker.Mock(e=e)]
+    opt._record_progress()  # noqa: SLF001
+
+    progress, focal = FeedReader(tmp_path / 'feed').poll()
+    assert_equal(progress['stage'], 'progress')
+    assert_close(progress['fom'], 0.5)
+    assert_close(progress['transmission'], [0.5])
+    assert_close(
+        np.load(progress['design']), np.mean(opt.device.get_design_variable(), -1)
+    )
+    assert_equal(focal['stage'], 'focal_plane')
+    intensity = np.mean(np.sum(e**2, axis=0), axis=(-2, -1))
+    assert_close(np.load(focal['intensity']), intensity)
+
+
+@pytest.mark.smoke()
+def test_focal_plane_plots(
+    tmp_path, default_device_dict: dict, make_optimization, mocker
+):
+    opt = make_optimization(default_device_dict)
+    opt.cfg = {
+        'simulator_dimension': '3D',
+        'lambda_values_um': np.linspace(0.4, 0.7, 12),
+    }
+    plot = mocker.patch('vipdopt.optimization.optimization.plotter.plot_Enorm_focal_3d')
+    # Uncropped fields of a 2D Z-normal focal monitor, at every other wavelength
+    rng = np.random.default_rng(0)
+    e = rng.normal(size=(3, 5, 4, 1, 6))
+    opt.fom.foms[0][0].fwd_monitors = [
+        mocker.Mock(
+            e=e,
+            coords=None,
+            freq_indices=np.arange(0, 12, 2),
+            properties={'x': 0.0, 'x span': 2e-6, 'y': 1e-6, 'y span': 1e-6},
+        )
+    ]
+    opt._plot_focal_plane(tmp_path)  # noqa: SLF001
+
+    plot.assert_called_once()
+    intensity, x, y, wl, folder, iteration = plot.call_args.args
+    assert_close(intensity, np.sum(e**2, axis=0)[:, :, 0])
+    assert_close(x, np.linspace(-1e-6, 1e-6, 5))
+    assert_close(y, np.linspace(0.5e-6, 1.5e-6, 4))
+    assert_close(wl, np.linspace(0.4, 0.7, 12)[::2] * 1e-6)
+    assert_equal(folder, tmp_path)
+    assert_equal(iteration, opt.iteration)
+    # Only the wavelengths that were saved can be plotted
+    assert_equal(plot.call_args.kwargs['wl_idxs'], None)
+
+
+@pytest.mark.smoke()
+def test_jsonlines_sink(tmp_path):
+    sink = JSONLinesSink(tmp_path / 'metrics.jsonl')
+    sink('a', {'x': np.float64(1.5), 'y': np.arange(3)})
+    sink('b', {'x': 2})
+
+    lines = (tmp_path / 'metrics.jsonl').read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert_equal([r['stage'] for r in records], ['a', 'b'])
+    assert_equal(records[0]['y'], [0, 1, 2])
+
+
+@pytest.mark.smoke()
+def test_statistics():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(3, 4, 5)) + 1j * rng.normal(size=(3, 4, 5))
+
+    assert_close(component_abs_mean(a), [np.mean(np.abs(a[i])) for i in range(3)])
+    stats = abs_stats(a)
+    assert_close(stats['min'], np.min(np.abs(a)))
+    assert_close(stats['max'], np.max(np.abs(a)))
+    assert_close(stats['mean'], np.mean(np.abs(a)))
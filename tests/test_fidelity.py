@@ -0,0 +1,98 @@
+import pytest
+
+from testing.utils import assert_close, assert_equal
+from vipdopt.optimization import Fidelity, FidelitySchedule
+from vipdopt.simulation import LumericalSimObjectType, LumericalSimulation
+
+MESH_SPACING_UM = 0.02
+SIMULATION_TIME_FS = 600
+
+LEVELS = [
+    {'start_epoch': 3},
+    {'start_epoch': 0, 'mesh_spacing_um': 0.06, 'fdtd_simulation_time_fs': 200},
+    {'start_epoch': 1, 'mesh_spacing_um': 0.04},
+]
+
+
+def make_sim() -> LumericalSimulation:
+    sim = LumericalSimulation()
+    sim.new_object(
+        'FDTD',
+        LumericalSimObjectType.FDTD,
+        **{'simulation time': SIMULATION_TIME_FS * 1e-15},
+    )
+    sim.new_object(
+        'design_mesh',
+        LumericalSimObjectType.MESH,
+        dx=MESH_SPACING_UM * 1e-6,
+        dy=MESH_SPACING_UM * 1e-6,
+        dz=MESH_SPACING_UM * 1e-6,
+    )
+    # A finer mesh that only overrides one axis
+    sim.new_object('mesh_sidewall_0', LumericalSimObjectType.MESH, dx=0.5e-8)
+    return sim
+
+
+@pytest.mark.smoke()
+def test_levels():
+    schedule = FidelitySchedule(LEVELS, MESH_SPACING_UM, SIMULATION_TIME_FS)
+
+    assert_equal([level.start_epoch for level in schedule.levels], [0, 1, 3])
+    assert_equal(schedule.level(0), Fidelity(0, 0.06, 200))
+    assert_equal(schedule.level(2), Fidelity(1, 0.04))
+    assert_equal(schedule.level(5), Fidelity(3))
+
+    # Epochs before the first level run at the config's fidelity
+    late_start = FidelitySchedule([Fidelity(2, 0.06)], MESH_SPACING_UM, 600)
+    assert_equal(late_start.level(1), Fidelity(0))
+
+
+@pytest.mark.smoke()
+def test_apply():
+    sim = make_sim()
+    schedule = FidelitySchedule(LEVELS, MESH_SPACING_UM, SIMULATION_TIME_FS)
+
+    schedule.apply(sim, 0)
+    assert_close(sim.objects['design_mesh']['dx'], 0.06e-6)
+    assert_close(sim.objects['design_mesh']['dz'], 0.06e-6)
+    assert_close(sim.objects['mesh_sidewall_0']['dx'], 1.5e-8)
+    assert 'dy' not in sim.objects['mesh_sidewall_0'].properties
+    assert_close(sim.objects['FDTD']['simulation time'], 200e-15)
+
+    # Changes are relative to the original simulation, not the previous level
+    schedule.apply(sim, 1)
+    assert_close(sim.objects['design_mesh']['dy'], 0.04e-6)
+    assert_close(sim.objects['FDTD']['simulation time'], SIMULATION_TIME_FS * 1e-15)
+    schedule.apply(sim, 1)
+    assert_close(sim.objects['design_mesh']['dy'], 0.04e-6)
+
+    schedule.apply(sim, 4)
+    assert_equal(sim, make_sim())
+
+
+@pytest.mark.smoke()
+def test_from_config():
+    cfg = {
+        'mesh_spacing_um': MESH_SPACING_UM,
+        'fdtd_simulation_time_fs': SIMULATION_TIME_FS,
+    }
+    assert FidelitySchedule.from_config(cfg) is None
+
+    schedule = FidelitySchedule.from_config({**cfg, 'fidelity_schedule': LEVELS})
+    assert schedule is not None
+    assert_equal(len(schedule.levels), len(LEVELS))
+    assert_equal(schedule.mesh_spacing_um, MESH_SPACING_UM)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'levels, msg',
+    [
+        ([{'start_epoch': -1}], r'must be non-negative'),
+        ([{'start_epoch': 0, 'mesh_spacing_um': 0}], r'Mesh spacing must be positive'),
+        ([{'start_epoch': 1}, {'start_epoch': 1}], r'distinct epochs'),
+    ],
+)
+def test_invalid_levels(levels, msg: str):
+    with pytest.raises(ValueError, match=msg):
+        FidelitySchedule(levels, MESH_SPACING_UM, SIMULATION_TIME_FS)
@@ -225,3 +225,69 @@ def test_unique_source_map():
 
     for i, combo in enumerate(combos):
         assert_equal(sim_map[frozenset(combo)], [foms[i][0]])
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'fom',
+    [
+        BASE_FOM,
+        2 * (BASE_FOM + 2 * BASE_FOM) + 3 * (BASE_FOM * BASE_FOM),
+        (BASE_FOM * BASE_FOM) * BASE_FOM,
+        1 + BASE_FOM,
+        SuperFoM([(BASE_FOM,)] * 4, np.linspace(0.0, 1.0, num=4)),
+    ],
+)
+def test_evaluate(fom: SuperFoM):
+    results = fom.evaluate(fom_args=(INPUT_ARRAY,), grad_args=(INPUT_ARRAY,))
+
+    assert_close(results['fom'], fom.compute_fom(INPUT_ARRAY))
+    assert_close(results['grad'], fom.compute_grad(INPUT_ARRAY))
+    assert_equal(results['foms'].shape, (len(fom.foms),))
+    assert_equal(results['grads'].shape, (len(fom.foms), *INPUT_ARRAY.shape))
+
+
+@pytest.mark.smoke()
+def test_evaluate_calls_once(mocker):
+    fom_spy = mocker.Mock(side_effect=lambda x, **kwargs: np.square(x))
+    grad_spy = mocker.Mock(side_effect=gradient_func)
+    fom = FoM('TE', [], [], [], [], fom_spy, grad_spy, [0, 1, 2], [], [0, 1, 2])
+    combined = 2 * fom + fom * fom
+
+    results = combined.evaluate(
+        fom_args=(INPUT_ARRAY,),
+        grad_args=(INPUT_ARRAY,),
+        quantities=('transmission',),
+    )
+
+    # One call for the value and one for each extra quantity; one gradient call
+    assert_equal(fom_spy.call_count, 2)
+    assert_equal(fom_spy.call_args.kwargs, {'type': 'transmission'})
+    assert_equal(grad_spy.call_count, 1)
+    # Products of FoMs report the quantities of their first FoM
+    assert_close(
+        results['quantities']['transmission'],
+        np.array([SQUARED_ARRAY, SQUARED_ARRAY]),
+    )
+    assert_close(results['fom'], 2 * SQUARE_SUM + SQUARE_SUM**2)
+
+
+@pytest.mark.smoke()
+def test_evaluate_group_quantities(mocker):
+    first_spy = mocker.Mock(side_effect=lambda x, **kwargs: np.square(x))
+    second_spy = mocker.Mock(side_effect=lambda x, **kwargs: np.ones_like(x))
+    first, second = (
+        FoM('TE', [], [], [], [], spy, gradient_func, [0, 1, 2], [], [0, 1, 2])
+        for spy in (first_spy, second_spy)
+    )
+
+    results = (first * second).evaluate(
+        fom_args=(INPUT_ARRAY,),
+        grad_args=(INPUT_ARRAY,),
+        quantities=('transmission',),
+    )
+
+    # The group reports the first FoM's transmission, not the product of both
+    assert_close(results['quantities']['transmission'], np.array([SQUARED_ARRAY]))
+    assert_equal(first_spy.call_count, 2)
+    assert_equal(second_spy.call_count, 1)
@@ -4,16 +4,25 @@
 import pytest
 from jax import grad, jit, vmap
 
-from testing import assert_close, assert_greater_than, assert_less_than
+from testing import (
+    assert_close,
+    assert_equal,
+    assert_greater_than,
+    assert_less_than,
+)
 from vipdopt.optimization import (
     AdamOptimizer,
     Device,
     FoM,
     GaussianFoM,
     GradientAscentOptimizer,
+    LBFGSOptimizer,
+    MMAOptimizer,
     UniformMAEFoM,
     UniformMSEFoM,
+    VolumeFractionConstraint,
 )
+from vipdopt.optimization.filter import Sigmoid
 
 DEVICE_SIZE = 25 * 25 * 5
 
@@ -180,3 +189,140 @@ def fom(x: npt.NDArray):
 
     assert_greater_than(f, 0.70 * DEVICE_SIZE)  # FoM is getting close to 1 everywhere
     assert_close(w.mean(), 1.0)
+
+
+@pytest.mark.parametrize(
+    'device',
+    [
+        {'randomize': True, 'init_seed': 0},
+        {'init_density': 1.0},
+    ],
+    indirect=True,
+)
+def test_lbfgs_gaussianfom(device: Device):
+    """Quasi-Newton steps should converge in far fewer iterations."""
+    fom = GaussianFoM(range(5), [], range(5), 25, 5)
+    opt = LBFGSOptimizer(max_change=0.1)
+
+    for i in range(50):
+        g = fom.compute_grad(device.get_design_variable())
+        opt.step(device, g, i)
+
+    f = fom.compute_fom(device.get_design_variable())
+    assert_close(f, 1.0 * DEVICE_SIZE)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'device',
+    [{'randomize': True, 'init_seed': 0}],
+    indirect=True,
+)
+def test_lbfgs_state(device: Device):
+    """Restoring the optimizer state should reproduce the same steps."""
+    fom = GaussianFoM(range(5), [], range(5), 25, 5)
+    opt = LBFGSOptimizer(max_change=0.1, history_size=3)
+    for i in range(5):
+        opt.step(device, fom.compute_grad(device.get_design_variable()), i)
+    assert len(opt.s_history) <= opt.history_size
+
+    restored = LBFGSOptimizer(**opt.state_dict())
+    w = device.get_design_variable().copy()
+    opt.step(device, fom.compute_grad(device.get_design_variable()), 5)
+    expected = device.get_design_variable().copy()
+
+    device.set_design_variable(w)
+    restored.step(device, fom.compute_grad(device.get_design_variable()), 5)
+    assert_close(device.get_design_variable(), expected)
+
+    # The first step is a gradient step with a change of exactly max_change
+    opt.reset()
+    opt.step(device, fom.compute_grad(device.get_design_variable()), 0)
+    assert_close(np.max(np.abs(device.get_design_variable() - expected)), 0.1)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'device',
+    [{'randomize': True, 'init_seed': 0}],
+    indirect=True,
+)
+def test_mma_gaussianfom(device: Device):
+    """Without constraints MMA should converge to the unconstrained optimum."""
+    fom = GaussianFoM(range(5), [], range(5), 25, 5)
+    opt = MMAOptimizer()
+
+    for i in range(50):
+        g = fom.compute_grad(device.get_design_variable())
+        opt.step(device, g, i)
+
+    f = fom.compute_fom(device.get_design_variable())
+    assert_close(f, 1.0 * DEVICE_SIZE, err=0.5)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'device',
+    [{'randomize': True, 'init_seed': 0, 'filters': [Sigmoid(0.5, 1.0)]}],
+    indirect=True,
+)
+def test_mma_volume_constraint(device: Device):
+    """Maximizing the density should stop at the volume fraction constraint."""
+    fom = UniformMAEFoM(range(5), [], range(5), 1.0)
+    opt = MMAOptimizer(
+        constraints=[
+            {'type': 'VolumeFractionConstraint', 'parameters': {'max_fraction': 0.3}}
+        ]
+    )
+    assert_equal(opt.constraints, [VolumeFractionConstraint(0.3)])
+
+    for i in range(30):
+        opt.step(device, fom.compute_grad(device.get_density()), i)
+    assert_close(np.mean(device.get_density()), 0.3)
+
+    # Restoring the optimizer state should reproduce the same step
+    restored = MMAOptimizer(**opt.state_dict())
+    w = device.get_design_variable().copy()
+    opt.step(device, fom.compute_grad(device.get_density()), 30)
+    expected = device.get_design_variable().copy()
+    device.set_design_variable(w)
+    restored.step(device, fom.compute_grad(device.get_density()), 30)
+    assert_close(device.get_design_variable(), expected)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('moments_dtype', ['float64', 'float32'])
+@pytest.mark.parametrize(
+    'device',
+    [{'randomize': True, 'init_seed': 0}],
+    indirect=True,
+)
+def test_adam_in_place(moments_dtype: str, device: Device):
+    """The in-place Adam update should match the textbook algorithm."""
+    opt = AdamOptimizer(step_size=1e-2, moments_dtype=moments_dtype)
+    b1, b2 = opt.betas
+    rng = np.random.default_rng(0)
+    w = np.real(device.get_design_variable()).copy()
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+
+    for i in range(5):
+        g = rng.normal(size=w.shape)
+        opt.step(device, g, i)
+        if i == 0:
+            buffer = opt.moments
+        m = b1 * m + (1 - b1) * g
+        v = b2 * v + (1 - b2) * g**2
+        m_hat = m / (1 - b1 ** (i + 1))
+        v_hat = v / (1 - b2 ** (i + 1))
+        w = np.clip(w + opt.step_size * m_hat / np.sqrt(v_hat + opt.eps), 0, 1)
+        assert_close(np.real(device.get_design_variable()), w, err=1e-5)
+
+    # The moments are updated in place rather than reallocated
+    assert opt.moments is buffer
+    assert_equal(opt.moments.dtype, np.dtype(moments_dtype))
+    assert_close(opt.moments[1], v, err=1e-5)
+
+    restored = AdamOptimizer(**opt.state_dict())
+    assert_equal(restored.moments, opt.moments)
+    assert_equal(AdamOptimizer(moments=(0.0, 0.0)).moments, None)
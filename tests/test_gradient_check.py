@@ -0,0 +1,153 @@
+"""Tests for optimization/gradient_check.py"""
+
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.configuration import Config
+from vipdopt.optimization import (
+    Sigmoid,
+    SpectralSampler,
+    UniformMAEFoM,
+    select_voxels,
+    verify_gradient,
+)
+from vipdopt.optimization.gradient_check import fom_objective, format_gradient_check
+
+# Objective sum(c * density**2) standing in for the simulated FoM
+WEIGHTS = np.linspace(0.5, 2.0, 4)[:, np.newaxis, np.newaxis]
+
+
+def _density_jobs(opt) -> Callable:
+    """Return a `_create_jobs` whose jobs remember the density they were made with."""
+
+    def create_jobs(fom, suffix='', adjoint=True):
+        fom.density = opt.device.get_density().copy()
+        return [f'sim{suffix}_fwd'] + ([f'sim{suffix}_adj'] if adjoint else [])
+
+    return create_jobs
+
+
+@pytest.mark.smoke()
+def test_select_voxels():
+    voxels = select_voxels((4, 5, 6), 10, seed=0)
+    assert_equal(voxels.shape, (10, 3))
+    assert_equal(len({tuple(v) for v in voxels}), 10)
+    assert np.all(voxels < (4, 5, 6))
+    assert_equal(select_voxels((4, 5, 6), 10, seed=0), voxels)
+
+    # Can't choose more voxels than there are
+    assert_equal(select_voxels((2, 2), 10).shape, (4, 2))
+
+
+@pytest.mark.smoke()
+def test_fom_objective():
+    fom = UniformMAEFoM(range(3), [], range(3), 0.5)
+    x = np.full((2, 3), 0.25)
+    assert_close(fom_objective(fom, (x,)), np.sum(fom.compute_fom(x, reduce=False)))
+    assert_close(
+        fom_objective(2 * fom, (x,), max_intensity=4.0), fom_objective(fom, (x,)) / 2
+    )
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'sign, expected_error, num_samples', [(1, 0.0, None), (-1, 2.0, None), (1, 0.0, 2)]
+)
+def test_verify_gradient(
+    default_device_dict: dict,
+    make_optimization,
+    mock_jobs,
+    mocker,
+    sign: int,
+    expected_error: float,
+    num_samples: int | None,
+):
+    device_dict = {
+        **default_device_dict,
+        'size': (4, 3, 2),
+        'randomize': True,
+        'init_seed': 0,
+        'filters': [Sigmoid(0.5, 1.0)],
+    }
+    opt = make_optimization(device_dict)
+    sampler = None if num_samples is None else SpectralSampler(num_samples)
+    opt.spectral_sampler = sampler
+    run_jobs = mock_jobs(opt, _density_jobs(opt))['run_jobs']
+    mocker.patch(
+        'vipdopt.optimization.gradient_check.fom_objective',
+        side_effect=lambda fom, *_args: np.sum(WEIGHTS * np.real(fom.density) ** 2),
+    )
+    # The gradient with respect to the density; deliberately wrong if sign < 0.
+    # Subsampling the spectrum would only estimate it.
+    mocker.patch.object(
+        opt,
+        '_evaluate',
+        side_effect=lambda _fom, device, **_kwargs: (
+            {},
+            (0.5 if opt._spectral_sample() is not None else 1.0)  # noqa: SLF001
+            * sign
+            * 2
+            * WEIGHTS
+            * np.real(device.get_density()),
+        ),
+    )
+    design = opt.device.get_design_variable().copy()
+
+    voxels = [(0, 0, 0), (3, 1, 1), (1, 2, 0)]
+    check = verify_gradient(opt, voxels, step=1e-5)
+
+    # The nominal and all perturbed simulations run in a single batch
+    run_jobs.assert_called_once_with([
+        'sim_fwd',
+        'sim_adj',
+        'sim_fd0p_fwd',
+        'sim_fd0m_fwd',
+        'sim_fd1p_fwd',
+        'sim_fd1m_fwd',
+        'sim_fd2p_fwd',
+        'sim_fd2m_fwd',
+    ])
+    assert_equal(opt.device.get_design_variable(), design)
+    assert opt.spectral_sampler is sampler
+
+    assert_equal(check['voxels'], voxels)
+    assert_close(check['adjoint'], sign * check['finite_difference'], err=1e-6)
+    assert_close(check['relative_error'], np.full(3, expected_error), err=1e-4)
+    assert 'Relative error norm' in format_gradient_check(check)
+
+
+@pytest.mark.smoke()
+def test_verify_gradient_symmetry(
+    default_device_dict: dict, make_optimization, mock_jobs, mocker
+):
+    device_dict = {
+        **default_device_dict,
+        'size': (3, 3, 2),
+        'randomize': True,
+        'init_seed': 0,
+        'filters': [Sigmoid(0.5, 1.0)],
+    }
+    opt = make_optimization(device_dict)
+    opt.cfg = Config({
+        'enforce_xy_gradient_symmetry': True,
+        'simulator_dimension': '3D',
+    })
+    mock_jobs(opt, _density_jobs(opt))
+    # Varies along x only, so making the gradient xy-symmetric changes it
+    weights = WEIGHTS[:3]
+    mocker.patch(
+        'vipdopt.optimization.gradient_check.fom_objective',
+        side_effect=lambda fom, *_args: np.sum(weights * np.real(fom.density) ** 2),
+    )
+
+    def evaluate(_fom, device, symmetrize=True, **_kwargs):
+        g = 2 * weights * np.real(device.get_density())
+        return {}, opt._symmetrize_gradient(g) if symmetrize else g  # noqa: SLF001
+
+    mocker.patch.object(opt, '_evaluate', side_effect=evaluate)
+
+    check = verify_gradient(opt, [(0, 1, 0), (2, 0, 1)], step=1e-5)
+    assert_close(check['adjoint'], check['finite_difference'], err=1e-6)
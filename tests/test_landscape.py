@@ -0,0 +1,118 @@
+"""Tests for optimization/landscape.py"""
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.optimization import LossLandscapeMapper, LumericalOptimization
+from vipdopt.optimization.landscape import (
+    design_hash,
+    landscape_directions,
+    load_landscape,
+)
+
+SHAPE = (4, 3, 2)
+
+
+@pytest.fixture()
+def optimization(
+    default_device_dict: dict, make_optimization, mock_jobs, mocker
+) -> LumericalOptimization:
+    opt = make_optimization({**default_device_dict, 'size': SHAPE})
+
+    # Each set of jobs remembers the design it was created with
+    def create_jobs(fom, suffix='', adjoint=True):
+        fom.design = np.real(opt.device.get_design_variable()).copy()
+        return [f'sim{suffix}']
+
+    mock_jobs(opt, create_jobs)
+    mocker.patch(
+        'vipdopt.optimization.landscape.fom_objective',
+        side_effect=lambda fom, *_args: float(np.sum(fom.design)),
+    )
+    return opt
+
+
+@pytest.mark.smoke()
+def test_directions():
+    gradient = np.arange(np.prod(SHAPE)).reshape(SHAPE) - 5.0
+    directions = landscape_directions(gradient, SHAPE, num_random=2, seed=0)
+
+    assert_equal(directions.shape, (3, *SHAPE))
+    assert_close(np.max(np.abs(directions), axis=(1, 2, 3)), np.ones(3))
+    assert_close(directions[0], gradient / np.max(np.abs(gradient)))
+    flat = directions.reshape(3, -1)
+    gram = flat @ flat.T
+    assert_close(gram - np.diag(np.diag(gram)), np.zeros((3, 3)), err=1e-9)
+
+    with pytest.raises(ValueError, match=r'zero gradient'):
+        landscape_directions(np.zeros(SHAPE), SHAPE, num_random=0)
+
+
+@pytest.mark.smoke()
+def test_design_hash():
+    w = np.ones(SHAPE)
+    assert_equal(design_hash(w), design_hash(w.copy()))
+    assert design_hash(w) != design_hash(w.reshape(6, 4))
+    w2 = w.copy()
+    w2[0, 0, 0] += 1e-12
+    assert design_hash(w) != design_hash(w2)
+    assert design_hash(w, 0) != design_hash(w, 1)
+
+
+@pytest.mark.smoke()
+def test_map(optimization: LumericalOptimization, tmp_path):
+    run_jobs = optimization._run_jobs  # noqa: SLF001
+    directions = np.zeros((2, *SHAPE))
+    directions[0, 0, 0, 0] = 1.0
+    directions[1, 1, 0, 0] = 1.0
+    offsets = [np.linspace(-0.2, 0.2, 3), np.linspace(-0.1, 0.1, 5)]
+    mapper = LossLandscapeMapper(optimization, directions, offsets, batch_size=4)
+    design = optimization.device.get_design_variable().copy()
+
+    streamed = []
+    values = mapper.map(on_result=lambda index, _value: streamed.append(index))
+
+    # The design is 0.5 everywhere, and the sum changes by the offsets
+    nominal = 0.5 * np.prod(SHAPE)
+    expected = nominal + offsets[0][:, np.newaxis] + offsets[1][np.newaxis, :]
+    assert_close(values, expected)
+    assert_equal(run_jobs.call_count, 4)  # 15 points in batches of 4
+    assert_equal(sorted(streamed), mapper.grid_points())
+    assert_equal(optimization.device.get_design_variable(), design)
+
+    # Every design is cached, so mapping again runs no simulations
+    other = LossLandscapeMapper(
+        optimization, directions[::-1], offsets[::-1], cache=mapper.cache
+    )
+    assert_close(other.map(), expected.T)
+    assert_equal(run_jobs.call_count, 4)
+
+    # Cached values are not reused once the optimization has moved on
+    optimization.iteration += 1
+    LossLandscapeMapper(optimization, directions, offsets, cache=mapper.cache).map()
+    assert_equal(run_jobs.call_count, 5)
+
+    mapper.save(tmp_path / 'landscape.npz')
+    loaded, loaded_offsets = load_landscape(tmp_path / 'landscape.npz')
+    assert_close(loaded, expected)
+    assert_close(loaded_offsets[1], offsets[1])
+
+
+@pytest.mark.smoke()
+def test_around(optimization: LumericalOptimization):
+    gradient = np.ones(SHAPE)
+    mapper = LossLandscapeMapper.around(
+        optimization, gradient, [np.linspace(-0.5, 0.5, 3)] * 2, seed=1
+    )
+    assert_equal(mapper.directions.shape, (2, *SHAPE))
+    assert_equal(mapper.values.shape, (3, 3))
+    assert_close(mapper.directions[0], gradient)
+
+    # Designs are clipped to the device's bounds
+    values = mapper.map()
+    assert_close(values[2, 1], np.prod(SHAPE))
+    assert_close(values[0, 1], 0.0)
+
+    with pytest.raises(ValueError, match=r'Expected offsets for 2 directions'):
+        LossLandscapeMapper(optimization, mapper.directions, [[0.0]])
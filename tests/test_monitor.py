@@ -1,10 +1,12 @@
+import numpy as np
 import pytest
 
-from testing.utils import assert_close
+from testing.utils import assert_close, assert_equal
 from tests.conftest import MONITOR_DATA_DIR
 
 # from vipdopt.optimization import FoM, SuperFoM
-from vipdopt.simulation import Power
+from vipdopt.simulation import Monitor, Power
+from vipdopt.simulation.monitor import MonitorDataCache
 
 
 def test_load(focal_monitor_efield, transmission_monitor_t):
@@ -38,3 +40,90 @@ def test_reset(mocker, focal_monitor_efield):
 
     m.reset()
     assert m._e is None  # Data should no longer be in memory  # noqa: SLF001
+
+
+def test_cropped_coords(tmp_path, focal_monitor_efield):
+    m = Power('focal_monitor_0')
+    m.set_source(MONITOR_DATA_DIR / 'sim_focal_monitor_0.npz')
+    assert m.coords is None  # Not cropped, so no axes were saved
+
+    data = dict(
+        np.load(MONITOR_DATA_DIR / 'sim_focal_monitor_0.npz', allow_pickle=True)
+    )
+    shape = focal_monitor_efield.shape
+    axes = {
+        ax: np.linspace(0, 1e-6, n) for ax, n in zip('xyz', shape[1:4], strict=True)
+    }
+    src = tmp_path / 'cropped_monitor.npz'
+    np.savez(src, **data, **axes)
+
+    m.set_source(src)
+    for ax in 'xyz':
+        assert_close(m.coords[ax], axes[ax])
+
+
+def test_cropped_freqs(tmp_path, focal_monitor_efield):
+    m = Power('focal_monitor_0')
+    m.set_source(MONITOR_DATA_DIR / 'sim_focal_monitor_0.npz')
+    nfreqs = focal_monitor_efield.shape[-1]
+    assert m.freq_indices is None  # Every frequency was saved
+    assert_equal(m.spectral_positions(range(nfreqs)), slice(None))
+    assert_equal(m.spectral_positions([0, 2]), [0, 2])
+
+    data = dict(
+        np.load(MONITOR_DATA_DIR / 'sim_focal_monitor_0.npz', allow_pickle=True)
+    )
+    saved = np.array([0, 2])
+    data['e'] = data['e'][..., saved]
+    src = tmp_path / 'cropped_monitor.npz'
+    np.savez(src, **data, freq_indices=saved)
+
+    m.set_source(src)
+    assert_equal(m.freq_indices, saved)
+    assert_equal(m.spectral_positions([2]), [1])
+    assert_equal(m.spectral_positions(saved), slice(None))
+    assert_close(m.e[..., m.spectral_positions([2])], focal_monitor_efield[..., [2]])
+    with pytest.raises(ValueError, match=r'were not saved'):
+        m.spectral_positions([1])
+
+
+def test_cache_shared(mocker, focal_monitor_efield):
+    cache = MonitorDataCache()
+    mocker.patch.object(Monitor, 'cache', cache)
+    src = MONITOR_DATA_DIR / 'sim_focal_monitor_0.npz'
+
+    monitors = [Power('focal_monitor_0', src) for _ in range(3)]
+    for m in monitors:
+        assert_close(m.e, focal_monitor_efield)
+    # File was only read once; other monitors were served from memory
+    assert_equal(cache.misses, 1)
+    assert_equal(cache.hits, 2)
+
+    # Data persists within an iteration...
+    cache.set_iteration(0)
+    _ = monitors[0].e
+    cache.set_iteration(0)
+    assert monitors[0]._e is not None  # noqa: SLF001
+
+    # ...but a new iteration invalidates it everywhere
+    cache.set_iteration(1)
+    assert len(cache) == 0
+    assert all(m._e is None for m in monitors)  # noqa: SLF001
+
+
+def test_cache_eviction(mocker):
+    focal_src = MONITOR_DATA_DIR / 'sim_focal_monitor_0.npz'
+    trans_src = MONITOR_DATA_DIR / 'sim_transmission_monitor_0.npz'
+    cache = MonitorDataCache(max_bytes=1)  # Only ever keep the newest file
+    mocker.patch.object(Monitor, 'cache', cache)
+
+    focal = Power('focal_monitor_0', focal_src)
+    trans = Power('transmission_monitor_0', trans_src)
+    _ = focal.e
+    assert focal_src in cache
+
+    _ = trans.t
+    assert trans_src in cache
+    assert focal_src not in cache
+    assert focal._e is None  # Evicted data is released  # noqa: SLF001
+    assert trans._t is not None  # noqa: SLF001
@@ -0,0 +1,148 @@
+"""Tests for optimization/parameterization.py"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.configuration import Config
+from vipdopt.optimization import (
+    AdamOptimizer,
+    Device,
+    LBFGSOptimizer,
+    Parameterization,
+)
+
+SHAPE = (6, 6, 5)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'kwargs, num_parameters',
+    [
+        ({}, 180),
+        ({'num_layers': 2}, 72),
+        ({'mirror': ['x', 'y']}, 45),
+        ({'num_layers': 2, 'mirror': ['x', 'y']}, 18),
+        ({'diagonal': 'main'}, 105),
+        ({'num_layers': 1, 'diagonal': 'anti', 'mirror': ['x']}, 6),
+        ({'tied_axes': ['z'], 'num_layers': 3, 'vertical_axis': 'y'}, 18),
+    ],
+)
+def test_parameterization(kwargs: dict, num_parameters: int):
+    param = Parameterization(SHAPE, **kwargs)
+    assert_equal(param.num_parameters, num_parameters)
+    assert_equal(param.matrix.shape, (np.prod(SHAPE), num_parameters))
+
+    rng = np.random.default_rng(0)
+    p = rng.normal(size=num_parameters)
+    w = param.expand(p)
+    assert_equal(w.shape, SHAPE)
+    assert_close(param.project(w), p)
+
+    # The gradient is the adjoint of the map
+    g = rng.normal(size=SHAPE)
+    assert_close(np.sum(w * g), p @ param.gradient(g))
+
+    assert_equal(Parameterization.from_dict(param.as_dict(), SHAPE), param)
+
+
+@pytest.mark.smoke()
+def test_constraints():
+    rng = np.random.default_rng(0)
+    param = Parameterization(SHAPE, num_layers=2, mirror=['x', 'y'], diagonal='anti')
+    w = param.expand(rng.normal(size=param.num_parameters))
+    assert_close(w, w[::-1])
+    assert_close(w, w[:, ::-1])
+    assert_close(w, np.flip(w, (0, 1)).transpose(1, 0, 2))
+    # Layers are split as evenly as possible
+    assert_close(w[..., :3], np.repeat(w[..., :1], 3, axis=-1))
+    assert_close(w[..., 3:], np.repeat(w[..., 3:4], 2, axis=-1))
+
+    # Projecting averages the tied voxels
+    w = np.zeros(SHAPE)
+    w[0, 0, 0] = 4.0
+    assert_close(param.expand(param.project(w))[-1, -1, 1], 4.0 / 12)
+
+    with pytest.raises(ValueError, match=r'Cannot tie 6 layers'):
+        Parameterization(SHAPE, num_layers=6)
+    with pytest.raises(ValueError, match=r'square xy-plane'):
+        Parameterization((4, 6, 5), diagonal='main')
+    with pytest.raises(ValueError, match=r'Diagonal symmetry must be one of'):
+        Parameterization(SHAPE, diagonal='x')
+    with pytest.raises(ValueError, match=r"Axes must be one of .* got 'w'"):
+        Parameterization(SHAPE, mirror=['w'])
+
+
+@pytest.mark.smoke()
+def test_from_config():
+    cfg = Config({'num_vertical_layers': 5, 'simulator_dimension': '3D'})
+    assert Parameterization.from_config(cfg, SHAPE) is None
+
+    cfg['tie_vertical_layers'] = True
+    cfg['mirror_symmetry'] = ['x']
+    param = Parameterization.from_config(cfg, SHAPE)
+    assert param is not None
+    assert_equal(param.num_parameters, 3 * 6 * 5)
+
+    cfg['simulator_dimension'] = '2D'
+    param = Parameterization.from_config(cfg, (6, 10, 3))
+    assert param is not None
+    assert_equal(param.as_dict()['tied_axes'], ['z'])
+    assert_equal(param.num_parameters, 3 * 5)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'optimizer', [AdamOptimizer(step_size=0.1), LBFGSOptimizer()]
+)
+def test_device(default_device_dict: dict, tmp_path: Path, optimizer):
+    default_device_dict.update({
+        'size': SHAPE,
+        'coords': {axis: np.arange(n) for axis, n in zip('xyz', SHAPE, strict=True)},
+        'randomize': True,
+        'init_seed': 0,
+        'parameterization': {'num_layers': 5, 'mirror': ['x', 'y']},
+    })
+    device = Device(**default_device_dict)
+    assert isinstance(device.parameterization, Parameterization)
+    w = device.get_design_variable()
+    assert_close(w, w[::-1, ::-1])
+    assert_equal(device.get_parameters().shape, (45,))
+
+    rng = np.random.default_rng(1)
+    for iteration in range(3):
+        optimizer.step(device, rng.normal(size=SHAPE), iteration)
+        # Constraints are enforced by construction
+        w = device.get_design_variable()
+        assert_close(w, w[::-1, ::-1])
+        assert np.all((np.real(w) >= 0) & (np.real(w) <= 1))
+    if isinstance(optimizer, AdamOptimizer):
+        assert_equal(optimizer.moments.shape, (2, 45))
+
+    device.save(tmp_path / 'device')
+    loaded = Device.from_source(tmp_path / 'device')
+    assert_equal(loaded.parameterization, device.parameterization)
+    assert_close(loaded.get_parameters(), device.get_parameters())
+
+    default_device_dict['parameterization'] = Parameterization((6, 6, 4))
+    with pytest.raises(ValueError, match=r'does not match device size'):
+        Device(**default_device_dict)
+
+
+@pytest.mark.smoke()
+def test_gradient(default_device_dict: dict):
+    """The reduced gradient is the sum of the gradient over the tied voxels."""
+    default_device_dict.update({
+        'size': SHAPE,
+        'parameterization': Parameterization(SHAPE, num_layers=1),
+    })
+    device = Device(**default_device_dict)
+    gradient = np.ones(SHAPE)
+    reduced = device.parameter_gradient(gradient)
+    assert_close(reduced, np.full(36, 5.0))
+    assert_close(
+        device.reduce_gradient(device.backpropagate(gradient)).reshape(6, 6),
+        np.sum(device.backpropagate(gradient), axis=-1),
+    )
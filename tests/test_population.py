@@ -0,0 +1,101 @@
+"""Tests for optimization/population.py"""
+
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from testing import assert_equal
+from vipdopt.optimization import Device, PopulationOptimization
+
+
+@pytest.fixture()
+def make_population(make_optimization) -> Callable[..., PopulationOptimization]:
+    """Return a function creating population optimizations of a device."""
+
+    def _make_population(device_dict: dict, **kwargs) -> PopulationOptimization:
+        return make_optimization(
+            device_dict,
+            optimization_type=PopulationOptimization,
+            epoch_list=[2, 4, 6],
+            **kwargs,
+        )
+
+    return _make_population
+
+
+@pytest.mark.smoke()
+def test_members(default_device_dict: dict, make_population):
+    opt = make_population(
+        default_device_dict,
+        population_size=3,
+        seeds=[0, 1, None],
+        init_densities=[0.5, 0.5, 0.3],
+    )
+    devices = [member.device for member in opt.members]
+    assert opt.device is devices[0]
+    assert devices[0] is not devices[1]
+    assert opt.members[0].optimizer is not opt.members[1].optimizer
+    assert opt.members[0].fom is not opt.members[1].fom
+
+    assert not np.array_equal(devices[0].w, devices[1].w)
+    assert_equal(
+        devices[0], Device(**{**default_device_dict, 'randomize': True, 'init_seed': 0})
+    )
+    assert_equal(
+        np.real(devices[2].get_design_variable()), np.full(devices[2].size, 0.3)
+    )
+
+    with pytest.raises(ValueError, match=r'Expected 3 seeds and initial densities.*'):
+        make_population(default_device_dict, population_size=3, seeds=[0])
+
+
+@pytest.mark.smoke()
+def test_batched_step(default_device_dict: dict, make_population, mock_jobs, mocker):
+    opt = make_population(default_device_dict, population_size=3)
+    mocks = mock_jobs(opt, lambda _fom, suffix: [f'sim{suffix}'])
+    foms = {id(m.fom): 1.0 + m.index for m in opt.members}
+    mocker.patch.object(
+        opt,
+        '_evaluate',
+        side_effect=lambda fom, device: (
+            {'fom': np.array([foms[id(fom)]]), 'quantities': {'transmission': [[1.0]]}},
+            np.ones(device.size),
+        ),
+    )
+    designs = [m.device.get_design_variable().copy() for m in opt.members]
+
+    opt._optimization_step()  # noqa: SLF001
+
+    # All simulations are run and extracted as one batch
+    mocks['run_jobs'].assert_called_once_with(['sim_m0', 'sim_m1', 'sim_m2'])
+    mocks['extract_monitor_data'].assert_called_once_with(
+        ['sim_m0', 'sim_m1', 'sim_m2']
+    )
+    for member, design in zip(opt.members, designs, strict=True):
+        assert not np.array_equal(member.device.get_design_variable(), design)
+
+    # The best member leads
+    assert opt.device is opt.members[2].device
+    assert_equal(opt.param_hist['population_fom'], [np.array([1.0, 2.0, 3.0])])
+
+    # Only the best members survive to the next epoch
+    opt._start_epoch(1)  # noqa: SLF001
+    assert_equal([m.index for m in opt.members], [2, 1])
+    assert opt.device is opt.members[0].device
+
+
+@pytest.mark.smoke()
+def test_state(default_device_dict: dict, make_population):
+    opt = make_population(default_device_dict, population_size=4)
+    for member in opt.members:
+        member.fom_value = float(member.index)
+    opt.select_survivors()
+    state = opt.state_dict()
+
+    restored = make_population(default_device_dict, population_size=4)
+    restored.load_state_dict(state)
+    assert_equal([m.index for m in restored.members], [3, 2])
+    assert_equal([m.fom_value for m in restored.members], [3.0, 2.0])
+    assert_equal(restored.device.w, opt.device.w)
+    assert restored.device is restored.members[0].device
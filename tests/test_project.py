@@ -1,10 +1,30 @@
 """Tests for project.py"""
 
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
 import pytest
 
 from testing import assert_equal
-from vipdopt.optimization import Device, FoM
+from vipdopt.configuration import Config
+from vipdopt.optimization import (
+    AdamOptimizer,
+    BinarizationConstraint,
+    Device,
+    FoM,
+    GradientOptimizer,
+    LumericalOptimization,
+    MMAOptimizer,
+    VolumeFractionConstraint,
+)
+from vipdopt.optimization.filter import Sigmoid
 from vipdopt.project import Project
+from vipdopt.snapshot import is_snapshot
+
+SHAPE = (4, 3, 2)
+SAVED_EPOCH = 1
+SAVED_ITERATION = 3
 
 
 @pytest.mark.xfail()
@@ -23,3 +43,86 @@ def test_load(device_dict: dict, fom_dict: dict):
         FoM.from_dict(name, data, src_to_sim_map) for name, data in fom_dict.items()
     ]
     assert_equal(project.foms[0], foms[0])
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'optimizer_type, optimizer_kwargs',
+    [
+        (
+            AdamOptimizer,
+            {
+                'step_size': 0.05,
+                'moments': np.full((2, *SHAPE), 0.1),
+                'step_control': {
+                    'epoch_start_design_change_min': 0.1,
+                    'epoch_start_design_change_max': 0.2,
+                    'progress': 0.5,
+                },
+            },
+        ),
+        (
+            MMAOptimizer,
+            {
+                'constraints': [
+                    VolumeFractionConstraint(0.4),
+                    BinarizationConstraint(0.5),
+                ],
+                'move_limit': 0.2,
+            },
+        ),
+    ],
+)
+def test_save_load_snapshot(
+    tmp_path: Path,
+    mocker,
+    make_optimization: Callable[..., LumericalOptimization],
+    default_device_dict: dict,
+    optimizer_type: type[GradientOptimizer],
+    optimizer_kwargs: dict,
+):
+    device_dict = {
+        **default_device_dict,
+        'size': SHAPE,
+        'coords': {
+            'x': np.linspace(0, 1, SHAPE[0]),
+            'y': np.linspace(0, 1, SHAPE[1]),
+            'z': np.linspace(0, 1, SHAPE[2]),
+        },
+        'randomize': True,
+        'init_seed': 0,
+        'filters': [Sigmoid(0.5, 1.0)],
+    }
+    # Build a fresh optimizer so that no state is shared between runs
+    optimizer = optimizer_type(**optimizer_kwargs)
+    project = Project(config_type=Config)
+    project.optimization = make_optimization(device_dict, optimizer=optimizer)
+    project.optimization.epoch = SAVED_EPOCH
+    project.optimization.iteration = SAVED_ITERATION
+    project.optimizer = project.optimization.optimizer
+    project.device = project.optimization.device
+    project.base_sim = project.optimization.base_sim
+    project.save_as(tmp_path)
+
+    # Devices are saved as snapshot directories, not .npy files
+    device_path = tmp_path / 'device' / f'e_{SAVED_EPOCH}_i_{SAVED_ITERATION}'
+    assert is_snapshot(device_path)
+    assert not device_path.with_suffix('.npy').exists()
+
+    # Without a config file, the project is loaded from its snapshot
+    load_config = mocker.patch.object(Project, '_load_config')
+    loaded = Project(config_type=Config)
+    loaded.load_project(tmp_path)
+    load_config.assert_called_once()
+    cfg: Config = load_config.call_args.args[0]
+
+    assert cfg['current_epoch'] == SAVED_EPOCH
+    assert cfg['current_iteration'] == SAVED_ITERATION
+    assert cfg['device'] == str(device_path)
+
+    loaded._load_optimizer(cfg)  # noqa: SLF001
+    assert isinstance(loaded.optimizer, type(optimizer))
+    assert_equal(vars(loaded.optimizer), vars(optimizer))
+
+    loaded._load_device(cfg)  # noqa: SLF001
+    assert_equal(loaded.device, project.device)
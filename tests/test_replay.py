@@ -0,0 +1,196 @@
+"""Tests for simulation/replay.py"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.configuration import Config
+from vipdopt.simulation import (
+    LumericalFDTD,
+    LumericalSimulation,
+    Monitor,
+    RecordingFDTD,
+    ReplayFDTD,
+    SessionArchive,
+    solver_from_config,
+)
+from vipdopt.simulation.simobject import LumericalSimObjectType
+
+MONITORS = ('focal_monitor_0', 'design_efield_monitor')
+FIELD_SHAPE = (4, 3, 2)
+
+
+def make_sim(name: str) -> LumericalSimulation:
+    sim = LumericalSimulation()
+    sim.info['name'] = name
+    for mname in MONITORS:
+        sim.new_object(mname, LumericalSimObjectType.PROFILE)
+    return sim
+
+
+def fake_extraction(sims: list[LumericalSimulation], iteration: int):
+    """Write monitor data as LumericalFDTD.reformat_monitor_data would."""
+    for sim in sims:
+        sim.link_monitors()
+        for i, monitor in enumerate(sim.monitors()):
+            e = np.full((3, 2, 2, 1, 5), 10.0 * iteration + i)
+            with monitor.src.open('wb') as f:
+                np.savez(f, e=e, h=e, p=None, t=np.ones(5), sp=np.ones(5), power=None)
+
+
+@pytest.fixture()
+def recording(tmp_path: Path, mocker) -> Path:
+    """Record a session of two iterations with two simulations each."""
+    archive = tmp_path / 'session'
+    solver = RecordingFDTD(archive)
+    mocker.patch.object(LumericalFDTD, 'runjobs')
+    mocker.patch.object(LumericalFDTD, 'import_field_shape', return_value=FIELD_SHAPE)
+    extract = mocker.patch.object(LumericalFDTD, 'reformat_monitor_data')
+    run_dir = tmp_path / 'run'
+    run_dir.mkdir()
+    for iteration in range(2):
+        solver.set_iteration(iteration)
+        sims = [make_sim('fwd_0'), make_sim('adj_0')]
+        for sim in sims:
+            sim.set_path(run_dir / f'{sim.info["name"]}.fsp')
+            sim.get_path().write_bytes(b'model')
+        if iteration == 0:
+            assert_equal(solver.import_field_shape(sims[0]), FIELD_SHAPE)
+        solver.runjobs()
+        extract.side_effect = lambda sims, iteration=iteration, **_: fake_extraction(
+            sims, iteration
+        )
+        solver.reformat_monitor_data(sims)
+    return archive
+
+
+@pytest.mark.smoke()
+def test_record(recording: Path):
+    archive = SessionArchive(recording)
+    assert_equal(archive.iterations(), [0, 1])
+    assert_equal(archive.entry(0)['field_shape'], list(FIELD_SHAPE))
+    assert archive.entry(1)['field_shape'] is None
+    assert_equal(sorted(archive.recorded_sims(1)), ['adj_0', 'fwd_0'])
+    assert_equal(archive.recorded_sims(1)['fwd_0']['monitors'], sorted(MONITORS))
+    assert (archive.sim_dir(1, 'fwd_0') / 'fwd_0.fsp').exists()
+    data = np.load(archive.monitor_file(1, 'fwd_0', 'design_efield_monitor'))
+    assert_close(data['e'], np.full((3, 2, 2, 1, 5), 11.0))
+
+    with pytest.raises(FileNotFoundError, match=r'No data recorded for monitor'):
+        archive.monitor_file(1, 'adj_1', 'focal_monitor_0')
+
+
+@pytest.mark.smoke()
+def test_archive_version(tmp_path: Path):
+    archive = SessionArchive(tmp_path)
+    archive.manifest['version'] = 0
+    archive.save()
+    with pytest.raises(ValueError, match=r'expected 1'):
+        SessionArchive(tmp_path)
+
+    with pytest.raises(FileNotFoundError, match=r'No recorded session'):
+        ReplayFDTD(tmp_path / 'missing')
+
+
+@pytest.mark.smoke()
+def test_replay(recording: Path, tmp_path: Path):
+    solver = ReplayFDTD(recording, time_scale=0)
+    solver.connect(hide=True)
+    work_dir = tmp_path / 'replay'
+    work_dir.mkdir()
+
+    for iteration in range(4):
+        solver.set_iteration(iteration)
+        sims = [make_sim('fwd_0'), make_sim('adj_0')]
+        for sim in sims:
+            sim_file = work_dir / f'{sim.info["name"]}.fsp'
+            solver.save(sim_file, sim)
+            solver.addjob(sim_file)
+        assert_equal(len(solver.listjobs()), 2)
+        solver.runjobs()
+        assert_equal(solver.listjobs(), [])
+        assert all(solver.job_completed(sim.get_path()) for sim in sims)
+        assert not solver.job_completed(work_dir / 'adj_1.fsp')
+
+        Monitor.cache.set_iteration(iteration)
+        solver.reformat_monitor_data(sims)
+        # Iterations past the end of the recording cycle through it
+        for i, monitor in enumerate(sims[0].monitors()):
+            assert_equal(monitor.src.parent, work_dir)
+            expected = np.full((3, 2, 2, 1, 5), 10.0 * (iteration % 2) + i)
+            assert_close(monitor.e, expected)
+
+        # The field shape is only recorded at the start of each epoch
+        assert_equal(solver.import_field_shape(sims[0]), FIELD_SHAPE)
+
+    solver.loop = False
+    with pytest.raises(FileNotFoundError, match=r'Iteration 3 was not recorded'):
+        solver.runjobs()
+
+
+@pytest.mark.smoke()
+def test_replay_latency(recording: Path, mocker):
+    sleep = mocker.patch('vipdopt.simulation.replay.time.sleep')
+    archive = SessionArchive(recording)
+    archive.entry(1)['runtime_s'] = 4.0
+    archive.save()
+
+    solver = ReplayFDTD(recording, time_scale=0.5)
+    solver.set_iteration(1)
+    solver.runjobs()
+    sleep.assert_called_once_with(2.0)
+
+    solver = ReplayFDTD(recording, latency_s=3.0, time_scale=2.0)
+    solver.runjobs()
+    sleep.assert_called_with(6.0)
+
+
+@pytest.mark.smoke()
+def test_solver_from_config(recording: Path, tmp_path: Path):
+    assert type(solver_from_config(Config())) is LumericalFDTD
+
+    solver = solver_from_config(
+        Config({'record_session': 'new_session', 'record_models': False}), tmp_path
+    )
+    assert isinstance(solver, RecordingFDTD)
+    assert_equal(solver.archive.root, tmp_path / 'new_session')
+    assert not solver.save_models
+
+    solver = solver_from_config(
+        Config({
+            'replay_session': recording.name,
+            'record_session': 'ignored',
+            'replay_latency_s': 1.5,
+            'replay_loop': False,
+        }),
+        recording.parent,
+    )
+    assert isinstance(solver, ReplayFDTD)
+    assert_equal(solver.latency_s, 1.5)
+    assert_equal(solver.time_scale, 1.0)
+    assert not solver.loop
+
+
+@pytest.mark.smoke()
+def test_optimization_replay(
+    recording: Path, default_device_dict: dict, make_optimization
+):
+    opt = make_optimization(
+        default_device_dict, solver=ReplayFDTD(recording, time_scale=0)
+    )
+    opt.fdtd.set_iteration(1)
+    sims = [make_sim('fwd_0'), make_sim('adj_0')]
+    for sim in sims:
+        sim_file = opt.dirs['temp'] / f'{sim.info["name"]}.fsp'
+        opt.fdtd.save(sim_file, sim)
+        opt.fdtd.addjob(sim_file)
+    opt._run_jobs(sims)  # noqa: SLF001
+    assert_equal(opt.fdtd.listjobs(), [])
+    opt.fdtd.reformat_monitor_data(sims)
+    assert_close(sims[1].monitors()[0].e, np.full((3, 2, 2, 1, 5), 10.0))
+
+    opt.fdtd.addjob(opt.dirs['temp'] / 'adj_1.fsp')
+    with pytest.raises(FileNotFoundError, match=r"\['adj_1'\] were not recorded"):
+        opt._run_jobs(sims)  # noqa: SLF001
@@ -0,0 +1,100 @@
+"""Tests for snapshot.py"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.snapshot import (
+    MANIFEST_NAME,
+    is_snapshot,
+    read_snapshot,
+    write_snapshot,
+)
+
+DATA = {
+    'name': 'test',
+    'size': (4, 5, 6),
+    'permittivity': 1.5 + 0.1j,
+    'path': Path('device/e_0_i_0'),
+    'weights': np.linspace(0, 1, 12).reshape(3, 4),
+    'nested': {
+        'coords': {'x': np.arange(4.0), 'y': np.arange(5, dtype='>f8')},
+        'values': [np.ones(2, dtype=np.complex128), np.int64(3), None, True],
+    },
+}
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('fname', ['snapshot', 'snapshot.zip'])
+def test_round_trip(tmp_path: Path, fname: str):
+    path = write_snapshot(tmp_path / fname, DATA, kind='test')
+    assert is_snapshot(path)
+    data = read_snapshot(path, kind='test')
+
+    assert_equal(data['name'], 'test')
+    assert_equal(data['size'], (4, 5, 6))
+    assert isinstance(data['size'], tuple)
+    assert_equal(data['permittivity'], 1.5 + 0.1j)
+    assert_equal(data['path'], 'device/e_0_i_0')
+    assert_close(data['weights'], DATA['weights'])
+    assert_close(data['nested']['coords']['y'], np.arange(5.0))
+    assert_equal(data['nested']['coords']['y'].dtype.byteorder in '<=|', True)
+    assert_close(data['nested']['values'][0], np.ones(2))
+    assert_equal(data['nested']['values'][1:], [3, None, True])
+
+    with pytest.raises(ValueError, match=r'contains test; expected device'):
+        read_snapshot(path, kind='device')
+
+
+@pytest.mark.smoke()
+def test_manifest(tmp_path: Path):
+    path = write_snapshot(tmp_path / 'snapshot', DATA)
+    with (path / MANIFEST_NAME).open() as f:
+        manifest = json.load(f)
+    # Arrays are stored as separate files, not in the manifest
+    assert_equal(manifest['data']['weights'], {'__array__': 'weights'})
+    assert_equal(manifest['arrays']['weights']['shape'], [3, 4])
+    assert (path / 'arrays' / 'nested.coords.x.npy').exists()
+
+    manifest['schema_version'] = 0
+    with (path / MANIFEST_NAME).open('w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match=r'schema version 0; expected 1'):
+        read_snapshot(path)
+
+    with pytest.raises(FileNotFoundError, match=r'No snapshot found'):
+        read_snapshot(tmp_path / 'missing')
+
+
+@pytest.mark.smoke()
+def test_mmap(tmp_path: Path):
+    path = write_snapshot(tmp_path / 'snapshot', DATA)
+    data = read_snapshot(path, mmap_bytes=64)
+    weights = data['weights']
+    assert isinstance(weights, np.memmap)
+    assert not isinstance(data['nested']['coords']['x'], np.memmap)
+
+    # Memory-mapped arrays are copy-on-write
+    weights[0, 0] = 10.0
+    assert_close(read_snapshot(path)['weights'], DATA['weights'])
+
+    assert not isinstance(read_snapshot(path, mmap_bytes=None)['weights'], np.memmap)
+
+
+@pytest.mark.smoke()
+def test_overwrite(tmp_path: Path):
+    path = write_snapshot(tmp_path / 'snapshot', DATA)
+    write_snapshot(path, {'weights': np.zeros(2)})
+    assert_equal(list(read_snapshot(path)), ['weights'])
+    assert_equal(sorted(p.name for p in tmp_path.iterdir()), ['snapshot'])
+
+    # Failed writes leave the existing snapshot untouched
+    with pytest.raises(TypeError, match=r'Cannot store value of type .*object'):
+        write_snapshot(path, {'weights': object()})
+    with pytest.raises(TypeError, match=r'Cannot store array of objects at "a/0"'):
+        write_snapshot(path, {'a': [np.array([None])]})
+    assert_close(read_snapshot(path)['weights'], np.zeros(2))
+    assert_equal(sorted(p.name for p in tmp_path.iterdir()), ['snapshot'])
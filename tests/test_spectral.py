@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from testing.utils import assert_close, assert_equal
+from vipdopt.configuration import Config
+from vipdopt.optimization import FoM, SpectralSampler, UniformMAEFoM
+
+NUM_FREQS = 60
+FREQS = np.arange(NUM_FREQS)
+PEAKED_WEIGHTS = np.exp(-np.square((FREQS - 15) / 4))
+# A smooth spectral gradient over a 3x3 design
+SPECTRAL_GRADIENT = np.sin(FREQS / 10)[np.newaxis, np.newaxis, :] * np.reshape(
+    range(1, 10), (3, 3, 1)
+)
+
+
+def spectral_fom_func(n):
+    return np.square(n)[..., np.newaxis] * np.ones(NUM_FREQS)
+
+
+def spectral_grad_func(n):
+    return SPECTRAL_GRADIENT
+
+
+SPECTRAL_FOM = FoM(
+    'TE', [], [], [], [], spectral_fom_func, spectral_grad_func, FREQS, [], FREQS
+)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('weights', [None, PEAKED_WEIGHTS])
+@pytest.mark.parametrize('num_samples', [1, 8, 59])
+def test_strata(weights, num_samples: int):
+    sampler = SpectralSampler(num_samples, weights)
+    edges = sampler.strata(NUM_FREQS)
+
+    assert_equal(len(edges), num_samples + 1)
+    assert_equal(edges[[0, -1]], [0, NUM_FREQS])
+    assert np.all(np.diff(edges) > 0)  # No empty strata
+
+    for iteration in range(5):
+        indices, quadrature = sampler.sample(iteration, NUM_FREQS)
+        assert_equal(quadrature.sum(), NUM_FREQS)
+        assert np.all(indices >= edges[:-1])
+        assert np.all(indices < edges[1:])
+
+
+@pytest.mark.smoke()
+def test_weighted_strata():
+    sampler = SpectralSampler(8, PEAKED_WEIGHTS)
+    edges = sampler.strata(NUM_FREQS)
+    _, quadrature = sampler.sample(0, NUM_FREQS)
+
+    # Wavelengths near the peak weight are sampled more densely
+    peak_stratum = np.searchsorted(edges, 15, side='right') - 1
+    assert_equal(quadrature[peak_stratum], 1)
+    assert_equal(quadrature[-1], quadrature.max())
+
+    with pytest.raises(ValueError, match=r'Expected 30 spectral weights'):
+        sampler.sample(0, 30)
+
+
+@pytest.mark.smoke()
+def test_rotation():
+    fixed = SpectralSampler(6, rotate=False)
+    assert_equal(fixed.sample(0, NUM_FREQS)[0], fixed.sample(7, NUM_FREQS)[0])
+
+    rotating = SpectralSampler(6)
+    sampled = np.unique(
+        np.concatenate([rotating.sample(i, NUM_FREQS)[0] for i in range(50)])
+    )
+    assert_equal(sampled, FREQS)  # Every wavelength is eventually used
+
+
+@pytest.mark.smoke()
+def test_full_sample():
+    indices, quadrature = SpectralSampler(NUM_FREQS).sample(3, NUM_FREQS)
+    assert_equal(indices, FREQS)
+    assert_equal(quadrature, np.ones(NUM_FREQS))
+
+    with pytest.raises(ValueError, match=r'must be positive'):
+        SpectralSampler(0)
+
+
+@pytest.mark.smoke()
+def test_sampled_gradient():
+    fom = 2 * SPECTRAL_FOM
+    x = np.ones((3, 3))
+    full = fom.evaluate(fom_args=(x,), grad_args=(x,))
+    assert full['grad_freqs'] is None
+
+    sample = SpectralSampler(12, rotate=False).sample(0, NUM_FREQS)
+    sampled = fom.evaluate(fom_args=(x,), grad_args=(x,), spectral_sample=sample)
+
+    assert_equal(sampled['grad_freqs'], sample[0])
+    assert_equal(sampled['grad'].shape, (3, 3, 12))
+    # The FoM is still reported over the full spectrum
+    assert_close(sampled['fom'], full['fom'])
+    # Summing over wavelength approximates the full spectral sum
+    assert_close(
+        np.sum(sampled['grad'], -1) / np.sum(full['grad'], -1),
+        np.ones((3, 3)),
+        err=0.05,
+    )
+
+
+@pytest.mark.smoke()
+def test_gradient_max_intensity(default_device_dict: dict, make_optimization):
+    opt = make_optimization(default_device_dict)
+    max_intensity = np.linspace(1.0, 2.0, 10)
+    opt.cfg = Config({'max_intensity_by_wavelength': max_intensity})
+    # A FoM covering only part of the spectrum
+    fom = UniformMAEFoM([1, 3, 5, 7], [], range(10), 0.5)
+
+    assert_close(opt._gradient_max_intensity(fom, None), max_intensity)  # noqa: SLF001
+    assert_close(
+        opt._gradient_max_intensity(fom, np.array([0, 2])),  # noqa: SLF001
+        max_intensity[[1, 5]],
+    )
@@ -0,0 +1,177 @@
+"""Tests for eval/spectrum.py"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.eval import FieldSlice, evaluate_spectra, load_npz
+from vipdopt.eval.plotter import plot_device_cross_section_spectrum
+from vipdopt.eval.spectrum import band_midpoints, render_field_slice
+
+WAVELENGTHS = np.linspace(400e-9, 700e-9, 6)
+
+
+def _write_monitor(fname: Path, shape: tuple[int, ...], seed: int = 0, **kwargs):
+    """Write monitor data in the format saved by `reformat_monitor_data`."""
+    rng = np.random.default_rng(seed)
+    e = rng.normal(size=(3, *shape)) + 1j * rng.normal(size=(3, *shape))
+    with fname.open('wb') as f:
+        np.savez(f, e=e, h=None, p=None, t=None, sp=np.ones(shape[-1]), **kwargs)
+    return e
+
+
+@pytest.mark.smoke()
+def test_load_npz(tmp_path: Path):
+    fname = tmp_path / 'monitor.npz'
+    e = _write_monitor(fname, (4, 5, 1, 6), x=np.arange(4.0))
+
+    data = load_npz(fname)
+    assert isinstance(data['e'], np.memmap)
+    assert_equal(data['e'], e)
+    assert_equal(data['x'], np.arange(4.0))
+    assert data['h'].item() is None
+
+    data = load_npz(fname, mmap=False)
+    assert not isinstance(data['e'], np.memmap)
+    assert_equal(data['e'], e)
+
+    # Compressed archives are read into memory
+    np.savez_compressed(tmp_path / 'compressed.npz', e=e)
+    data = load_npz(tmp_path / 'compressed.npz')
+    assert not isinstance(data['e'], np.memmap)
+    assert_equal(data['e'], e)
+
+
+@pytest.mark.smoke()
+def test_field_slice(tmp_path: Path):
+    fname = tmp_path / 'monitor.npz'
+    e = _write_monitor(fname, (4, 5, 3, 6))
+    data = load_npz(fname)
+
+    enorm = FieldSlice('xz', 'monitor', axis='y', index=1).plane(data, 2)
+    assert_close(enorm, np.sqrt(np.sum(np.abs(e[:, :, 1, :, 2]) ** 2, axis=0)))
+    # Cross sections default to the middle of the monitor
+    real_ez = FieldSlice('yz', 'monitor', 'real_ez', axis='x').plane(data, 5)
+    assert_close(real_ez, np.real(e[2, 2, :, :, 5]))
+
+    (h_label, h), (v_label, v) = FieldSlice('xz', 'monitor', axis='y').axes(data)
+    assert_equal((h_label, v_label), ('x index', 'z index'))
+    assert_equal(len(h), 4)
+    assert_equal(len(v), 3)
+
+    with pytest.raises(ValueError, match=r'is not planar'):
+        FieldSlice('plane', 'monitor').plane(data, 0)
+    with pytest.raises(ValueError, match=r'out of bounds'):
+        FieldSlice('xz', 'monitor', axis='y', index=5).plane(data, 0)
+    with pytest.raises(ValueError, match=r'Field quantity must be one of'):
+        FieldSlice('xz', 'monitor', 'imag_ex')
+
+    # Monitors saved at a subset of frequencies
+    planar = tmp_path / 'planar.npz'
+    e = _write_monitor(planar, (4, 5, 1, 2), freq_indices=np.array([1, 4]))
+    data = load_npz(planar)
+    focal = FieldSlice('focal', 'monitor', 'real_ex')
+    assert_close(focal.plane(data, 4), np.real(e[0, :, :, 0, 1]))
+    with pytest.raises(ValueError, match=r'Wavelength 2 was not saved'):
+        focal.plane(data, 2)
+
+
+@pytest.mark.smoke()
+def test_render_field_slice(tmp_path: Path):
+    fname = tmp_path / 'monitor.npz'
+    _write_monitor(fname, (4, 5, 1, 6), x=np.linspace(-1e-6, 1e-6, 4))
+    fnames = render_field_slice(
+        str(fname),
+        FieldSlice('focal', 'monitor').as_dict(),
+        WAVELENGTHS.tolist(),
+        [460e-9, 700e-9],
+        str(tmp_path),
+        'job',
+    )
+    assert_equal(
+        [Path(f).name for f in fnames],
+        ['job_focal_enorm_460nm.png', 'job_focal_enorm_700nm.png'],
+    )
+    assert all(Path(f).exists() for f in fnames)
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('workers', [0, 2])
+def test_evaluate_spectra(tmp_path: Path, workers: int):
+    jobs = {}
+    for i in range(3):
+        files = {'focal': tmp_path / f'job{i}_focal.npz'}
+        _write_monitor(files['focal'], (4, 4, 1, 6), seed=i)
+        if i > 0:
+            files['device'] = tmp_path / f'job{i}_device.npz'
+            _write_monitor(files['device'], (4, 4, 3, 6), seed=i)
+        jobs[f'job{i}'] = files
+    slices = [
+        FieldSlice('focal', 'focal'),
+        FieldSlice('device', 'device', 'real_ex', axis='y'),
+    ]
+
+    plots = evaluate_spectra(
+        tmp_path / 'plots',
+        jobs,
+        slices,
+        WAVELENGTHS,
+        num_bands=2,
+        workers=workers,
+        max_pending=1,
+    )
+    assert_equal(band_midpoints(WAVELENGTHS, 2), [WAVELENGTHS[1], WAVELENGTHS[4]])
+    # Slices of monitors a job doesn't have are skipped
+    assert_equal([len(p) for p in plots.values()], [2, 4, 4])
+    assert_equal(
+        sorted(p.name for p in plots['job1']),
+        [
+            'job1_device_real_ex_460nm.png',
+            'job1_device_real_ex_640nm.png',
+            'job1_focal_enorm_460nm.png',
+            'job1_focal_enorm_640nm.png',
+        ],
+    )
+    assert all(p.exists() for ps in plots.values() for p in ps)
+
+
+@pytest.mark.smoke()
+def test_plot_device_cross_section_spectrum(tmp_path: Path):
+    rng = np.random.default_rng(0)
+    r_vectors = []
+    f_vectors = []
+    lateral = np.linspace(-1e-6, 1e-6, 4)
+    for i in range(6):
+        # Alternate between cross-sections normal to y and to x
+        x, y = (0.0, lateral) if i % 2 else (lateral, 0.0)
+        r_vectors.extend([
+            {'var_values': x},
+            {'var_values': y},
+            {'var_values': np.linspace(0, 1e-6, 3)},
+        ])
+        f_vectors.extend([
+            {'var_values': rng.random((4, 3, 6))},
+            {'var_values': rng.normal(size=(3, 4, 3, 6))},
+        ])
+    plot_data = {
+        'r': r_vectors,
+        'f': f_vectors,
+        'lambda': [{'var_values': WAVELENGTHS}],
+    }
+
+    fig, ax = plot_device_cross_section_spectrum(
+        plot_data,
+        0,
+        None,
+        ['sweep/job0.fsp'],
+        str(tmp_path),
+        plot_wavelengths=[460e-9],
+        ignore_opp_polarization=False,
+    )
+    assert ax is fig.axes[0]
+    plots = sorted((tmp_path / 'device_cross_section_spectra').iterdir())
+    # Four quantities for each of 6 cross-sections
+    assert_equal(len(plots), 4 * 6)
+    assert (tmp_path / 'device_cross_section_spectra/job0_realEz_5_460 nm.png').exists()
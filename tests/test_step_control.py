@@ -0,0 +1,95 @@
+"""Tests for optimization/step_control.py"""
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.optimization import (
+    AdamOptimizer,
+    Device,
+    GradientAscentOptimizer,
+    StepSizeController,
+)
+from vipdopt.optimization.step_control import MaxChangeCurve
+
+
+@pytest.fixture()
+def curve_inputs() -> tuple[np.ndarray, ...]:
+    rng = np.random.default_rng(0)
+    x = rng.random(200)
+    direction = rng.normal(size=200)
+    direction[:10] = 0
+    x[10:20] = 1.0  # Some variables start on the bound
+    return x, direction, np.zeros(200), np.ones(200)
+
+
+@pytest.mark.smoke()
+def test_max_change_curve(curve_inputs):
+    x, direction, lower, upper = curve_inputs
+    curve = MaxChangeCurve(x, direction, lower, upper)
+
+    step_sizes = np.logspace(-4, 2, 50)
+    expected = [
+        np.max(np.abs(np.clip(x + s * direction, lower, upper) - x)) for s in step_sizes
+    ]
+    assert_close(curve(step_sizes), np.array(expected), err=1e-12)
+
+    for change in (1e-3, 0.05, 0.5):
+        assert_close(curve(curve.inverse(change)), change, err=1e-12)
+
+    # Can't change the design by more than the largest distance to a bound
+    unreachable = curve.inverse(10.0)
+    assert_close(curve(unreachable), curve(1e6), err=1e-12)
+
+
+@pytest.mark.smoke()
+def test_bounds():
+    controller = StepSizeController(0.05, 0.15, 0.0, 0.05)
+    assert_close(controller.bounds(), (0.05, 0.15))
+    controller.set_epoch(2, 5)
+    assert_close(controller.bounds(), (0.025, 0.1))
+    controller.set_epoch(4, 5)
+    assert_close(controller.bounds(), (0.0, 0.05))
+
+    with pytest.raises(ValueError, match=r'Minimum design change must not exceed.*'):
+        StepSizeController(0.2, 0.1, 0.0, 0.05)
+
+
+@pytest.mark.smoke()
+def test_from_config():
+    cfg = {
+        'use_fixed_step_size': False,
+        'epoch_start_design_change_min': 0.05,
+        'epoch_start_design_change_max': 0.15,
+        'epoch_end_design_change_min': 0.0,
+        'epoch_end_design_change_max': 0.05,
+    }
+    assert_equal(
+        StepSizeController.from_config(cfg), StepSizeController(0.05, 0.15, 0.0, 0.05)
+    )
+    assert StepSizeController.from_config({**cfg, 'use_fixed_step_size': True}) is None
+    del cfg['epoch_end_design_change_min']
+    assert StepSizeController.from_config(cfg) is None
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('step_size', [1e-6, 1.0, 1e3])
+@pytest.mark.parametrize('opt_type', [GradientAscentOptimizer, AdamOptimizer])
+@pytest.mark.parametrize(
+    'device',
+    [{'randomize': True, 'init_seed': 0}],
+    indirect=True,
+)
+def test_step_within_bounds(opt_type, step_size: float, device: Device):
+    """Steps should change the design by an amount within the configured bounds."""
+    controller = StepSizeController(0.05, 0.15, 0.0, 0.05)
+    opt = opt_type(step_size=step_size, step_control=controller.as_dict())
+    assert_equal(opt.step_control, controller)
+    rng = np.random.default_rng(1)
+
+    for i in range(3):
+        w = device.get_design_variable().copy()
+        opt.step(device, rng.normal(size=w.shape), i)
+        change = np.max(np.abs(device.get_design_variable() - w))
+        lo, hi = controller.bounds()
+        assert lo - 1e-9 <= change <= hi + 1e-9
@@ -0,0 +1,243 @@
+"""Tests for eval/sweep.py"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.configuration import Config, SonyBayerConfig
+from vipdopt.eval import (
+    Sweep,
+    SweepMetric,
+    SweepParameter,
+    SweepSpec,
+    load_sweep,
+    reduce_monitor_data,
+)
+from vipdopt.simulation import ReplayFDTD, SessionArchive
+
+SIM_TEMPLATE = """{
+    "info": {"name": "sweep"},
+    "objects": {
+        "FDTD": {
+            "name": "FDTD",
+            "obj_type": "fdtd",
+            "properties": {"simulation time": {{ data.fdtd_simulation_time_fs }}}
+        },
+        {%- for pol in ['x', 'y'] %}
+        "forward_src_{{ pol }}": {
+            "name": "forward_src_{{ pol }}",
+            "obj_type": "tfsf",
+            "properties": {"angle theta": {{ data.source_angle_theta_deg }}}
+        },
+        {%- endfor %}
+        "transmission_monitor": {
+            "name": "transmission_monitor",
+            "obj_type": "power",
+            "properties": {}
+        }
+    }
+}
+"""
+BASE_CONFIG = {
+    'fdtd_simulation_time_fs': 1000,
+    'source_angle_theta_deg': 0.0,
+    'lambda_values_um': [0.4, 0.5, 0.6],
+}
+BASE_TRANSMISSION = np.array([0.1, 0.2, 0.3])
+
+
+def transmission(theta: float, src: str) -> np.ndarray:
+    """The transmission recorded for a source at an angle."""
+    return (1 + theta / 10) * BASE_TRANSMISSION * (2 if src.endswith('y') else 1)
+
+
+def write_monitor_data(path: Path, t: np.ndarray) -> Path:
+    e = np.full((3, 2, 2, 1, len(t)), 2.0)
+    with path.open('wb') as f:
+        np.savez(f, e=e, h=e, p=None, t=t, sp=np.ones(len(t)), power=None)
+    return path
+
+
+def record(sweep: Sweep, archive_dir: Path) -> ReplayFDTD:
+    """Record the transmission of every variant of a sweep for replay."""
+    archive = SessionArchive(archive_dir)
+    data_dir = archive_dir.parent / 'recorded'
+    data_dir.mkdir(exist_ok=True)
+    variants = zip(sweep.variant_keys(), sweep.spec.variants(), strict=True)
+    for key, overrides in variants:
+        for src in ('forward_src_x', 'forward_src_y'):
+            name = f'sweep_{key[:12]}_{src}'
+            t = transmission(overrides['source_angle_theta_deg'], src)
+            fname = write_monitor_data(data_dir / f'{name}.npz', t)
+            archive.add_sim(0, name, {'transmission_monitor': fname})
+    archive.save()
+    return ReplayFDTD(archive_dir, time_scale=0)
+
+
+@pytest.fixture()
+def spec_dict(tmp_path: Path) -> dict:
+    (tmp_path / 'sweep_sim.j2').write_text(SIM_TEMPLATE)
+    return {
+        'parameters': [
+            {
+                'key': 'source_angle_theta_deg',
+                'start': 0.0,
+                'stop': 10.0,
+                'num': 3,
+                'name': 'Angle',
+                'short_form': 'th',
+            },
+            {'key': 'fdtd_simulation_time_fs', 'values': [1000, 2000]},
+        ],
+        'metrics': [
+            {'name': 'trans', 'monitor': 'transmission_monitor'},
+            {
+                'name': 'trans_x',
+                'monitor': 'transmission_monitor',
+                'reduce': 'mean',
+                'source': 'forward_src_x',
+            },
+        ],
+        'simulation_template': 'sweep_sim.j2',
+        'title': 'test_sweep',
+    }
+
+
+@pytest.mark.smoke()
+def test_sweep_spec(spec_dict: dict, tmp_path: Path):
+    spec = SweepSpec.from_dict(spec_dict, tmp_path)
+    assert_equal(spec.shape, (3, 2))
+    assert_equal(spec.parameters[0].values, [0.0, 5.0, 10.0])
+    variants = spec.variants()
+    assert_equal(len(variants), 6)
+    assert_equal(
+        variants[1], {'source_angle_theta_deg': 0.0, 'fdtd_simulation_time_fs': 2000}
+    )
+    assert_equal(spec.indices()[1], (0, 1))
+    assert_equal(SweepSpec.from_dict(spec.as_dict()).as_dict(), spec.as_dict())
+
+    # List-valued keys can be swept over ranges
+    param = SweepParameter.from_dict({
+        'key': 'lambda_values_um',
+        'values': [{'start': 0.4, 'stop': 0.6, 'num': 3}, [0.5, 0.6]],
+    })
+    assert_close(param.values[0], [0.4, 0.5, 0.6])
+    assert_equal(param.r_vector()['var_values'], [0, 1])
+
+    spec_dict['mode'] = 'zip'
+    with pytest.raises(ValueError, match=r'same number of values'):
+        SweepSpec.from_dict(spec_dict, tmp_path)
+    spec_dict['parameters'][1]['values'].append(3000)
+    spec = SweepSpec.from_dict(spec_dict, tmp_path)
+    assert_equal(spec.shape, (3,))
+    assert_equal(spec.variants()[2]['fdtd_simulation_time_fs'], 3000)
+
+    spec_dict['mode'] = 'diagonal'
+    with pytest.raises(ValueError, match=r'Sweep mode must be one of'):
+        SweepSpec.from_dict(spec_dict, tmp_path)
+
+
+@pytest.mark.smoke()
+def test_sweep_metric(tmp_path: Path):
+    t = np.array([0.1, 0.4, 0.7, 1.0])
+    fname = str(write_monitor_data(tmp_path / 'mon.npz', t))
+    files = {'src': {'mon': fname}}
+
+    def reduce(**kwargs):
+        return reduce_monitor_data(files, [{'name': 'm', 'monitor': 'mon', **kwargs}])
+
+    assert_close(reduce()['m'], t)
+    assert_close(reduce(reduce='max', wavelengths=[0, 2])['m'], 0.4)
+    assert_close(reduce(quantity='intensity')['m'], np.full(4, 48.0))
+    with pytest.raises(ValueError, match=r"no 'power' data"):
+        reduce(quantity='power')
+    with pytest.raises(ValueError, match=r'Metric reduction must be one of'):
+        SweepMetric('m', 'mon', reduce='median')
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize('workers', [0, 2])
+def test_sweep_run(spec_dict: dict, tmp_path: Path, workers: int):
+    spec = SweepSpec.from_dict(spec_dict, tmp_path)
+    sweep = Sweep(spec, BASE_CONFIG, None, tmp_path / 'sweep', workers=workers)
+    sweep.solver = record(sweep, tmp_path / 'session')
+
+    results = []
+    table = sweep.run(lambda index, values: results.append((index, values)))
+    assert_equal(sorted(index for index, _ in results), spec.indices())
+    angles = np.array([0.0, 5.0, 10.0])[:, np.newaxis, np.newaxis]
+    expected = 1.5 * (1 + angles / 10) * BASE_TRANSMISSION
+    assert_close(table['trans'], np.broadcast_to(expected, (3, 2, 3)))
+    assert_close(
+        table['trans_x'], np.broadcast_to(np.mean(expected, axis=-1) / 1.5, (3, 2))
+    )
+    sims = sorted(p.name for p in (tmp_path / 'sweep' / 'jobs').glob('*.npz'))
+    assert_equal(len(sims), 12)
+
+    # Finished variants are not simulated again
+    sweep.solver = None
+    results.clear()
+    assert_close(sweep.run(lambda *args: results.append(args))['trans'], table['trans'])
+    assert_equal(len(results), 6)
+
+    # Extending the sweep only simulates the new variants
+    spec_dict['parameters'][0]['stop'] = 15.0
+    spec_dict['parameters'][0]['num'] = 4
+    extended = Sweep(
+        SweepSpec.from_dict(spec_dict, tmp_path), BASE_CONFIG, None, sweep.directory
+    )
+    missing = [k for k in extended.variant_keys() if k not in extended.results]
+    assert_equal(len(missing), 2)
+    assert np.all(np.isnan(extended.table()['trans'][3]))
+    assert_close(extended.table()['trans'][:3], table['trans'])
+
+    # Results depend on the base config too
+    other = Sweep(spec, {**BASE_CONFIG, 'background_index': 1.5}, None, sweep.directory)
+    assert not set(other.variant_keys()) & set(sweep.variant_keys())
+
+
+@pytest.mark.smoke()
+def test_sweep_plot_data(spec_dict: dict, tmp_path: Path):
+    spec = SweepSpec.from_dict(spec_dict, tmp_path)
+    sweep = Sweep(spec, Config(BASE_CONFIG), None, tmp_path / 'sweep', workers=0)
+    sweep.solver = record(sweep, tmp_path / 'session')
+    sweep.run()
+
+    plot_data = sweep.plot_data(['trans', 'trans_x'])
+    assert_equal(list(plot_data['r'][0]), [p.key for p in spec.parameters])
+    assert_equal(plot_data['r'][0]['source_angle_theta_deg']['var_name'], 'Angle')
+    trans = plot_data['f'][0]
+    assert_equal(trans['var_name'], 'trans')
+    assert_close(trans['var_values'][:, 0], 0.3 * np.array([1.0, 1.5, 2.0]))
+    assert_close(trans['var_stdevs'][0], np.full(2, 1.5 * np.std(BASE_TRANSMISSION)))
+    assert_close(plot_data['f'][1]['var_stdevs'], np.zeros((3, 2)))
+
+    sweep.plot(tmp_path / 'plots')
+    plots = sorted(p.name for p in (tmp_path / 'plots').iterdir())
+    assert_equal(
+        plots,
+        ['test_sweep_fdtd_simulation_time_fs_1000.000.png', 'test_sweep_th_0.000.png'],
+    )
+
+    sweep.save(tmp_path / 'sweep.npz')
+    loaded_spec, table = load_sweep(tmp_path / 'sweep.npz')
+    assert_equal(loaded_spec.as_dict(), spec.as_dict())
+    assert_close(table['trans'], sweep.table()['trans'])
+
+
+@pytest.mark.smoke()
+def test_sweep_derived_configs(spec_dict: dict, tmp_path: Path):
+    spec_dict['derived_template'] = (
+        Path.cwd() / 'jinja_templates' / 'derived_simulation_properties.j2'
+    )
+    spec_dict['parameters'] = [{'key': 'device_scale_um', 'values': [0.05, 0.1]}]
+    spec = SweepSpec.from_dict(spec_dict, tmp_path)
+    base = SonyBayerConfig.from_file(Path('testing/config_example.yml'))
+    sweep = Sweep(spec, base, None, tmp_path / 'sweep')
+
+    configs = sweep.variant_configs(spec.variants())
+    assert all(isinstance(cfg, SonyBayerConfig) for cfg in configs)
+    assert_close(configs[1]['focal_length_um'], 2 * configs[0]['focal_length_um'])
+    assert 'focal_length_um' not in sweep.base_config
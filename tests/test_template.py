@@ -5,7 +5,7 @@
 import yaml
 
 from testing import assert_close
-from vipdopt.configuration.template import TemplateRenderer
+from vipdopt.configuration.template import TemplateRenderer, referenced_keys
 from vipdopt.utils import read_config_file
 
 TEST_TEMPLATE_FILE = 'derived_simulation_properties.j2'
@@ -32,3 +32,79 @@ def test_render_example_config(
         assert k in rendered_data
         print(k, v)
         assert_close(rendered_data[k], v)
+
+
+@pytest.fixture()
+def renderer(tmp_path) -> TemplateRenderer:
+    (tmp_path / 'derived.j2').write_text(
+        'area: {{ data.width * data["height"] }}\nscale: {{ scale }}\n'
+    )
+    (tmp_path / 'original.j2').write_text(
+        '{% for name, value in data.items() -%}\n{{ name }}: {{ value }}\n{% endfor %}'
+    )
+    rndr = TemplateRenderer(tmp_path, bytecode_cache_dir=tmp_path / 'cache')
+    rndr.set_template('derived.j2')
+    return rndr
+
+
+@pytest.mark.smoke()
+def test_referenced_keys(renderer: TemplateRenderer):
+    env = renderer.env
+    ast = env.parse(
+        '{% set x = data.a + data["b"] %}{{ x }}{{ other | length }}{{ data.a }}'
+    )
+    assert referenced_keys(ast) == {'data': frozenset('ab'), 'other': None}
+
+    # Iterating over or passing the variable around reads all of its keys
+    ast = env.parse('{{ data.a }}{% for k in data.keys() %}{{ k }}{% endfor %}')
+    assert referenced_keys(ast) == {'data': None}
+    ast = env.parse('{{ data.a }}{{ data | length }}')
+    assert referenced_keys(ast) == {'data': None}
+    ast = env.parse('{{ data[key] }}')
+    assert referenced_keys(ast) == {'data': None, 'key': None}
+
+
+@pytest.mark.smoke()
+def test_memoized_render(renderer: TemplateRenderer, tmp_path):
+    data = {'width': 2, 'height': 3.0, 'unused': [1, 2]}
+    output = renderer.render(data=data, scale=1)
+    assert yaml.safe_load(output) == {'area': 6.0, 'scale': 1}
+    assert (renderer.hits, renderer.misses) == (0, 1)
+    assert any((tmp_path / 'cache').iterdir())
+
+    # Keys the template doesn't read don't affect the output
+    assert renderer.render(data={**data, 'unused': None}, scale=1) == output
+    assert (renderer.hits, renderer.misses) == (1, 1)
+    assert yaml.safe_load(renderer.render(data={**data, 'width': 4}, scale=1)) == {
+        'area': 12.0,
+        'scale': 1,
+    }
+    assert (renderer.hits, renderer.misses) == (1, 2)
+
+    # Values are compared exactly, not by their printed representation
+    renderer.render(data=data, scale=np.array([1.0, 1.0 + 1e-12]))
+    renderer.render(data=data, scale=np.array([1.0, 1.0]))
+    assert (renderer.hits, renderer.misses) == (1, 4)
+
+    renderer.set_template('original.j2')
+    assert yaml.safe_load(renderer.render(data=data)) == data
+    changed = {**data, 'unused': 'changed'}
+    assert yaml.safe_load(renderer.render(data=changed)) == changed
+    assert (renderer.hits, renderer.misses) == (1, 6)
+
+    renderer.register_filter('double', lambda x: 2 * x)
+    renderer.render(data=data)
+    assert (renderer.hits, renderer.misses) == (1, 7)
+
+
+@pytest.mark.smoke()
+def test_render_many(renderer: TemplateRenderer):
+    variants = [{'data': {'width': w, 'height': 1}} for w in (1, 2, 1, 3, 2)]
+    outputs = renderer.render_many(variants, scale=0.5)
+    assert [yaml.safe_load(o)['area'] for o in outputs] == [1, 2, 1, 3, 2]
+    assert (renderer.hits, renderer.misses) == (2, 3)
+
+    uncached = TemplateRenderer(renderer.env.loader.searchpath[0], memo_size=0)
+    uncached.set_template('derived.j2')
+    assert uncached.render_many(variants, scale=0.5) == outputs
+    assert (uncached.hits, uncached.misses) == (0, 5)
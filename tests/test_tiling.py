@@ -0,0 +1,179 @@
+"""Tests for optimization/tiling.py"""
+
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from testing import assert_close, assert_equal
+from vipdopt.configuration import Config
+from vipdopt.optimization import TiledOptimization, tile_slices
+from vipdopt.optimization.tiling import blend_weights, tile_simulation
+from vipdopt.simulation import LumericalSimulation
+from vipdopt.simulation.simobject import LumericalSimObjectType
+
+SIZE = (10, 8, 3)
+
+
+@pytest.fixture()
+def make_tiled(make_optimization) -> Callable[..., TiledOptimization]:
+    """Return a function creating tiled optimizations of a device of size SIZE."""
+
+    def _make_tiled(device_dict: dict, **kwargs) -> TiledOptimization:
+        base_sim = LumericalSimulation()
+        base_sim.new_object(
+            'FDTD', LumericalSimObjectType.FDTD, **{'x span': 20e-6, 'y span': 16e-6}
+        )
+        device_dict.update({
+            'size': SIZE,
+            'coords': {
+                'x': np.linspace(-4.5, 4.5, SIZE[0]),
+                'y': np.linspace(-3.5, 3.5, SIZE[1]),
+                'z': np.linspace(0, 1, SIZE[2]),
+            },
+            'randomize': True,
+            'init_seed': 0,
+        })
+        return make_optimization(
+            device_dict,
+            optimization_type=TiledOptimization,
+            base_sim=base_sim,
+            cfg=Config({'enforce_xy_gradient_symmetry': False}),
+            epoch_list=[2, 4],
+            **kwargs,
+        )
+
+    return _make_tiled
+
+
+@pytest.mark.smoke()
+def test_tile_slices():
+    slices = tile_slices(SIZE, (2, 3), overlap=1)
+    assert_equal(len(slices), 6)
+    assert_equal(slices[0], (slice(0, 6), slice(0, 4), slice(None)))
+    assert_equal(slices[4], (slice(4, 10), slice(2, 7), slice(None)))
+
+    # The blending weights of all tiles sum to one
+    total = np.zeros(SIZE)
+    for index, s in zip(np.ndindex(2, 3), slices, strict=True):
+        weights = blend_weights(SIZE, (2, 3), 1, index)
+        assert_equal(weights.shape, (*total[s].shape[:2], 1))
+        total[s] += weights
+    assert_close(total, np.ones(SIZE))
+    assert_close(blend_weights(SIZE, (2, 3), 1, (0, 0))[3:, 0, 0], [1.0, 0.75, 0.25])
+
+    assert_equal(tile_slices(SIZE, (1, 1)), [(slice(0, 10), slice(0, 8), slice(None))])
+    with pytest.raises(ValueError, match=r'too small for an overlap of 2 voxels'):
+        tile_slices(SIZE, (2, 3), overlap=2)
+
+
+@pytest.mark.smoke()
+def test_tile_simulation():
+    sim = LumericalSimulation()
+    sim.info['name'] = 'base'
+    sim.new_object(
+        'FDTD', LumericalSimObjectType.FDTD, **{'x span': 10.0, 'y span': 10.0}
+    )
+    sim.new_object(
+        'monitor', LumericalSimObjectType.POWER, **{'x min': -4.0, 'x max': 2.0}
+    )
+    sim.new_object('point', LumericalSimObjectType.POWER, x=-4.0)
+    sim.new_object(
+        'outside', LumericalSimObjectType.POWER, **{'x': -8.0, 'x span': 1.0}
+    )
+
+    tile = tile_simulation(sim, {'x': (-1.0, 5.0)}, 'base_t1_0')
+    assert_equal(tile.info['name'], 'base_t1_0')
+    assert_close(tile.objects['FDTD']['x'], 2.0)
+    assert_close(tile.objects['FDTD']['x span'], 6.0)
+    assert_close(tile.objects['FDTD']['y span'], 10.0)
+    assert_close(tile.objects['monitor']['x min'], -1.0)
+    assert_close(tile.objects['monitor']['x max'], 2.0)
+    assert_equal(tile.objects['outside']['x'], -8.0)
+    # The original simulation is untouched
+    assert_close(sim.objects['monitor']['x min'], -4.0)
+
+
+@pytest.mark.smoke()
+def test_tiles(tmp_path, default_device_dict: dict, make_tiled):
+    opt = make_tiled(
+        default_device_dict, num_tiles=(2, 1), overlap=1, margin_um=0.5
+    )
+    assert_equal([tile.name for tile in opt.tiles], ['t0_0', 't1_0'])
+    tile = opt.tiles[1]
+    assert_equal(tile.device.size, (6, 8, 3))
+    assert_close(tile.device.coords['x'], np.linspace(-0.5, 4.5, 6))
+    assert tile.fom is not opt.fom
+    assert tile.device.filters is opt.device.filters
+
+    # Only the split axis is cropped, to the tile and its margin
+    fdtd = tile.sim.objects['FDTD']
+    assert_close(fdtd['x'] - fdtd['x span'] / 2, -1e-6)
+    assert_close(fdtd['y span'], 16e-6)
+    assert_equal(tile.sim.get_path(), tmp_path / 'temp' / '_t1_0.fsp')
+
+    # Tiles view the full design
+    opt.device.set_design_variable(np.full(SIZE, 0.25))
+    assert_close(tile.device.get_design_variable(), np.full((6, 8, 3), 0.25))
+    assert_close(tile.device.get_permittivity(), np.full((6, 8, 3), 0.25))
+
+    with pytest.raises(ValueError, match=r'Expected 2 tile simulations; got 1'):
+        make_tiled(
+            default_device_dict, num_tiles=(2, 1), tile_sims=[tile.sim]
+        )
+    with pytest.raises(ValueError, match=r'positive number of tiles'):
+        make_tiled(default_device_dict, num_tiles=(0, 1))
+
+
+@pytest.mark.smoke()
+def test_tiled_step(default_device_dict: dict, make_tiled, mock_jobs, mocker):
+    opt = make_tiled(default_device_dict, num_tiles=(2, 2), overlap=1)
+    mocks = mock_jobs(opt, lambda _fom, base_sim: [f'{base_sim.info["name"]}_fwd'])
+    foms = {id(tile.fom): 1.0 + k for k, tile in enumerate(opt.tiles)}
+    mocker.patch.object(
+        opt,
+        '_evaluate',
+        side_effect=lambda fom, device, **_: (
+            {
+                'fom': np.array([foms[id(fom)]]),
+                'foms': np.array([foms[id(fom)]]),
+                'quantities': {'transmission': [[foms[id(fom)]]]},
+            },
+            np.full(device.size, foms[id(fom)]),
+        ),
+    )
+    step = mocker.patch.object(opt.optimizer, 'step')
+
+    opt._optimization_step()  # noqa: SLF001
+
+    assert_equal(mocks['import_device'].call_count, 4)
+    # All simulations are run as one batch, and extracted tile by tile
+    mocks['run_jobs'].assert_called_once_with(
+        ['_t0_0_fwd', '_t0_1_fwd', '_t1_0_fwd', '_t1_1_fwd']
+    )
+    assert_equal(mocks['extract_monitor_data'].call_count, 4)
+
+    # The gradients are blended across the overlaps
+    gradient = step.call_args.args[1]
+    assert_equal(gradient.shape, SIZE)
+    assert_close(gradient[0, 0], np.full(3, 1.0))
+    assert_close(gradient[-1, -1], np.full(3, 4.0))
+    assert_close(gradient[4:6, 0, 0], [1.5, 2.5])
+    assert_close(opt.fom_hist['intensity_overall'], [np.array([10.0])])
+    assert_close(opt.fom_hist['transmission_0'], [np.array([2.5])])
+
+
+@pytest.mark.smoke()
+def test_state(default_device_dict: dict, make_tiled):
+    opt = make_tiled(default_device_dict, overlap=1)
+    state = opt.state_dict()
+
+    restored = make_tiled(default_device_dict, overlap=1)
+    restored.device.set_design_variable(np.zeros(SIZE))
+    restored.load_state_dict(state)
+    assert_equal(restored.device.w, opt.device.w)
+
+    # The tiles view the restored design
+    restored.device.set_design_variable(np.full(SIZE, 0.125))
+    for tile in restored.tiles:
+        assert_close(tile.device.get_design_variable(), 0.125)
@@ -8,7 +8,7 @@
 import pytest
 
 from testing import assert_close, assert_equal
-from vipdopt.utils import read_config_file, sech, setup_logger
+from vipdopt.utils import bounding_slice, read_config_file, sech, setup_logger
 
 TEST_YAML_PATH = 'vipdopt/configuration/config_example.yml'
 
@@ -164,3 +164,24 @@ def test_json_loader(
     else:
         cfg = read_config_file(fname)
         assert_equal(cfg['objects']['source_aperture']['obj_type'], 'rect')
+
+
+@pytest.mark.smoke()
+@pytest.mark.parametrize(
+    'bounds, expected',
+    [
+        ((0.25, 0.75), slice(2, 9)),
+        ((0.2, 0.8), slice(2, 9)),
+        ((0.0, 1.0), slice(0, 11)),
+        ((-1.0, 2.0), slice(0, 11)),
+        ((0.8, 0.2), slice(2, 9)),
+        ((0.55, 0.55), slice(5, 7)),
+    ],
+)
+def test_bounding_slice(bounds: tuple[float, float], expected: slice):
+    axis = np.linspace(0, 1, 11)
+    s = bounding_slice(axis, bounds)
+    assert_equal(s, expected)
+    # Sliced axis must still cover the requested bounds
+    assert axis[s][0] <= max(min(bounds), axis[0])
+    assert axis[s][-1] >= min(max(bounds), axis[-1])
@@ -1,7 +1,9 @@
 """Run the Vipdopt software package."""
 
+import json
 import logging
 import os
+import signal
 import sys
 from argparse import SUPPRESS, ArgumentParser
 
@@ -23,8 +25,12 @@
 
 from pathlib import Path
 
-from vipdopt.gui import start_gui
+from vipdopt.configuration import Config
+from vipdopt.diagnostics import DASHBOARD_STAGES, DashboardFeed, metrics
+from vipdopt.eval import Sweep, SweepSpec
+from vipdopt.optimization.gradient_check import select_voxels, verify_gradient
 from vipdopt.project import Project
+from vipdopt.simulation import ReplayFDTD
 
 if __name__ == '__main__':
     
@@ -49,6 +55,14 @@
     subparsers = parser.add_subparsers(help='commands', dest='command')
     opt_parser = subparsers.add_parser('optimize')
     gui_parser = subparsers.add_parser('gui')
+    verify_parser = subparsers.add_parser(
+        'verify-gradient',
+        help='Compare the adjoint gradient against finite differences of the solver',
+    )
+    sweep_parser = subparsers.add_parser(
+        'sweep',
+        help='Evaluate the design over a sweep of configuration parameters',
+    )
     
     # Configure optimizer subparser
     opt_parser.add_argument(
@@ -73,21 +87,164 @@
         default='config.yaml',
         help='Configuration file to use in the optimization; defaults to config.yaml',
     )
+    opt_parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Resume the optimization from the latest checkpoint in the project',
+    )
+    opt_parser.add_argument(
+        '--feed',
+        type=Path,
+        default=None,
+        help='Folder in the project directory to write a live progress feed to, '
+        'e.g. for the GUI dashboard',
+    )
     
+    # Configure gradient verification subparser
+    verify_parser.add_argument(
+        '-v',
+        '--verbose',
+        action='store_const',
+        const=True,
+        default=SUPPRESS,
+        help='Enable verbose output.',
+    )
+    verify_parser.add_argument(
+        'directory',
+        type=Path,
+        help='Project directory to use',
+    )
+    verify_parser.add_argument(
+        '--log', type=Path, default=SUPPRESS, help='Path to the log file.'
+    )
+    verify_parser.add_argument(
+        '--config',
+        type=str,
+        default='config.yaml',
+        help='Configuration file to use; defaults to config.yaml',
+    )
+    verify_parser.add_argument(
+        '--voxel',
+        type=lambda s: tuple(int(i) for i in s.split(',')),
+        action='append',
+        default=None,
+        help='Comma-separated index of a design voxel to perturb, e.g. 10,12,3; '
+        'may be repeated. Defaults to randomly chosen voxels',
+    )
+    verify_parser.add_argument(
+        '--num-voxels',
+        type=int,
+        default=8,
+        help='Number of random voxels to perturb if none are given; defaults to 8',
+    )
+    verify_parser.add_argument(
+        '--seed', type=int, default=None, help='Random seed for choosing voxels'
+    )
+    verify_parser.add_argument(
+        '--step',
+        type=float,
+        default=1e-3,
+        help='Perturbation of the design variable; defaults to 1e-3',
+    )
+    verify_parser.add_argument(
+        '--output',
+        type=Path,
+        default='gradient_check.json',
+        help='File in the project directory to save the results to',
+    )
+
+    # Configure sweep subparser
+    sweep_parser.add_argument(
+        '-v',
+        '--verbose',
+        action='store_const',
+        const=True,
+        default=SUPPRESS,
+        help='Enable verbose output.',
+    )
+    sweep_parser.add_argument(
+        'directory',
+        type=Path,
+        help='Project directory to use',
+    )
+    sweep_parser.add_argument(
+        'spec',
+        type=str,
+        help='Sweep specification file in the project directory',
+    )
+    sweep_parser.add_argument(
+        '--log', type=Path, default=SUPPRESS, help='Path to the log file.'
+    )
+    sweep_parser.add_argument(
+        '--config',
+        type=str,
+        default='config.yaml',
+        help='Configuration file to sweep; defaults to config.yaml',
+    )
+    sweep_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of processes reducing monitor data; 0 reduces it in the main '
+        'process. Defaults to one per CPU',
+    )
+    sweep_parser.add_argument(
+        '--output',
+        type=Path,
+        default='sweep.npz',
+        help='File in the project directory to save the results to',
+    )
+    sweep_parser.add_argument(
+        '--plot',
+        action='store_true',
+        help='Plot the results in the project\'s plots folder',
+    )
+
     args = parser.parse_args()
 
     # Set up logging
-    log_file = args.directory / args.log if args.command == 'optimize' else args.log
+    log_file = (
+        args.directory / args.log
+        if args.command in ('optimize', 'verify-gradient', 'sweep')
+        else args.log
+    )
     # Set verbosity
     level = logging.DEBUG if args.verbose else logging.INFO
     vipdopt.logger = setup_logger('global_logger', level, log_file=log_file)
     
     # GUI? 
     if args.command == 'gui':
+        # Only the GUI needs Qt, so don't import it for headless runs
+        from vipdopt.gui import start_gui
+
         sys.exit(start_gui([]))
     elif args.command is None:
         print(parser.format_usage())
         sys.exit(1)
+    elif args.command == 'sweep':
+        cfg = Config.from_file(args.directory / args.config)
+        spec = SweepSpec.from_file(args.directory / args.spec)
+        sweep = Sweep.from_config(
+            spec,
+            cfg,
+            args.directory / 'sweep',
+            root=args.directory,
+            workers=args.workers,
+        )
+        # Replayed sessions don't need lumapi
+        if not isinstance(sweep.solver, ReplayFDTD):
+            vipdopt.lumapi = import_lumapi(
+                cfg['lumapi_filepath_local']
+                if os.getenv('SLURM_JOB_NODELIST') is None
+                else cfg['lumapi_filepath_hpc']
+            )
+        vipdopt.fdtd = sweep.solver
+        sweep.solver.connect(hide=True)
+        sweep.run()
+        sweep.save(args.directory / args.output)
+        if args.plot:
+            sweep.plot(args.directory / 'plots')
+        sys.exit(0)
     
     
     #
@@ -105,20 +262,45 @@
     # 'foms': list of FoM objects, 'weights': array of shape (#FoMs, nλ)
     vipdopt.logger.info('Completed Step 0: Project Setup')
 
-    # Now that config is loaded, set up lumapi
-    if os.getenv('SLURM_JOB_NODELIST') is None:
-        vipdopt.lumapi = import_lumapi(
-            project.config.data['lumapi_filepath_local']
-        )  # Windows (local machine)
-    else:
-        vipdopt.lumapi = import_lumapi(
-            project.config.data['lumapi_filepath_hpc']
-        )  # HPC (Linux)
+    # Now that config is loaded, set up lumapi. Replayed sessions don't need it.
+    if not isinstance(project.optimization.fdtd, ReplayFDTD):
+        if os.getenv('SLURM_JOB_NODELIST') is None:
+            vipdopt.lumapi = import_lumapi(
+                project.config.data['lumapi_filepath_local']
+            )  # Windows (local machine)
+        else:
+            vipdopt.lumapi = import_lumapi(
+                project.config.data['lumapi_filepath_hpc']
+            )  # HPC (Linux)
 
     fdtd = project.optimization.fdtd    # NOTE: - the instantiation is called in optimization.py
     vipdopt.fdtd = fdtd      # Makes it available to global
 
     fdtd.connect(hide=False) # True)
+
+    if args.command == 'verify-gradient':
+        voxels = args.voxel
+        if voxels is None:
+            voxels = select_voxels(project.device.size, args.num_voxels, args.seed)
+        check = verify_gradient(project.optimization, voxels, step=args.step)
+        with open(args.directory / args.output, 'w') as f:
+            json.dump(
+                {k: np.asarray(v).tolist() for k, v in check.items()}, f, indent=4
+            )
+        vipdopt.logger.info(
+            f'Saved gradient check results to {args.directory / args.output}'
+        )
+        sys.exit(0)
+
+    if args.feed is not None:
+        metrics.add_sink(
+            DashboardFeed(args.directory / args.feed), stages=DASHBOARD_STAGES
+        )
+    # When asked to terminate, e.g. by the GUI, stop after the current iteration
+    signal.signal(signal.SIGTERM, lambda *_: project.stop_optimization())
+
+    if args.resume:
+        project.resume_optimization()
     project.start_optimization()
     
     # STL Export final design
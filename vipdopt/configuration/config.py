@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import contextlib
 import json
 from collections import UserDict
+from collections.abc import Iterator, Mapping
 from pathlib import Path
+from typing import Any
 
 import yaml
 
@@ -13,7 +16,93 @@
 
 
 class Config(UserDict):
-    """A generic class for storing parameters from a configuration file."""
+    """A generic class for storing parameters from a configuration file.
+
+    Configs derived from another with `derive` share its parameters until either
+    one is edited, at which point the edited config makes its own copy. Only the
+    top-level mapping is copied; nested values such as lists stay shared, so
+    replace them rather than modifying them in place.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize a Config."""
+        self._batch_depth = 0  # Number of open `batch` blocks
+        self._shared = False  # Whether `data` may be referenced by another config
+        super().__init__(*args, **kwargs)
+
+    def _own_data(self) -> None:
+        """Make sure that `data` isn't shared before modifying it."""
+        if self._shared:
+            self.data = dict(self.data)
+            self._shared = False
+
+    def __setitem__(self, key: Any, item: Any) -> None:
+        """Set the value of a parameter."""
+        self._own_data()
+        super().__setitem__(key, item)
+
+    def __delitem__(self, key: Any) -> None:
+        """Remove a parameter."""
+        self._own_data()
+        super().__delitem__(key)
+
+    def __ior__(self, other: Any) -> Config:
+        """Update with the parameters of another mapping."""
+        self.update(other)
+        return self
+
+    def __copy__(self) -> Config:
+        """Return a copy of this config, sharing its parameters until edited."""
+        return self.derive()
+
+    def _validate(self) -> None:
+        """Check that the parameters are consistent, raising ValueError if not."""
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[Config]:
+        """Group several edits so that the config is only validated once.
+
+        Validation runs when the outermost block exits. If the block raises an
+        exception, or the edited config is invalid, every edit made in the block
+        is undone.
+
+        Yields:
+            (Config): This config.
+        """
+        # Edits in the block copy the parameters first, keeping these intact
+        saved = self.data
+        self._shared = True
+        self._batch_depth += 1
+        try:
+            yield self
+            if self._batch_depth == 1:
+                self._validate()
+        except BaseException:
+            self.data = saved
+            raise
+        finally:
+            self._batch_depth -= 1
+
+    def derive(self, overrides: Mapping[str, Any] | None = None, **kwargs) -> Config:
+        """Return a copy of this config with some parameters replaced.
+
+        The copy shares this config's parameters until either of them is edited,
+        so deriving many variants of one config is cheap.
+
+        Arguments:
+            overrides (Mapping[str, Any] | None): Parameters to set in the copy.
+                Defaults to None.
+            **kwargs: More parameters to set in the copy.
+
+        Returns:
+            (Config): The new config, validated once with its parameters replaced.
+        """
+        variant = self.__class__.__new__(self.__class__)
+        variant.__dict__.update(self.__dict__)
+        variant._batch_depth = 0  # noqa: SLF001
+        self._shared = variant._shared = True  # noqa: SLF001
+        variant.update(overrides or {}, **kwargs)
+        return variant
 
     def __str__(self):
         """Return shorter string version of the Config object."""
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterable
+import copy
+import functools
+from collections.abc import Iterable, Mapping
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, overload
 
@@ -14,7 +16,7 @@
 from overrides import override
 
 from vipdopt.configuration.config import Config
-from vipdopt.configuration.template import TemplateRenderer
+from vipdopt.configuration.template import DEFAULT_MEMO_SIZE, TemplateRenderer
 from vipdopt.utils import ensure_path
 
 # A lookup table that adds additional vertical mesh cells depending on layers
@@ -35,18 +37,24 @@
 
 VERTICAL_LAYERS = 10
 
+# The C implementation of the YAML parser is much faster, if installed
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=DEFAULT_MEMO_SIZE)
+def _parse_derived(output: str) -> dict:
+    """Parse a rendered template, remembering the result for identical outputs."""
+    return yaml.load(output, Loader=_YAML_LOADER)
+
 
 class SonyBayerConfig(Config):
     """Config object specifically for use with the Sony bayer filter optimization."""
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._do_validation = True
-
     @override
     def __setitem__(self, name: str, value: Any) -> None:
         super().__setitem__(name, value)
-        if self._do_validation:
+        # Edits in a batch are validated together at the end
+        if not self._batch_depth:
             self._validate()
 
     @ensure_path
@@ -66,20 +74,49 @@ def update(self, **kwargs: Any) -> None: ...
 
     def update(self, *args, **kwargs: Any) -> None:
         """Update self with values from another dictionary-like object."""
-        self._do_validation = False
-        if len(args) == 0:
-            super().update(**kwargs)
-        else:
-            super().update(args[0], **kwargs)
-        self._do_validation = True
-        self._validate()
+        with self.batch():
+            if len(args) == 0:
+                super().update(**kwargs)
+            else:
+                super().update(args[0], **kwargs)
 
     def derive_params(self, renderer: TemplateRenderer):
         """Derive the parameters that depend on the config files."""
         new_yaml = renderer.render(data=self, pi=np.pi)
-        new_params = yaml.safe_load(new_yaml)
+        # Copy, so that changes to this config don't leak into the parse cache
+        new_params = copy.deepcopy(_parse_derived(new_yaml))
         self.update(new_params)
 
+    @classmethod
+    def derive_variants(
+        cls,
+        base: Mapping[str, Any],
+        variants: Iterable[Mapping[str, Any]],
+        renderer: TemplateRenderer,
+    ) -> list[SonyBayerConfig]:
+        """Create several configs from a base config, deriving their parameters.
+
+        All of the variants are rendered in one batch, so that renders and parses
+        are shared between variants with identical outputs.
+
+        Arguments:
+            base (Mapping[str, Any]): The parameters shared by every variant.
+            variants (Iterable[Mapping[str, Any]]): The parameters each variant
+                overrides.
+            renderer (TemplateRenderer): Renderer with the derived properties
+                template set.
+
+        Returns:
+            (list[SonyBayerConfig]): A config for each variant, in order.
+        """
+        if not isinstance(base, cls):
+            base = cls(base)
+        configs = [base.derive(overrides) for overrides in variants]
+        outputs = renderer.render_many([{'data': cfg} for cfg in configs], pi=np.pi)
+        for cfg, output in zip(configs, outputs, strict=True):
+            cfg.update(copy.deepcopy(_parse_derived(output)))
+        return configs
+
     def _explicit_band_centering(self):
         # Determine the wavelengths that will be directed to each focal area
         self.spectral_focal_plane_map = [
@@ -279,6 +316,7 @@ def _derive_params(self):
         if self.get('do_rejection'):
             self._do_rejection()
 
+    @override
     def _validate(self):
         """Validate the config file and compute conditional attributes."""
         if self.get('border_optimization') and self.get('use_smooth_blur'):
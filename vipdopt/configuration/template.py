@@ -1,35 +1,200 @@
 """Library of code for working with Jinja and rendering templates."""
 
+import hashlib
 import logging
 import os
+import pickle
 import sys
 from argparse import ArgumentParser
-from collections.abc import Callable, Iterable
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
 from pathlib import Path
+from typing import Any
 
 import numpy as np
 import numpy.typing as npt
-from jinja2 import Environment, FileSystemLoader, Undefined
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Undefined,
+    meta,
+    nodes,
+)
 from overrides import override
 
 sys.path.append(os.getcwd())
 
 import vipdopt
 from vipdopt.configuration.config import read_config_file
-from vipdopt.utils import ensure_path, setup_logger
+from vipdopt.utils import PathLike, convert_path, ensure_path, setup_logger
+
+DEFAULT_MEMO_SIZE = 256
+
+# Using any of these attributes of a variable reads all of its keys
+_MAPPING_METHODS = frozenset(name for name in dir(dict) if not name.startswith('_'))
+# Templates using these can read variables that their own source doesn't mention
+_TEMPLATE_REFERENCES = (nodes.Extends, nodes.Include, nodes.Import, nodes.FromImport)
+
+
+def referenced_keys(ast: nodes.Template) -> dict[str, frozenset[str] | None]:
+    """Return the keys of each context variable that a template reads.
+
+    Arguments:
+        ast (nodes.Template): The parsed template.
+
+    Returns:
+        (dict[str, frozenset[str] | None]): Map of the variables the template
+            expects to be passed to the attributes and constant items read from
+            them, or None if the variable is used as a whole (e.g. iterated over
+            or passed to a filter).
+    """
+    names = meta.find_undeclared_variables(ast)
+    keys: dict[str, set[str]] = {name: set() for name in names}
+    lookups = dict.fromkeys(names, 0)
+    whole: set[str] = set()
+
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        target = node.node
+        if not isinstance(target, nodes.Name) or target.name not in keys:
+            continue
+        lookups[target.name] += 1
+        if isinstance(node, nodes.Getattr):
+            key = node.attr
+        elif isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+            key = node.arg.value
+        else:
+            whole.add(target.name)
+            continue
+        if key in _MAPPING_METHODS:
+            whole.add(target.name)
+        keys[target.name].add(key)
+
+    # Any use of a variable other than looking up one of its keys reads all of it
+    for node in ast.find_all(nodes.Name):
+        if node.name in keys and node.ctx == 'load':
+            lookups[node.name] -= 1
+    whole.update(name for name, count in lookups.items() if count < 0)
+
+    return {
+        name: None if name in whole else frozenset(k) for name, k in keys.items()
+    }
+
+
+def fingerprint(value: Any) -> bytes:
+    """Return a digest identifying a value, for use as a cache key.
+
+    Raises:
+        TypeError: If the value cannot be serialized.
+    """
+    if isinstance(value, Mapping):
+        value = list(value.items())  # Iteration order affects the output
+    try:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, AttributeError) as e:
+        raise TypeError(f'Cannot fingerprint value of type {type(value)}') from e
+    return hashlib.blake2b(data, digest_size=16).digest()
 
 
 class TemplateRenderer:
-    """Class for rendering Jinja Templates."""
+    """Class for rendering Jinja Templates.
+
+    Compiled templates are kept in memory by the Jinja environment and, if a
+    bytecode cache directory is given, on disk so that other processes can skip
+    compiling them too. Rendered outputs are memoized, keyed on the values of just
+    the context variables and keys the active template references, so rendering
+    config variants that differ only in unused keys reuses earlier results.
+
+    Attributes:
+        env (Environment): The Jinja environment templates are loaded from.
+        memo_size (int): Maximum number of rendered outputs to remember; 0
+            disables memoization.
+        hits (int): Number of renders served from the memo.
+        misses (int): Number of renders that evaluated the template.
+    """
 
     @ensure_path
-    def __init__(self, src_directory: Path) -> None:
+    def __init__(
+        self,
+        src_directory: Path,
+        bytecode_cache_dir: PathLike | None = None,
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ) -> None:
         """Initialize and TemplateRenderer."""
-        self.env = Environment(loader=FileSystemLoader(str(src_directory)))
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            cache_dir = convert_path(bytecode_cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+        self.env = Environment(
+            loader=FileSystemLoader(str(src_directory)),
+            bytecode_cache=bytecode_cache,
+        )
+        self.memo_size = memo_size
+        self.hits = 0
+        self.misses = 0
+        self._memo: OrderedDict[tuple, str] = OrderedDict()
+        # Keys of each variable the template reads; None if it may read anything
+        self._references: dict[str, frozenset[str] | None] | None = None
+
+    def _memo_key(self, kwargs: dict[str, Any]) -> tuple | None:
+        """Return the memo key of a render, or None if it can't be memoized."""
+        references = self._references
+        if references is None:
+            references = dict.fromkeys(kwargs)
+        parts: list[tuple] = []
+        try:
+            for name in sorted(references):
+                if name not in kwargs:
+                    continue
+                value = kwargs[name]
+                keys = references[name]
+                if keys is not None and isinstance(value, Mapping):
+                    parts.extend(
+                        (name, k, fingerprint(value[k]))
+                        for k in sorted(keys)
+                        if k in value
+                    )
+                else:
+                    parts.append((name, None, fingerprint(value)))
+        except TypeError:
+            return None
+        return (self.template.name, *parts)
 
     def render(self, **kwargs) -> str:
         """Render template with provided data values."""
-        return self.template.render(trim_blocks=True, lstrip_blocks=True, **kwargs)
+        key = self._memo_key(kwargs) if self.memo_size > 0 else None
+        if key is not None and key in self._memo:
+            self.hits += 1
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        self.misses += 1
+        output = self.template.render(trim_blocks=True, lstrip_blocks=True, **kwargs)
+        if key is not None:
+            self._memo[key] = output
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return output
+
+    def render_many(self, variants: Iterable[dict[str, Any]], **kwargs) -> list[str]:
+        """Render the template once for each of several sets of data values.
+
+        Variants that reference the same values are only rendered once.
+
+        Arguments:
+            variants (Iterable[dict[str, Any]]): The data values of each render.
+            **kwargs: Data values shared by every render; overridden by those of
+                the variants.
+
+        Returns:
+            (list[str]): The rendered output of each variant, in order.
+        """
+        return [self.render(**{**kwargs, **variant}) for variant in variants]
+
+    def clear_memo(self) -> None:
+        """Forget all memoized outputs."""
+        self._memo.clear()
 
     @ensure_path
     def render_to_file(self, fname: Path, **kwargs):
@@ -45,10 +210,17 @@ def render_to_file(self, fname: Path, **kwargs):
     def set_template(self, template: Path) -> None:
         """Set the active template for the renderer."""
         self.template = self.env.get_template(template.name)
+        source, _, _ = self.env.loader.get_source(self.env, template.name)
+        ast = self.env.parse(source)
+        self._references = (
+            None if any(ast.find_all(_TEMPLATE_REFERENCES)) else referenced_keys(ast)
+        )
 
     def register_filter(self, name: str, func: Callable) -> None:
         """Add or reassign a filter to use in the environment."""
         self.env.filters[name] = func
+        # Outputs rendered with the old filter are out of date
+        self.clear_memo()
 
 
 class SonyBayerRenderer(TemplateRenderer):
@@ -56,9 +228,9 @@ class SonyBayerRenderer(TemplateRenderer):
 
     @ensure_path
     @override
-    def __init__(self, src_directory: Path) -> None:
+    def __init__(self, src_directory: Path, **kwargs) -> None:
         """Initialize a SonyBayerRenderer."""
-        super().__init__(src_directory)
+        super().__init__(src_directory, **kwargs)
         self.register_filter('linspace', np.linspace)
         self.register_filter('sin', np.sin)
         self.register_filter('tan', np.tan)
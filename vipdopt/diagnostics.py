@@ -0,0 +1,227 @@
+"""Lazily computed diagnostic statistics and the stream they are published to."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Collection
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+import vipdopt
+from vipdopt.utils import PathLike, convert_path
+
+# Below DEBUG, so that these statistics are not computed by default
+DIAGNOSTIC = 5
+logging.addLevelName(DIAGNOSTIC, 'DIAGNOSTIC')
+
+MetricsSink = Callable[[str, dict[str, Any]], None]
+
+FEED_NAME = 'feed.jsonl'
+# Stages published by the optimization for live dashboards
+DASHBOARD_STAGES = ('progress', 'focal_plane')
+_IMAGE_TAG = '__image__'
+
+
+class MetricsStream:
+    """Publishes per-stage statistics to the logger and any registered sinks.
+
+    Statistics are passed as zero-argument callables and are only evaluated if the
+    logger would emit them or at least one sink is registered, so expensive
+    reductions over large arrays cost nothing when nobody is listening.
+
+    Attributes:
+        level (int): The logging level to log statistics at.
+    """
+
+    def __init__(self, level: int = DIAGNOSTIC) -> None:
+        """Initialize a MetricsStream."""
+        self.level = level
+        self._sinks: list[MetricsSink] = []
+        self._stages: dict[MetricsSink, frozenset[str]] = {}
+
+    def add_sink(self, sink: MetricsSink, stages: Collection[str] | None = None):
+        """Register a function to be called with (stage, stats) for each record.
+
+        Arguments:
+            sink (MetricsSink): The function to call.
+            stages (Collection[str] | None): If provided, only records of these
+                stages are sent to the sink, and statistics of other stages are not
+                computed on its behalf. Defaults to None, sending every record.
+        """
+        self._sinks.append(sink)
+        if stages is not None:
+            self._stages[sink] = frozenset(stages)
+
+    def remove_sink(self, sink: MetricsSink):
+        """Stop sending records to a sink."""
+        self._sinks.remove(sink)
+        self._stages.pop(sink, None)
+
+    def _listeners(self, stage: str | None) -> list[MetricsSink]:
+        """Return the sinks that accept records of a stage (of any stage if None)."""
+        return [
+            sink
+            for sink in self._sinks
+            if stage is None or stage in self._stages.get(sink, (stage,))
+        ]
+
+    def enabled(self, stage: str | None = None) -> bool:
+        """Return whether recorded statistics would be consumed by anything.
+
+        Arguments:
+            stage (str | None): If provided, only consider sinks accepting records
+                of this stage. Defaults to None.
+        """
+        return bool(self._listeners(stage)) or vipdopt.logger.isEnabledFor(self.level)
+
+    def record(self, stage: str, **stats: Callable[[], Any] | Any):
+        """Compute and publish statistics for a stage, if anyone is listening.
+
+        Arguments:
+            stage (str): Name of the stage the statistics belong to.
+            **stats (Callable[[], Any] | Any): The statistics to record. Callables
+                are evaluated lazily; other values are recorded as is.
+        """
+        if not self.enabled(stage):
+            return
+        values = {
+            name: stat() if callable(stat) else stat for name, stat in stats.items()
+        }
+        vipdopt.logger.log(
+            self.level,
+            f'{stage}: ' + ', '.join(f'{name}={val}' for name, val in values.items()),
+        )
+        for sink in self._listeners(stage):
+            sink(stage, values)
+
+
+class JSONLinesSink:
+    """Metrics sink that appends each record to a file as a line of JSON."""
+
+    def __init__(self, fname: PathLike) -> None:
+        """Initialize a JSONLinesSink."""
+        self.path: Path = convert_path(fname)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, stage: str, stats: dict[str, Any]):
+        """Write a record to file."""
+        record = {'time': time.time(), 'stage': stage, **stats}
+        with self.path.open('a') as f:
+            f.write(json.dumps(record, default=_to_json) + '\n')
+
+
+class DashboardFeed:
+    """Metrics sink feeding a live dashboard through the files in a folder.
+
+    Each record is appended to `feed.jsonl` as a line of JSON. Images in a record,
+    i.e. arrays of two or more dimensions, are instead written to
+    `<stage>.<name>.npy`, replacing the previous image, and referenced from the
+    record; so only the latest image is kept and the folder does not grow with
+    the length of the run. Dashboards tail the feed with a FeedReader.
+
+    Attributes:
+        directory (Path): The folder the feed is written to.
+        path (Path): The feed's log of records.
+    """
+
+    def __init__(self, directory: PathLike) -> None:
+        """Initialize a DashboardFeed, starting a new feed in the folder."""
+        self.directory: Path = convert_path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / FEED_NAME
+        self.path.unlink(missing_ok=True)
+
+    def __call__(self, stage: str, stats: dict[str, Any]):
+        """Write a record to the feed."""
+        record: dict[str, Any] = {'time': time.time(), 'stage': stage}
+        for name, value in stats.items():
+            if isinstance(value, np.ndarray) and value.ndim >= 2:  # noqa: PLR2004
+                fname = f'{stage}.{name}.npy'
+                # Write the whole image before replacing the old one, so that
+                # readers never see a partial file
+                tmp = self.directory / f'.{fname}.tmp'
+                with tmp.open('wb') as f:
+                    np.save(f, value, allow_pickle=False)
+                os.replace(tmp, self.directory / fname)
+                record[name] = {_IMAGE_TAG: fname}
+            else:
+                record[name] = value
+        with self.path.open('a') as f:
+            f.write(json.dumps(record, default=_to_json) + '\n')
+
+
+class FeedReader:
+    """Reads the records added to a DashboardFeed since it was last polled.
+
+    Attributes:
+        directory (Path): The folder the feed is written to.
+        path (Path): The feed's log of records.
+    """
+
+    def __init__(self, directory: PathLike) -> None:
+        """Initialize a FeedReader."""
+        self.directory: Path = convert_path(directory)
+        self.path = self.directory / FEED_NAME
+        self._offset = 0
+        self._inode: int | None = None
+
+    def poll(self) -> list[dict[str, Any]]:
+        """Return the records written since the last poll.
+
+        Only complete lines are read, so records being written are returned by the
+        next poll. If the feed has been restarted, all of its records are returned.
+        Images are returned as the path of their file, which holds the latest image.
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._inode = stat.st_ino
+            self._offset = 0
+        with self.path.open('rb') as f:
+            f.seek(self._offset)
+            data = f.read(stat.st_size - self._offset)
+        end = data.rfind(b'\n') + 1
+        self._offset += end
+        records = [json.loads(line) for line in data[:end].splitlines() if line]
+        for record in records:
+            for name, value in record.items():
+                if isinstance(value, dict) and _IMAGE_TAG in value:
+                    record[name] = self.directory / value[_IMAGE_TAG]
+        return records
+
+
+def _to_json(o: Any) -> Any:
+    """Convert numpy types into JSON serializable objects."""
+    if isinstance(o, np.ndarray | np.generic):
+        return o.tolist()
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def component_abs_mean(a: npt.NDArray) -> npt.NDArray:
+    """Return the mean absolute value of each component along the first axis.
+
+    Computes |a| once for the whole array rather than once per component.
+    """
+    return np.abs(a).reshape(len(a), -1).mean(axis=1)
+
+
+def abs_stats(a: npt.ArrayLike) -> dict[str, float]:
+    """Return the mean, min, and max of |a| from a single absolute value pass."""
+    mag = np.abs(a)
+    return {
+        'mean': float(mag.mean()),
+        'min': float(mag.min()),
+        'max': float(mag.max()),
+    }
+
+
+# Global metrics stream used throughout the package
+metrics = MetricsStream()
@@ -1 +1,31 @@
 """Subpackage containing support code for evaluating optimization results."""
+
+from vipdopt.eval.spectrum import (
+    FieldSlice,
+    evaluate_spectra,
+    job_monitor_files,
+    load_npz,
+)
+from vipdopt.eval.sweep import (
+    Sweep,
+    SweepMetric,
+    SweepParameter,
+    SweepResults,
+    SweepSpec,
+    load_sweep,
+    reduce_monitor_data,
+)
+
+__all__ = [
+    'FieldSlice',
+    'Sweep',
+    'SweepMetric',
+    'SweepParameter',
+    'SweepResults',
+    'SweepSpec',
+    'evaluate_spectra',
+    'job_monitor_files',
+    'load_npz',
+    'load_sweep',
+    'reduce_monitor_data',
+]
@@ -10,6 +10,7 @@
 import copy
 import os
 import sys
+from pathlib import Path
 
 import matplotlib.pyplot as plt  # type: ignore
 import numpy as np
@@ -24,6 +25,12 @@
 # # Gets all parameters from config file - store all those variables within the namespace. Editing cfg edits it for all modules accessing it
 # # See https://docs.python.org/3/faq/programming.html#how-do-i-share-global-variables-across-modules
 import vipdopt
+from vipdopt.eval.spectrum import (
+    band_midpoints,
+    field_image,
+    nearest_index,
+    wavelength_label,
+)
 
 # * Template
 # The structure of the dictionaries we are passing into these functions are as follows:
@@ -318,9 +325,14 @@ def export_plot_config(
 
 
 class SweepPlot(BasicPlot):
-    def __init__(self, plot_data, slice_coords):
+    def __init__(self, plot_data, slice_coords, cutoff_1d_sweep_offset=None):
         """Initializes the plot_config variable of this class object and also the Plot object."""
         super().__init__(plot_data)
+        self.sweep_parameters = plot_data['r'][0]
+        # Number of points to cut off the start and end of each line
+        if cutoff_1d_sweep_offset is None:
+            cutoff_1d_sweep_offset = [0, 0]
+        self.cutoff_1d_sweep_offset = cutoff_1d_sweep_offset
 
         # Whichever entry is a slice means that variable in r_vectors is the x-axis of this plot
         r_vector_value_idx = next(
@@ -353,8 +365,11 @@ def append_line_data(
                 'marker_style': marker_style,
             }
 
-            y_plot_data = self.f_vectors[plot_idx]['var_values']
-            y_plot_data = np.reshape(y_plot_data, (len(y_plot_data), 1))
+            # Each f-vector holds an N-D array of values with an axis per parameter
+            y_plot_data = np.asarray(self.f_vectors[plot_idx]['var_values'])
+            y_stdevs = np.broadcast_to(
+                self.f_vectors[plot_idx]['var_stdevs'], y_plot_data.shape
+            )[tuple(slice_coords)]
             y_plot_data = y_plot_data[tuple(slice_coords)]
 
             normalization_factor = np.max(y_plot_data) if normalize_against_max else 1
@@ -362,8 +377,8 @@ def append_line_data(
             line_data['x_axis']['values'] = self.r_vectors['var_values']
             # line_data['cutoff'] = slice(0, len(line_data['x_axis']['values']))
             line_data['cutoff'] = slice(
-                0 + lmp.cutoff_1d_sweep_offset[0],
-                len(line_data['x_axis']['values']) + lmp.cutoff_1d_sweep_offset[1],
+                0 + self.cutoff_1d_sweep_offset[0],
+                len(line_data['x_axis']['values']) + self.cutoff_1d_sweep_offset[1],
             )
 
             line_data['color'] = plot_colors[plot_idx]
@@ -384,13 +399,13 @@ def append_line_data(
 
                 line_data_2['x_axis']['values'] = self.r_vectors['var_values']
                 line_data_2['y_axis']['values'] = (
-                    y_plot_data + self.f_vectors[plot_idx]['var_stdevs']
+                    y_plot_data + y_stdevs
                 ) / normalization_factor
                 # line_data_2['cutoff'] = slice(0, len(line_data_2['x_axis']['values']))
                 line_data_2['cutoff'] = slice(
-                    0 + lmp.cutoff_1d_sweep_offset[0],
+                    0 + self.cutoff_1d_sweep_offset[0],
                     len(line_data_2['x_axis']['values'])
-                    + lmp.cutoff_1d_sweep_offset[1],
+                    + self.cutoff_1d_sweep_offset[1],
                 )
 
                 colors_so_far = plt.rcParams['axes.prop_cycle'].by_key()['color']
@@ -400,7 +415,7 @@ def append_line_data(
 
                 line_data_3 = copy.deepcopy(line_data_2)
                 line_data_3['y_axis']['values'] = (
-                    y_plot_data - self.f_vectors[plot_idx]['var_stdevs']
+                    y_plot_data - y_stdevs
                 ) / normalization_factor
                 self.plot_config['lines'].append(line_data_3)
 
@@ -408,7 +423,7 @@ def assign_title(self, title_string):
         """Replaces title of plot.
         Overwriting the method in BasePlot.
         """
-        for sweep_param_value in list(lmp.sweep_parameters.values()):
+        for sweep_param_value in list(self.sweep_parameters.values()):
             optimized_value = sweep_param_value['var_values'][
                 sweep_param_value['peakInd']
             ]
@@ -426,7 +441,7 @@ def assign_axis_labels(self, slice_coords, y_label_string):
         sweep_variable_idx = next(
             index for (index, item) in enumerate(slice_coords) if type(item) is slice
         )
-        self.plot_config['x_axis']['label'] = list(lmp.sweep_parameters.values())[
+        self.plot_config['x_axis']['label'] = list(self.sweep_parameters.values())[
             sweep_variable_idx
         ]['var_name']
         self.plot_config['y_axis']['label'] = y_label_string
@@ -453,7 +468,9 @@ def export_plot_config(
         if not os.path.isdir(SAVE_LOCATION):
             os.makedirs(SAVE_LOCATION)
 
-        param_filename_str = lmp.create_parameter_filename_string(slice_coords)
+        param_filename_str = create_parameter_filename_string(
+            self.sweep_parameters, slice_coords
+        )
         plt.savefig(
             SAVE_LOCATION + f'/{filename}{param_filename_str}.png', bbox_inches='tight'
         )
@@ -465,6 +482,21 @@ def export_plot_config(
             plt.close()
 
 
+def create_parameter_filename_string(sweep_parameters, slice_coords):
+    """Returns a string identifying the values of the parameters a sweep plot is fixed at,
+    i.e. those whose entry in slice_coords is an index rather than a slice.
+    """
+    param_filename_str = ''
+    for sweep_param, coord in zip(sweep_parameters.values(), slice_coords):
+        if isinstance(coord, slice):
+            continue
+        value = sweep_param['var_values'][coord]
+        param_filename_str += (
+            '_' + sweep_param['short_form'] + '_' + sweep_param['formatStr'] % value
+        )
+    return param_filename_str
+
+
 # * Functions that call one of the Plot classes
 
 
@@ -963,9 +995,13 @@ def plot_Enorm_focal_plane_image_spectrum(
     plot_folder,
     plot_wavelengths=None,
     ignore_opp_polarization=True,
+    num_bands=3,
 ):
     """For the given job index, plots the E-norm f.p. image at specific input spectra, corresponding to that job.
     Note: Includes focal scatter region.
+
+    To plot many jobs without loading all of their fields, use
+    `vipdopt.eval.spectrum.evaluate_spectra` instead.
     """
     r_vectors = plot_data['r']
     f_vectors = plot_data['f']
@@ -974,89 +1010,37 @@ def plot_Enorm_focal_plane_image_spectrum(
 
     if plot_wavelengths is None:
         # We split the wavelength range into equal bands, and grab their midpoints.
-        # plot_wavelengths = [lambda_min_um, lambda_values_um[int(len(lambda_values_um/2))]lambda_max_um]
-        spectral_band_midpoints = np.multiply(
-            gp.cv.num_points_per_band, np.arange(0.5, gp.cv.num_bands + 0.5)
-        ).astype(
-            int
-        )  # This fails if num_points_per_band and num_bands are different than what was optimized
-        plot_wavelengths = np.array(wl_vector)[spectral_band_midpoints].tolist()
+        plot_wavelengths = band_midpoints(wl_vector, num_bands)
 
     if ignore_opp_polarization:
         plot_wavelengths = plot_wavelengths[:-1]
 
-    for plot_wl in plot_wavelengths:
-        plot_wl = float(plot_wl)
+    # If the monitor area is rectangular, truncate to a square
+    max_spatial_idx = np.min(np.shape(f_vectors[0]['var_values'])[0:2])
+    x = np.squeeze(r_vectors[0]['var_values'])[0:max_spatial_idx] * 1e6
+    y = np.squeeze(r_vectors[1]['var_values'])[0:max_spatial_idx] * 1e6
 
-        fig, ax = plt.subplots()
+    plot_subfolder = os.path.join(plot_folder, 'Enorm_fp_image_spectra')
+    os.makedirs(plot_subfolder, exist_ok=True)
+    job_name = Path(job_names[job_idx]).stem
 
-        # Find the index of plot_wl in the wl_vector
-        wl_index = min(range(len(wl_vector)), key=lambda i: abs(wl_vector[i] - plot_wl))
-
-        # If the monitor area is rectangular, truncate to a square
-        max_spatial_idx = np.min(np.shape(f_vectors[0]['var_values'])[0:2])
-        r_vectors[0]['var_values'] = r_vectors[0]['var_values'][0:max_spatial_idx]
-        r_vectors[1]['var_values'] = r_vectors[1]['var_values'][0:max_spatial_idx]
-
-        Y_grid, X_grid = np.meshgrid(
-            np.squeeze(r_vectors[0]['var_values']) * 1e6,
-            np.squeeze(r_vectors[1]['var_values']) * 1e6,
-        )
-        c = ax.pcolormesh(
-            X_grid,
-            Y_grid,
+    fig = None
+    for plot_wl in plot_wavelengths:
+        wl_index = nearest_index(wl_vector, float(plot_wl))
+        wl_str = wavelength_label(float(plot_wl))
+        fig = field_image(
             f_vectors[0]['var_values'][0:max_spatial_idx, 0:max_spatial_idx, wl_index],
-            cmap='jet',
-            shading='auto',
-        )  # cmap='RdYlBu_r' is also good
-        plt.gca().set_aspect('equal')
-
-        wl_str = (
-            f'{plot_wl * 1e9:.0f} nm' if plot_wl < 1e-6 else f'{plot_wl * 1e6:.3f} um'
+            ('x (um)', x),
+            ('y (um)', y),
+            r'$E_{norm}$' + r' at Focal Plane: $\lambda = $ ' + f'{wl_str}',
         )
-        title_string = r'$E_{norm}$' + r' at Focal Plane: $\lambda = $ ' + f'{wl_str}'
-        plt.title(title_string)
-        plt.xlabel('x (um)')
-        plt.ylabel('y (um)')
-
-        divider = make_axes_locatable(ax)
-        cax = divider.append_axes('right', size='5%', pad=0.25)
-        fig.colorbar(c, cax=cax)
-
-        fig_width = 8.0
-        fig_height = fig_width * 1.0
-        l = ax.figure.subplotpars.left
-        r = ax.figure.subplotpars.right
-        t = ax.figure.subplotpars.top
-        b = ax.figure.subplotpars.bottom
-        figw = float(fig_width) / (r - l)
-        figh = float(fig_height) / (t - b)
-        ax.figure.set_size_inches(figw, figh, forward=True)
-        plt.tight_layout()
-
-        # plt.show(block=False)
-        # plt.show()
-
-        plot_subfolder_name = 'Enorm_fp_image_spectra'
-        if not os.path.isdir(plot_folder + '/' + plot_subfolder_name):
-            os.makedirs(plot_folder + '/' + plot_subfolder_name)
-
-        plt.savefig(
-            plot_folder
-            + '/'
-            + plot_subfolder_name
-            + '/'
-            + utility.isolate_filename(job_names[job_idx]).replace('.fsp', '')
-            + '_'
-            + f'{wl_str}'
-            + '.png',
+        fig.savefig(
+            os.path.join(plot_subfolder, f'{job_name}_{wl_str}.png'),
             bbox_inches='tight',
         )
         vipdopt.logger.info('Exported: Enorm Focal Plane Image at wavelength ' + wl_str)
 
-        plt.close()
-
-    return fig, ax
+    return fig, None if fig is None else fig.axes[0]
 
 
 def plot_device_cross_section_spectrum(
@@ -1067,10 +1051,14 @@ def plot_device_cross_section_spectrum(
     plot_folder,
     plot_wavelengths=None,
     ignore_opp_polarization=True,
+    num_bands=3,
 ):
-    """For the given job index, plots the device cross section image plots at specific input spectra, corresponding to that job."""
-    import gc
+    """For the given job index, plots the device cross section image plots at specific input spectra, corresponding to that job.
 
+    Each figure is drawn without pyplot and dropped once saved, so memory use does not
+    grow with the number of plots. To plot many jobs without loading all of their
+    fields, use `vipdopt.eval.spectrum.evaluate_spectra` instead.
+    """
     r_vectors = plot_data['r']
     f_vectors = plot_data['f']
     lambda_vectors = plot_data['lambda']
@@ -1078,231 +1066,79 @@ def plot_device_cross_section_spectrum(
 
     if plot_wavelengths is None:
         # We split the wavelength range into equal bands, and grab their midpoints.
-        # plot_wavelengths = [lambda_min_um, lambda_values_um[int(len(lambda_values_um/2))]lambda_max_um]
-        spectral_band_midpoints = np.multiply(
-            gp.cv.num_points_per_band, np.arange(0.5, gp.cv.num_bands + 0.5)
-        ).astype(
-            int
-        )  # This fails if num_points_per_band and num_bands are different than what was optimized
-        plot_wavelengths = np.array(wl_vector)[spectral_band_midpoints].tolist()
+        plot_wavelengths = band_midpoints(wl_vector, num_bands)
 
     if ignore_opp_polarization:
         plot_wavelengths = plot_wavelengths[:-1]
 
-    for device_cross_idx in range(6):
-        # * Create E-norm images
-        for plot_wl in plot_wavelengths:
-            plot_wl = float(plot_wl)
-
-            fig, ax = plt.subplots()
-
-            is_x_slice = False
-            y_grid = r_vectors[device_cross_idx * 3 + 2][
-                'var_values'
-            ]  # Plot the z-axis as the vertical
-            x_grid = r_vectors[
-                device_cross_idx * 3
-            ][
-                'var_values'
-            ]  # Check if it's the x-axis or y-axis that is the slice; plot the non-slice as the horizontal of the image plot
-            slice_val = r_vectors[device_cross_idx * 3 + 1]['var_values']
-            slice_str = '$y = '
-            if isinstance(x_grid, int | float):
-                is_x_slice = True
-                x_grid = r_vectors[device_cross_idx * 3 + 1]['var_values']
-                slice_val = r_vectors[device_cross_idx * 3]['var_values']
-                slice_str = '$x = '
-            slice_str += f'{slice_val:.2e}$; '
-
-            # Find the index of plot_wl in the wl_vector
-            wl_index = min(
-                range(len(wl_vector)), key=lambda i: abs(wl_vector[i] - plot_wl)
-            )
+    plot_subfolder = os.path.join(plot_folder, 'device_cross_section_spectra')
+    os.makedirs(plot_subfolder, exist_ok=True)
+    job_name = Path(job_names[job_idx]).stem
+    display_vector_labels = ['x', 'y', 'z']
 
-            Y_grid, X_grid = np.meshgrid(
-                np.squeeze(y_grid) * 1e6, np.squeeze(x_grid) * 1e6
-            )
-            c = ax.pcolormesh(
-                X_grid,
-                Y_grid,
-                f_vectors[device_cross_idx * 2]['var_values'][:, :, wl_index],
-                cmap='jet',
-                shading='auto',
-            )  # cmap='RdYlBu_r' is also good
-            plt.axhline(0, color='black', linestyle='-', linewidth=2.2)
-            plt.gca().set_aspect('auto')
-
-            wl_str = (
-                f'{plot_wl * 1e9:.0f} nm'
-                if plot_wl < 1e-6
-                else f'{plot_wl * 1e6:.3f} um'
-            )
-            title_string = (
-                r'$E_{norm}$'
-                + ', Device Cross-Section:\n'
-                + slice_str
-                + r'$\lambda = $ '
-                + f'{wl_str}'
-            )
-            plt.title(title_string)
-            plt.xlabel('y (um)' if is_x_slice else 'x (um)')
-            plt.ylabel('z (um)')
-
-            divider = make_axes_locatable(ax)
-            cax = divider.append_axes('right', size='5%', pad=0.25)
-            fig.colorbar(c, cax=cax)
-
-            fig_width = 8.0
-            fig_height = fig_width / np.shape(X_grid)[0] * np.shape(X_grid)[1]
-            l = ax.figure.subplotpars.left
-            r = ax.figure.subplotpars.right
-            t = ax.figure.subplotpars.top
-            b = ax.figure.subplotpars.bottom
-            figw = float(fig_width) / (r - l)
-            figh = float(fig_height) / (t - b)
-            ax.figure.set_size_inches(figw, figh, forward=True)
-            plt.tight_layout()
-
-            # plt.show(block=False)
-            # plt.show()
-
-            plot_subfolder_name = 'device_cross_section_spectra'
-            if not os.path.isdir(plot_folder + '/' + plot_subfolder_name):
-                os.makedirs(plot_folder + '/' + plot_subfolder_name)
-
-            plt.savefig(
-                plot_folder
-                + '/'
-                + plot_subfolder_name
-                + '/'
-                + utility.isolate_filename(job_names[job_idx]).replace('.fsp', '')
-                + '_Enorm_'
-                + f'{device_cross_idx}'
-                + '_'
-                + f'{wl_str}'
-                + '.png',
-                bbox_inches='tight',
-            )
-            vipdopt.logger.info(
-                f'Exported: Device Cross Section Enorm Image {device_cross_idx} at wavelength '
-                + wl_str
+    fig = None
+    for device_cross_idx in range(6):
+        # Plot the z-axis as the vertical. Check if it's the x-axis or y-axis that is
+        # the slice; plot the non-slice as the horizontal of the image plot
+        z_grid = r_vectors[device_cross_idx * 3 + 2]['var_values']
+        x_grid = r_vectors[device_cross_idx * 3]['var_values']
+        slice_val = r_vectors[device_cross_idx * 3 + 1]['var_values']
+        horizontal_label = 'x (um)'
+        slice_str = '$y = '
+        if isinstance(x_grid, int | float):
+            x_grid = r_vectors[device_cross_idx * 3 + 1]['var_values']
+            slice_val = r_vectors[device_cross_idx * 3]['var_values']
+            horizontal_label = 'y (um)'
+            slice_str = '$x = '
+        slice_str += f'{slice_val:.2e}$; '
+        horizontal = (horizontal_label, np.squeeze(x_grid) * 1e6)
+        vertical = ('z (um)', np.squeeze(z_grid) * 1e6)
+
+        # * Create E-norm images, then images of the real part of each E component
+        images = [('Enorm', r'$E_{norm}$', f_vectors[device_cross_idx * 2], None)]
+        images.extend(
+            (
+                f'realE{label}',
+                f'$Re(E_{label})$',
+                f_vectors[device_cross_idx * 2 + 1],
+                component,
             )
-
-            plt.close()
-
-        # * Create real_E_x images
-        display_vector_labels = ['x', 'y', 'z']
-        display_vector_component = 0  # 0 for x, 1 for y, 2 for z
-
-        for display_vector_component in range(3):
+            for component, label in enumerate(display_vector_labels)
+        )
+        for file_label, quantity, f_vector, component in images:
             for plot_wl in plot_wavelengths:
-                plot_wl = float(plot_wl)
-
-                fig, ax = plt.subplots()
-
-                is_x_slice = False
-                y_grid = r_vectors[device_cross_idx * 3 + 2][
-                    'var_values'
-                ]  # Plot the z-axis as the vertical
-                x_grid = r_vectors[
-                    device_cross_idx * 3
-                ][
-                    'var_values'
-                ]  # Check if it's the x-axis or y-axis that is the slice; plot the non-slice as the horizontal of the image plot
-                slice_val = r_vectors[device_cross_idx * 3 + 1]['var_values']
-                slice_str = '$y = '
-                if isinstance(x_grid, int | float):
-                    is_x_slice = True
-                    x_grid = r_vectors[device_cross_idx * 3 + 1]['var_values']
-                    slice_val = r_vectors[device_cross_idx * 3]['var_values']
-                    slice_str = '$x = '
-                slice_str += f'{slice_val:.2e}$; '
-
-                # Find the index of plot_wl in the wl_vector
-                wl_index = min(
-                    range(len(wl_vector)), key=lambda i: abs(wl_vector[i] - plot_wl)
-                )
-
-                Y_grid, X_grid = np.meshgrid(
-                    np.squeeze(y_grid) * 1e6, np.squeeze(x_grid) * 1e6
-                )
-                c = ax.pcolormesh(
-                    X_grid,
-                    Y_grid,
-                    np.real(
-                        f_vectors[device_cross_idx * 2 + 1]['var_values'][
-                            display_vector_component
-                        ][:, :, wl_index]
-                    ),
-                    cmap='jet',
-                    shading='auto',
-                )  # cmap='RdYlBu_r' is also good
-                plt.axhline(0, color='black', linestyle='-', linewidth=2.2)
-                plt.gca().set_aspect('auto')
-
-                wl_str = (
-                    f'{plot_wl * 1e9:.0f} nm'
-                    if plot_wl < 1e-6
-                    else f'{plot_wl * 1e6:.3f} um'
-                )
-                title_string = (
-                    r'$Re(E_x)$'
+                wl_index = nearest_index(wl_vector, float(plot_wl))
+                wl_str = wavelength_label(float(plot_wl))
+                values = f_vector['var_values']
+                if component is None:
+                    image = values[:, :, wl_index]
+                else:
+                    image = np.real(values[component][:, :, wl_index])
+                fig = field_image(
+                    image,
+                    horizontal,
+                    vertical,
+                    quantity
                     + ', Device Cross-Section:\n'
                     + slice_str
                     + r'$\lambda = $ '
-                    + f'{wl_str}'
+                    + f'{wl_str}',
+                    aspect='auto',
+                    hline=0,
                 )
-                plt.title(title_string)
-                plt.xlabel('y (um)' if is_x_slice else 'x (um)')
-                plt.ylabel('z (um)')
-
-                divider = make_axes_locatable(ax)
-                cax = divider.append_axes('right', size='5%', pad=0.25)
-                fig.colorbar(c, cax=cax)
-
-                fig_width = 8.0
-                fig_height = fig_width / np.shape(X_grid)[0] * np.shape(X_grid)[1]
-                l = ax.figure.subplotpars.left
-                r = ax.figure.subplotpars.right
-                t = ax.figure.subplotpars.top
-                b = ax.figure.subplotpars.bottom
-                figw = float(fig_width) / (r - l)
-                figh = float(fig_height) / (t - b)
-                ax.figure.set_size_inches(figw, figh, forward=True)
-                plt.tight_layout()
-
-                # plt.show(block=False)
-                # plt.show()
-
-                plot_subfolder_name = 'device_cross_section_spectra'
-                if not os.path.isdir(plot_folder + '/' + plot_subfolder_name):
-                    os.makedirs(plot_folder + '/' + plot_subfolder_name)
-
-                plt.savefig(
-                    plot_folder
-                    + '/'
-                    + plot_subfolder_name
-                    + '/'
-                    + utility.isolate_filename(job_names[job_idx]).replace('.fsp', '')
-                    + '_realE'
-                    + f'{display_vector_labels[display_vector_component]}'
-                    + '_'
-                    + f'{device_cross_idx}'
-                    + '_'
-                    + f'{wl_str}'
-                    + '.png',
+                fig.savefig(
+                    os.path.join(
+                        plot_subfolder,
+                        f'{job_name}_{file_label}_{device_cross_idx}_{wl_str}.png',
+                    ),
                     bbox_inches='tight',
                 )
                 vipdopt.logger.info(
-                    f'Exported: Device Cross Section E{display_vector_labels[display_vector_component]}_real Image {device_cross_idx} at wavelength '
-                    + wl_str
+                    f'Exported: Device Cross Section {file_label} Image '
+                    f'{device_cross_idx} at wavelength {wl_str}'
                 )
 
-        plt.close()
-
-    gc.collect()
-
-    return fig, ax
+    return fig, None if fig is None else fig.axes[0]
 
 
 def plot_crosstalk_power_spectrum(
@@ -1364,7 +1200,7 @@ def plot_sorting_transmission_sweep_1d(
     """
     if cutoff_1d_sweep_offset is None:
         cutoff_1d_sweep_offset = [0, 0]
-    sp = SweepPlot(plot_data, slice_coords)
+    sp = SweepPlot(plot_data, slice_coords, cutoff_1d_sweep_offset)
 
     # plot_colors = ['blue', 'green', 'red', 'gray']
     # plot_labels = ['Blue', 'Green (x-pol.)', 'Red', 'Green (y-pol.)']
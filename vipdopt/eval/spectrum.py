@@ -0,0 +1,452 @@
+"""Streaming evaluation of the field spectra saved by simulation jobs.
+
+Field images at several wavelengths are plotted for every job of an evaluation,
+e.g. the E-field at the focal plane or across the device. Rather than gathering
+every job's fields in memory first, each job's monitor files are memory-mapped,
+reduced to the plotted planes and rendered in worker processes, with a bounded
+number of tasks in flight. Only the plane being drawn is ever read from disk, so
+memory use does not grow with the number of jobs or wavelengths.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import struct
+import zipfile
+from collections.abc import Iterator, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any
+
+import matplotlib as mpl  # type: ignore
+import numpy as np
+import numpy.typing as npt
+from matplotlib.figure import Figure  # type: ignore
+from mpl_toolkits.axes_grid1 import make_axes_locatable  # type: ignore
+
+import vipdopt
+from vipdopt.diagnostics import metrics
+from vipdopt.simulation import LumericalSimulation
+from vipdopt.utils import PathLike, convert_path
+
+AXES = 'xyz'
+FIELD_QUANTITIES = {
+    'enorm': r'$E_{norm}$',
+    'real_ex': r'$Re(E_x)$',
+    'real_ey': r'$Re(E_y)$',
+    'real_ez': r'$Re(E_z)$',
+}
+# Same style as the plotter's, without changing the global matplotlib settings
+PLOT_STYLE = {'font.weight': 'normal', 'font.size': 20}
+FIGURE_WIDTH = 8.0
+
+# Layout of a zip archive's local file header
+_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+def load_npz(path: PathLike, mmap: bool = True) -> dict[str, Any]:
+    """Return the arrays in an .npz file, memory-mapping those stored uncompressed.
+
+    `np.load` can't memory-map the members of an .npz archive, but files written
+    by `np.savez` store each array uncompressed, so its data can be mapped directly
+    from the archive. Compressed, empty, and object arrays are read into memory.
+
+    Arguments:
+        path (PathLike): The .npz file to load.
+        mmap (bool): Whether to memory-map arrays; if False, every array is read
+            into memory. Defaults to True.
+
+    Returns:
+        (dict[str, Any]): Mapping of array names to (read-only) arrays.
+    """
+    path = convert_path(path)
+    arrays: dict[str, Any] = {}
+    with zipfile.ZipFile(path) as zf, path.open('rb') as raw:
+        for info in zf.infolist():
+            name = info.filename.removesuffix('.npy')
+            with zf.open(info) as f:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                header_size = f.tell()
+            if (
+                not mmap
+                or info.compress_type != zipfile.ZIP_STORED
+                or dtype.hasobject
+                or np.prod(shape) == 0
+            ):
+                with zf.open(info) as f:
+                    arrays[name] = np.lib.format.read_array(f, allow_pickle=True)
+                continue
+            # The data starts after the member's local header and the .npy header
+            raw.seek(info.header_offset)
+            local = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+            if local[0] != _LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f'Corrupt member {info.filename} in {path}')
+            offset = info.header_offset + _LOCAL_HEADER.size + local[9] + local[10]
+            arrays[name] = np.memmap(
+                path,
+                dtype=dtype,
+                mode='r',
+                shape=shape,
+                order='F' if fortran_order else 'C',
+                offset=offset + header_size,
+            )
+    return arrays
+
+
+def band_midpoints(wavelengths: npt.ArrayLike, num_bands: int) -> list[float]:
+    """Return the wavelengths in the middle of `num_bands` equal spectral bands."""
+    wavelengths = np.ravel(wavelengths)
+    points_per_band = len(wavelengths) / num_bands
+    indices = (points_per_band * np.arange(0.5, num_bands)).astype(int)
+    return wavelengths[indices].tolist()
+
+
+def nearest_index(values: npt.ArrayLike, value: float) -> int:
+    """Return the index of the entry of `values` closest to `value`."""
+    return int(np.argmin(np.abs(np.ravel(values) - value)))
+
+
+def wavelength_label(wl: float) -> str:
+    """Return a wavelength in meters in nm, or in um from 1 um up."""
+    return f'{wl * 1e9:.0f} nm' if wl < 1e-6 else f'{wl * 1e6:.3f} um'  # noqa: PLR2004
+
+
+class FieldSlice:
+    """A plane through one monitor's E field, plotted as an image per wavelength.
+
+    Attributes:
+        name (str): Name of the slice, used in plot titles and file names.
+        monitor (str): Name of the monitor whose fields are sliced.
+        quantity (str): What to plot: the norm of the E field ('enorm') or the real
+            part of one of its components ('real_ex', 'real_ey', 'real_ez').
+        axis (str | None): The axis normal to the plane. If None, the monitor must
+            be planar, and the plane is the monitor itself.
+        index (int | None): Index of the plane along `axis`; if None, the middle
+            of the monitor.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        monitor: str,
+        quantity: str = 'enorm',
+        axis: str | None = None,
+        index: int | None = None,
+    ) -> None:
+        """Initialize a FieldSlice."""
+        if quantity not in FIELD_QUANTITIES:
+            raise ValueError(
+                f'Field quantity must be one of {tuple(FIELD_QUANTITIES)}; '
+                f'got {quantity}'
+            )
+        if axis is not None and axis not in AXES:
+            raise ValueError(f'Slice axis must be one of {tuple(AXES)}; got {axis}')
+        self.name = name
+        self.monitor = monitor
+        self.quantity = quantity
+        self.axis = axis
+        self.index = index
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> FieldSlice:
+        """Create a slice from its dictionary representation."""
+        return cls(**d)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this slice."""
+        return {
+            'name': self.name,
+            'monitor': self.monitor,
+            'quantity': self.quantity,
+            'axis': self.axis,
+            'index': self.index,
+        }
+
+    def _normal(self, field_shape: Sequence[int]) -> tuple[int, int]:
+        """Return the normal axis of the plane and its index along that axis."""
+        spatial = field_shape[1:4]
+        if self.axis is None:
+            planar = [i for i, n in enumerate(spatial) if n == 1]
+            if not planar:
+                raise ValueError(
+                    f'Monitor {self.monitor} is not planar; choose an axis to slice'
+                )
+            return planar[0], 0
+        a = AXES.index(self.axis)
+        index = spatial[a] // 2 if self.index is None else self.index
+        if not 0 <= index < spatial[a]:
+            raise ValueError(
+                f'Slice index {index} is out of bounds for a monitor with '
+                f'{spatial[a]} samples along {self.axis}'
+            )
+        return a, index
+
+    def axes(self, data: Mapping[str, Any]) -> tuple[tuple[str, npt.NDArray], ...]:
+        """Return the label and values of the plane's horizontal and vertical axes.
+
+        Positions are in um if the monitor's coordinates were saved, and sample
+        indices otherwise.
+        """
+        shape = data['e'].shape
+        normal, _ = self._normal(shape)
+        axes = []
+        for a in (i for i in range(3) if i != normal):
+            if AXES[a] in data:
+                axes.append((f'{AXES[a]} (um)', np.ravel(data[AXES[a]]) * 1e6))
+            else:
+                axes.append((f'{AXES[a]} index', np.arange(shape[a + 1])))
+        return tuple(axes)
+
+    def plane(self, data: Mapping[str, Any], wavelength_index: int) -> npt.NDArray:
+        """Return the plotted quantity over the plane at one wavelength.
+
+        Only the plane is read from the fields, so memory-mapped fields are never
+        loaded in full.
+
+        Arguments:
+            data (Mapping[str, Any]): The monitor's data, as returned by `load_npz`.
+            wavelength_index (int): Index of the wavelength in the full spectrum.
+
+        Raises:
+            ValueError: If the monitor's fields were not saved at the wavelength.
+
+        Returns:
+            (npt.NDArray): Real array of shape (horizontal, vertical).
+        """
+        e = data['e']
+        position = wavelength_index
+        if 'freq_indices' in data:
+            saved = np.ravel(data['freq_indices'])
+            matches = np.flatnonzero(saved == wavelength_index)
+            if len(matches) == 0:
+                raise ValueError(
+                    f'Wavelength {wavelength_index} was not saved for monitor '
+                    f'"{self.monitor}"; only {saved} are available'
+                )
+            position = int(matches[0])
+        normal, index = self._normal(e.shape)
+        region: list[Any] = [slice(None)] * 3
+        region[normal] = index
+        field = np.asarray(e[(slice(None), *region, position)])
+        if self.quantity == 'enorm':
+            return np.sqrt(np.sum(np.abs(field) ** 2, axis=0))
+        return np.real(field[AXES.index(self.quantity[-1])])
+
+
+def field_image(
+    image: npt.ArrayLike,
+    horizontal: tuple[str, npt.ArrayLike],
+    vertical: tuple[str, npt.ArrayLike],
+    title: str,
+    aspect: str = 'equal',
+    hline: float | None = None,
+) -> Figure:
+    """Draw an image of a field over a plane.
+
+    The figure is not managed by pyplot, so it needs no closing, and drawing many
+    of them in parallel is safe.
+
+    Arguments:
+        image (npt.ArrayLike): The field, of shape (horizontal, vertical).
+        horizontal (tuple[str, npt.ArrayLike]): Label and positions of the
+            horizontal axis.
+        vertical (tuple[str, npt.ArrayLike]): Label and positions of the vertical
+            axis.
+        title (str): Title of the plot.
+        aspect (str): Aspect ratio of the axes. Defaults to 'equal'.
+        hline (float | None): Position of a horizontal line to mark, such as the
+            bottom of the device. Defaults to None.
+
+    Returns:
+        (Figure): The figure.
+    """
+    h_label, h = horizontal
+    v_label, v = vertical
+    h = np.ravel(h)
+    v = np.ravel(v)
+    with mpl.rc_context(PLOT_STYLE):
+        fig = Figure()
+        ax = fig.subplots()
+        v_grid, h_grid = np.meshgrid(v, h)
+        c = ax.pcolormesh(h_grid, v_grid, image, cmap='jet', shading='auto')
+        if hline is not None:
+            ax.axhline(hline, color='black', linestyle='-', linewidth=2.2)
+        ax.set_aspect(aspect)
+        ax.set_title(title)
+        ax.set_xlabel(h_label)
+        ax.set_ylabel(v_label)
+
+        cax = make_axes_locatable(ax).append_axes('right', size='5%', pad=0.25)
+        fig.colorbar(c, cax=cax)
+
+        params = fig.subplotpars
+        fig_height = FIGURE_WIDTH * len(v) / len(h)
+        fig.set_size_inches(
+            FIGURE_WIDTH / (params.right - params.left),
+            fig_height / (params.top - params.bottom),
+        )
+        fig.tight_layout()
+    return fig
+
+
+def render_field_slice(
+    monitor_file: str,
+    slice_spec: Mapping[str, Any],
+    wavelengths: Sequence[float],
+    plot_wavelengths: Sequence[float],
+    plot_folder: str,
+    prefix: str,
+) -> list[str]:
+    """Plot a slice of one monitor's fields at each of several wavelengths.
+
+    Only takes and returns picklable values, so that it can run in worker
+    processes.
+
+    Arguments:
+        monitor_file (str): The monitor's data file.
+        slice_spec (Mapping[str, Any]): The slice to plot, as returned by
+            `FieldSlice.as_dict`.
+        wavelengths (Sequence[float]): The full spectrum of the simulation, in
+            meters.
+        plot_wavelengths (Sequence[float]): The wavelengths to plot; each is
+            rounded to the nearest one in the spectrum.
+        plot_folder (str): The folder to save the plots in.
+        prefix (str): Prefix of the plots' file names, e.g. the job's name.
+
+    Returns:
+        (list[str]): The files the plots were saved to.
+    """
+    field_slice = FieldSlice.from_dict(slice_spec)
+    data = load_npz(monitor_file)
+    horizontal, vertical = field_slice.axes(data)
+    fnames = []
+    for wl in plot_wavelengths:
+        wl_index = nearest_index(wavelengths, wl)
+        label = wavelength_label(wavelengths[wl_index])
+        fig = field_image(
+            field_slice.plane(data, wl_index),
+            horizontal,
+            vertical,
+            f'{FIELD_QUANTITIES[field_slice.quantity]}, {field_slice.name}: '
+            rf'$\lambda = $ {label}',
+            aspect='equal' if field_slice.axis is None else 'auto',
+        )
+        fname = Path(plot_folder) / (
+            f'{prefix}_{field_slice.name}_{field_slice.quantity}_'
+            f'{label.replace(" ", "")}.png'
+        )
+        fig.savefig(fname, bbox_inches='tight')
+        fnames.append(str(fname))
+    return fnames
+
+
+def _init_worker():
+    """Make sure worker processes draw with the non-interactive Agg backend."""
+    mpl.use('Agg')
+
+
+def job_monitor_files(
+    sims: Sequence[LumericalSimulation],
+) -> dict[str, dict[str, Path]]:
+    """Return the data file of each monitor of each simulation, by simulation name."""
+    return {
+        sim.info['name']: {mon.name: mon.src for mon in sim.monitors()} for sim in sims
+    }
+
+
+def evaluate_spectra(
+    plot_folder: PathLike,
+    jobs: Mapping[str, Mapping[str, PathLike]],
+    slices: Sequence[FieldSlice],
+    wavelengths: npt.ArrayLike,
+    plot_wavelengths: npt.ArrayLike | None = None,
+    num_bands: int = 3,
+    workers: int | None = None,
+    max_pending: int | None = None,
+) -> dict[str, list[Path]]:
+    """Plot field slices at several wavelengths for every job of an evaluation.
+
+    Each (job, slice) pair is a task that memory-maps the monitor's data file and
+    renders its images in a worker process. At most `max_pending` tasks are in
+    flight at once, and each only returns the names of its plots, so memory use
+    is bounded however many jobs and wavelengths there are.
+
+    Arguments:
+        plot_folder (PathLike): The folder to save the plots in.
+        jobs (Mapping[str, Mapping[str, PathLike]]): Map of each job's name to the
+            data files of its monitors, e.g. as returned by `job_monitor_files`.
+            Slices of monitors a job doesn't have are skipped for that job.
+        slices (Sequence[FieldSlice]): The slices to plot.
+        wavelengths (npt.ArrayLike): The full spectrum of the simulations, in
+            meters.
+        plot_wavelengths (npt.ArrayLike | None): The wavelengths to plot. Defaults
+            to the middle of each of `num_bands` equal bands of the spectrum.
+        num_bands (int): Number of bands to plot if `plot_wavelengths` is None.
+            Defaults to 3.
+        workers (int | None): Number of worker processes; 0 plots everything in
+            this process, and None uses one per CPU.
+        max_pending (int | None): Maximum number of tasks in flight. Defaults to
+            twice the number of workers.
+
+    Returns:
+        (dict[str, list[Path]]): The plots of each job.
+    """
+    plot_folder = convert_path(plot_folder)
+    wavelengths = np.ravel(wavelengths).tolist()
+    if plot_wavelengths is None:
+        plot_wavelengths = band_midpoints(wavelengths, num_bands)
+    plot_wavelengths = np.ravel(plot_wavelengths).tolist()
+    plot_folder.mkdir(parents=True, exist_ok=True)
+
+    tasks: Iterator[tuple[str, tuple]] = (
+        (
+            job,
+            (
+                str(files[s.monitor]),
+                s.as_dict(),
+                wavelengths,
+                plot_wavelengths,
+                str(plot_folder),
+                job,
+            ),
+        )
+        for job, files in jobs.items()
+        for s in slices
+        if s.monitor in files
+    )
+    plots: dict[str, list[Path]] = {job: [] for job in jobs}
+
+    def collect(job: str, fnames: list[str]):
+        plots[job].extend(Path(f) for f in fnames)
+        metrics.record('spectrum', job=job, plots=len(fnames))
+
+    if workers == 0:
+        for job, args in tasks:
+            collect(job, render_field_slice(*args))
+    else:
+        if max_pending is None:
+            max_pending = 2 * (workers or os.cpu_count() or 1)
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker)
+        pending: dict[Future, str] = {}
+        try:
+            while True:
+                for job, args in itertools.islice(tasks, max_pending - len(pending)):
+                    pending[executor.submit(render_field_slice, *args)] = job
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(pending.pop(future), future.result())
+        finally:
+            executor.shutdown(cancel_futures=True)
+    vipdopt.logger.info(
+        f'Exported {sum(len(p) for p in plots.values())} field spectrum plots '
+        f'to {plot_folder}'
+    )
+    return plots
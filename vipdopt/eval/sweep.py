@@ -0,0 +1,727 @@
+"""Sweeps evaluating a design over variants of its configuration."""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+import vipdopt
+from vipdopt.configuration import (
+    Config,
+    SonyBayerConfig,
+    SonyBayerRenderer,
+    TemplateRenderer,
+)
+from vipdopt.configuration.template import fingerprint
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization import Device
+from vipdopt.simulation import ISolver, LumericalSimulation, solver_from_config
+from vipdopt.utils import PathLike, convert_path, ensure_path, read_config_file
+
+SWEEP_MODES = ('grid', 'zip')
+METRIC_QUANTITIES = ('t', 'power', 'sp', 'intensity')
+METRIC_REDUCTIONS = ('spectrum', 'mean', 'max', 'min', 'sum')
+RESULTS_FOLDER = 'results'
+JOBS_FOLDER = 'jobs'
+
+
+def _expand_values(values: Any) -> Any:
+    """Expand {'start', 'stop', 'num'} ranges in a list of parameter values."""
+    if isinstance(values, Mapping):
+        return np.linspace(values['start'], values['stop'], values['num']).tolist()
+    if isinstance(values, list):
+        return [_expand_values(v) for v in values]
+    return values
+
+
+class SweepParameter:
+    """A config key and the values it takes in a sweep.
+
+    Attributes:
+        key (str): The config key to override.
+        values (list): The value of the key in each step of the sweep. Values may
+            themselves be lists, e.g. for `lambda_values_um`.
+        name (str): Name of the parameter in plots.
+        short_form (str): Abbreviation of the parameter in plot file names.
+        format_str (str): Format of the parameter's values in plot file names.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        values: Sequence,
+        name: str | None = None,
+        short_form: str | None = None,
+        format_str: str = '%.3f',
+    ) -> None:
+        """Initialize a SweepParameter."""
+        if len(values) == 0:
+            raise ValueError(f'Sweep parameter {key} has no values')
+        self.key = key
+        self.values = list(values)
+        self.name = key if name is None else name
+        self.short_form = key if short_form is None else short_form
+        self.format_str = format_str
+
+    def __len__(self) -> int:
+        """Return the number of values of this parameter."""
+        return len(self.values)
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> SweepParameter:
+        """Create a parameter from its entry in a sweep spec.
+
+        The values are either listed under `values`, or spaced evenly from `start`
+        to `stop` in `num` steps. Listed values that are themselves such ranges are
+        expanded, so that list-valued keys can be swept over ranges too.
+        """
+        d = dict(d)
+        if 'values' in d:
+            values = _expand_values(d.pop('values'))
+        else:
+            values = np.linspace(d.pop('start'), d.pop('stop'), d.pop('num')).tolist()
+        return cls(values=values, **d)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this parameter."""
+        return {
+            'key': self.key,
+            'values': self.values,
+            'name': self.name,
+            'short_form': self.short_form,
+            'format_str': self.format_str,
+        }
+
+    def r_vector(self, peak_index: int = 0) -> dict[str, Any]:
+        """Return this parameter in the plotter's r-vector format."""
+        values = self.values
+        if any(isinstance(v, list | tuple) for v in values):
+            # Plot list-valued parameters against their step number
+            values = list(range(len(values)))
+        return {
+            'var_name': self.name,
+            'var_values': values,
+            'short_form': self.short_form,
+            'peakInd': peak_index,
+            'formatStr': self.format_str,
+            'iterating': len(values) > 1,
+        }
+
+
+class SweepMetric:
+    """A reduction of the data of one monitor to a scalar or spectrum.
+
+    Attributes:
+        name (str): Name of the metric.
+        monitor (str): Name of the monitor whose data is reduced.
+        quantity (str): The data to reduce: transmission ('t'), power ('power'),
+            source power ('sp'), or the E-field intensity ('intensity') summed
+            over the monitor.
+        reduce (str): How to reduce the spectrum: keep it ('spectrum'), or take
+            its 'mean', 'max', 'min', or 'sum'.
+        wavelengths (tuple[int, int] | None): Range of wavelength indices to keep
+            before reducing; None keeps all of them.
+        source (str | None): The forward source whose simulation to use; if None,
+            the metric is averaged over every forward source.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        monitor: str,
+        quantity: str = 't',
+        reduce: str = 'spectrum',
+        wavelengths: Sequence[int] | None = None,
+        source: str | None = None,
+    ) -> None:
+        """Initialize a SweepMetric."""
+        if quantity not in METRIC_QUANTITIES:
+            raise ValueError(
+                f'Metric quantity must be one of {METRIC_QUANTITIES}; got {quantity}'
+            )
+        if reduce not in METRIC_REDUCTIONS:
+            raise ValueError(
+                f'Metric reduction must be one of {METRIC_REDUCTIONS}; got {reduce}'
+            )
+        self.name = name
+        self.monitor = monitor
+        self.quantity = quantity
+        self.reduce = reduce
+        self.wavelengths = None if wavelengths is None else tuple(wavelengths)
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> SweepMetric:
+        """Create a metric from its entry in a sweep spec."""
+        return cls(**d)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this metric."""
+        return {
+            'name': self.name,
+            'monitor': self.monitor,
+            'quantity': self.quantity,
+            'reduce': self.reduce,
+            'wavelengths': None if self.wavelengths is None else list(self.wavelengths),
+            'source': self.source,
+        }
+
+    def __call__(self, data: Mapping[str, Any]) -> npt.NDArray:
+        """Reduce the data of a monitor, as loaded from its .npz file."""
+        if self.quantity == 'intensity':
+            e = np.asarray(data['e'])
+            spectrum = np.sum(np.abs(e) ** 2, axis=tuple(range(e.ndim - 1)))
+        else:
+            values = data[self.quantity]
+            if values is None or values.dtype == object:
+                raise ValueError(
+                    f'Monitor {self.monitor} has no {self.quantity!r} data'
+                )
+            spectrum = np.real(np.asarray(values)).reshape(-1)
+        if self.wavelengths is not None:
+            spectrum = spectrum[slice(*self.wavelengths)]
+        if self.reduce == 'spectrum':
+            return spectrum
+        return np.asarray(getattr(np, self.reduce)(spectrum))
+
+
+def reduce_monitor_data(
+    monitor_files: Mapping[str, Mapping[str, str]],
+    metric_specs: Sequence[Mapping[str, Any]],
+) -> dict[str, npt.NDArray]:
+    """Reduce the monitor data of one sweep variant to its metrics.
+
+    Only takes and returns picklable values, so that it can run in worker
+    processes.
+
+    Arguments:
+        monitor_files (Mapping[str, Mapping[str, str]]): Map of each forward
+            source to the data files of its simulation's monitors.
+        metric_specs (Sequence[Mapping[str, Any]]): The metrics to compute, as
+            returned by `SweepMetric.as_dict`.
+
+    Returns:
+        (dict[str, npt.NDArray]): The value of each metric.
+    """
+    loaded: dict[str, dict[str, Any]] = {}
+
+    def load(fname: str) -> dict[str, Any]:
+        if fname not in loaded:
+            with np.load(fname, allow_pickle=True) as data:
+                loaded[fname] = {k: data[k] for k in data.files}
+        return loaded[fname]
+
+    values: dict[str, npt.NDArray] = {}
+    for spec in metric_specs:
+        metric = SweepMetric.from_dict(spec)
+        sources = list(monitor_files) if metric.source is None else [metric.source]
+        per_source = [
+            metric(load(monitor_files[src][metric.monitor])) for src in sources
+        ]
+        values[metric.name] = np.mean(per_source, axis=0)
+    return values
+
+
+class SweepSpec:
+    """Description of a sweep over config keys.
+
+    In 'grid' mode every combination of the parameters' values is evaluated, and
+    results have one axis per parameter. In 'zip' mode the parameters are varied
+    together, so they must all have the same number of values, and results have a
+    single axis.
+
+    Attributes:
+        parameters (list[SweepParameter]): The parameters to sweep.
+        metrics (list[SweepMetric]): The metrics to compute for every variant.
+        mode (str): How to combine the parameters; 'grid' or 'zip'.
+        simulation_template (Path): Jinja template that renders a variant's config
+            into its simulation, like `simulation_template.j2`.
+        derived_template (Path | None): Jinja template of the parameters derived
+            from each variant's config, like `derived_simulation_properties.j2`.
+        batch_size (int | None): Number of variants to simulate per job queue;
+            None runs all of them in a single queue.
+        title (str): Title of the sweep's plots.
+    """
+
+    def __init__(
+        self,
+        parameters: Sequence[SweepParameter],
+        metrics: Sequence[SweepMetric],
+        simulation_template: PathLike,
+        derived_template: PathLike | None = None,
+        mode: str = 'grid',
+        batch_size: int | None = None,
+        title: str = 'sweep',
+    ) -> None:
+        """Initialize a SweepSpec."""
+        if mode not in SWEEP_MODES:
+            raise ValueError(f'Sweep mode must be one of {SWEEP_MODES}; got {mode}')
+        if len(parameters) == 0:
+            raise ValueError('A sweep needs at least one parameter')
+        if mode == 'zip' and len({len(p) for p in parameters}) > 1:
+            raise ValueError(
+                'Zipped sweep parameters must have the same number of values; got '
+                f'{[len(p) for p in parameters]}'
+            )
+        if len(metrics) == 0:
+            raise ValueError('A sweep needs at least one metric')
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f'Batch size must be positive; got {batch_size}')
+        self.parameters = list(parameters)
+        self.metrics = list(metrics)
+        self.simulation_template = convert_path(simulation_template)
+        self.derived_template = (
+            None if derived_template is None else convert_path(derived_template)
+        )
+        self.mode = mode
+        self.batch_size = batch_size
+        self.title = title
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any], root: PathLike = '.') -> SweepSpec:
+        """Create a spec from a dictionary, resolving templates against `root`."""
+        d = dict(d)
+        root = convert_path(root)
+        derived = d.pop('derived_template', None)
+        return cls(
+            parameters=[SweepParameter.from_dict(p) for p in d.pop('parameters')],
+            metrics=[SweepMetric.from_dict(m) for m in d.pop('metrics')],
+            simulation_template=root / d.pop('simulation_template'),
+            derived_template=None if derived is None else root / derived,
+            **d,
+        )
+
+    @classmethod
+    def from_file(cls, fname: PathLike, root: PathLike = '.') -> SweepSpec:
+        """Read a spec from a YAML or JSON file."""
+        return cls.from_dict(read_config_file(fname), root)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this spec."""
+        return {
+            'parameters': [p.as_dict() for p in self.parameters],
+            'metrics': [m.as_dict() for m in self.metrics],
+            'simulation_template': str(self.simulation_template),
+            'derived_template': None
+            if self.derived_template is None
+            else str(self.derived_template),
+            'mode': self.mode,
+            'batch_size': self.batch_size,
+            'title': self.title,
+        }
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The shape of the sweep's results, excluding the metrics' own axes."""
+        if self.mode == 'zip':
+            return (len(self.parameters[0]),)
+        return tuple(len(p) for p in self.parameters)
+
+    def indices(self) -> list[tuple[int, ...]]:
+        """Return the index of every variant in the results, in order."""
+        return list(np.ndindex(*self.shape))
+
+    def variants(self) -> list[dict[str, Any]]:
+        """Return the config keys each variant overrides, in order."""
+        if self.mode == 'zip':
+            steps = [(i,) * len(self.parameters) for i in range(self.shape[0])]
+        else:
+            steps = list(itertools.product(*(range(len(p)) for p in self.parameters)))
+        return [
+            {p.key: p.values[i] for p, i in zip(self.parameters, step, strict=True)}
+            for step in steps
+        ]
+
+
+class SweepResults:
+    """Folder of sweep results, stored as one file per variant.
+
+    Each variant is identified by a key hashed from everything that determines its
+    results, so finished variants are skipped when a sweep is resumed or extended,
+    and sweeps with different settings can share a folder.
+
+    Attributes:
+        directory (Path): The folder results are stored in.
+    """
+
+    @ensure_path
+    def __init__(self, directory: Path) -> None:
+        """Initialize SweepResults."""
+        self.directory = directory
+
+    def path(self, key: str) -> Path:
+        """Return the file the results of a variant are stored in."""
+        return self.directory / f'{key}.npz'
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether the results of a variant have been stored."""
+        return isinstance(key, str) and self.path(key).exists()
+
+    def save(
+        self, key: str, overrides: Mapping[str, Any], values: Mapping[str, npt.NDArray]
+    ):
+        """Store the metrics of a variant.
+
+        The file is written in full before it is moved into place, so that a sweep
+        interrupted while saving never leaves partial results behind.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path(key).with_suffix('.tmp')
+        with tmp.open('wb') as f:
+            np.savez(f, __overrides__=json.dumps(overrides), **values)
+        os.replace(tmp, self.path(key))
+
+    def load(self, key: str) -> dict[str, npt.NDArray]:
+        """Return the metrics of a variant."""
+        with np.load(self.path(key)) as data:
+            return {k: data[k] for k in data.files if k != '__overrides__'}
+
+    def overrides(self, key: str) -> dict[str, Any]:
+        """Return the config keys a variant overrides."""
+        with np.load(self.path(key)) as data:
+            return json.loads(str(data['__overrides__']))
+
+
+class Sweep:
+    """Evaluates a design over variants of its configuration.
+
+    Each variant's config is derived from the base config and rendered into a
+    simulation with the spec's templates. The forward simulations of all variants
+    that have not been computed yet are enqueued together, `batch_size` variants
+    at a time, and run as a single job queue of the solver. Their monitor data is
+    then reduced to the spec's metrics in worker processes, and each variant's
+    metrics are saved as soon as its batch finishes, so an interrupted sweep
+    resumes where it stopped.
+
+    Attributes:
+        spec (SweepSpec): The parameters and metrics of the sweep.
+        base_config (Config): The config shared by all variants.
+        solver (ISolver): The solver to run the simulations with.
+        directory (Path): Folder for simulation files and results.
+        device (Device | None): Device to import into each variant's simulation.
+        workers (int | None): Number of processes reducing monitor data; 0 reduces
+            it in this process, and None uses one per CPU.
+        results (SweepResults): The results of finished variants.
+    """
+
+    def __init__(
+        self,
+        spec: SweepSpec,
+        base_config: Mapping[str, Any],
+        solver: ISolver,
+        directory: PathLike,
+        device: Device | None = None,
+        workers: int | None = None,
+    ) -> None:
+        """Initialize a Sweep."""
+        self.spec = spec
+        self.base_config = (
+            base_config if isinstance(base_config, Config) else Config(base_config)
+        )
+        self.solver = solver
+        self.directory = convert_path(directory)
+        self.device = device
+        self.workers = workers
+        self.results = SweepResults(self.directory / RESULTS_FOLDER)
+
+        self._sim_renderer = TemplateRenderer(spec.simulation_template.parent)
+        self._sim_renderer.set_template(spec.simulation_template)
+        self._derived_renderer: TemplateRenderer | None = None
+        if spec.derived_template is not None:
+            self._derived_renderer = SonyBayerRenderer(spec.derived_template.parent)
+            self._derived_renderer.set_template(spec.derived_template)
+
+    @classmethod
+    def from_config(
+        cls,
+        spec: SweepSpec,
+        cfg: Config,
+        directory: PathLike,
+        root: PathLike = '.',
+        **kwargs,
+    ) -> Sweep:
+        """Create a sweep of a project config, with the solver and device it sets.
+
+        Arguments:
+            spec (SweepSpec): The parameters and metrics of the sweep.
+            cfg (Config): The project config to sweep.
+            directory (PathLike): Folder for simulation files and results.
+            root (PathLike): The folder relative paths in the config are resolved
+                against. Defaults to the working directory.
+            **kwargs: Keyword arguments for Sweep.
+        """
+        device = Device.from_source(cfg['device']) if 'device' in cfg else None
+        return cls(
+            spec,
+            cfg,
+            solver_from_config(cfg, root),
+            directory,
+            device=device,
+            **kwargs,
+        )
+
+    def variant_keys(self) -> list[str]:
+        """Return the key identifying the results of each variant, in order."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(fingerprint(self.base_config.data))
+        for template in (self.spec.simulation_template, self.spec.derived_template):
+            if template is not None:
+                digest.update(template.read_bytes())
+        digest.update(json.dumps([m.as_dict() for m in self.spec.metrics]).encode())
+        if self.device is not None:
+            digest.update(np.ascontiguousarray(self.device.get_design_variable()))
+
+        keys = []
+        for overrides in self.spec.variants():
+            d = digest.copy()
+            d.update(json.dumps(overrides, sort_keys=True).encode())
+            keys.append(d.hexdigest())
+        return keys
+
+    def variant_configs(self, variants: Sequence[Mapping[str, Any]]) -> list[Config]:
+        """Derive the config of each of several variants."""
+        if self._derived_renderer is None:
+            return [self.base_config.derive(overrides) for overrides in variants]
+        return SonyBayerConfig.derive_variants(
+            self.base_config.data, variants, self._derived_renderer
+        )
+
+    def variant_sims(
+        self, configs: Sequence[Config], keys: Sequence[str]
+    ) -> list[dict[str, LumericalSimulation]]:
+        """Create the forward simulations of each of several variants.
+
+        Arguments:
+            configs (Sequence[Config]): The config of each variant.
+            keys (Sequence[str]): The key of each variant, used to name its
+                simulations so that different variants can be enqueued together.
+
+        Returns:
+            (list[dict[str, LumericalSimulation]]): Map of each variant's forward
+                sources to the simulation with just that source enabled, named
+                `sweep_<key>_<source>`.
+        """
+        outputs = self._sim_renderer.render_many(
+            [{'data': cfg} for cfg in configs], pi=np.pi
+        )
+        all_sims = []
+        for cfg, key, output in zip(configs, keys, outputs, strict=True):
+            sim = LumericalSimulation(json.loads(output))
+            if self.device is not None and sim.imports():
+                self.device.import_cur_index(
+                    sim.imports()[0], reinterpolation_factor=1, binarize=False
+                )
+            all_sims.append({
+                src: sim.with_enabled([src], name=f'sweep_{key[:12]}_{src}')
+                for src in self._forward_sources(cfg, sim)
+            })
+        return all_sims
+
+    @staticmethod
+    def _forward_sources(cfg: Config, sim: LumericalSimulation) -> list[str]:
+        """Return the sources that need a simulation to evaluate a variant."""
+        foms = cfg.get('figures_of_merit', {})
+        sources = {src for fom in foms.values() for src in fom.get('fwd_srcs', [])}
+        if not sources:
+            sources = set(sim.source_names())
+        return sorted(sources)
+
+    def run(
+        self,
+        on_result: Callable[[tuple[int, ...], dict[str, npt.NDArray]], None]
+        | None = None,
+    ) -> dict[str, npt.NDArray]:
+        """Evaluate every variant of the sweep that has not been computed yet.
+
+        Arguments:
+            on_result (Callable | None): Called with the index and metrics of each
+                variant as soon as they are available.
+
+        Returns:
+            (dict[str, npt.NDArray]): The sweep's results, as returned by `table`.
+        """
+        keys = self.variant_keys()
+        indices = self.spec.indices()
+        variants = self.spec.variants()
+        pending = [i for i, key in enumerate(keys) if key not in self.results]
+        vipdopt.logger.info(
+            f'Sweeping {self.spec.title}: {len(pending)} of {len(keys)} variants '
+            'need to be simulated'
+        )
+        for i, key in enumerate(keys):
+            if i not in pending and on_result is not None:
+                on_result(indices[i], self.results.load(key))
+        if not pending:
+            return self.table()
+
+        job_dir = self.directory / JOBS_FOLDER
+        job_dir.mkdir(parents=True, exist_ok=True)
+        metric_specs = [m.as_dict() for m in self.spec.metrics]
+        batch_size = self.spec.batch_size or len(pending)
+        executor = ProcessPoolExecutor(self.workers) if self.workers != 0 else None
+        try:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start : start + batch_size]
+                batch_keys = [keys[i] for i in batch]
+                configs = self.variant_configs([variants[i] for i in batch])
+                variant_sims = self.variant_sims(configs, batch_keys)
+
+                sims = [sim for sims in variant_sims for sim in sims.values()]
+                for sim in sims:
+                    sim_file = job_dir / f'{sim.info["name"]}.fsp'
+                    self.solver.save(sim_file, sim)  # Saving also sets the path
+                    self.solver.addjob(sim_file)
+                self.solver.runjobs_to_completion(sims)
+                self.solver.reformat_monitor_data(sims)
+
+                monitor_files = [
+                    {
+                        src: {mon.name: str(mon.src) for mon in sim.monitors()}
+                        for src, sim in sims.items()
+                    }
+                    for sims in variant_sims
+                ]
+                if executor is None:
+                    reduced = (
+                        reduce_monitor_data(files, metric_specs)
+                        for files in monitor_files
+                    )
+                else:
+                    reduced = executor.map(
+                        reduce_monitor_data,
+                        monitor_files,
+                        itertools.repeat(metric_specs),
+                    )
+                for i, values in zip(batch, reduced, strict=True):
+                    self.results.save(keys[i], variants[i], values)
+                    metrics.record(
+                        'sweep',
+                        index=indices[i],
+                        **{k: lambda v=v: float(np.mean(v)) for k, v in values.items()},
+                    )
+                    if on_result is not None:
+                        on_result(indices[i], values)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.table()
+
+    def table(self) -> dict[str, npt.NDArray]:
+        """Return the results of the sweep computed so far.
+
+        Returns:
+            (dict[str, npt.NDArray]): Each metric's values, with shape
+                `spec.shape` followed by the shape of the metric. Variants that
+                have not been computed are NaN.
+        """
+        keys = self.variant_keys()
+        indices = self.spec.indices()
+        loaded = {
+            i: self.results.load(key)
+            for i, key in enumerate(keys)
+            if key in self.results
+        }
+        table: dict[str, npt.NDArray] = {}
+        for metric in self.spec.metrics:
+            shapes = [np.shape(v[metric.name]) for v in loaded.values()]
+            shape = shapes[0] if shapes else ()
+            values = np.full(self.spec.shape + shape, np.nan)
+            for i, v in loaded.items():
+                values[indices[i]] = v[metric.name]
+            table[metric.name] = values
+        return table
+
+    def plot_data(self, metric_names: Sequence[str] | None = None) -> dict[str, Any]:
+        """Return the sweep's results in the format of the plotter's sweep plots.
+
+        Spectral metrics are summarized by their mean over wavelengths, with their
+        standard deviation as the error.
+
+        Arguments:
+            metric_names (Sequence[str] | None): The metrics to include, in order;
+                defaults to all of them.
+
+        Returns:
+            (dict[str, Any]): Plot data with r-vectors for the parameters (in
+                'zip' mode, only the first parameter) and an f-vector for each
+                metric.
+        """
+        table = self.table()
+        if metric_names is None:
+            metric_names = [m.name for m in self.spec.metrics]
+        parameters = self.spec.parameters
+        if self.spec.mode == 'zip':
+            parameters = parameters[:1]
+
+        f_vectors = []
+        for name in metric_names:
+            values = table[name]
+            axes = tuple(range(len(self.spec.shape), values.ndim))
+            f_vectors.append({
+                'var_name': name,
+                'var_values': np.mean(values, axis=axes),
+                'var_stdevs': np.std(values, axis=axes),
+                'statistics': 'mean',
+            })
+        return {
+            'r': [{p.key: p.r_vector() for p in parameters}],
+            'f': f_vectors,
+            'title': self.spec.title,
+        }
+
+    @ensure_path
+    def plot(
+        self,
+        plot_folder: Path,
+        metric_names: Sequence[str] | None = None,
+        plot_std_dev: bool = True,
+    ):
+        """Plot the metrics along each parameter of the sweep.
+
+        Each plot varies one parameter, with the others fixed at their first value.
+
+        Arguments:
+            plot_folder (Path): The folder to save the plots in.
+            metric_names (Sequence[str] | None): The metrics to plot; defaults to
+                all of them.
+            plot_std_dev (bool): Whether to plot the standard deviation of spectral
+                metrics over wavelength. Defaults to True.
+        """
+        # Importing the plotter sets global matplotlib styles, so only do it here
+        import matplotlib.pyplot as plt
+
+        from vipdopt.eval.plotter import SweepPlot
+
+        plot_data = self.plot_data(metric_names)
+        labels = [f['var_name'] for f in plot_data['f']]
+        cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        colors = [cycle[i % len(cycle)] for i in range(len(labels))]
+        for axis in range(len(plot_data['r'][0])):
+            slice_coords: list[int | slice] = [0] * len(self.spec.shape)
+            slice_coords[axis] = slice(None)
+            plot = SweepPlot(plot_data, slice_coords)
+            plot.append_line_data(slice_coords, plot_std_dev, colors, labels)
+            plot.assign_title(self.spec.title)
+            plot.assign_axis_labels(slice_coords, 'Metric')
+            plot.export_plot_config(plot_folder, '', self.spec.title, slice_coords)
+
+    @ensure_path
+    def save(self, fname: Path):
+        """Save the spec and the results computed so far to a .npz file."""
+        np.savez(fname, __spec__=json.dumps(self.spec.as_dict()), **self.table())
+
+
+def load_sweep(fname: PathLike) -> tuple[SweepSpec, dict[str, npt.NDArray]]:
+    """Load the spec and results saved by `Sweep.save`."""
+    with np.load(fname) as data:
+        spec = SweepSpec.from_dict(json.loads(str(data['__spec__'])))
+        return spec, {k: data[k] for k in data.files if k != '__spec__'}
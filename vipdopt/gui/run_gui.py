@@ -3,15 +3,17 @@
 from __future__ import annotations
 
 import contextlib
-import pickle
 import subprocess
 import sys
 from collections.abc import Callable
+from pathlib import Path
+from typing import Any
 
 import matplotlib as mpl  # type: ignore
+import numpy as np
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg  # type: ignore
 from matplotlib.figure import Figure  # type: ignore
-from PySide6.QtCore import QCoreApplication, Qt
+from PySide6.QtCore import QCoreApplication, QProcess, Qt, QTimer
 from PySide6.QtWidgets import (
     QApplication,
     QComboBox,
@@ -27,16 +29,17 @@
 )
 
 import vipdopt
+from vipdopt.diagnostics import FeedReader
 from vipdopt.gui.config_editor import ConfigModel
 from vipdopt.gui.ui_dashboard import Ui_MainWindow as Ui_DashboardWindow
 from vipdopt.gui.ui_fom_dialog import Ui_Dialog as Ui_FomDialog
 from vipdopt.gui.ui_settings import Ui_MainWindow as Ui_SettingsWindow
 from vipdopt.optimization import BayerFilterFoM, FoM, GradientOptimizer
-from vipdopt.project import Project
+from vipdopt.project import PROJECT_SNAPSHOT_NAME, Project
 from vipdopt.simulation import ISimulation, LumericalSimulation
 from vipdopt.simulation.monitor import Monitor
 from vipdopt.submit_job import generate_script
-from vipdopt.utils import PathLike, StoppableThread, read_config_file, subclasses
+from vipdopt.utils import PathLike, read_config_file, subclasses
 
 mpl.use('QtAgg')
 
@@ -52,11 +55,11 @@
 SIM_TYPES = [str(c) for c in subclasses(ISimulation)]
 OPTIMIZER_TYPES = [str(c) for c in subclasses(GradientOptimizer)]
 
-PLOT_NAMES = [
-    ['fom.pkl', 'overall_trans.pkl'],
-    ['enorm.pkl', 'final_device_layer.pkl'],
-]
-PLOT_DIMS = (len(PLOT_NAMES), len(PLOT_NAMES[0]))
+PLOT_DIMS = (2, 2)
+# Folder in the project directory the optimization's live feed is written to
+FEED_FOLDER = 'feed'
+# How often to check the feed for new results
+FEED_POLL_MS = 1000
 
 
 class FomDialog(QDialog, Ui_FomDialog):
@@ -466,7 +469,13 @@ def adjust_figure_size(self, fig_width, fig_height=None):
 
 
 class StatusDashboard(QMainWindow, Ui_DashboardWindow):
-    """Wrapper class for the status window."""
+    """Wrapper class for the status window.
+
+    The optimization runs in a separate process, which publishes its progress to
+    a feed in the project directory (see `vipdopt.diagnostics.DashboardFeed`).
+    The dashboard polls the feed on a timer and updates its plots in place, so the
+    GUI stays responsive and refreshing it stays cheap however long the run is.
+    """
 
     def __init__(self):
         """Initialize a StatusWindow."""
@@ -482,16 +491,65 @@ def __init__(self):
         for i in range(PLOT_DIMS[0]):
             for j in range(PLOT_DIMS[1]):
                 self.gridLayout.addWidget(self.plots[i][j], i, j)
+        self._init_artists()
 
         self.project = Project()
         self.running = False
-        self.opt_thread = StoppableThread()
+        self.feed: FeedReader | None = None
+        self.history: dict[str, list[Any]] = {}
+        self._clear_history()
+
+        # The optimization runs in a background process
+        self.opt_process = QProcess(self)
+        self.opt_process.setProcessChannelMode(
+            QProcess.ProcessChannelMode.ForwardedChannels
+        )
+        self.opt_process.finished.connect(self._optimization_finished)
+
+        self.feed_timer = QTimer(self)
+        self.feed_timer.timeout.connect(self._poll_feed)
+        self.feed_timer.start(FEED_POLL_MS)
 
         self.start_stop_pushButton.setText('Start Optimization')
 
         self.start_stop_pushButton.clicked.connect(self.toggle_optimization)
         self.edit_pushButton.clicked.connect(self.settings_window)
 
+    def _init_artists(self):
+        """Create the lines and images that are updated as results come in."""
+        fom_ax = self.plots[0][0].fig.subplots()
+        fom_ax.set_title('Figure of Merit')
+        fom_ax.set_xlabel('Iteration')
+        (self.fom_line,) = fom_ax.plot([], [], color='black', marker='o')
+
+        self.trans_ax = self.plots[0][1].fig.subplots()
+        self.trans_ax.set_title('Transmission')
+        self.trans_ax.set_xlabel('Iteration')
+        (self.overall_trans_line,) = self.trans_ax.plot(
+            [], [], color='black', marker='o', label='Overall'
+        )
+        # One line per FoM, created once the number of FoMs is known
+        self.trans_lines: list[Any] = []
+
+        focal_ax = self.plots[1][0].fig.subplots()
+        focal_ax.set_title('Focal Plane Intensity')
+        self.focal_image = focal_ax.imshow(np.zeros((1, 1)), cmap='jet', origin='lower')
+
+        device_ax = self.plots[1][1].fig.subplots()
+        device_ax.set_title('Device Design')
+        self.device_image = device_ax.imshow(
+            np.zeros((1, 1)), cmap='Greys', origin='lower', vmin=0, vmax=1
+        )
+
+    def _clear_history(self):
+        """Forget the results plotted so far."""
+        self.history = {
+            'iteration': [],
+            'fom': [],
+            'overall_transmission': [],
+            'transmission': [],
+        }
+
     def open_project(self):
         """Load optimization project into the GUI."""
         proj_dir = QFileDialog.getExistingDirectory(
@@ -503,6 +561,9 @@ def open_project(self):
         if proj_dir:
             self.project.load_project(proj_dir)
             vipdopt.logger.info(f'Loaded project from {proj_dir}')
+            # Show the results of the project's latest run
+            self._clear_history()
+            self.feed = FeedReader(self.project.dir / FEED_FOLDER)
             self._update_values()
             vipdopt.logger.info(f'Updated GUI with values from {proj_dir}')
 
@@ -530,55 +591,156 @@ def override_close(*args):
     def create_submission_script(self):
         """Generate a slurm script to run the optimization."""
         slurm_script = str(self.project.dir / 'slurm.sh')
+        # The submitted job loads the project as it is now
+        self.project.save()
         generate_script(
-            self.project.optimization.nsims,
+            slurm_script,
+            str(self.project.optimization.nsims),
             str(self.project.dir),
-            'config.json',
+            '--config',
+            PROJECT_SNAPSHOT_NAME,
         )
         subprocess.call(['sbatch', str(slurm_script)])
 
     def toggle_optimization(self):
-        """Toggle whether the optimization is running."""
-        self.running = not self.running
-        if self.running:
-            self.create_submission_script()
-            self.opt_thread = StoppableThread(target=self.project.start_optimization)
-            self.opt_thread.run()
+        """Start the optimization, or stop it after the current iteration."""
+        if self.opt_process.state() == QProcess.ProcessState.NotRunning:
+            self.start_optimization()
         else:
-            self.opt_thread.stop()
-            self.opt_thread = StoppableThread(target=self.project.stop_optimization)
-            self.opt_thread.run()
-        self._update_values()
-
-    def _update_plots(self):
-        """Update the plots."""
-        plots_folder = self.project.subdirectories['opt_plots']
+            vipdopt.logger.info('Stopping optimization after the current iteration')
+            # The optimization process stops gracefully when terminated
+            self.opt_process.terminate()
+            self.start_stop_pushButton.setText('Stopping...')
+            self.start_stop_pushButton.setEnabled(False)
+
+    def start_optimization(self):
+        """Run the project's optimization in a background process."""
+        if self.project.optimization is None:
+            vipdopt.logger.warning('Open a project before starting an optimization')
+            return
+        # The optimization process loads the project as it is now
+        self.project.save()
+        self._clear_history()
+        self.feed = FeedReader(self.project.dir / FEED_FOLDER)
+        self.opt_process.start(
+            sys.executable,
+            [
+                '-m',
+                'vipdopt',
+                'optimize',
+                str(self.project.dir),
+                '--config',
+                PROJECT_SNAPSHOT_NAME,
+                '--feed',
+                FEED_FOLDER,
+            ],
+        )
+        self.running = True
+        self.start_stop_pushButton.setText('Stop Optimization')
 
-        for i in range(PLOT_DIMS[0]):
-            for j, name in enumerate(PLOT_NAMES[i]):
-                self.gridLayout.removeWidget(self.plots[i][j])
-                fig_path = plots_folder / name
-                if fig_path.exists():
-                    self.plots[i][j].deleteLater()
-                    new_fig: Figure = pickle.load(fig_path.open('rb'))  # type: ignore
-                    if isinstance(new_fig, tuple):
-                        new_fig = new_fig[0]
-                    self.plots[i][j] = MplCanvas(new_fig)
-                self.gridLayout.addWidget(self.plots[i][j], i, j)
+    def _optimization_finished(self, exit_code: int, _exit_status: Any = None):
+        """Update the dashboard once the optimization process has exited."""
+        vipdopt.logger.info(f'Optimization process exited with code {exit_code}')
+        self._poll_feed()
+        self.running = False
+        self.start_stop_pushButton.setText('Start Optimization')
+        self.start_stop_pushButton.setEnabled(True)
+
+    def _poll_feed(self):
+        """Update the plots with the results published since the last poll."""
+        if self.feed is None:
+            return
+        records = self.feed.poll()
+        if not records:
+            return
+
+        # Only the latest version of each image is kept, so load each at most once
+        images: dict[str, Path] = {}
+        for record in records:
+            if record['stage'] == 'progress':
+                self._add_progress(record)
+                images['design'] = record['design']
+            elif record['stage'] == 'focal_plane':
+                images['intensity'] = record['intensity']
+
+        changed = {self.plots[0][0], self.plots[0][1]}
+        if 'intensity' in images and self._set_image(
+            self.focal_image, images['intensity']
+        ):
+            changed.add(self.plots[1][0])
+        if 'design' in images and self._set_image(
+            self.device_image, images['design'], rescale=False
+        ):
+            changed.add(self.plots[1][1])
+        for canvas in changed:
+            canvas.draw_idle()
+
+    def _add_progress(self, record: dict[str, Any]):
+        """Extend the traces with the results of an iteration."""
+        for key, values in self.history.items():
+            values.append(record[key])
+        iterations = self.history['iteration']
+        self.fom_line.set_data(iterations, self.history['fom'])
+        self.overall_trans_line.set_data(
+            iterations, self.history['overall_transmission']
+        )
+        transmission = np.array(self.history['transmission']).T
+        while len(self.trans_lines) < len(transmission):
+            (line,) = self.trans_ax.plot([], [], label=f'FoM {len(self.trans_lines)}')
+            self.trans_lines.append(line)
+        for line, values in zip(self.trans_lines, transmission, strict=False):
+            line.set_data(iterations, values)
+        for ax in (self.fom_line.axes, self.trans_ax):
+            ax.relim()
+            ax.autoscale_view()
+
+        self.iter_label.setText(str(record['iteration']))
+        self.epoch_label.setText(str(record['epoch']))
+        self.avg_power_label.setText(f'{record["overall_transmission"]:.4f}')
+
+    def _set_image(self, image: Any, path: Path, rescale: bool = True) -> bool:
+        """Show the latest version of an image from the feed.
+
+        Returns:
+            (bool): Whether the image could be loaded.
+        """
+        try:
+            data = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            # Not written yet, or replaced while reading; try again next poll
+            return False
+        # Images have x along their first axis, but are drawn with it horizontal
+        data = np.atleast_2d(data).T
+        image.set_data(data)
+        image.set_extent((-0.5, data.shape[1] - 0.5, -0.5, data.shape[0] - 0.5))
+        if rescale:
+            image.set_clim(np.min(data), np.max(data))
+        if image is self.focal_image:
+            self.avg_e_label.setText(f'{np.mean(data):.4g}')
+        return True
 
     def _update_values(self):
-        self._update_plots()
+        """Update the dashboard with the project's settings and latest results."""
+        self._poll_feed()
 
-        self.running = self.project.optimization.loop
+        self.running = self.opt_process.state() != QProcess.ProcessState.NotRunning
         if self.running:
             self.start_stop_pushButton.setText('Stop Optimization')
         else:
             self.start_stop_pushButton.setText('Start Optimization')
 
-        self.iter_label.setText(str(self.project.optimization.iteration))
-        self.epoch_label.setText(str(self.project.optimization.epoch))
-        self.avg_e_label.setText('unknown')
-        self.avg_power_label.setText('unknown')
+        if self.project.optimization is not None and not self.history['iteration']:
+            self.iter_label.setText(str(self.project.optimization.iteration))
+            self.epoch_label.setText(str(self.project.optimization.epoch))
+            self.avg_e_label.setText('unknown')
+            self.avg_power_label.setText('unknown')
+
+    def closeEvent(self, event):  # noqa: N802
+        """Stop a running optimization before closing the dashboard."""
+        if self.opt_process.state() != QProcess.ProcessState.NotRunning:
+            self.opt_process.terminate()
+            self.opt_process.waitForFinished()
+        super().closeEvent(event)
 
 
 def start_gui(args: list[str]):
@@ -1,7 +1,14 @@
 """Subpackage providing optimization functionality for inverse design."""
 
 from vipdopt.optimization.adam import AdamOptimizer
+from vipdopt.optimization.constraints import (
+    BinarizationConstraint,
+    Constraint,
+    VolumeFractionConstraint,
+)
+from vipdopt.optimization.continuation import ContinuationSchedule, ParameterRamp
 from vipdopt.optimization.device import Device
+from vipdopt.optimization.fidelity import Fidelity, FidelitySchedule
 from vipdopt.optimization.filter import Filter, Scale, Sigmoid
 from vipdopt.optimization.fom import (
     BayerFilterFoM,
@@ -11,14 +18,32 @@
     UniformMAEFoM,
     UniformMSEFoM,
 )
+from vipdopt.optimization.gradient_check import (
+    GradientCheck,
+    select_voxels,
+    verify_gradient,
+)
+from vipdopt.optimization.landscape import LossLandscapeMapper
+from vipdopt.optimization.lbfgs import LBFGSOptimizer
+from vipdopt.optimization.mma import MMAOptimizer
 from vipdopt.optimization.optimization import LumericalOptimization
 from vipdopt.optimization.optimizer import GradientAscentOptimizer, GradientOptimizer
+from vipdopt.optimization.parameterization import Parameterization
+from vipdopt.optimization.population import PopulationMember, PopulationOptimization
+from vipdopt.optimization.spectral import SpectralSampler
+from vipdopt.optimization.step_control import StepSizeController
+from vipdopt.optimization.tiling import Tile, TiledOptimization, tile_slices
 
 __all__ = [
     'AdamOptimizer',
     'GradientAscentOptimizer',
     'BayerFilterFoM',
+    'BinarizationConstraint',
+    'Constraint',
+    'ContinuationSchedule',
     'Device',
+    'Fidelity',
+    'FidelitySchedule',
     'Filter',
     'FoM',
     'FoM',
@@ -26,8 +51,24 @@
     'UniformMSEFoM',
     'SuperFoM',
     'GaussianFoM',
+    'GradientCheck',
     'GradientOptimizer',
+    'LBFGSOptimizer',
+    'LossLandscapeMapper',
+    'MMAOptimizer',
+    'ParameterRamp',
+    'Parameterization',
     'LumericalOptimization',
+    'PopulationMember',
+    'PopulationOptimization',
     'Sigmoid',
     'Scale',
+    'SpectralSampler',
+    'StepSizeController',
+    'Tile',
+    'TiledOptimization',
+    'VolumeFractionConstraint',
+    'select_voxels',
+    'tile_slices',
+    'verify_gradient',
 ]
@@ -3,66 +3,111 @@
 import numpy as np
 import numpy.typing as npt
 
-import vipdopt
+from vipdopt.diagnostics import abs_stats, metrics
 from vipdopt.optimization.device import Device
 from vipdopt.optimization.optimizer import GradientOptimizer
+from vipdopt.optimization.step_control import StepSizeController, load_step_controller
 
 
 class AdamOptimizer(GradientOptimizer):
-    """Optimizer implementing the Adaptive Moment Estimation (Adam) algorithm."""
+    """Optimizer implementing the Adaptive Moment Estimation (Adam) algorithm.
+
+    The first and second moments are kept in a single preallocated buffer of shape
+    (2, *parameter shape) that is updated in place every step, so the optimizer
+    holds exactly two arrays of state the size of the device's parameters. The
+    buffer is allocated on the first step, once the shape of the parameters is
+    known.
+
+    Attributes:
+        step_size (float): The step size to multiply the Adam update by.
+        betas (tuple[float, float]): Decay rates of the first and second moments.
+        eps (float): Term added to the second moment for numerical stability.
+        moments (npt.NDArray | None): The first and second moments, stacked along
+            the first axis; None before the first step.
+        moments_dtype (str): Data type to store the moments in, e.g. 'float32' to
+            halve the memory used by the optimizer state.
+        step_control (StepSizeController | None): If provided, adapts the step size
+            every iteration to keep the maximum design change within its bounds.
+    """
 
     betas: tuple[float, float]
-    moments: npt.NDArray
+    moments: npt.NDArray | None
+    moments_dtype: str
     step_size: float
     eps: float
+    step_control: StepSizeController | None
 
     def __init__(
         self,
         step_size: float = 0.01,
         betas: tuple[float, float] = (0.9, 0.999),
         eps: float = 1e-8,
-        moments: npt.ArrayLike = (0.0, 0.0),
+        moments: npt.ArrayLike | None = None,
+        moments_dtype: str = 'float64',
+        step_control: StepSizeController | dict | None = None,
         **kwargs,
     ) -> None:
         """Initialize an AdamOptimizer instance."""
+        moments_dtype = np.dtype(moments_dtype).name
+        if moments is not None:
+            moments = np.asarray(moments, dtype=moments_dtype)
+            # Moments from before the first step carry no information
+            if moments.ndim <= 1:
+                moments = None
         super().__init__(
             step_size=step_size,
             betas=tuple(betas),
             eps=float(eps),
-            moments=np.array(moments),
+            moments=moments,
+            moments_dtype=moments_dtype,
+            step_control=load_step_controller(step_control),
             **kwargs,
         )
 
+    def _moment_buffers(self, shape: tuple[int, ...]) -> tuple[npt.NDArray, ...]:
+        """Return views of the first and second moments, allocating if needed."""
+        if self.moments is None or self.moments.shape[1:] != shape:
+            self.moments = np.zeros((2, *shape), dtype=self.moments_dtype)
+        elif self.moments.dtype != self.moments_dtype:
+            self.moments = self.moments.astype(self.moments_dtype)
+        return self.moments[0], self.moments[1]
+
     def step(self, device: Device, gradient: npt.ArrayLike, iteration: int):
         """Take gradient step using Adam algorithm."""
-        gradient = device.backpropagate(gradient)
-
-        # Changed to gradient descent for now...
+        # A fresh copy that is used as scratch space for the rest of the step
+        g = np.real(device.parameter_gradient(gradient)).astype(self.moments_dtype)
+        m, v = self._moment_buffers(g.shape)
         b1, b2 = self.betas
-        m = self.moments[0, ...]
-        v = self.moments[1, ...]
 
-        m = b1 * m + (1 - b1) * gradient
-        v = b2 * v + (1 - b2) * gradient**2
-        self.moments = np.array([m, v])
+        # m = b1 * m + (1 - b1) * g
+        m -= g
+        m *= b1
+        m += g
+        # v = b2 * v + (1 - b2) * g**2
+        np.square(g, out=g)
+        v -= g
+        v *= b2
+        v += g
 
-        m_hat = m / (1 - b1 ** (iteration + 1))
-        v_hat = v / (1 - b2 ** (iteration + 1))
-        w_hat = device.get_design_variable() + self.step_size * m_hat / np.sqrt(
-            v_hat + self.eps
-        )
+        # direction = m_hat / sqrt(v_hat + eps), computed in the scratch buffer
+        direction = np.multiply(v, 1 / (1 - b2 ** (iteration + 1)), out=g)
+        direction += self.eps
+        np.sqrt(direction, out=direction)
+        np.divide(m, direction, out=direction)
+        direction *= 1 / (1 - b1 ** (iteration + 1))
+
+        if self.step_control is not None:
+            self.step_size = self.step_control.scale(device, direction, self.step_size)
 
+        w = device.get_parameters()
+        w_hat = np.multiply(direction, self.step_size, dtype=np.float64)
+        w_hat += np.real(w)
         clipped = device.clip(w_hat)
-        device_diff = np.abs(clipped - device.get_design_variable())
-        device_diff_without_clipping = np.abs(w_hat - device.get_design_variable())
-        vipdopt.logger.info(f'Max change is {np.max(device_diff)}')
-        vipdopt.logger.info(
-            f'Max change without clipping is {np.max(device_diff_without_clipping)}'
-        )
-        vipdopt.logger.info(f'Min change is {np.min(device_diff)}')
-        vipdopt.logger.info(
-            f'Min change without clipping is {np.min(device_diff_without_clipping)}'
+        metrics.record(
+            'adam_step',
+            change=lambda: abs_stats(clipped - w),
+            change_without_clipping=lambda: abs_stats(w_hat - w),
         )
 
         # Apply changes
-        device.set_design_variable(clipped)
+        device.set_parameters(clipped)
@@ -0,0 +1,117 @@
+"""Atomic, asynchronous checkpointing of optimization state."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+import vipdopt
+from vipdopt.utils import PathLike, convert_path
+
+CHECKPOINT_NAME = 'checkpoint.npy'
+
+
+def write_atomic(fname: PathLike, state: dict[str, Any]):
+    """Write a state dictionary to file such that readers never see partial data.
+
+    The data is first written to a temporary file in the same directory, flushed
+    to disk, and then renamed over `fname`. Renames within a filesystem are atomic,
+    so a job killed mid-write leaves the previous checkpoint untouched.
+
+    Arguments:
+        fname (PathLike): The file to write to.
+        state (dict[str, Any]): The data to save.
+    """
+    path = convert_path(fname)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, state, allow_pickle=True)  # type: ignore
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def read_checkpoint(fname: PathLike) -> dict[str, Any]:
+    """Load a state dictionary written by `write_atomic`."""
+    with convert_path(fname).open('rb') as f:
+        return np.load(f, allow_pickle=True).flat[0]
+
+
+class Checkpointer:
+    """Writes optimization checkpoints to a directory on a background thread.
+
+    Only one write is in flight at a time; writes are performed in the order they
+    were submitted, so the file on disk always holds the newest completed state.
+
+    Attributes:
+        directory (Path): The folder containing the checkpoint file.
+        path (Path): The checkpoint file itself.
+    """
+
+    def __init__(self, directory: PathLike, name: str = CHECKPOINT_NAME):
+        """Initialize a Checkpointer."""
+        self.directory = convert_path(directory)
+        self.path = self.directory / name
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: Future | None = None
+
+    def save(self, state: dict[str, Any], block: bool = False):
+        """Submit a state dictionary to be written.
+
+        The caller must not mutate `state` afterwards; pass copies of any arrays
+        that will continue to change.
+
+        Arguments:
+            state (dict[str, Any]): The data to checkpoint.
+            block (bool): If True, wait for the write to finish before returning.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='vipdopt-checkpoint'
+            )
+        self._pending = self._executor.submit(write_atomic, self.path, state)
+        self._pending.add_done_callback(self._report)
+        if block:
+            self.wait()
+
+    def wait(self):
+        """Block until all submitted checkpoints have been written."""
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def close(self):
+        """Finish outstanding writes and stop the background thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._pending = None
+
+    def exists(self) -> bool:
+        """Return whether a checkpoint has been written to disk."""
+        return self.path.exists()
+
+    def load(self) -> dict[str, Any]:
+        """Wait for pending writes, then read the most recent checkpoint."""
+        self.wait()
+        return read_checkpoint(self.path)
+
+    def _report(self, future: Future):
+        """Log the result of a background write."""
+        exc = future.exception()
+        if exc is not None:
+            vipdopt.logger.error(f'Failed to write checkpoint {self.path}: {exc}')
+        else:
+            vipdopt.logger.debug(f'Checkpoint written to {self.path}')
@@ -0,0 +1,120 @@
+"""Module for the abstract Constraint class and all its implementations."""
+
+from __future__ import annotations
+
+import abc
+
+import numpy as np
+import numpy.typing as npt
+from overrides import override
+
+from vipdopt.optimization.device import Device
+
+
+class Constraint(abc.ABC):
+    """An abstract interface for differentiable design constraints.
+
+    A constraint is satisfied when its value is less than or equal to zero.
+    """
+
+    @property
+    @abc.abstractmethod
+    def init_vars(self) -> dict:
+        """The variables used to initialize this Constraint."""
+
+    @abc.abstractmethod
+    def __call__(self, device: Device) -> tuple[float, npt.NDArray]:
+        """Evaluate the constraint on a device.
+
+        Returns:
+            (tuple[float, npt.NDArray]): The value of the constraint, and its
+                gradient with respect to the device's design variable.
+        """
+
+    def __eq__(self, __value: object) -> bool:
+        """Test equality."""
+        if isinstance(__value, Constraint):
+            return type(self) is type(__value) and self.init_vars == __value.init_vars
+        return super().__eq__(__value)
+
+    def as_dict(self) -> dict:
+        """Return a dictionary representation of this constraint."""
+        return {'type': type(self).__name__, 'parameters': self.init_vars}
+
+    def __repr__(self) -> str:
+        """Return a string representation of the constraint."""
+        params = ', '.join(f'{k}={v}' for k, v in self.init_vars.items())
+        return f'{type(self).__name__}({params})'
+
+
+def density_to_design_gradient(device: Device, gradient: npt.NDArray) -> npt.NDArray:
+    """Propagate a gradient w.r.t. the density back to the design variable.
+
+    The density is the output of every filter except the final Scale filter, so the
+    chain rule is applied through all of those filters in reverse order.
+    """
+    grad = gradient
+    for i in range(device.num_filters() - 2, -1, -1):
+        grad = device.filters[i].chain_rule(
+            grad, device.w[..., i + 1], device.w[..., i]
+        )
+    return np.real(grad)
+
+
+class VolumeFractionConstraint(Constraint):
+    """Bound the fraction of the device filled with the high index material.
+
+    Attributes:
+        max_fraction (float): The maximum allowed mean density.
+    """
+
+    @property
+    @override
+    def init_vars(self) -> dict:
+        return {'max_fraction': self.max_fraction}
+
+    def __init__(self, max_fraction: float) -> None:
+        """Initialize a VolumeFractionConstraint."""
+        if not 0 <= max_fraction <= 1:
+            raise ValueError(
+                f'Volume fraction must be in the range [0, 1]; got {max_fraction}'
+            )
+        self.max_fraction = max_fraction
+
+    @override
+    def __call__(self, device: Device) -> tuple[float, npt.NDArray]:
+        density = np.real(device.get_density())
+        value = float(np.mean(density)) - self.max_fraction
+        grad = np.full(density.shape, 1.0 / density.size)
+        return value, density_to_design_gradient(device, grad)
+
+
+class BinarizationConstraint(Constraint):
+    """Require the device density to be binarized by at least a certain amount.
+
+    Uses the same binarization measure as `Device.compute_binarization`, applied to
+    the density.
+
+    Attributes:
+        min_binarization (float): The minimum allowed binarization in [0, 1].
+    """
+
+    @property
+    @override
+    def init_vars(self) -> dict:
+        return {'min_binarization': self.min_binarization}
+
+    def __init__(self, min_binarization: float) -> None:
+        """Initialize a BinarizationConstraint."""
+        if not 0 <= min_binarization <= 1:
+            raise ValueError(
+                f'Binarization must be in the range [0, 1]; got {min_binarization}'
+            )
+        self.min_binarization = min_binarization
+
+    @override
+    def __call__(self, device: Device) -> tuple[float, npt.NDArray]:
+        density = np.real(device.get_density())
+        value = self.min_binarization - device.compute_binarization(density)
+        grad = -(2.0 / density.size) * np.sign(density - 0.5)
+        return float(value), density_to_design_gradient(device, grad)
@@ -0,0 +1,251 @@
+"""Continuation schedules for the parameters of a device's filters."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+import vipdopt
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization.device import Device
+
+RAMP_KINDS = ('geometric', 'linear', 'steps')
+
+# The projection strength doubling every epoch, starting from a weak projection
+DEFAULT_FILTER_SCHEDULE: list[dict[str, Any]] = [
+    {'filter': 'Sigmoid', 'parameter': 'beta', 'start': 0.0625, 'rate': 2.0},
+    {'filter': 'Sigmoid', 'parameter': 'eta', 'start': 0.5, 'kind': 'steps'},
+]
+
+
+def epoch_progress(iteration: int, epoch_list: Sequence[int]) -> float:
+    """Return how far an optimization is through its epochs.
+
+    An iteration is in the filter epoch k of the last entry of `epoch_list` it has
+    reached, as the filters were always updated; with the usual epoch list
+    [0, 16, 32, ...], iterations 0-15 are in filter epoch 0. Iterations before the
+    first entry are also counted as filter epoch 0.
+
+    Arguments:
+        iteration (int): The current (total) iteration.
+        epoch_list (Sequence[int]): The iteration each epoch ends at.
+
+    Returns:
+        (float): The current filter epoch plus the fraction of it that has
+            completed.
+    """
+    epoch = int(np.searchsorted(epoch_list, iteration, side='right')) - 1
+    if epoch < 0:
+        return 0.0
+    if epoch >= len(epoch_list) - 1:
+        return float(epoch)
+    start = epoch_list[epoch]
+    end = epoch_list[epoch + 1]
+    fraction = (iteration - start) / max(end - start, 1)
+    return epoch + float(np.clip(fraction, 0.0, 1.0))
+
+
+class ParameterRamp:
+    """Trajectory of one parameter of a device filter over an optimization.
+
+    The trajectory is a function of the epoch, or, if `per_iteration` is set, of the
+    fractional epoch (see `epoch_progress`), so that the parameter ramps smoothly
+    across the iterations of an epoch instead of jumping at its boundaries. At a
+    (fractional) epoch t, the value is:
+    - 'geometric': start * rate ** t
+    - 'linear': start + rate * t
+    - 'steps': values[floor(t)], holding the last value; or start if no values are
+        given.
+    and is then limited to `maximum`, if given.
+
+    Attributes:
+        filter (str): Type of the filter to update, e.g. 'Sigmoid'.
+        parameter (str): Name of the parameter to update, e.g. 'beta'.
+        start (float): Value of the parameter at the start of the optimization.
+        rate (float): Growth factor (geometric) or increment (linear) per epoch.
+        kind (str): One of 'geometric', 'linear', or 'steps'. Defaults to 'steps' if
+            `values` are given, and 'geometric' otherwise.
+        values (list[float] | None): The value in each epoch, for 'steps'.
+        per_iteration (bool): Whether to update the parameter every iteration.
+        maximum (float | None): Upper limit of the parameter.
+        index (int): Which filter of the given type to update, if a device has
+            several. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        filter: str,  # noqa: A002
+        parameter: str,
+        start: float | None = None,
+        rate: float = 1.0,
+        kind: str | None = None,
+        values: Sequence[float] | None = None,
+        per_iteration: bool = False,
+        maximum: float | None = None,
+        index: int = 0,
+    ) -> None:
+        """Initialize a ParameterRamp."""
+        if kind is None:
+            kind = 'geometric' if values is None else 'steps'
+        if kind not in RAMP_KINDS:
+            raise ValueError(f'Ramp kind must be one of {RAMP_KINDS}; got {kind!r}')
+        if kind == 'geometric' and rate <= 0:
+            raise ValueError(f'Geometric ramps must have a positive rate; got {rate}')
+        if values is not None and len(values) == 0:
+            raise ValueError('Expected at least one value for a step ramp')
+        if start is None:
+            if values is None:
+                raise ValueError(f'No start value given for {filter}.{parameter}')
+            start = values[0]
+        self.filter = filter
+        self.parameter = parameter
+        self.start = start
+        self.rate = rate
+        self.kind = kind
+        self.values = None if values is None else list(values)
+        self.per_iteration = per_iteration
+        self.maximum = maximum
+        self.index = index
+
+    def __eq__(self, __value: object) -> bool:
+        """Test equality."""
+        if isinstance(__value, ParameterRamp):
+            return self.as_dict() == __value.as_dict()
+        return super().__eq__(__value)
+
+    def __repr__(self) -> str:
+        """Return a string representation of this ramp."""
+        return f'ParameterRamp({self.as_dict()})'
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this ramp."""
+        return {
+            'filter': self.filter,
+            'parameter': self.parameter,
+            'start': self.start,
+            'rate': self.rate,
+            'kind': self.kind,
+            'values': self.values,
+            'per_iteration': self.per_iteration,
+            'maximum': self.maximum,
+            'index': self.index,
+        }
+
+    def value(self, progress: float) -> float:
+        """Return the value of the parameter at a (fractional) epoch."""
+        t = progress if self.per_iteration else np.floor(progress)
+        match self.kind:
+            case 'geometric':
+                value = self.start * self.rate**t
+            case 'linear':
+                value = self.start + self.rate * t
+            case _:
+                value = (
+                    self.start
+                    if self.values is None
+                    else self.values[min(int(t), len(self.values) - 1)]
+                )
+        if self.maximum is not None:
+            value = min(value, self.maximum)
+        return float(value)
+
+    def filter_index(self, device: Device) -> int:
+        """Return the index of the filter this ramp updates in a device."""
+        matches = [
+            i for i, f in enumerate(device.filters) if type(f).__name__ == self.filter
+        ]
+        if self.index >= len(matches):
+            raise ValueError(
+                f'Device has {len(matches)} {self.filter} filter(s); cannot update '
+                f'the one at index {self.index}'
+            )
+        return matches[self.index]
+
+
+class ContinuationSchedule:
+    """Updates a device's filter parameters as an optimization progresses.
+
+    Filters are updated in place, and a device's density is only recomputed from
+    the first filter whose parameters actually changed, so calling `apply` every
+    iteration is cheap when nothing changes (e.g. ramps that only step per epoch).
+    The filters' parameters are stored with the device, and the schedule itself is
+    a pure function of the epoch and iteration, so resuming an optimization
+    reproduces the same trajectory.
+
+    Attributes:
+        ramps (list[ParameterRamp]): The trajectory of each scheduled parameter.
+    """
+
+    def __init__(self, ramps: Sequence[ParameterRamp | dict]) -> None:
+        """Initialize a ContinuationSchedule."""
+        self.ramps = [
+            ramp if isinstance(ramp, ParameterRamp) else ParameterRamp(**ramp)
+            for ramp in ramps
+        ]
+        targets = [(r.filter, r.index, r.parameter) for r in self.ramps]
+        if len(set(targets)) != len(targets):
+            raise ValueError(f'Filter parameters scheduled more than once: {targets}')
+
+    @classmethod
+    def from_config(cls, cfg: Any) -> ContinuationSchedule | None:
+        """Create a schedule from the `filter_schedule` setting of a config.
+
+        If the config does not specify a schedule, the default one is used, which
+        doubles the strength of the first sigmoid filter every epoch.
+
+        Returns:
+            (ContinuationSchedule | None): The schedule, or None if the config's
+                schedule is empty, i.e. the filters are fixed.
+        """
+        ramps = cfg.get('filter_schedule', DEFAULT_FILTER_SCHEDULE)
+        if not ramps:
+            return None
+        return cls(ramps)
+
+    def as_dict(self) -> list[dict[str, Any]]:
+        """Return a config representation of this schedule."""
+        return [ramp.as_dict() for ramp in self.ramps]
+
+    def parameters(
+        self, device: Device, progress: float
+    ) -> dict[int, dict[str, float]]:
+        """Return the scheduled filter parameters of a device.
+
+        Arguments:
+            device (Device): The device whose filters to update.
+            progress (float): The current (fractional) epoch.
+
+        Returns:
+            (dict[int, dict[str, float]]): Map of filter indices to parameters.
+        """
+        parameters: dict[int, dict[str, float]] = {}
+        for ramp in self.ramps:
+            params = parameters.setdefault(ramp.filter_index(device), {})
+            params[ramp.parameter] = ramp.value(progress)
+        return parameters
+
+    def apply(self, device: Device, progress: float) -> bool:
+        """Update a device's filters for the current (fractional) epoch.
+
+        Returns:
+            (bool): Whether any filter parameter changed.
+        """
+        parameters = self.parameters(device, progress)
+        changed = device.update_filters(parameters)
+        if changed:
+            vipdopt.logger.debug(
+                f'Updated filters of {device.name} at epoch {progress:.3f}: '
+                f'{parameters}'
+            )
+            metrics.record(
+                'continuation',
+                progress=progress,
+                parameters=lambda: {
+                    f'{device.filters[i].__class__.__name__}{i}.{k}': v
+                    for i, params in parameters.items()
+                    for k, v in params.items()
+                },
+            )
+        return changed
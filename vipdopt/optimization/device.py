@@ -14,13 +14,16 @@
 from scipy import interpolate
 
 from vipdopt import GDS, STL
-from vipdopt.optimization.filter import Filter, Scale, Sigmoid
+from vipdopt.optimization.filter import Filter, Scale
+from vipdopt.optimization.parameterization import Parameterization
 from vipdopt.simulation import Import
+from vipdopt.snapshot import is_snapshot, read_snapshot, write_snapshot
 from vipdopt.utils import Coordinates, PathLike, ensure_path, repeat
 
 CONTROL_AVERAGE_PERMITTIVITY = 3
 GAUSSIAN_SCALE = 0.27
 REINTERPOLATION_SIZE = (300, 300, 306)
+SNAPSHOT_KIND = 'device'
 
 
 # TODO: Add `feature_dimensions` for allowing z layers to have thickness otehr than 1
@@ -39,6 +42,9 @@ class Device:
         symmetric (bool): Whether to initialize with symmetric design vairables;
             defaults to False. Does nothing if `randomize` is False.
         filters (list[Filter]): Filters to initialize the device with.
+        parameterization (Parameterization | None): Reduced parameterization of the
+            design variable that optimizers work with; if None, every voxel is a
+            parameter. The initial design is projected onto it.
         w (npt.NDArray[np.complex128]): The w variable for the device;
             has shape equal to size x (len(filters) + 1).
     """
@@ -54,6 +60,7 @@ def __init__(
         init_seed: None | int = None,
         symmetric: bool = False,
         filters: list[Filter] | None = None,
+        parameterization: Parameterization | dict | None = None,
         **kwargs,
     ):
         """Initialize Device object."""
@@ -98,6 +105,14 @@ def __init__(
             )
         self.coords = coords
 
+        if isinstance(parameterization, dict):
+            parameterization = Parameterization.from_dict(parameterization, size)
+        if parameterization is not None and parameterization.shape != tuple(size):
+            raise ValueError(
+                f'Parameterization of shape {parameterization.shape} does not match '
+                f'device size {size}'
+            )
+
         # Optional arguments
         self.name = name
         self.init_density = init_density
@@ -105,6 +120,7 @@ def __init__(
         self.init_seed = init_seed
         self.symmetric = symmetric
         self.filters = filters
+        self.parameterization = parameterization
         vars(self).update(kwargs)
 
         # Give default value for the shape of the field.
@@ -141,6 +157,10 @@ def _init_variables(self):
             w[..., 0] = np.maximum(np.minimum(w[..., 0], 1), 0)
         else:
             w[..., 0] = self.init_density * np.ones(self.size, dtype=np.complex128)
+        if self.parameterization is not None:
+            w[..., 0] = self.parameterization.expand(
+                self.parameterization.project(w[..., 0])
+            )
         self.w = w
 
     def as_dict(self) -> dict:
@@ -164,6 +184,9 @@ def as_dict(self) -> dict:
             filters.append(filt_dict)
         data['filters'] = filters
 
+        if self.parameterization is not None:
+            data['parameterization'] = self.parameterization.as_dict()
+
         return data
 
     def load_dict(self, device_data: dict):
@@ -190,29 +213,40 @@ def _from_dict(cls, device_data: dict) -> Device:
         data['filters'] = filters
         return cls(**data)
 
+    def snapshot_dict(self, binarize: bool = False) -> dict:
+        """Return the data stored in a snapshot of this device.
+
+        Unlike `as_dict`, the coordinates are kept as arrays, and the design
+        variable is included.
+        """
+        data = self.as_dict()
+        data['coords'] = dict(self.coords)
+        w = self.get_design_variable()
+        data['w'] = self.pass_through_filters(w, True) if binarize else w
+        return data
+
     @ensure_path
     def save(self, fname: Path, binarize: bool = False):
-        """Save device to a .npz file."""
-        with fname.open('wb') as f:
-            np.save(f, self.as_dict())  # type: ignore
-            if binarize:
-                np.save(f, self.pass_through_filters(self.get_design_variable(), True))
-            else:
-                np.save(f, self.get_design_variable())
+        """Save device to a snapshot directory, or a .zip archive of one.
+
+        Arguments:
+            fname (Path): The snapshot to write.
+            binarize (bool): Whether to save the binarized design variable instead.
+                Defaults to False.
+        """
+        write_snapshot(fname, self.snapshot_dict(binarize), kind=SNAPSHOT_KIND)
 
     @classmethod
     def from_source(cls, source: dict | PathLike) -> Device:
-        """Create a new device from a dictionary or load a saved .npy file."""
+        """Create a new device from a dictionary or load a saved device."""
         if isinstance(source, dict):
             return Device._from_dict(source)
         return Device._from_file(source)
 
     @ensure_path
     def load_file(self, fname: Path):
-        """Load device from a .npz file."""
-        with fname.open('rb') as f:
-            attributes = np.load(f, allow_pickle=True).flat[0]
-            w = np.load(f)
+        """Load device from a snapshot or a legacy .npy file."""
+        attributes, w = Device._read_file(fname)
         self.load_dict(attributes)
         self.set_design_variable(w)
 
@@ -220,13 +254,23 @@ def load_file(self, fname: Path):
     @ensure_path
     def _from_file(cls, fname: Path) -> Device:
         """Create a new device by loading from a saved file."""
-        with fname.open('rb') as f:
-            attributes = np.load(f, allow_pickle=True).flat[0]
-            w = np.load(f)
+        attributes, w = Device._read_file(fname)
         d = Device._from_dict(attributes)
         d.set_design_variable(w)
         return d
 
+    @staticmethod
+    def _read_file(fname: Path) -> tuple[dict, npt.NDArray]:
+        """Read the attributes and design variable of a saved device."""
+        if is_snapshot(fname):
+            attributes = read_snapshot(fname, kind=SNAPSHOT_KIND)
+            return attributes, attributes.pop('w')
+        # Devices used to be saved as a pickled dictionary followed by the design
+        with fname.open('rb') as f:
+            attributes = np.load(f, allow_pickle=True).flat[0]
+            w = np.load(f)
+        return attributes, w
+
     def clip(self, x: npt.NDArray) -> npt.NDArray:
         """Return x where all values are clipped to the device's constraints."""
         return np.maximum(
@@ -234,6 +278,13 @@ def clip(self, x: npt.NDArray) -> npt.NDArray:
             self.permittivity_constraints[0],
         )
 
+    def get_bounds(self) -> dict[str, tuple[float, float]]:
+        """Return the (min, max) extent of the device along each axis in meters."""
+        return {
+            axis: (1e-6 * float(np.min(c)), 1e-6 * float(np.max(c)))
+            for axis, c in self.coords.items()
+        }
+
     def get_design_variable(self) -> npt.NDArray[np.complex128]:
         """Return the design variable of the device region (i.e. first layer)."""
         return self.w[..., 0]
@@ -243,19 +294,59 @@ def set_design_variable(self, value: npt.NDArray[np.complex128]):
         self.w[..., 0] = value.copy()
         self.update_density()
 
+    def get_parameters(self) -> npt.NDArray[np.complex128]:
+        """Return the parameters optimizers work with.
+
+        This is the reduced design vector if the device has a parameterization,
+        otherwise the design variable itself.
+        """
+        if self.parameterization is None:
+            return self.get_design_variable()
+        return self.parameterization.project(self.get_design_variable())
+
+    def set_parameters(self, value: npt.NDArray):
+        """Set the design variable from the parameters optimizers work with."""
+        if self.parameterization is None:
+            self.set_design_variable(value)
+        else:
+            self.set_design_variable(self.parameterization.expand(value))
+
+    def reduce_gradient(self, gradient: npt.NDArray) -> npt.NDArray:
+        """Return a gradient w.r.t. the design variable w.r.t. the parameters."""
+        if self.parameterization is None:
+            return gradient
+        return self.parameterization.gradient(gradient)
+
+    def parameter_gradient(self, gradient: npt.ArrayLike) -> npt.NDArray:
+        """Backpropagate a gradient to the parameters optimizers work with."""
+        return self.reduce_gradient(self.backpropagate(gradient))
+
     def num_filters(self):
         """Return the number of filters in this device."""
         return len(self.filters)
 
-    def update_filters(self, epoch=0):
-        """Update the filters of the device."""
-        # TODO: Make this more general.
-        sigmoid_beta = 0.0625 * (2**epoch)
-        sigmoid_eta = 0.5
-        self.filters = [
-            Sigmoid(sigmoid_eta, sigmoid_beta),
-            Scale(self.permittivity_constraints),
+    def update_filters(self, parameters: dict[int, dict[str, float]]) -> bool:
+        """Set parameters of the device's filters in place.
+
+        Only the layers of `w` after the first filter whose parameters changed are
+        recomputed.
+
+        Arguments:
+            parameters (dict[int, dict[str, float]]): Map of filter indices to the
+                new values of their parameters.
+
+        Returns:
+            (bool): Whether any parameter changed value.
+        """
+        changed = [
+            i
+            for i, params in sorted(parameters.items())
+            if self.filters[i].update(**params)
         ]
+        if not changed:
+            return False
+        self.update_density(start=changed[0])
+        return True
 
     def get_density(self):
         """Return the density of the device region (i.e. last layer)."""
@@ -269,9 +360,14 @@ def get_permittivity(self) -> npt.NDArray[np.complex128]:
 
         return self.w[..., -1]
 
-    def update_density(self):
-        """Pass each layer of density through the devices filters."""
-        for i in range(self.num_filters()):
+    def update_density(self, start: int = 0):
+        """Pass each layer of density through the devices filters.
+
+        Arguments:
+            start (int): Index of the first filter to pass through; the layers
+                before its input are assumed to be up to date. Defaults to 0.
+        """
+        for i in range(start, self.num_filters()):
             var_in = self.w[..., i]
             var_out = self.filters[i].forward(var_in)
             self.w[..., i + 1] = var_out
@@ -463,28 +559,48 @@ def import_cur_index(
 
         return cur_density, cur_permittivity
 
-    def interpolate_gradient(self, g: npt.NDArray, dimension: str = '3D'):
+    def interpolate_gradient(
+        self,
+        g: npt.NDArray,
+        dimension: str = '3D',
+        coords: Coordinates | None = None,
+    ):
         """Reinterpolate and import gradient into the shape of the design regions.
 
         Arguments:
             g (NDArray): The uninterpolated, but perhaps processed, gradient with shape obtained from
                         the design efield monitors for adjoint optimization.
             dimension (str): The dimension of the simulation, either "2D" or "3D". Defaults to "3D".
+            coords (Coordinates | None): The positions in meters at which `g` was
+                sampled, e.g. the axes of a cropped design monitor. If None, `g` is
+                assumed to span exactly the device's coordinates. Defaults to None.
         """
-        gradient_region_x = 1e-6 * np.linspace(
-            self.coords['x'][0], self.coords['x'][-1], g.shape[0]
-        )  # cfg.pv.device_voxels_simulation_mesh_lateral_bordered)
-        gradient_region_y = 1e-6 * np.linspace(
-            self.coords['y'][0], self.coords['y'][-1], g.shape[1]
-        )
-        try:
-            gradient_region_z = 1e-6 * np.linspace(
-                self.coords['z'][0], self.coords['z'][-1], g.shape[2]
+        if coords is not None:
+            gradient_region_x = np.ravel(coords['x'])
+            gradient_region_y = np.ravel(coords['y'])
+        else:
+            gradient_region_x = 1e-6 * np.linspace(
+                self.coords['x'][0], self.coords['x'][-1], g.shape[0]
+            )  # cfg.pv.device_voxels_simulation_mesh_lateral_bordered)
+            gradient_region_y = 1e-6 * np.linspace(
+                self.coords['y'][0], self.coords['y'][-1], g.shape[1]
             )
+        try:
+            if coords is not None and len(np.ravel(coords['z'])) == g.shape[2]:
+                gradient_region_z = np.ravel(coords['z'])
+            else:
+                gradient_region_z = 1e-6 * np.linspace(
+                    self.coords['z'][0], self.coords['z'][-1], g.shape[2]
+                )
         except IndexError:  # 2D case
             gradient_region_z = 1e-6 * np.linspace(
                 self.coords['z'][0], self.coords['z'][-1], 3
             )
+        # Sample positions coming from the solver can differ from the device
+        # coordinates by rounding error at the edges, so allow extrapolation there.
+        interp_kwargs = (
+            {} if coords is None else {'bounds_error': False, 'fill_value': None}
+        )
         design_region_geometry = np.array(
             np.meshgrid(
                 1e-6 * self.coords['x'],
@@ -502,6 +618,7 @@ def interpolate_gradient(self, g: npt.NDArray, dimension: str = '3D'):
                 ),  # Repeats 2D array in 3rd dimension, 3 times
                 design_region_geometry,
                 method='linear',
+                **interp_kwargs,
             )
         elif dimension in '3D':
             design_gradient_interpolated = interpolate.interpn(
@@ -509,6 +626,7 @@ def interpolate_gradient(self, g: npt.NDArray, dimension: str = '3D'):
                 g,
                 design_region_geometry,
                 method='linear',
+                **interp_kwargs,
             )
 
         return design_gradient_interpolated
@@ -0,0 +1,192 @@
+"""Schedules running early epochs on cheaper, lower fidelity simulations."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import vipdopt
+from vipdopt.diagnostics import metrics
+from vipdopt.simulation import LumericalSimObjectType, LumericalSimulation
+
+MESH_STEP_PROPERTIES = ('dx', 'dy', 'dz')
+SIMULATION_TIME_PROPERTY = 'simulation time'
+
+
+class Fidelity:
+    """Simulation settings to use starting from a given epoch.
+
+    Attributes:
+        start_epoch (int): The first epoch to use these settings in.
+        mesh_spacing_um (float | None): Mesh spacing in microns; None keeps the
+            spacing of the config.
+        fdtd_simulation_time_fs (float | None): Simulation time in femtoseconds;
+            None keeps the simulation time of the config.
+    """
+
+    def __init__(
+        self,
+        start_epoch: int,
+        mesh_spacing_um: float | None = None,
+        fdtd_simulation_time_fs: float | None = None,
+    ) -> None:
+        """Initialize a Fidelity."""
+        if start_epoch < 0:
+            raise ValueError(f'Start epoch must be non-negative; got {start_epoch}')
+        for name, value in (
+            ('Mesh spacing', mesh_spacing_um),
+            ('Simulation time', fdtd_simulation_time_fs),
+        ):
+            if value is not None and value <= 0:
+                raise ValueError(f'{name} must be positive; got {value}')
+        self.start_epoch = int(start_epoch)
+        self.mesh_spacing_um = mesh_spacing_um
+        self.fdtd_simulation_time_fs = fdtd_simulation_time_fs
+
+    def __eq__(self, __value: object) -> bool:
+        """Test equality."""
+        if isinstance(__value, Fidelity):
+            return self.as_dict() == __value.as_dict()
+        return super().__eq__(__value)
+
+    def __repr__(self) -> str:
+        """Return a string representation of this fidelity."""
+        return f'Fidelity({self.as_dict()})'
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this fidelity."""
+        return {
+            'start_epoch': self.start_epoch,
+            'mesh_spacing_um': self.mesh_spacing_um,
+            'fdtd_simulation_time_fs': self.fdtd_simulation_time_fs,
+        }
+
+
+class FidelitySchedule:
+    """Assigns a simulation fidelity to every epoch of an optimization.
+
+    Each level of the schedule is used from its start epoch until the next level
+    starts; epochs before the first level use the settings of the config. A typical
+    schedule runs the first epochs on a coarse mesh with a short simulation time,
+    where most of the topology is found, and refines the simulations as the design
+    converges.
+
+    Mesh steps of every mesh override object are scaled by the ratio of the level's
+    mesh spacing to the config's, so objects meshed more finely than the rest of the
+    simulation (e.g. sidewalls) stay relatively finer. The design variable itself is
+    unaffected: the device is imported onto, and its gradient interpolated from,
+    whatever mesh the simulation uses, so the design carries over between levels.
+
+    Attributes:
+        levels (list[Fidelity]): The levels of the schedule, by start epoch.
+        mesh_spacing_um (float): The config's mesh spacing in microns.
+        fdtd_simulation_time_fs (float): The config's simulation time in
+            femtoseconds.
+    """
+
+    def __init__(
+        self,
+        levels: Sequence[Fidelity | dict],
+        mesh_spacing_um: float,
+        fdtd_simulation_time_fs: float,
+    ) -> None:
+        """Initialize a FidelitySchedule."""
+        self.levels = sorted(
+            (
+                level if isinstance(level, Fidelity) else Fidelity(**level)
+                for level in levels
+            ),
+            key=lambda level: level.start_epoch,
+        )
+        starts = [level.start_epoch for level in self.levels]
+        if len(set(starts)) != len(starts):
+            raise ValueError(
+                f'Fidelity levels must start at distinct epochs; got {starts}'
+            )
+        self.mesh_spacing_um = mesh_spacing_um
+        self.fdtd_simulation_time_fs = fdtd_simulation_time_fs
+        # Property values of the full fidelity simulation, recorded on first use
+        self._base_properties: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Any) -> FidelitySchedule | None:
+        """Create a schedule from the `fidelity_schedule` setting of a config.
+
+        Returns:
+            (FidelitySchedule | None): The schedule, or None if the config does not
+                specify one.
+        """
+        levels = cfg.get('fidelity_schedule')
+        if not levels:
+            return None
+        return cls(levels, cfg['mesh_spacing_um'], cfg['fdtd_simulation_time_fs'])
+
+    def level(self, epoch: int) -> Fidelity:
+        """Return the fidelity to use in an epoch."""
+        current = Fidelity(0)
+        for level in self.levels:
+            if level.start_epoch > epoch:
+                break
+            current = level
+        return current
+
+    def apply(self, sim: LumericalSimulation, epoch: int) -> Fidelity:
+        """Update a simulation's mesh and simulation time for an epoch.
+
+        Arguments:
+            sim (LumericalSimulation): The simulation to update in place. Must
+                always be the same (base) simulation, since its original properties
+                are recorded the first time it is updated.
+            epoch (int): The epoch that is about to start.
+
+        Returns:
+            (Fidelity): The fidelity that was applied.
+        """
+        level = self.level(epoch)
+        if not self._base_properties:
+            self._record_base_properties(sim)
+
+        mesh_scale = (
+            1.0
+            if level.mesh_spacing_um is None
+            else level.mesh_spacing_um / self.mesh_spacing_um
+        )
+        time_fs = (
+            self.fdtd_simulation_time_fs
+            if level.fdtd_simulation_time_fs is None
+            else level.fdtd_simulation_time_fs
+        )
+        for name, properties in self._base_properties.items():
+            updates = {
+                prop: value * mesh_scale
+                for prop, value in properties.items()
+                if prop in MESH_STEP_PROPERTIES
+            }
+            if SIMULATION_TIME_PROPERTY in properties:
+                updates[SIMULATION_TIME_PROPERTY] = time_fs * 1e-15
+            sim.update_object(name, **updates)
+
+        vipdopt.logger.info(
+            f'Using fidelity {level} for epoch {epoch}: mesh steps scaled by '
+            f'{mesh_scale}, simulation time {time_fs} fs.'
+        )
+        metrics.record(
+            'fidelity',
+            epoch=epoch,
+            mesh_scale=mesh_scale,
+            simulation_time_fs=time_fs,
+        )
+        return level
+
+    def _record_base_properties(self, sim: LumericalSimulation):
+        """Remember the full fidelity mesh steps and simulation time of a sim."""
+        for name, obj in sim.objects.items():
+            if obj.obj_type == LumericalSimObjectType.MESH:
+                keys: Sequence[str] = MESH_STEP_PROPERTIES
+            elif obj.obj_type == LumericalSimObjectType.FDTD:
+                keys = (SIMULATION_TIME_PROPERTY,)
+            else:
+                continue
+            base = {k: obj.properties[k] for k in keys if k in obj.properties}
+            if base:
+                self._base_properties[name] = base
@@ -36,6 +36,32 @@ def verify_bounds(self, variable: npt.NDArray | float | float) -> bool:
             and (np.max(np.array(variable)) <= self._bounds[1])
         )
 
+    def update(self, **params) -> bool:
+        """Set parameters of this filter in place.
+
+        Only the variables used to initialize this filter (see `init_vars`) can be
+        updated.
+
+        Returns:
+            (bool): Whether any parameter changed value.
+        """
+        current = self.init_vars
+        unknown = set(params) - set(current)
+        if unknown:
+            raise ValueError(
+                f'Unknown parameters {sorted(unknown)} for {type(self).__name__}; '
+                f'expected a subset of {sorted(current)}'
+            )
+        changed = {k: v for k, v in params.items() if current[k] != v}
+        if not changed:
+            return False
+        vars(self).update(changed)
+        self._precompute()
+        return True
+
+    def _precompute(self):  # noqa: B027
+        """Recompute any values derived from the parameters of this filter."""
+
     @abc.abstractmethod
     def forward(self, x: npt.NDArray | float) -> npt.NDArray | float:
         """Propogate x through the filter and return the result."""
@@ -89,9 +115,20 @@ def __init__(self, eta: float, beta: float) -> None:
 
         self.eta = eta
         self.beta = beta
+        self._precompute()
 
+    @override
+    def update(self, **params) -> bool:
+        if 'eta' in params and not self.verify_bounds(params['eta']):
+            raise ValueError('Eta must be in the range [0, 1]')
+        return super().update(**params)
+
+    @override
+    def _precompute(self):
         # Calculate denominator for use in methods
-        self._denominator = np.tanh(beta * eta) + np.tanh(beta * (1 - eta))
+        self._denominator = np.tanh(self.beta * self.eta) + np.tanh(
+            self.beta * (1 - self.eta)
+        )
 
     def __repr__(self) -> str:
         """Return a string representation of the filter."""
@@ -178,7 +215,10 @@ def init_vars(self) -> dict:
     def __init__(self, variable_bounds: tuple[float, float]):
         """Initialize a Scale filter."""
         self.variable_bounds = variable_bounds
+        self._precompute()
 
+    @override
+    def _precompute(self):
         self.range = self._bounds[1] - self._bounds[0]
 
     def __eq__(self, __value: object) -> bool:
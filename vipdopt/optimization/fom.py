@@ -8,12 +8,13 @@
 from copy import copy
 from functools import reduce
 from itertools import product
-from typing import Any, Concatenate
+from typing import Any, Concatenate, TypedDict
 
 import numpy as np
 import numpy.typing as npt
 
 import vipdopt
+from vipdopt.diagnostics import component_abs_mean, metrics
 from vipdopt.simulation import LumericalSimulation, Monitor, Source
 from vipdopt.simulation.monitor import Power, Profile
 from vipdopt.simulation.source import DipoleSource, GaussianSource
@@ -29,6 +30,23 @@
 POLARIZATIONS = ['TE', 'TM', 'TE+TM']
 
 
+class FoMEvaluation(TypedDict):
+    """Results of evaluating every FoM in a SuperFoM in a single pass.
+
+    Per-group arrays have a leading axis of length len(SuperFoM.foms). If the
+    gradient was only evaluated at a subset of the spectrum, `grad_freqs` holds the
+    indices of the sampled frequencies along the gradient's last axis; otherwise it
+    is None.
+    """
+
+    fom: npt.NDArray
+    foms: npt.NDArray
+    grad: npt.NDArray
+    grads: npt.NDArray
+    quantities: dict[str, npt.NDArray]
+    grad_freqs: npt.NDArray | None
+
+
 class SuperFoM:
     """Representation of a weighted sum of FoMs that take the same arguments.
 
@@ -62,7 +80,8 @@ def __eq__(self, other: Any) -> bool:
 
     def reset_monitors(self):
         """Reset all of the monitors used to calculate the FoM."""
-        map(FoM.reset_monitors, flatten(self.foms))
+        for fom in flatten(self.foms):
+            FoM.reset_monitors(fom)
 
     def performance_weighting(self, fom_values: npt.NDArray):
         """Recompute the weights based on the performance of the optimization.
@@ -148,6 +167,13 @@ def _prod_rule(foms: tuple[FoM, ...], *args, **kwargs) -> npt.NDArray:
                 )
             )
         )
+        return SuperFoM._prod_rule_from_values(fom_vals, grad_vals)
+
+    @staticmethod
+    def _prod_rule_from_values(
+        fom_vals: npt.NDArray, grad_vals: npt.NDArray
+    ) -> npt.NDArray:
+        """Apply the product rule given the (unreduced) values and gradients."""
         term2 = np.sum(
             np.divide(
                 grad_vals,
@@ -177,6 +203,134 @@ def compute_grad(
             return np.einsum('i,i...->...', self.performance_weights, grad_results)
         return np.einsum('i,i...->...', self.weights, grad_results)
 
+    def evaluate(
+        self,
+        fom_args: tuple[Any, ...] = (),
+        fom_kwargs: dict | None = None,
+        grad_args: tuple[Any, ...] = (),
+        grad_kwargs: dict | None = None,
+        quantities: Sequence[str] = (),
+        apply_performance_weights: bool = False,
+        spectral_sample: tuple[npt.ArrayLike, npt.ArrayLike] | None = None,
+    ) -> FoMEvaluation:
+        """Compute the FoM, its gradient, and any extra quantities in a single pass.
+
+        Unlike calling `compute_fom` and `compute_grad` separately, each unique FoM's
+        `fom_func` and `grad_func` are called exactly once (plus once per extra
+        quantity of the first FoM in a group), all reading from the same monitor
+        data. Per-group results are written into preallocated arrays and the weights
+        are applied with a single contraction.
+
+        Arguments:
+            fom_args (tuple[Any, ...]): Positional arguments passed to each `fom_func`.
+            fom_kwargs (dict | None): Keyword arguments passed to each `fom_func`.
+            grad_args (tuple[Any, ...]): Positional arguments passed to each
+                `grad_func`.
+            grad_kwargs (dict | None): Keyword arguments passed to each `grad_func`.
+            quantities (Sequence[str]): Additional outputs to compute, passed to
+                `fom_func` as the `type` keyword argument (e.g. 'transmission').
+                These are returned without spectral weighting or reduction. Groups
+                of several FoMs report the quantities of their first FoM.
+            apply_performance_weights (bool): Whether to combine the gradients using
+                the performance weights rather than `self.weights`.
+            spectral_sample (tuple[npt.ArrayLike, npt.ArrayLike] | None): Indices
+                along the gradient's spectral axis to evaluate the gradient at, and
+                the quadrature weight of each, e.g. from a `SpectralSampler`. The
+                gradient is then only computed at those frequencies and scaled so
+                that summing it over frequency approximates the sum over the full
+                spectrum. The FoM and extra quantities are always computed over the
+                full spectrum. Defaults to None, computing the full gradient.
+
+        Returns:
+            (FoMEvaluation): The weighted FoM and gradient, the per-group values
+                they were combined from, and the per-group extra quantities.
+        """
+        fom_kwargs = {} if fom_kwargs is None else fom_kwargs
+        grad_kwargs = {} if grad_kwargs is None else grad_kwargs
+
+        # A FoM may appear in several groups; only evaluate it once
+        unique_foms = {id(fom): fom for fom in flatten(self.foms)}
+        values: dict[int, npt.NDArray] = {}
+        grads: dict[int, npt.NDArray] = {}
+        extras: dict[int, dict[str, npt.NDArray]] = {}
+        # Each group reports the extra quantities of its first FoM
+        leading_foms = {id(group[0]) for group in self.foms}
+        for key, fom in unique_foms.items():
+            values[key] = np.dot(
+                fom.fom_func(*fom_args, **fom_kwargs), fom.spectral_weights
+            )
+            if key in leading_foms:
+                extras[key] = {
+                    q: np.asarray(fom.fom_func(*fom_args, **{**fom_kwargs, 'type': q}))
+                    for q in quantities
+                }
+            if spectral_sample is None:
+                grads[key] = np.dot(
+                    fom.grad_func(*grad_args, **grad_kwargs), fom.spectral_weights
+                )
+            else:
+                grads[key] = fom.sampled_grad(
+                    spectral_sample, *grad_args, **grad_kwargs
+                )
+        n_groups = len(self.foms)
+        fom_results: npt.NDArray | None = None
+        grad_results: npt.NDArray | None = None
+        quantity_results: dict[str, npt.NDArray] = {}
+        for i, group in enumerate(self.foms):
+            keys = [id(fom) for fom in group]
+            fom_val = np.prod(
+                [fom.reduce_func(values[id(fom)]) for fom in group], axis=0
+            )
+            if len(group) == 1:
+                grad_val = grads[keys[0]]
+            else:
+                group_values = [values[k] for k in keys]
+                if spectral_sample is not None:
+                    # The product rule needs the values at the sampled frequencies
+                    group_values = [
+                        np.take(v, spectral_sample[0], axis=-1) if np.ndim(v) else v
+                        for v in group_values
+                    ]
+                grad_val = SuperFoM._prod_rule_from_values(
+                    np.array(group_values),
+                    np.array([grads[k] for k in keys]),
+                )
+
+            if fom_results is None or grad_results is None:
+                fom_results = np.empty(
+                    (n_groups, *np.shape(fom_val)), dtype=np.result_type(fom_val)
+                )
+                grad_results = np.empty(
+                    (n_groups, *np.shape(grad_val)), dtype=np.result_type(grad_val)
+                )
+            fom_results[i] = fom_val
+            grad_results[i] = grad_val
+
+            for q in quantities:
+                q_val = extras[keys[0]][q]
+                if q not in quantity_results:
+                    quantity_results[q] = np.empty(
+                        (n_groups, *q_val.shape), dtype=q_val.dtype
+                    )
+                quantity_results[q][i] = q_val
+
+        assert fom_results is not None
+        assert grad_results is not None
+        self.performance_weighting(fom_results)
+        grad_weights = (
+            self.performance_weights if apply_performance_weights else self.weights
+        )
+        return FoMEvaluation(
+            fom=np.einsum('i,i...->...', self.weights, fom_results),
+            foms=fom_results,
+            grad=np.einsum('i,i...->...', grad_weights, grad_results),
+            grads=grad_results,
+            quantities=quantity_results,
+            grad_freqs=None
+            if spectral_sample is None
+            else np.asarray(spectral_sample[0]),
+        )
+
     def create_forward_sim(
         self, base_sim: LumericalSimulation
     ) -> list[LumericalSimulation]:
@@ -462,7 +616,6 @@ def reset_monitors(self):
     def compute_fom(self, *args, reduce: bool = True, **kwargs) -> npt.NDArray:
         """Compute the figure of merit."""
         total_fom = self.fom_func(*args, **kwargs)
-        self.reset_monitors()
         # return self._subtract_neg(total_fom)
         f = np.dot(total_fom, self.spectral_weights)
         if reduce:
@@ -472,10 +625,51 @@ def compute_fom(self, *args, reduce: bool = True, **kwargs) -> npt.NDArray:
     def compute_grad(self, *args, **kwargs) -> npt.NDArray:
         """Compute the gradient of the figure of merit."""
         total_grad = self.grad_func(*args, **kwargs)
-        self.reset_monitors()
         # return self._subtract_neg(total_grad)
         return np.dot(total_grad, self.spectral_weights)
 
+    def compute_grad_at(self, freqs: npt.ArrayLike, *args, **kwargs) -> npt.NDArray:
+        """Compute the (unweighted) gradient at a subset of its frequencies only.
+
+        Arguments:
+            freqs (npt.ArrayLike): Indices along the gradient's spectral axis, i.e.
+                positions in `pos_max_freqs`.
+            *args: Arguments passed to `grad_func`.
+            **kwargs: Keyword arguments passed to `grad_func`.
+
+        Returns:
+            (npt.NDArray): The gradient, with a last axis of length len(freqs).
+        """
+        # Subclasses that can skip the work at the other frequencies override this
+        return np.take(self.grad_func(*args, **kwargs), freqs, axis=-1)
+
+    def sampled_grad(
+        self,
+        spectral_sample: tuple[npt.ArrayLike, npt.ArrayLike],
+        *args,
+        **kwargs,
+    ) -> npt.NDArray:
+        """Compute the spectrally weighted gradient at a sample of frequencies.
+
+        Arguments:
+            spectral_sample (tuple[npt.ArrayLike, npt.ArrayLike]): The sampled
+                indices along the gradient's spectral axis and their quadrature
+                weights.
+            *args: Arguments passed to `grad_func`.
+            **kwargs: Keyword arguments passed to `grad_func`.
+
+        Returns:
+            (npt.NDArray): The gradient as `compute_grad` would return it, except
+                that any spectral axis only contains the sampled frequencies,
+                scaled by their quadrature weights.
+        """
+        freqs, quadrature = (np.asarray(a) for a in spectral_sample)
+        grad = self.compute_grad_at(freqs, *args, **kwargs)
+        spectral_weights = np.asarray(self.spectral_weights)
+        if spectral_weights.ndim == 0:
+            return grad * (spectral_weights * quadrature)
+        return np.dot(grad, spectral_weights[freqs] * quadrature)
+
     def _subtract_neg(self, array: npt.NDArray) -> npt.NDArray:
         """[NO LONGER USED] Subtract the restricted indices from the positive ones."""
         if len(self.pos_max_freqs) == 0:
@@ -695,32 +889,33 @@ def _bayer_fom(self, *args, **kwargs):
             case _:
                 return total_ffom
 
-    def _bayer_gradient(self):
-        """Compute the gradient of the bayer filter figure of merit."""
+    def _bayer_gradient(self, freqs: npt.ArrayLike | None = None):
+        """Compute the gradient of the bayer filter figure of merit.
+
+        Arguments:
+            freqs (npt.ArrayLike | None): If provided, only compute the gradient at
+                these positions in `pos_max_freqs`. Defaults to None.
+        """
+        freq_idxs = np.asarray(self.pos_max_freqs)
+        if freqs is not None:
+            freq_idxs = freq_idxs[freqs]
+        fwd_monitor = self.fwd_monitors[2]
+        adj_monitor = self.adj_monitors[0]
         # e_fwd = self.design_fwd_fields
-        e_fwd = self.fwd_monitors[2].e
-        e_adj = self.adj_monitors[0].e
+        e_fwd = fwd_monitor.e[..., fwd_monitor.spectral_positions(freq_idxs)]
+        e_adj = adj_monitor.e[..., adj_monitor.spectral_positions(freq_idxs)]
+        source_weight = self.source_weight[..., freq_idxs]
 
         # #! DEBUG: Check orthogonality and direction of E-fields in the design monitor
-        vipdopt.logger.info(
-            f'Forward design fields have average absolute xyz-components: '
-            f'{np.mean(np.abs(e_fwd[0]))}, {np.mean(np.abs(e_fwd[1]))}, '
-            f'{np.mean(np.abs(e_fwd[2]))}.'
-        )
-        vipdopt.logger.info(
-            f'Adjoint design fields have average absolute xyz-components: '
-            f'{np.mean(np.abs(e_adj[0]))}, {np.mean(np.abs(e_adj[1]))}, '
-            f'{np.mean(np.abs(e_adj[2]))}.'
-        )
-        vipdopt.logger.info(
-            f'Source weight has average absolute xyz-components: '
-            f'{np.mean(np.abs(self.source_weight[0]))}, '
-            f'{np.mean(np.abs(self.source_weight[1]))}, '
-            f'{np.mean(np.abs(self.source_weight[2]))}.'
+        metrics.record(
+            'bayer_gradient',
+            fwd_field_abs_mean=lambda: component_abs_mean(e_fwd),
+            adj_field_abs_mean=lambda: component_abs_mean(e_adj),
+            source_weight_abs_mean=lambda: component_abs_mean(source_weight),
         )
 
         # df_dev = np.real(np.sum(e_fwd * e_adj, axis=0))
-        e_adj = e_adj * self.source_weight
+        e_adj = e_adj * source_weight
         df_dev = 1 * (e_fwd[0] * e_adj[0] + e_fwd[1] * e_adj[1] + e_fwd[2] * e_adj[2])
         # Taking real part comes when multiplying by Δε0 i.e. change in permittivity.
 
@@ -742,7 +937,11 @@ def _bayer_gradient(self):
         # ======================================================================================================================
 
         # return df_dev
-        return df_dev[..., self.pos_max_freqs]
+        return df_dev
+
+    def compute_grad_at(self, freqs: npt.ArrayLike, *args, **kwargs) -> npt.NDArray:
+        """Compute the gradient only from the fields at the sampled frequencies."""
+        return self._bayer_gradient(freqs=freqs)
 
 
 class UniformMAEFoM(FoM):
@@ -0,0 +1,208 @@
+"""Verification of adjoint gradients against finite differences of the solver."""
+
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any, TypedDict
+
+import numpy as np
+import numpy.typing as npt
+
+import vipdopt
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization.fom import SuperFoM
+
+if TYPE_CHECKING:
+    from vipdopt.optimization.optimization import LumericalOptimization
+
+
+class GradientCheck(TypedDict):
+    """Results of comparing the adjoint gradient against finite differences.
+
+    Every array has one entry per checked voxel.
+    """
+
+    voxels: npt.NDArray
+    step: float
+    fom: float
+    adjoint: npt.NDArray
+    finite_difference: npt.NDArray
+    relative_error: npt.NDArray
+    error_norm: float
+
+
+def select_voxels(
+    shape: tuple[int, ...], num_voxels: int, seed: int | None = None
+) -> npt.NDArray:
+    """Choose distinct voxels of a design at random.
+
+    Returns:
+        (npt.NDArray): Array of shape (num_voxels, len(shape)) of voxel indices.
+    """
+    num_voxels = min(num_voxels, int(np.prod(shape)))
+    rng = np.random.default_rng(seed)
+    flat = np.sort(rng.choice(int(np.prod(shape)), num_voxels, replace=False))
+    return np.stack(np.unravel_index(flat, shape), axis=-1)
+
+
+def fom_objective(
+    fom: SuperFoM,
+    fom_args: tuple[Any, ...] = (),
+    fom_kwargs: dict | None = None,
+    max_intensity: npt.ArrayLike = 1.0,
+) -> float:
+    """Compute the scalar objective whose gradient the optimization computes.
+
+    This is the weighted sum over FoM groups and wavelengths of the FoM values,
+    scaled by the maximum intensity at each wavelength, matching the weighting and
+    reduction applied to the gradient in `LumericalOptimization`.
+    """
+    fom_kwargs = {} if fom_kwargs is None else fom_kwargs
+    total = 0.0
+    for weight, group in zip(fom.weights, fom.foms, strict=True):
+        values = np.prod(
+            [f.compute_fom(*fom_args, reduce=False, **fom_kwargs) for f in group],
+            axis=0,
+        )
+        total += float(np.real(np.sum(weight * values / max_intensity)))
+    return total
+
+
+def verify_gradient(
+    optimization: LumericalOptimization,
+    voxels: npt.ArrayLike,
+    step: float = 1e-3,
+) -> GradientCheck:
+    """Compare the adjoint gradient with central differences at chosen voxels.
+
+    The design variable at each voxel is perturbed by +/- `step` and the forward
+    simulations of every perturbed design are enqueued together with the nominal
+    forward and adjoint simulations, so all of them run as a single batch. The
+    adjoint gradient is computed as in an optimization step, backpropagated through
+    the device's filters, and compared with the central difference of
+    `fom_objective`. Any spectral subsampling is turned off during the check, so
+    that both use the full spectrum and sampling error is not reported as gradient
+    error. Likewise, the adjoint gradient is not made xy-symmetric.
+
+    Arguments:
+        optimization (LumericalOptimization): The optimization whose device, FoM,
+            and simulations to check.
+        voxels (npt.ArrayLike): Indices into the design variable of the voxels to
+            perturb, with shape (number of voxels, number of dimensions).
+        step (float): The perturbation of the design variable. Defaults to 1e-3.
+
+    Returns:
+        (GradientCheck): The gradient from both methods and their relative error.
+    """
+    device = optimization.device
+    voxels = np.atleast_2d(np.asarray(voxels, dtype=int))
+    max_intensity = np.asarray(
+        optimization.cfg.get('max_intensity_by_wavelength', 1.0)
+    )
+    w0 = device.get_design_variable().copy()
+
+    spectral_sampler = optimization.spectral_sampler
+    optimization.spectral_sampler = None
+    try:
+        adjoint, perturbed = _run_gradient_check(optimization, voxels, step, w0)
+    finally:
+        optimization.spectral_sampler = spectral_sampler
+
+    def objective(fom: SuperFoM) -> float:
+        return fom_objective(
+            fom, optimization.fom_args, optimization.fom_kwargs, max_intensity
+        )
+
+    finite_difference = np.array([
+        (objective(plus) - objective(minus)) / (2 * step) for plus, minus in perturbed
+    ])
+    scale = np.maximum(np.abs(finite_difference), np.finfo(float).tiny)
+    relative_error = np.abs(adjoint - finite_difference) / scale
+    error_norm = float(
+        np.linalg.norm(adjoint - finite_difference)
+        / max(np.linalg.norm(finite_difference), np.finfo(float).tiny)
+    )
+
+    check = GradientCheck(
+        voxels=voxels,
+        step=step,
+        fom=objective(optimization.fom),
+        adjoint=adjoint,
+        finite_difference=finite_difference,
+        relative_error=relative_error,
+        error_norm=error_norm,
+    )
+    metrics.record(
+        'gradient_check',
+        iteration=optimization.iteration,
+        error_norm=error_norm,
+        max_relative_error=lambda: float(np.max(relative_error, initial=0.0)),
+    )
+    vipdopt.logger.info(f'Gradient check results:\n{format_gradient_check(check)}')
+    return check
+
+
+def _run_gradient_check(
+    optimization: LumericalOptimization,
+    voxels: npt.NDArray,
+    step: float,
+    w0: npt.NDArray,
+) -> tuple[npt.NDArray, list[tuple[SuperFoM, SuperFoM]]]:
+    """Run the simulations of a gradient check.
+
+    Returns:
+        (tuple[npt.NDArray, list[tuple[SuperFoM, SuperFoM]]]): The adjoint gradient
+            at each voxel, and the FoMs of the designs perturbed up and down at each.
+    """
+    device = optimization.device
+    vipdopt.logger.info(
+        f'Setting up gradient check at {len(voxels)} voxels with step {step}'
+    )
+    optimization._import_device(device)  # noqa: SLF001
+    sims = optimization._create_jobs(optimization.fom)  # noqa: SLF001
+    perturbed: list[tuple[SuperFoM, SuperFoM]] = []
+    try:
+        for k, voxel in enumerate(voxels):
+            pair = []
+            for sign, label in ((1, 'p'), (-1, 'm')):
+                w = w0.copy()
+                w[tuple(voxel)] += sign * step
+                device.set_design_variable(w)
+                optimization._import_device(device)  # noqa: SLF001
+                fom = deepcopy(optimization.fom)
+                sims += optimization._create_jobs(  # noqa: SLF001
+                    fom, f'_fd{k}{label}', adjoint=False
+                )
+                pair.append(fom)
+            perturbed.append((pair[0], pair[1]))
+    finally:
+        device.set_design_variable(w0)
+    # Leave the base simulation with the nominal design
+    optimization._import_device(device)  # noqa: SLF001
+
+    optimization._run_jobs(sims)  # noqa: SLF001
+    optimization._extract_monitor_data(sims)  # noqa: SLF001
+
+    # A symmetrized gradient is not the gradient of the FoM at a single voxel
+    _, design_gradient = optimization._evaluate(  # noqa: SLF001
+        optimization.fom, device, apply_performance_weights=False, symmetrize=False
+    )
+    adjoint = np.real(device.backpropagate(design_gradient))[tuple(voxels.T)]
+    return adjoint, perturbed
+
+
+def format_gradient_check(check: GradientCheck) -> str:
+    """Return a table of the results of a gradient check."""
+    lines = [
+        f'{"voxel":>16} {"adjoint":>14} {"finite diff.":>14} {"rel. error":>10}',
+    ]
+    for voxel, adj, fd, err in zip(
+        check['voxels'],
+        check['adjoint'],
+        check['finite_difference'],
+        check['relative_error'],
+        strict=True,
+    ):
+        lines.append(f'{tuple(voxel)!s:>16} {adj:>14.6e} {fd:>14.6e} {err:>10.3e}')
+    lines.append(f'Relative error norm: {check["error_norm"]:.3e}')
+    return '\n'.join(lines)
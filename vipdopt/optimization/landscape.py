@@ -0,0 +1,270 @@
+"""Mapping of the FoM over a grid of perturbations around a design."""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+from collections.abc import Callable, Sequence
+from copy import deepcopy
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import numpy.typing as npt
+
+import vipdopt
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization.fom import SuperFoM
+from vipdopt.optimization.gradient_check import fom_objective
+from vipdopt.utils import PathLike, ensure_path
+
+if TYPE_CHECKING:
+    from vipdopt.optimization.optimization import LumericalOptimization
+
+
+def design_hash(w: npt.ArrayLike, *context: Any) -> str:
+    """Return a key identifying a design variable, for caching its FoM.
+
+    Arguments:
+        w (npt.ArrayLike): The design variable.
+        *context (Any): Anything else the FoM depends on, e.g. the iteration or the
+            filter parameters, identified by its string representation.
+    """
+    w = np.ascontiguousarray(w)
+    digest = hashlib.sha1(usedforsecurity=False)
+    digest.update(str((w.shape, w.dtype.str, context)).encode())
+    digest.update(w.tobytes())
+    return digest.hexdigest()
+
+
+def landscape_directions(
+    gradient: npt.ArrayLike | None,
+    shape: tuple[int, ...],
+    num_random: int = 1,
+    seed: int | None = None,
+) -> npt.NDArray:
+    """Create mutually orthogonal directions to perturb a design along.
+
+    The first direction is along the gradient (if provided), and the rest are random.
+    Each direction is scaled to a maximum absolute value of 1, so that an offset
+    along it is the maximum change it makes to any design variable.
+
+    Arguments:
+        gradient (npt.ArrayLike | None): The gradient with respect to the design
+            variable, or None to only use random directions.
+        shape (tuple[int, ...]): The shape of the design variable.
+        num_random (int): The number of random directions. Defaults to 1.
+        seed (int | None): Random seed for the random directions.
+
+    Returns:
+        (npt.NDArray): Array of shape (number of directions, *shape).
+    """
+    rng = np.random.default_rng(seed)
+    vectors = [] if gradient is None else [np.real(gradient).ravel()]
+    vectors += [rng.standard_normal(int(np.prod(shape))) for _ in range(num_random)]
+
+    # Gram-Schmidt orthogonalization
+    basis: list[npt.NDArray] = []
+    for v in vectors:
+        u = v.copy()
+        for b in basis:
+            u -= np.dot(u, b) * b
+        norm = np.linalg.norm(u)
+        if norm == 0:
+            raise ValueError('Cannot create a direction from a zero gradient')
+        basis.append(u / norm)
+    return np.array([b / np.max(np.abs(b)) for b in basis]).reshape(-1, *shape)
+
+
+class LossLandscapeMapper:
+    """Evaluates the FoM of an optimization on a grid of perturbed designs.
+
+    Grid point (i, j, ...) is the current design plus offsets[0][i] times the first
+    direction, plus offsets[1][j] times the second, and so on, clipped to the
+    device's bounds. Only forward simulations are needed, and they are enqueued
+    `batch_size` grid points at a time. Each batch runs as a single job queue, and its
+    values are written into `values` (NaN until computed) and passed to
+    `on_result` as soon as it finishes, so partial landscapes can be inspected while
+    the rest is still running.
+
+    FoM values are cached by a hash of the design variable, so points that are
+    revisited, e.g. the unperturbed design or overlapping grids, are not simulated
+    again. The key also includes the optimization's epoch and iteration and the
+    device's filter parameters, so values from before e.g. a continuation schedule
+    raised beta are not reused. The cache may be shared between mappers.
+
+    Attributes:
+        optimization (LumericalOptimization): The optimization whose device, FoM,
+            and simulations to use.
+        directions (npt.NDArray): The directions to perturb the design along.
+        offsets (list[npt.NDArray]): The offsets along each direction.
+        batch_size (int | None): Number of grid points to simulate per batch; None
+            simulates all of them in one batch.
+        cache (dict[str, float]): Map of design hashes to FoM values.
+        values (npt.NDArray): The FoM at every grid point.
+    """
+
+    def __init__(
+        self,
+        optimization: LumericalOptimization,
+        directions: npt.ArrayLike,
+        offsets: Sequence[npt.ArrayLike],
+        batch_size: int | None = None,
+        cache: dict[str, float] | None = None,
+    ) -> None:
+        """Initialize a LossLandscapeMapper."""
+        self.optimization = optimization
+        self.directions = np.real(np.asarray(directions))
+        self.offsets = [np.ravel(o).astype(float) for o in offsets]
+        shape = optimization.device.get_design_variable().shape
+        if self.directions.shape[1:] != shape:
+            raise ValueError(
+                f'Directions must have the shape of the design variable {shape}; '
+                f'got {self.directions.shape[1:]}'
+            )
+        if len(self.offsets) != len(self.directions):
+            raise ValueError(
+                f'Expected offsets for {len(self.directions)} directions; '
+                f'got {len(self.offsets)}'
+            )
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f'Batch size must be positive; got {batch_size}')
+        self.batch_size = batch_size
+        self.cache = {} if cache is None else cache
+        self.values = np.full(tuple(len(o) for o in self.offsets), np.nan)
+
+    @classmethod
+    def around(
+        cls,
+        optimization: LumericalOptimization,
+        gradient: npt.ArrayLike | None,
+        offsets: Sequence[npt.ArrayLike],
+        seed: int | None = None,
+        **kwargs,
+    ) -> LossLandscapeMapper:
+        """Create a mapper along the gradient and random orthogonal directions.
+
+        Arguments:
+            optimization (LumericalOptimization): The optimization to map.
+            gradient (npt.ArrayLike | None): Gradient with respect to the design
+                variable; if None, only random directions are used.
+            offsets (Sequence[npt.ArrayLike]): The offsets along each direction,
+                i.e. the maximum change in the design variable. The number of
+                directions is the length of this sequence.
+            seed (int | None): Random seed for the random directions.
+            **kwargs: Keyword arguments for LossLandscapeMapper.
+        """
+        shape = optimization.device.get_design_variable().shape
+        num_random = len(offsets) - (gradient is not None)
+        directions = landscape_directions(gradient, shape, num_random, seed)
+        return cls(optimization, directions, offsets, **kwargs)
+
+    def grid_points(self) -> list[tuple[int, ...]]:
+        """Return the indices of every grid point."""
+        return list(itertools.product(*(range(len(o)) for o in self.offsets)))
+
+    def design_at(self, w0: npt.NDArray, index: tuple[int, ...]) -> npt.NDArray:
+        """Return the (clipped) design variable at a grid point around w0."""
+        coefficients = [o[i] for o, i in zip(self.offsets, index, strict=True)]
+        w = np.real(w0) + np.tensordot(coefficients, self.directions, axes=1)
+        return self.optimization.device.clip(w).astype(w0.dtype)
+
+    def map(
+        self,
+        on_result: Callable[[tuple[int, ...], float], None] | None = None,
+    ) -> npt.NDArray:
+        """Evaluate the FoM at every grid point not computed yet.
+
+        Arguments:
+            on_result (Callable[[tuple[int, ...], float], None] | None): Called with
+                the index and FoM of each grid point as soon as it is available.
+
+        Returns:
+            (npt.NDArray): The FoM at every grid point, i.e. `values`.
+        """
+        opt = self.optimization
+        device = opt.device
+        w0 = device.get_design_variable().copy()
+        max_intensity = np.asarray(opt.cfg.get('max_intensity_by_wavelength', 1.0))
+
+        # The FoM of a design also depends on the filters and on the epoch, e.g.
+        # through the fidelity schedule
+        context = (
+            opt.epoch,
+            opt.iteration,
+            [f.init_vars for f in device.filters or []],
+        )
+
+        # Points whose design has already been evaluated come from the cache
+        pending: list[tuple[tuple[int, ...], str, npt.NDArray]] = []
+        for index in self.grid_points():
+            if not np.isnan(self.values[index]):
+                continue
+            w = self.design_at(w0, index)
+            key = design_hash(w, *context)
+            if key in self.cache:
+                self._store(index, self.cache[key], on_result)
+            else:
+                pending.append((index, key, w))
+        vipdopt.logger.info(
+            f'Mapping loss landscape: {len(pending)} of {self.values.size} grid '
+            'points need to be simulated'
+        )
+
+        batch_size = self.batch_size or max(len(pending), 1)
+        try:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start : start + batch_size]
+                sims = []
+                foms: list[SuperFoM] = []
+                for index, _, w in batch:
+                    device.set_design_variable(w)
+                    opt._import_device(device)  # noqa: SLF001
+                    fom = deepcopy(opt.fom)
+                    suffix = '_ls' + '_'.join(str(i) for i in index)
+                    sims += opt._create_jobs(fom, suffix, adjoint=False)  # noqa: SLF001
+                    foms.append(fom)
+                opt._run_jobs(sims)  # noqa: SLF001
+                opt._extract_monitor_data(sims)  # noqa: SLF001
+
+                for (index, key, _), fom in zip(batch, foms, strict=True):
+                    value = fom_objective(
+                        fom, opt.fom_args, opt.fom_kwargs, max_intensity
+                    )
+                    self.cache[key] = value
+                    self._store(index, value, on_result)
+        finally:
+            device.set_design_variable(w0)
+        if pending:
+            # Leave the base simulation with the nominal design
+            opt._import_device(device)  # noqa: SLF001
+        return self.values
+
+    def _store(
+        self,
+        index: tuple[int, ...],
+        value: float,
+        on_result: Callable[[tuple[int, ...], float], None] | None,
+    ):
+        """Record the FoM at a grid point."""
+        self.values[index] = value
+        metrics.record('loss_landscape', index=index, fom=value)
+        if on_result is not None:
+            on_result(index, value)
+
+    @ensure_path
+    def save(self, fname: Path):
+        """Save the grid and the FoM values to a .npz file."""
+        np.savez(
+            fname,
+            values=self.values,
+            directions=self.directions,
+            **{f'offsets_{i}': o for i, o in enumerate(self.offsets)},
+        )
+
+
+def load_landscape(fname: PathLike) -> tuple[npt.NDArray, list[npt.NDArray]]:
+    """Load the FoM values and offsets saved by `LossLandscapeMapper.save`."""
+    with np.load(fname) as data:
+        offsets = [data[f'offsets_{i}'] for i in range(data['directions'].shape[0])]
+        return data['values'], offsets
@@ -0,0 +1,161 @@
+"""Limited-memory quasi-Newton (L-BFGS-B) optimizer."""
+
+from __future__ import annotations
+
+import numpy as np
+import numpy.typing as npt
+
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization.device import Device
+from vipdopt.optimization.optimizer import GradientOptimizer
+
+
+class LBFGSOptimizer(GradientOptimizer):
+    """Optimizer implementing a bound-constrained L-BFGS (L-BFGS-B) update.
+
+    Curvature information is accumulated from the last `history_size` pairs of
+    design changes and gradient changes in the pre-filter design space (i.e. after
+    `Device.backpropagate`). Variables sitting on a bound of `Device.clip` whose
+    gradient points out of the feasible region are held fixed, and the remaining
+    variables are updated with the two-loop recursion.
+
+    Because every FoM evaluation requires a full set of simulations, no line search
+    is performed. Instead, the maximum change of any design variable is limited to
+    `max_change` per iteration; the very first step (with no curvature information)
+    is a gradient step of exactly that size.
+
+    Attributes:
+        step_size (float): Multiplier applied to the quasi-Newton step.
+        max_change (float): Maximum absolute change of any design variable per step.
+        history_size (int): Number of (s, y) pairs to keep.
+        curvature_eps (float): Pairs with s·y <= curvature_eps * |s| |y| are
+            discarded to keep the inverse Hessian approximation positive definite.
+        s_history (list[npt.NDArray]): Past changes in the design variable.
+        y_history (list[npt.NDArray]): Past changes in the (negated) gradient.
+        prev_design (npt.NDArray | None): The design at the previous step.
+        prev_gradient (npt.NDArray | None): The gradient at the previous step.
+    """
+
+    step_size: float
+    max_change: float
+    history_size: int
+    curvature_eps: float
+    s_history: list[npt.NDArray]
+    y_history: list[npt.NDArray]
+    prev_design: npt.NDArray | None
+    prev_gradient: npt.NDArray | None
+
+    def __init__(
+        self,
+        step_size: float = 1.0,
+        max_change: float = 0.05,
+        history_size: int = 10,
+        curvature_eps: float = 1e-10,
+        s_history: list[npt.ArrayLike] | None = None,
+        y_history: list[npt.ArrayLike] | None = None,
+        prev_design: npt.ArrayLike | None = None,
+        prev_gradient: npt.ArrayLike | None = None,
+        **kwargs,
+    ) -> None:
+        """Initialize an LBFGSOptimizer instance."""
+        super().__init__(
+            step_size=float(step_size),
+            max_change=float(max_change),
+            history_size=int(history_size),
+            curvature_eps=float(curvature_eps),
+            s_history=[np.asarray(s, dtype=float) for s in s_history or []],
+            y_history=[np.asarray(y, dtype=float) for y in y_history or []],
+            prev_design=None if prev_design is None else np.asarray(prev_design),
+            prev_gradient=None if prev_gradient is None else np.asarray(prev_gradient),
+            **kwargs,
+        )
+
+    def reset(self):
+        """Discard all curvature information."""
+        self.s_history = []
+        self.y_history = []
+        self.prev_design = None
+        self.prev_gradient = None
+
+    def step(
+        self,
+        device: Device,
+        gradient: npt.ArrayLike,
+        iteration: int,  # noqa: ARG002
+    ):
+        """Take a quasi-Newton step that increases the figure of merit."""
+        w = np.real(device.get_parameters())
+        g = np.real(device.parameter_gradient(gradient)).ravel()
+        x = w.ravel()
+
+        if self.prev_design is not None and self.prev_design.shape == x.shape:
+            self._update_history(x - self.prev_design, self.prev_gradient - g)
+        self.prev_design = x.copy()
+        self.prev_gradient = g.copy()
+
+        # Variables on a bound that the gradient pushes against can't move
+        free = (device.clip(w + np.sign(g).reshape(w.shape)) != w).ravel()
+
+        if self.s_history:
+            # Minimize -FoM: the descent direction is -H(-g) = H g
+            direction = self._two_loop(np.where(free, g, 0.0))
+            direction = self.step_size * np.where(free, direction, 0.0)
+            if direction @ g <= 0:  # Not an ascent direction; discard curvature
+                self.s_history = []
+                self.y_history = []
+                direction = np.where(free, g, 0.0)
+        else:
+            direction = np.where(free, g, 0.0)
+
+        max_dir = np.max(np.abs(direction), initial=0.0)
+        if max_dir == 0:
+            return
+        if not self.s_history or max_dir > self.max_change:
+            direction *= self.max_change / max_dir
+
+        w_hat = x + direction
+        clipped = device.clip(w_hat.reshape(w.shape))
+        metrics.record(
+            'lbfgs_step',
+            history=len(self.s_history),
+            free_fraction=lambda: float(np.mean(free)),
+            max_change=lambda: float(np.max(np.abs(clipped - w))),
+        )
+        device.set_parameters(clipped)
+
+    def _update_history(self, s: npt.NDArray, y: npt.NDArray):
+        """Add a curvature pair to the history if it satisfies the curvature test."""
+        sy = s @ y
+        if sy <= self.curvature_eps * np.linalg.norm(s) * np.linalg.norm(y):
+            return
+        self.s_history.append(s)
+        self.y_history.append(y)
+        if len(self.s_history) > self.history_size:
+            del self.s_history[0]
+            del self.y_history[0]
+
+    def _two_loop(self, q: npt.NDArray) -> npt.NDArray:
+        """Compute the product of the inverse Hessian approximation with q."""
+        q = q.copy()
+        rhos = [
+            1.0 / (y @ s) for s, y in zip(self.s_history, self.y_history, strict=True)
+        ]
+        alphas = []
+        for s, y, rho in zip(
+            reversed(self.s_history),
+            reversed(self.y_history),
+            reversed(rhos),
+            strict=True,
+        ):
+            alpha = rho * (s @ q)
+            q -= alpha * y
+            alphas.append(alpha)
+
+        s, y = self.s_history[-1], self.y_history[-1]
+        r = q * ((s @ y) / (y @ y))
+        for s, y, rho, alpha in zip(
+            self.s_history, self.y_history, rhos, reversed(alphas), strict=True
+        ):
+            beta = rho * (y @ r)
+            r += (alpha - beta) * s
+        return r
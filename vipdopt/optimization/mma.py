@@ -0,0 +1,241 @@
+"""Method of Moving Asymptotes (MMA) optimizer."""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+import numpy.typing as npt
+from scipy import optimize
+
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization.constraints import Constraint
+from vipdopt.optimization.device import Device
+from vipdopt.optimization.optimizer import GradientOptimizer
+
+# Upper limit on the Lagrange multipliers; reached only if the approximated
+# constraints cannot be satisfied within the move limits.
+MAX_MULTIPLIER = 1e8
+
+
+class MMAOptimizer(GradientOptimizer):
+    """Optimizer implementing Svanberg's Method of Moving Asymptotes.
+
+    Maximizes the figure of merit subject to constraints g_i(w) <= 0 and the box
+    constraints of `Device.clip`. Each step builds the convex MMA approximation of
+    the (negated) figure of merit and the constraints around the current design and
+    solves it through its dual, which only has one variable per constraint. Every
+    dual evaluation is a handful of vectorized operations over the design, so the
+    subproblem cost is negligible compared to the simulations.
+
+    The objective gradient is normalized to a maximum magnitude of 1 before building
+    the approximation, since raw adjoint gradients can be many orders of magnitude
+    smaller than the constraint gradients.
+
+    Reference: K. Svanberg, "The method of moving asymptotes - a new method for
+    structural optimization", https://doi.org/10.1002/nme.1620240207
+
+    Attributes:
+        constraints (list[Constraint]): The constraints to satisfy.
+        move_limit (float): Maximum change of any design variable per step, as a
+            fraction of its allowed range.
+        asyinit (float): Initial distance of the asymptotes from the design.
+        asyincr (float): Factor to widen the asymptotes by when converging smoothly.
+        asydecr (float): Factor to narrow the asymptotes by when oscillating.
+        low (npt.NDArray | None): Lower asymptotes from the previous step.
+        upp (npt.NDArray | None): Upper asymptotes from the previous step.
+        xold1 (npt.NDArray | None): The design one step ago.
+        xold2 (npt.NDArray | None): The design two steps ago.
+    """
+
+    constraints: list[Constraint]
+    move_limit: float
+    asyinit: float
+    asyincr: float
+    asydecr: float
+    low: npt.NDArray | None
+    upp: npt.NDArray | None
+    xold1: npt.NDArray | None
+    xold2: npt.NDArray | None
+
+    def __init__(
+        self,
+        constraints: list[Constraint | dict] | None = None,
+        move_limit: float = 0.1,
+        asyinit: float = 0.5,
+        asyincr: float = 1.2,
+        asydecr: float = 0.7,
+        low: npt.ArrayLike | None = None,
+        upp: npt.ArrayLike | None = None,
+        xold1: npt.ArrayLike | None = None,
+        xold2: npt.ArrayLike | None = None,
+        **kwargs,
+    ) -> None:
+        """Initialize an MMAOptimizer instance."""
+        super().__init__(
+            constraints=[_load_constraint(c) for c in constraints or []],
+            move_limit=float(move_limit),
+            asyinit=float(asyinit),
+            asyincr=float(asyincr),
+            asydecr=float(asydecr),
+            low=None if low is None else np.asarray(low, dtype=float),
+            upp=None if upp is None else np.asarray(upp, dtype=float),
+            xold1=None if xold1 is None else np.asarray(xold1, dtype=float),
+            xold2=None if xold2 is None else np.asarray(xold2, dtype=float),
+            **kwargs,
+        )
+
+    def step(
+        self,
+        device: Device,
+        gradient: npt.ArrayLike,
+        iteration: int,  # noqa: ARG002
+    ):
+        """Take a step solving the MMA subproblem around the current design."""
+        w = np.real(device.get_parameters())
+        x = w.ravel()
+        # Box constraints are whatever Device.clip enforces
+        xmin = np.real(device.clip(np.full(w.shape, -np.inf))).ravel()
+        xmax = np.real(device.clip(np.full(w.shape, np.inf))).ravel()
+
+        # Minimize -FoM
+        df0 = -np.real(device.parameter_gradient(gradient)).ravel()
+        scale = np.max(np.abs(df0), initial=0.0)
+        if scale > 0:
+            df0 = df0 / scale
+
+        m = len(self.constraints)
+        fval = np.empty(m)
+        dfdx = np.empty((m, x.size))
+        for i, constraint in enumerate(self.constraints):
+            val, grad = constraint(device)
+            fval[i] = val
+            dfdx[i] = np.ravel(device.reduce_gradient(grad))
+
+        low, upp = self._update_asymptotes(x, xmin, xmax)
+        xnew, lam = self._solve_subproblem(x, xmin, xmax, low, upp, df0, fval, dfdx)
+
+        self.xold2 = self.xold1
+        self.xold1 = x.copy()
+        self.low = low
+        self.upp = upp
+
+        metrics.record(
+            'mma_step',
+            constraints=fval,
+            multipliers=lam,
+            max_change=lambda: float(np.max(np.abs(xnew - x), initial=0.0)),
+        )
+        device.set_parameters(device.clip(xnew.reshape(w.shape)))
+
+    def _update_asymptotes(
+        self, x: npt.NDArray, xmin: npt.NDArray, xmax: npt.NDArray
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        """Compute the lower and upper asymptotes for the current step."""
+        xrange = xmax - xmin
+        if (
+            self.xold1 is None
+            or self.xold2 is None
+            or self.low is None
+            or self.upp is None
+            or self.xold2.shape != x.shape
+        ):
+            return x - self.asyinit * xrange, x + self.asyinit * xrange
+
+        # Widen the asymptotes where the design moves monotonically, and narrow
+        # them where it oscillates
+        trend = (x - self.xold1) * (self.xold1 - self.xold2)
+        factor = np.ones_like(x)
+        factor[trend > 0] = self.asyincr
+        factor[trend < 0] = self.asydecr
+        low = x - factor * (self.xold1 - self.low)
+        upp = x + factor * (self.upp - self.xold1)
+
+        low = np.clip(low, x - 10 * xrange, x - 0.01 * xrange)
+        upp = np.clip(upp, x + 0.01 * xrange, x + 10 * xrange)
+        return low, upp
+
+    def _solve_subproblem(
+        self,
+        x: npt.NDArray,
+        xmin: npt.NDArray,
+        xmax: npt.NDArray,
+        low: npt.NDArray,
+        upp: npt.NDArray,
+        df0: npt.NDArray,
+        fval: npt.NDArray,
+        dfdx: npt.NDArray,
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        """Solve the convex MMA subproblem through its dual.
+
+        Returns:
+            (tuple[npt.NDArray, npt.NDArray]): The new design and the Lagrange
+                multipliers of the constraints.
+        """
+        xrange = np.maximum(xmax - xmin, 1e-5)
+        alpha = np.maximum.reduce(
+            [
+                low + 0.1 * (x - low),
+                x - self.move_limit * xrange,
+                xmin,
+            ]
+        )
+        beta = np.minimum.reduce(
+            [
+                upp - 0.1 * (upp - x),
+                x + self.move_limit * xrange,
+                xmax,
+            ]
+        )
+
+        ux1 = upp - x
+        xl1 = x - low
+        reg = 1e-5 / xrange
+
+        def approximation(df: npt.NDArray) -> tuple[npt.NDArray, npt.NDArray]:
+            pos = np.maximum(df, 0)
+            neg = np.maximum(-df, 0)
+            p = (1.001 * pos + 0.001 * neg + reg) * ux1**2
+            q = (0.001 * pos + 1.001 * neg + reg) * xl1**2
+            return p, q
+
+        p0, q0 = approximation(df0)
+        p, q = approximation(dfdx)
+        b = p @ (1 / ux1) + q @ (1 / xl1) - fval
+
+        def primal(lam: npt.NDArray) -> tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+            pl = p0 + lam @ p
+            ql = q0 + lam @ q
+            sp, sq = np.sqrt(pl), np.sqrt(ql)
+            xl = np.clip((sp * low + sq * upp) / (sp + sq), alpha, beta)
+            return xl, pl, ql
+
+        if len(fval) == 0:
+            return primal(np.zeros(0))[0], np.zeros(0)
+
+        def neg_dual(lam: npt.NDArray) -> tuple[float, npt.NDArray]:
+            xl, pl, ql = primal(lam)
+            inv_u = 1 / (upp - xl)
+            inv_l = 1 / (xl - low)
+            value = pl @ inv_u + ql @ inv_l - lam @ b
+            grad = p @ inv_u + q @ inv_l - b
+            return -value, -grad
+
+        res = optimize.minimize(
+            neg_dual,
+            np.zeros(len(fval)),
+            jac=True,
+            method='L-BFGS-B',
+            bounds=[(0, MAX_MULTIPLIER)] * len(fval),
+        )
+        return primal(res.x)[0], res.x
+
+
+def _load_constraint(constraint: Constraint | dict) -> Constraint:
+    """Create a Constraint from its dictionary representation if necessary."""
+    if isinstance(constraint, Constraint):
+        return constraint
+    constraint_cls: type[Constraint] = getattr(
+        sys.modules['vipdopt.optimization.constraints'], constraint['type']
+    )
+    return constraint_cls(**constraint.get('parameters', {}))
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import os
-import pickle
 from collections.abc import Callable
 from itertools import chain
 from pathlib import Path
@@ -15,17 +14,23 @@
 import vipdopt
 from vipdopt import GDS, STL
 from vipdopt.configuration import Config
+from vipdopt.diagnostics import metrics
 from vipdopt.eval import plotter
+from vipdopt.optimization.checkpoint import Checkpointer, read_checkpoint, write_atomic
+from vipdopt.optimization.continuation import ContinuationSchedule, epoch_progress
 from vipdopt.optimization.device import Device
-from vipdopt.optimization.fom import BayerFilterFoM, FoM, SuperFoM
+from vipdopt.optimization.fidelity import FidelitySchedule
+from vipdopt.optimization.fom import BayerFilterFoM, FoM, FoMEvaluation, SuperFoM
 from vipdopt.optimization.optimizer import GradientOptimizer
-from vipdopt.simulation import LumericalFDTD, LumericalSimulation
-from vipdopt.utils import real_part_complex_product, rmtree
+from vipdopt.optimization.spectral import SpectralSampler
+from vipdopt.simulation import ISolver, LumericalFDTD, LumericalSimulation, Monitor
+from vipdopt.utils import flatten, real_part_complex_product, rmtree
 
 DEFAULT_OPT_FOLDERS = {
     'temp': Path('./optimization/temp'),
     'opt_info': Path('./optimization'),
     'opt_plots': Path('./optimization/plots'),
+    'checkpoints': Path('./optimization/checkpoints'),
 }
 
 TI02_THRESHOLD = 0.5
@@ -49,6 +54,11 @@ def __init__(
         true_iteration: int = 0,
         dirs: dict[str, Path] = DEFAULT_OPT_FOLDERS,
         env_vars: dict = {},
+        checkpoint_frequency: int = 1,
+        spectral_sampler: SpectralSampler | None = None,
+        fidelity_schedule: FidelitySchedule | None = None,
+        continuation_schedule: ContinuationSchedule | None = None,
+        solver: ISolver | None = None,
     ):
         """Initialize Optimization object."""
         self.base_sim = base_sim
@@ -75,14 +85,33 @@ def __init__(
         self.epoch_list = epoch_list
         self.loop = True
         self.iteration = true_iteration
+        self.epoch = 0
+
+        # Checkpoints are written every `checkpoint_frequency` iterations
+        self.checkpoint_frequency = checkpoint_frequency
+        self.checkpointer = Checkpointer(
+            dirs.get('checkpoints', DEFAULT_OPT_FOLDERS['checkpoints'])
+        )
 
         self.spectral_weights = np.array(1)
         self.performance_weights = np.array(1)
 
-        # Setup Lumerical Hook
-        self.fdtd = LumericalFDTD()
+        # If provided, the gradient is only computed at a subset of the spectrum
+        self.spectral_sampler = spectral_sampler
+        # If provided, early epochs run on cheaper simulations
+        self.fidelity_schedule = fidelity_schedule
+        # If provided, the device's filters are strengthened as the design converges
+        self.continuation_schedule = continuation_schedule
+
+        # Monitor data is cached in memory for the duration of an iteration. The
+        # cache is shared by every monitor, so its size is set by the Project
+        self.monitor_cache = Monitor.cache
+
+        # Setup Lumerical Hook, unless another solver (e.g. a replay) is given
+        self.fdtd = LumericalFDTD() if solver is None else solver
         # # TODO: Are we running it locally or on SLURM or on AWS or?
-        self.fdtd.promise_env_setup(**env_vars)
+        if isinstance(self.fdtd, LumericalFDTD):
+            self.fdtd.promise_env_setup(**env_vars)
 
         # Setup histories
         self.fom_hist: dict[
@@ -173,12 +202,98 @@ def create_history(self, fom_types, max_iter, num_design_frequency_points):
     def save_histories(self):
         """Save the fom and parameter histories to file."""
         folder = self.dirs['opt_info']
-        foms = np.array(self.fom_hist)
-        with (folder / 'fom_history.npy').open('wb') as f:
-            np.save(f, foms)
-        params = np.array(self.param_hist)
-        with (folder / 'parameter_history.npy').open('wb') as f:
-            np.save(f, params)
+        write_atomic(folder / 'fom_history.npy', self.fom_hist)
+        write_atomic(folder / 'parameter_history.npy', self.param_hist)
+
+    def load_histories(self, offsets: dict[str, int] | None = None):
+        """Load the fom and parameter histories from file.
+
+        Arguments:
+            offsets (dict[str, int] | None): If provided, the number of entries to
+                keep in each history. Entries recorded after a checkpoint was taken
+                are discarded so the histories line up with the restored state.
+        """
+        folder = self.dirs['opt_info']
+        for hist, fname in (
+            (self.fom_hist, 'fom_history.npy'),
+            (self.param_hist, 'parameter_history.npy'),
+        ):
+            if not (folder / fname).exists():
+                continue
+            hist.update(read_checkpoint(folder / fname))
+            if offsets is not None:
+                for key, values in hist.items():
+                    del values[offsets.get(key, len(values)) :]
+
+    def state_dict(self) -> dict[str, Any]:
+        """Return a snapshot of everything needed to resume this optimization.
+
+        Returns:
+            (dict[str, Any]): Dictionary containing the device's `w` variable, the
+                optimizer state, the current iteration and epoch, the performance
+                weights, and the length of each history.
+        """
+        return {
+            'iteration': self.iteration,
+            'epoch': self.epoch,
+            'w': self.device.w.copy(),
+            'optimizer': self.optimizer.state_dict(),
+            'optimizer_type': type(self.optimizer).__name__,
+            'performance_weights': np.array(self.fom.performance_weights, copy=True),
+            'history_offsets': {
+                key: len(values)
+                for key, values in chain(
+                    self.fom_hist.items(), self.param_hist.items()
+                )
+            },
+        }
+
+    def load_state_dict(self, state: dict[str, Any]):
+        """Restore this optimization from the output of `state_dict()`."""
+        if state['w'].shape != self.device.w.shape:
+            raise ValueError(
+                f'Checkpoint design has shape {state["w"].shape}; '
+                f'expected {self.device.w.shape}'
+            )
+        if state['optimizer_type'] != type(self.optimizer).__name__:
+            raise ValueError(
+                f'Checkpoint was created with a {state["optimizer_type"]}; '
+                f'cannot resume with a {type(self.optimizer).__name__}'
+            )
+        self.iteration = state['iteration']
+        self.epoch = state['epoch']
+        self.device.w = state['w'].copy()
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.fom.performance_weights = np.array(state['performance_weights'])
+        self.load_histories(state['history_offsets'])
+
+    def save_checkpoint(self, block: bool = False):
+        """Write the current state to the checkpoint folder in the background.
+
+        Arguments:
+            block (bool): If True, wait for the checkpoint to be written.
+        """
+        vipdopt.logger.debug(f'Saving checkpoint for iteration {self.iteration}')
+        self.checkpointer.save(self.state_dict(), block=block)
+
+    def resume(self) -> bool:
+        """Restore the optimization from the latest checkpoint, if one exists.
+
+        Returns:
+            (bool): True if a checkpoint was loaded, False otherwise.
+        """
+        if not self.checkpointer.exists():
+            vipdopt.logger.warning(
+                f'No checkpoint found in {self.checkpointer.directory}; '
+                'starting from the beginning.'
+            )
+            return False
+        self.load_state_dict(self.checkpointer.load())
+        vipdopt.logger.info(
+            f'Resumed from checkpoint at epoch {self.epoch}, '
+            f'iteration {self.iteration}.'
+        )
+        return True
 
     def generate_plots(self):
         """Generate the plots and save to file."""
@@ -187,46 +302,20 @@ def generate_plots(self):
         # ! 20240229 Ian - Best to be specifying functions for 2D and for 3D.
 
         # TODO: Plot key information such as Figure of Merit evolution for easy visualization and checking in the middle of optimizations
-        fom_fig = plotter.plot_fom_trace(
-            self.figure_of_merit_evolution, folder, self.epoch_list
-        )
-        quad_trans_fig = plotter.plot_quadrant_transmission_trace(
+        plotter.plot_fom_trace(self.figure_of_merit_evolution, folder, self.epoch_list)
+        plotter.plot_quadrant_transmission_trace(
             self.fom_evolution['transmission'], folder, self.epoch_list
         )
-        overall_trans_fig = plotter.plot_quadrant_transmission_trace(
+        plotter.plot_quadrant_transmission_trace(
             self.fom_evolution['overall_transmission'],
             folder,
             self.epoch_list,
             filename='overall_trans_trace',
         )
 
-        # TODO: code this to pull the forward sim for FoM_0 i.e. forward_src_x in this case but not EVERY case.
-        # self.runner_sim.fdtd.load(
-        #     self.foms[0].fom_monitors[0].sim.info['path']
-        # )  # untested
-        self.runner_sim.fdtd.load(self.sim_files[0].name)
-        e_focal = self.runner_sim.getresult('transmission_focal_monitor_', 'E')
-        if self.cfg['simulator_dimension'] == '2D':
-            intensity_fig = plotter.plot_Enorm_focal_2d(
-                np.sum(np.abs(np.squeeze(e_focal['E'])) ** 2, axis=-1),
-                e_focal['x'],
-                e_focal['lambda'],
-                folder,
-                self.iteration,
-                wl_idxs=[7, 22],
-            )
-        elif self.cfg['simulator_dimension'] == '3D':
-            intensity_fig = plotter.plot_Enorm_focal_3d(
-                np.sum(np.abs(np.squeeze(e_focal['E'])) ** 2, axis=-1),
-                e_focal['x'],
-                e_focal['y'],
-                e_focal['lambda'],
-                folder,
-                self.iteration,
-                wl_idxs=[9, 29, 49],
-            )
-
-            indiv_trans_fig = plotter.plot_individual_quadrant_transmission(
+        self._plot_focal_plane(folder)
+        if self.cfg['simulator_dimension'] == '3D':
+            plotter.plot_individual_quadrant_transmission(
                 self.fom_evolution['transmission'],
                 self.cfg['lambda_values_um'],
                 folder,
@@ -234,28 +323,62 @@ def generate_plots(self):
             )  # continuously produces only one plot per epoch to save space
 
         cur_index = self.device.index_from_permittivity(self.device.get_permittivity())
-        final_device_layer_fig, _ = plotter.visualize_device(
-            cur_index, folder, iteration=self.iteration
-        )
+        plotter.visualize_device(cur_index, folder, iteration=self.iteration)
 
         # # plotter.plot_moments(adam_moments, OPTIMIZATION_PLOTS_FOLDER)
         # # plotter.plot_step_size(adam_moments, OPTIMIZATION_PLOTS_FOLDER)
 
-        # Create plot pickle files for GUI visualization
-        with (folder / 'fom.pkl').open('wb') as f:
-            pickle.dump(fom_fig, f)
-        with (folder / 'quad_trans.pkl').open('wb') as f:
-            pickle.dump(quad_trans_fig, f)
-        with (folder / 'overall_trans.pkl').open('wb') as f:
-            pickle.dump(overall_trans_fig, f)
-        with (folder / 'enorm.pkl').open('wb') as f:
-            pickle.dump(intensity_fig, f)
-        with (folder / 'indiv_trans.pkl').open('wb') as f:
-            pickle.dump(indiv_trans_fig, f)
-        with (folder / 'final_device_layer.pkl').open('wb') as f:
-            pickle.dump(final_device_layer_fig, f)
         # TODO: rest of the plots
 
+    def _focal_monitor(self) -> Monitor | None:
+        """Return the first FoM's first forward monitor, which is its focal plane."""
+        fwd_monitors = next(flatten(self.fom.foms)).fwd_monitors
+        return fwd_monitors[0] if fwd_monitors else None
+
+    def _plot_focal_plane(self, folder: Path):
+        """Plot the intensity at the focal plane at a few wavelengths."""
+        focal_monitor = self._focal_monitor()
+        if focal_monitor is None:
+            return
+        # Intensity in the focal plane, shaped (nx, ny, wavelengths)
+        intensity = np.sum(np.abs(focal_monitor.e) ** 2, axis=0)[:, :, 0, :]
+        coords = focal_monitor.coords
+        if coords is None:
+            # Uncropped fields span the monitor itself
+            props = focal_monitor.properties
+            coords = {
+                ax: np.linspace(
+                    props.get(ax, 0.0) - props.get(f'{ax} span', 0.0) / 2,
+                    props.get(ax, 0.0) + props.get(f'{ax} span', 0.0) / 2,
+                    n,
+                )
+                for ax, n in zip('xy', intensity.shape, strict=False)
+            }
+        wl = np.asarray(self.cfg['lambda_values_um']) * 1e-6
+        if focal_monitor.freq_indices is not None:
+            wl = wl[focal_monitor.freq_indices]
+        num_wl = intensity.shape[-1]
+
+        if self.cfg['simulator_dimension'] == '2D':
+            plotter.plot_Enorm_focal_2d(
+                intensity[:, 0],
+                coords['x'],
+                wl,
+                folder,
+                self.iteration,
+                wl_idxs=[i for i in (7, 22) if i < num_wl] or None,
+            )
+        elif self.cfg['simulator_dimension'] == '3D':
+            plotter.plot_Enorm_focal_3d(
+                intensity,
+                coords['x'],
+                coords['y'],
+                wl,
+                folder,
+                self.iteration,
+                wl_idxs=[i for i in (9, 29, 49) if i < num_wl] or None,
+            )
+
     def _pre_run(self):
         """Final pre-processing before running the optimization."""
         # Connect to Lumerical. #! Warning - starts a new project if already connected
@@ -266,6 +389,7 @@ def _post_run(self):
         """Final post-processing after running the optimization."""
         # Disconnect from Lumerical
         self.loop = False
+        self.checkpointer.close()
         self.save_histories()
         self.generate_plots()
         self.fdtd.close()
@@ -371,6 +495,7 @@ def _inner_optimization_loop(self):
             if max_iter < self.iteration:
                 continue
 
+            self._start_epoch(epoch)
             vipdopt.logger.info(
                 f'=============== Starting Epoch {epoch} ===============\n'
             )
@@ -385,6 +510,9 @@ def _inner_optimization_loop(self):
 
                 # Clean scratch directory to save storage space
                 rmtree(self.dirs['temp'], keep_dir=True)
+                # Monitor data from previous iterations is now out of date
+                self.monitor_cache.set_iteration(self.iteration)
+                self.fdtd.set_iteration(self.iteration)
 
                 # # Disable device index monitor(s) to save memory
                 self.base_sim.disable(self.base_sim.indexmonitor_names())
@@ -392,193 +520,10 @@ def _inner_optimization_loop(self):
                 #! THE ORDER of the following matters because device.field_shape must be set properly
                 #! before calling device.import_cur_index()
                 if i == 0:  # Just do it once per epoch
-                    # Sync up base sim LumericalSimObject with FDTD in order to get device index monitor shape.
-                    self.fdtd.save(self.base_sim.get_path(), self.base_sim)
-                    # Reassign field shape now that the device has been properly imported into Lumerical.
-                    self.device.field_shape = self.base_sim.import_field_shape()
-
-                # Each epoch the filters get stronger and so the permittivity must be passed through the new filters
-                self.device.update_filters(
-                    epoch=np.max(np.where(np.array(self.epoch_list) <= self.iteration))
-                )
-                self.device.update_density()
-                # Import device index now into base simulation
-                import_primitive = self.base_sim.imports()[0]
-                cur_density, cur_permittivity = self.device.import_cur_index(
-                    import_primitive,
-                    reinterpolation_factor=1,
-                    binarize=False,
-                )
-                # Sync up with FDTD to properly import device.
-                self.fdtd.save(self.base_sim.get_path(), self.base_sim)
-
-                # # Save statistics to do with design variable away before running simulations.
-                # Save current design before iteration
-                self.param_hist.get('design').append(self.device.get_design_variable())
-                # # Calculate material % and binarization level, store away
-                # # todo: redo this section once you get sigmoid filters up and can start counting materials
-                # cur_index = self.device.index_from_permittivity(self.device.get_permittivity())
-                # tio2_pct = 100 * np.count_nonzero(self.device.get_design_variable() < 0.5) / cur_index.size
-                # # todo: should wrap these as functions of Device object
-                # vipdopt.logger.info(f'TiO2% is {tio2_pct}%.')		# todo: seems to be wrong?
-                # self.param_hist.get('tio2_pct').append( tio2_pct )
-                # # logging.info(f'Binarization is {100 * np.sum(np.abs(cur_density-0.5))/(cur_density.size*0.5)}%.')
-                # binarization_fraction = self.device.compute_binarization(self.device.get_design_variable())
-                # vipdopt.logger.info(f'Binarization is {100 * binarization_fraction}%.')
-                # self.param_hist.get('binarization').append( binarization_fraction )
-                # # todo: re-code binarization for multiple materials.
-
-                vipdopt.logger.info('Beginning Step 1: All Simulations Setup')
-                #
-                # Step 1: After importing the current epoch's permittivity value to the device;
-                # We create a different optimization job for:
-                # - each of the polarizations for the forward source waves
-                # - each of the polarizations for each of the adjoint sources
-                # Since here, each adjoint source is corresponding to a focal location for a target color band, we have
-                # <num_wavelength_bands> x <num_polarizations> adjoint sources.
-                # We then enqueue each job and run them all in parallel.
-
-                # Create jobs
-                fwd_sims = self.fom.create_forward_sim(self.base_sim)
-                adj_sims = self.fom.create_adjoint_sim(self.base_sim)
-                for sim in chain(fwd_sims, adj_sims):
-                    sim_file = self.dirs['temp'] / f'{sim.info["name"]}.fsp'
-                    # sim.link_monitors()
-
-                    self.fdtd.save(sim_file, sim)  # Saving also sets the path
-                    self.fdtd.addjob(sim_file)
-                vipdopt.logger.info(
-                    'In-Progress Step 1: All Simulations Setup and Jobs Added'
-                )
-
-                # If true, we're in debugging mode and it means no simulations are run.
-                # Data is instead pulled from finished simulation files in the debug folder.
-                # If false, run jobs and check that they all ran to completion.
-                if True:  # self.cfg['pull_sim_files_from_debug_folder']:
-                    for sim in chain(fwd_sims, adj_sims):
-                        sim_file = (
-                            self.dirs['debug_completed_jobs']
-                            / f'{sim.info["name"]}.fsp'
-                        )
-                        sim.set_path(sim_file)
-                else:
-                    while self.fdtd.fdtd.listjobs(
-                        'FDTD'
-                    ):  # Existing job list still occupied
-                        # Run simulations from existing job list
-                        self.fdtd.runjobs()
-
-                        # Check if there are any jobs that didn't run
-                        for sim in chain(fwd_sims, adj_sims):
-                            sim_file = sim.get_path()
-                            # self.fdtd.load(sim_file)
-                            # if self.fdtd.layoutmode():
-                            if (
-                                sim_file.stat().st_size <= 2e7
-                            ):  # Arbitrary 20MB filesize for simulations that didn't run completely
-                                self.fdtd.addjob(sim_file)
-                                vipdopt.logger.info(
-                                    f'Failed to run: {sim_file.name}. Re-adding ...'
-                                )
-                vipdopt.logger.info('Completed Step 1: All Simulations Run.')
-
-                # Reformat monitor data for easy use
-                self.fdtd.reformat_monitor_data(list(chain(fwd_sims, adj_sims)))
-
-                # Compute intensity FoM and apply spectral and performance weights.
-                f = self.fom.compute_fom(*self.fom_args, **self.fom_kwargs)
-                # Scale by max_intensity_by_wavelength weighting (any intensity FoM needs this)
-                f /= np.array(self.cfg['max_intensity_by_wavelength'])
-                self.fom_hist.get('intensity_overall').append(f)
-                vipdopt.logger.debug(f'FoM: {f}')
-
-                # Compute transmission FoM and apply spectral and performance weights.
-                fom_kwargs_trans = self.fom_kwargs.copy()
-                fom_kwargs_trans.update({'type': 'transmission'})
-                t = np.array([
-                    fom[0].fom_func(*self.fom_args, **fom_kwargs_trans)
-                    for fom in self.fom.foms
-                ])
-                [
-                    self.fom_hist.get(f'transmission_{idx}').append(t_i)
-                    for idx, t_i in enumerate(t)
-                ]
-                self.fom_hist.get('transmission_overall').append(
-                    np.squeeze(np.sum(t, 0))
-                )
-                # [plt.plot(np.squeeze(t_i)) for t_i in t]
-
-                # # Here is where we would start plotting the loss landscape. Probably should be accessed by a separate class...
-                # # Or we could move it to the device step part
-                # loss_landscape_mapper = LossLandscapeMapper.LossLandscapeMapper(simulations, devices)
-
-                # Compute gradient and apply spectral and performance weights.
-                g = self.fom.compute_grad(
-                    *self.grad_args,
-                    apply_performance_weights=True,
-                    **self.grad_kwargs,
-                )
-                # Scale by max_intensity_by_wavelength weighting (any intensity FoM needs this)
-                g /= np.array(self.cfg['max_intensity_by_wavelength'])
-                # vipdopt.logger.debug(f'Gradient: {g}')
-
-                # Process gradient accordingly for application to device through optimizer.
+                    self._update_field_shape()
 
-                g = np.sum(g, -1)  # Sum over wavelength
-                vipdopt.logger.info(
-                    f'Design_gradient has average {np.mean(g)}, max {np.max(g)}'
-                )
-
-                # Permittivity factor in amplitude of electric dipole at x_0:
-                # We need to properly account here for the current real and imaginary index
-                # because they both contribute in the end to the real part of the gradient ΔFoM/Δε_r
-                # in Eq. 5 of Lalau-Keraly paper https://doi.org/10.1364/OE.21.021693
-                # todo: if dispersion is considered, this needs to be assembled spectrally --------------------------------------------------
-                # dispersive_max_permittivity = dispersion_model.average_permittivity( dispersive_ranges_um[ lookup_dispersive_range_idx ] )
-                dispersive_max_permittivity = self.device.permittivity_constraints[1]
-                delta_permittivity = (
-                    dispersive_max_permittivity
-                    - self.device.permittivity_constraints[0]
-                )
-                # todo: -----------------------------------------------------------------------------------------------------
-                get_grad_density = real_part_complex_product(delta_permittivity, g)
-                #! This is where the gradient picks up a permittivity factor i.e. becomes larger than 1!
-                #! Mitigated by backpropagating through the Scale filter.
-                get_grad_density = (
-                    2 * get_grad_density
-                )  # Factor of 2 after taking the real part according to algorithm
-
-                # # Get the full design gradient by summing the x,y polarization components
-                # # todo: Do we need to consider polarization in the same way with the new implementation??
-                # design_gradient = 2 * ( xy_polarized_gradients[0] + xy_polarized_gradients[1] )
-
-                # Project / interpolate the design_gradient, the values of which we have at each (mesh) voxel point, and obtain it at each (geometry) voxel point
-                design_gradient_interpolated = self.device.interpolate_gradient(
-                    get_grad_density, dimension=self.cfg['simulator_dimension']
-                )
-
-                # Each device needs to remember its gradient!
-                # todo: refine this
-                if self.cfg['enforce_xy_gradient_symmetry']:
-                    if self.cfg['simulator_dimension'] in '2D':
-                        transpose_design_gradient_interpolated = np.flip(
-                            design_gradient_interpolated, 1
-                        )
-                    if self.cfg['simulator_dimension'] in '3D':
-                        transpose_design_gradient_interpolated = np.swapaxes(
-                            design_gradient_interpolated, 0, 1
-                        )
-                    design_gradient_interpolated = 0.5 * (
-                        design_gradient_interpolated
-                        + transpose_design_gradient_interpolated
-                    )
-                # self.device.gradient = design_gradient_interpolated.copy()	# This is BEFORE backpropagation
-
-                # Step the device with the gradient
-                vipdopt.logger.debug('Stepping device along gradient.')
-                self.optimizer.step(
-                    self.device, design_gradient_interpolated.copy(), self.iteration
-                )
+                self._optimization_step()
+                self._record_progress()
 
                 # Generate Plots and call callback functions
                 self.save_histories()
@@ -586,9 +531,377 @@ def _inner_optimization_loop(self):
                 self.call_callbacks()
 
                 self.iteration += 1
+                if self.iteration % self.checkpoint_frequency == 0:
+                    self.save_checkpoint()
             if not self.loop:
                 break
 
+    def _start_epoch(self, epoch: int):
+        """Prepare for the start of an epoch."""
+        self.epoch = epoch
+        self.optimizer.set_epoch(epoch, len(self.epoch_list))
+        # The field shape is re-read from the updated simulation below
+        if self.fidelity_schedule is not None:
+            self.fidelity_schedule.apply(self.base_sim, epoch)
+
+    def _update_field_shape(self):
+        """Read the shape of the design index monitor fields into the device."""
+        # Sync up base sim LumericalSimObject with FDTD in order to get device index monitor shape.
+        self.fdtd.save(self.base_sim.get_path(), self.base_sim)
+        # Reassign field shape now that the device has been properly imported into Lumerical.
+        self.device.field_shape = self.fdtd.import_field_shape(self.base_sim)
+
+    def _optimization_step(self):
+        """Simulate the current design, then step it along the FoM gradient."""
+        self._import_device(self.device)
+
+        # # Save statistics to do with design variable away before running simulations.
+        # Save current design before iteration
+        self.param_hist.get('design').append(self.device.get_design_variable())
+        # # Calculate material % and binarization level, store away
+        # # todo: redo this section once you get sigmoid filters up and can start counting materials
+        # cur_index = self.device.index_from_permittivity(self.device.get_permittivity())
+        # tio2_pct = 100 * np.count_nonzero(self.device.get_design_variable() < 0.5) / cur_index.size
+        # # todo: should wrap these as functions of Device object
+        # vipdopt.logger.info(f'TiO2% is {tio2_pct}%.')		# todo: seems to be wrong?
+        # self.param_hist.get('tio2_pct').append( tio2_pct )
+        # # logging.info(f'Binarization is {100 * np.sum(np.abs(cur_density-0.5))/(cur_density.size*0.5)}%.')
+        # binarization_fraction = self.device.compute_binarization(self.device.get_design_variable())
+        # vipdopt.logger.info(f'Binarization is {100 * binarization_fraction}%.')
+        # self.param_hist.get('binarization').append( binarization_fraction )
+        # # todo: re-code binarization for multiple materials.
+
+        vipdopt.logger.info('Beginning Step 1: All Simulations Setup')
+        sims = self._create_jobs(self.fom)
+        self._run_jobs(sims)
+        self._extract_monitor_data(sims)
+
+        results, design_gradient = self._evaluate(self.fom, self.device)
+        self._record_results(results)
+
+        # Step the device with the gradient
+        vipdopt.logger.debug('Stepping device along gradient.')
+        self.optimizer.step(self.device, design_gradient, self.iteration)
+
+    def _import_device(self, device: Device, sim: LumericalSimulation | None = None):
+        """Pass a device through the current filters and import it into a simulation.
+
+        Arguments:
+            device (Device): The device to import.
+            sim (LumericalSimulation | None): The simulation whose first import
+                primitive receives the device. Defaults to the base simulation.
+        """
+        sim = self.base_sim if sim is None else sim
+        # The filters get stronger as the optimization progresses; only the layers
+        # after a filter whose parameters changed are recomputed
+        if self.continuation_schedule is not None:
+            self.continuation_schedule.apply(
+                device, epoch_progress(self.iteration, self.epoch_list)
+            )
+        # Import device index now into the simulation
+        import_primitive = sim.imports()[0]
+        device.import_cur_index(
+            import_primitive,
+            reinterpolation_factor=1,
+            binarize=False,
+        )
+        # Sync up with FDTD to properly import device.
+        self.fdtd.save(sim.get_path(), sim)
+
+    def _create_jobs(
+        self,
+        fom: SuperFoM,
+        name_suffix: str = '',
+        adjoint: bool = True,
+        base_sim: LumericalSimulation | None = None,
+    ) -> list[LumericalSimulation]:
+        """Create, save, and enqueue the simulations needed to evaluate a FoM.
+
+        Step 1: After importing the current epoch's permittivity value to the device;
+        We create a different optimization job for:
+        - each of the polarizations for the forward source waves
+        - each of the polarizations for each of the adjoint sources
+        Since here, each adjoint source is corresponding to a focal location for a
+        target color band, we have <num_wavelength_bands> x <num_polarizations>
+        adjoint sources. We then enqueue each job and run them all in parallel.
+
+        Arguments:
+            fom (SuperFoM): The FoM whose monitors will be linked to the new sims.
+            name_suffix (str): Appended to the base simulation's name, so that jobs
+                for different designs can be enqueued together.
+            adjoint (bool): Whether to create the adjoint simulations too; the FoM
+                value only needs the forward simulations. Defaults to True.
+            base_sim (LumericalSimulation | None): The simulation to create the
+                jobs from. Defaults to the base simulation.
+
+        Returns:
+            (list[LumericalSimulation]): The forward and adjoint simulations.
+        """
+        base_sim = self.base_sim if base_sim is None else base_sim
+        base_name = base_sim.info['name']
+        base_sim.info['name'] = base_name + name_suffix
+        try:
+            fwd_sims = fom.create_forward_sim(base_sim)
+            adj_sims = fom.create_adjoint_sim(base_sim) if adjoint else []
+        finally:
+            base_sim.info['name'] = base_name
+        sims = fwd_sims + adj_sims
+        for sim in sims:
+            sim_file = self.dirs['temp'] / f'{sim.info["name"]}.fsp'
+            # sim.link_monitors()
+
+            self.fdtd.save(sim_file, sim)  # Saving also sets the path
+            self.fdtd.addjob(sim_file)
+        vipdopt.logger.info('In-Progress Step 1: All Simulations Setup and Jobs Added')
+        return sims
+
+    def _run_jobs(self, sims: list[LumericalSimulation]):
+        """Run all enqueued jobs, re-adding any that did not run to completion."""
+        # If true, we're in debugging mode and it means no simulations are run.
+        # Data is instead pulled from finished simulation files in the debug folder.
+        # If false, run jobs and check that they all ran to completion.
+        # Recorded sessions can instead be replayed with a ReplayFDTD solver.
+        if self.cfg.get('pull_sim_files_from_debug_folder', False):
+            for sim in sims:
+                sim_file = self.dirs['debug_completed_jobs'] / f'{sim.info["name"]}.fsp'
+                sim.set_path(sim_file)
+        else:
+            self.fdtd.runjobs_to_completion(sims)
+        vipdopt.logger.info('Completed Step 1: All Simulations Run.')
+
+    def _spectral_sample(self) -> tuple[npt.NDArray, npt.NDArray] | None:
+        """Return the frequencies to compute the gradient at this iteration.
+
+        Returns:
+            (tuple[npt.NDArray, npt.NDArray] | None): Indices along the gradient's
+                spectral axis and their quadrature weights, or None if the full
+                spectrum is used.
+        """
+        if self.spectral_sampler is None:
+            return None
+        num_freqs = len(next(flatten(self.fom.foms)).pos_max_freqs)
+        return self.spectral_sampler.sample(self.iteration, num_freqs)
+
+    def _gradient_max_intensity(
+        self, fom: SuperFoM, grad_freqs: npt.NDArray | None
+    ) -> npt.NDArray:
+        """Return the maximum intensity at the frequencies of a gradient.
+
+        Arguments:
+            fom (SuperFoM): The FoM the gradient was computed for.
+            grad_freqs (npt.NDArray | None): The sampled frequencies along the
+                gradient's spectral axis, i.e. positions in `pos_max_freqs`, or None
+                if the full spectrum was used.
+
+        Returns:
+            (npt.NDArray): The maximum intensity at each of the gradient's
+                frequencies.
+        """
+        max_intensity = np.array(self.cfg['max_intensity_by_wavelength'])
+        if grad_freqs is None:
+            return max_intensity
+        # Map the positions in pos_max_freqs to indices into the full spectrum
+        pos_max_freqs = np.asarray(next(flatten(fom.foms)).pos_max_freqs)
+        return max_intensity[pos_max_freqs[grad_freqs]]
+
+    def _extract_monitor_data(
+        self,
+        sims: list[LumericalSimulation],
+        fom: SuperFoM | None = None,
+        device: Device | None = None,
+    ):
+        """Reformat the monitor data of finished simulations for easy use.
+
+        Arguments:
+            sims (list[LumericalSimulation]): The finished simulations.
+            fom (SuperFoM | None): The FoM whose gradient monitors are cropped.
+                Defaults to the optimization's FoM.
+            device (Device | None): The device to crop the gradient monitors to.
+                Defaults to the optimization's device.
+        """
+        fom = self.fom if fom is None else fom
+        device = self.device if device is None else device
+        # Gradient monitors only need the fields that overlap with the device, so
+        # crop them during extraction.
+        design_bounds = device.get_bounds()
+        crop_bounds = {
+            mon.name: design_bounds for f in flatten(fom.foms) for mon in f.adj_monitors
+        }
+
+        # When subsampling the spectrum, they also only need the sampled frequencies
+        freq_indices: dict[str, npt.NDArray] = {}
+        sample = self._spectral_sample()
+        if sample is not None:
+            for f in flatten(fom.foms):
+                freqs = np.asarray(f.pos_max_freqs)[sample[0]]
+                for mon in f.adj_monitors:
+                    freq_indices[mon.name] = np.union1d(
+                        freq_indices.get(mon.name, []), freqs
+                    ).astype(int)
+
+        self.fdtd.reformat_monitor_data(
+            sims, crop_bounds=crop_bounds, freq_indices=freq_indices
+        )
+
+    def _evaluate(
+        self,
+        fom: SuperFoM,
+        device: Device,
+        apply_performance_weights: bool = True,
+        symmetrize: bool = True,
+    ) -> tuple[FoMEvaluation, npt.NDArray]:
+        """Compute the FoM and the design gradient from extracted monitor data.
+
+        Arguments:
+            fom (SuperFoM): The FoM to evaluate; its monitors must be linked to
+                simulations whose data has been extracted.
+            device (Device): The device the simulations were run with.
+            apply_performance_weights (bool): Whether to combine the gradients of
+                the FoMs with their performance weights. Defaults to True.
+            symmetrize (bool): Whether to enforce the xy-symmetry of the gradient,
+                if the config asks for it. Defaults to True.
+
+        Returns:
+            (tuple[FoMEvaluation, npt.NDArray]): The (intensity scaled) evaluation
+                of the FoM, and the gradient with respect to the device's density
+                interpolated onto the device's geometry voxels.
+        """
+        # Physical positions of the (cropped) gradient monitor's samples
+        grad_coords = next(flatten(fom.foms)).adj_monitors[0].coords
+
+        # Compute the FoM, transmission, and gradient from the same monitor
+        # data, applying spectral and performance weights.
+        sample = self._spectral_sample()
+        if sample is not None:
+            metrics.record(
+                'spectral_sample',
+                iteration=self.iteration,
+                freqs=sample[0],
+                quadrature=sample[1],
+            )
+        results = fom.evaluate(
+            fom_args=self.fom_args,
+            fom_kwargs=self.fom_kwargs,
+            grad_args=self.grad_args,
+            grad_kwargs=self.grad_kwargs,
+            quantities=('transmission',),
+            apply_performance_weights=apply_performance_weights,
+            spectral_sample=sample,
+        )
+
+        # Scale by max_intensity_by_wavelength weighting (any intensity FoM needs this)
+        results['fom'] /= np.array(self.cfg['max_intensity_by_wavelength'])
+        vipdopt.logger.debug(f'FoM: {results["fom"]}')
+
+        # The loss landscape around the current design can be mapped with
+        # landscape.LossLandscapeMapper, e.g. from a callback.
+
+        g = results['grad']
+        # Scale by max_intensity_by_wavelength weighting (any intensity FoM needs this)
+        g /= self._gradient_max_intensity(fom, results['grad_freqs'])
+        # vipdopt.logger.debug(f'Gradient: {g}')
+
+        # Process gradient accordingly for application to device through optimizer.
+
+        g = np.sum(g, -1)  # Sum over wavelength
+        metrics.record(
+            'design_gradient',
+            iteration=self.iteration,
+            mean=lambda: np.mean(g),
+            max=lambda: np.max(g),
+        )
+
+        # Permittivity factor in amplitude of electric dipole at x_0:
+        # We need to properly account here for the current real and imaginary index
+        # because they both contribute in the end to the real part of the gradient ΔFoM/Δε_r
+        # in Eq. 5 of Lalau-Keraly paper https://doi.org/10.1364/OE.21.021693
+        # todo: if dispersion is considered, this needs to be assembled spectrally --------------------------------------------------
+        # dispersive_max_permittivity = dispersion_model.average_permittivity( dispersive_ranges_um[ lookup_dispersive_range_idx ] )
+        dispersive_max_permittivity = device.permittivity_constraints[1]
+        delta_permittivity = (
+            dispersive_max_permittivity - device.permittivity_constraints[0]
+        )
+        # todo: -----------------------------------------------------------------------------------------------------
+        get_grad_density = real_part_complex_product(delta_permittivity, g)
+        #! This is where the gradient picks up a permittivity factor i.e. becomes larger than 1!
+        #! Mitigated by backpropagating through the Scale filter.
+        get_grad_density = (
+            2 * get_grad_density
+        )  # Factor of 2 after taking the real part according to algorithm
+
+        # # Get the full design gradient by summing the x,y polarization components
+        # # todo: Do we need to consider polarization in the same way with the new implementation??
+        # design_gradient = 2 * ( xy_polarized_gradients[0] + xy_polarized_gradients[1] )
+
+        # Project / interpolate the design_gradient, the values of which we have at each (mesh) voxel point, and obtain it at each (geometry) voxel point
+        design_gradient_interpolated = device.interpolate_gradient(
+            get_grad_density,
+            dimension=self.cfg['simulator_dimension'],
+            coords=grad_coords,
+        )
+
+        # Each device needs to remember its gradient!
+        # todo: refine this
+        if symmetrize:
+            design_gradient_interpolated = self._symmetrize_gradient(
+                design_gradient_interpolated
+            )
+        # self.device.gradient = design_gradient_interpolated.copy()	# This is BEFORE backpropagation
+
+        return results, design_gradient_interpolated.copy()
+
+    def _symmetrize_gradient(self, g: npt.NDArray) -> npt.NDArray:
+        """Enforce the xy-symmetry of a design gradient, if the config asks for it."""
+        if not self.cfg['enforce_xy_gradient_symmetry']:
+            return g
+        if self.cfg['simulator_dimension'] in '2D':
+            transpose_g = np.flip(g, 1)
+        if self.cfg['simulator_dimension'] in '3D':
+            transpose_g = np.swapaxes(g, 0, 1)
+        return 0.5 * (g + transpose_g)
+
+    def _record_results(self, results: FoMEvaluation):
+        """Append the FoM and transmission from an evaluation to the histories."""
+        self.fom_hist.get('intensity_overall').append(results['fom'])
+
+        t = results['quantities']['transmission']
+        [
+            self.fom_hist.get(f'transmission_{idx}').append(t_i)
+            for idx, t_i in enumerate(t)
+        ]
+        self.fom_hist.get('transmission_overall').append(np.squeeze(np.sum(t, 0)))
+        # [plt.plot(np.squeeze(t_i)) for t_i in t]
+
+    def _record_progress(self):
+        """Publish the results of the latest iteration, e.g. to a live dashboard."""
+        num_foms = len(self.fom.foms)
+        metrics.record(
+            'progress',
+            iteration=self.iteration,
+            epoch=self.epoch,
+            fom=lambda: float(np.mean(self.fom_hist['intensity_overall'][-1])),
+            transmission=lambda: [
+                float(np.mean(self.fom_hist[f'transmission_{i}'][-1]))
+                for i in range(num_foms)
+            ],
+            overall_transmission=lambda: float(
+                np.mean(self.fom_hist['transmission_overall'][-1])
+            ),
+            # Top view of the design, averaged over its layers
+            design=lambda: np.mean(np.real(self.device.get_design_variable()), -1),
+        )
+        focal_monitor = self._focal_monitor()
+        if focal_monitor is None:
+            return
+        metrics.record(
+            'focal_plane',
+            iteration=self.iteration,
+            # Intensity averaged over wavelength
+            intensity=lambda: np.atleast_2d(
+                np.mean(np.sum(np.abs(focal_monitor.e) ** 2, axis=0), axis=(-2, -1))
+            ),
+        )
+
     def call_callbacks(self):
         """Call all of the callback functions."""
         for fun in self._callbacks:
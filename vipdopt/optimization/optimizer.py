@@ -1,10 +1,13 @@
 """Code for representing optimizers."""
 
 import abc
+from copy import deepcopy
+from typing import Any
 
 import numpy.typing as npt
 
 from vipdopt.optimization.device import Device
+from vipdopt.optimization.step_control import StepSizeController, load_step_controller
 
 
 # TODO: Add support for otehr types of optimizers
@@ -19,15 +22,45 @@ def __init__(self, **kwargs):
     def step(self, device: Device, gradient: npt.ArrayLike, iteration: int):
         """Step forward one iteration in the optimization process."""
 
+    def set_epoch(self, epoch: int, num_epochs: int):
+        """Prepare the optimizer for the start of a new epoch."""
+        step_control: StepSizeController | None = getattr(self, 'step_control', None)
+        if step_control is not None:
+            step_control.set_epoch(epoch, num_epochs)
+
+    def state_dict(self) -> dict[str, Any]:
+        """Return a copy of all the state needed to resume this optimizer."""
+        return deepcopy(vars(self))
+
+    def load_state_dict(self, state: dict[str, Any]):
+        """Restore the state of this optimizer from `state_dict()` output."""
+        vars(self).update(deepcopy(state))
+
 
 class GradientAscentOptimizer(GradientOptimizer):
-    """Optimizer for doing basic gradient ascent."""
+    """Optimizer for doing basic gradient ascent.
+
+    Attributes:
+        step_size (float): The step size to multiply the gradient by.
+        step_control (StepSizeController | None): If provided, adapts the step size
+            every iteration to keep the maximum design change within its bounds.
+    """
 
     step_size: float
+    step_control: StepSizeController | None
 
-    def __init__(self, step_size=0.01, **kwargs):
+    def __init__(
+        self,
+        step_size=0.01,
+        step_control: StepSizeController | dict | None = None,
+        **kwargs,
+    ):
         """Initialize a GradientDescentOptimizer."""
-        super().__init__(step_size=step_size, **kwargs)
+        super().__init__(
+            step_size=step_size,
+            step_control=load_step_controller(step_control),
+            **kwargs,
+        )
 
     def step(
         self,
@@ -36,53 +69,9 @@ def step(
         iteration: int,  # noqa: ARG002
     ):
         """Step with the gradient."""
-        grad = device.backpropagate(gradient)
-        w_hat = device.get_design_variable() + self.step_size * grad
-
-        device.set_design_variable(device.clip(w_hat))
-
-    # TODO: For Gradient Descent/Ascent only: Need to check whether it's respecting the epochs and everything.
-    # todo: At the moment this is implemented in a way where it doesn't respect the epoch maximums and minimums.
-    def scale_step_size(
-        epoch_start_design_change_min,
-        epoch_start_design_change_max,
-        epoch_end_design_change_min,
-        epoch_end_design_change_max,
-    ):
-        """Begin scaling of step size so that the design change stays within epoch_design_change limits in config."""
-        # # 20240726 Ian - one day i'll understand this code
-        # if use_fixed_step_size:
-        #     step_size = fixed_step_size
-        # else:
-        #     step_size = step_size_start
-        #     check_last = False
-        #     last = 0
-
-        #     while True:
-        #         # Gets proposed design variable according to Eq. S2, OPTICA Paper Supplement: https://doi.org/10.1364/OPTICA.384228
-        #         # Divides step size by 2 until the difference in the design variable is within the ranges set.
-
-        #         proposed_design_variable = cur_design_variable + step_size * design_gradient
-        #         proposed_design_variable = np.maximum(                       # Makes sure that it's between 0 and 1
-        #                                                 np.minimum(proposed_design_variable, 1.0),
-        #                                                 0.0)
-
-        #         difference = np.abs(proposed_design_variable - cur_design_variable)
-        #         max_difference = np.max(difference)
-
-        #         if (max_difference <= max_change_design) and (max_difference >= min_change_design):
-        #             break										# max_difference in [min_change_design, max_change_design]
-        #         elif (max_difference <= max_change_design):		# max_difference < min_change_design, by definition
-        #             step_size *= 2
-        #             if (last ^ 1) and check_last:	# For a Boolean, last ^ 1 = !last
-        #                 break						# skips the next two lines only if last=0 and check_last=True
-        #             check_last = True
-        #             last = 1
-        #         else:											# max_difference > max_change_design
-        #             step_size /= 2
-        #             if (last ^ 0) and check_last:	# For a Boolean, last ^ 0 = last
-        #                 break						# skips the next two lines only if last=1 and check_last=True
-        #             check_last = True
-        #             last = 0
-
-        return 3
+        grad = device.parameter_gradient(gradient)
+        if self.step_control is not None:
+            self.step_size = self.step_control.scale(device, grad, self.step_size)
+        w_hat = device.get_parameters() + self.step_size * grad
+
+        device.set_parameters(device.clip(w_hat))
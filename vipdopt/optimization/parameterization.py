@@ -0,0 +1,216 @@
+"""Reduced parameterizations of a device's design variable."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+from scipy.sparse import csgraph
+
+AXES = 'xyz'
+DIAGONALS = ('main', 'anti')
+
+
+class Parameterization:
+    """Linear map from a reduced design vector onto a device's design variable.
+
+    Voxels that are tied together, either because they lie in the same vertical
+    layer or because they are images of each other under a symmetry, share a single
+    parameter. The map is then a sparse 0/1 matrix P with exactly one nonzero entry
+    per row, so the design variable is w = P p and the gradient of a figure of merit
+    with respect to the parameters is the adjoint P^T dF/dw. Since the columns of P
+    are disjoint, the least-squares projection of a design onto the parameterization
+    averages the voxels tied to each parameter.
+
+    Attributes:
+        shape (tuple[int, int, int]): The shape of the design variable.
+        num_layers (int | None): The number of vertical layers whose voxels are
+            tied along `vertical_axis`; if None, layers are not tied. Voxels are
+            split as evenly as possible between the layers.
+        vertical_axis (str): The axis along which the layers are stacked.
+        tied_axes (tuple[str, ...]): Axes along which every voxel is tied, e.g. the
+            extruded axis of a 2D device.
+        mirror (tuple[str, ...]): Axes across whose center plane the design is
+            mirror symmetric.
+        diagonal (str | None): Whether the design is symmetric under reflection
+            across the 'main' (x = y) or 'anti' diagonal of the xy-plane.
+        matrix (sparse.csr_array): The (voxels, parameters) matrix P.
+    """
+
+    def __init__(
+        self,
+        shape: Sequence[int],
+        num_layers: int | None = None,
+        vertical_axis: str = 'z',
+        tied_axes: Sequence[str] = (),
+        mirror: Sequence[str] = (),
+        diagonal: str | None = None,
+    ) -> None:
+        """Initialize a Parameterization."""
+        self.shape = tuple(int(n) for n in shape)
+        if len(self.shape) != 3:  # noqa: PLR2004
+            raise ValueError(
+                f'Parameterization shape must be 3 dimensional; got {self.shape}'
+            )
+        for axis in (vertical_axis, *tied_axes, *mirror):
+            if axis not in AXES:
+                raise ValueError(f'Axes must be one of {tuple(AXES)}; got {axis!r}')
+        if num_layers is not None and not (
+            0 < num_layers <= self.shape[AXES.index(vertical_axis)]
+        ):
+            raise ValueError(
+                f'Cannot tie {num_layers} layers along an axis of '
+                f'{self.shape[AXES.index(vertical_axis)]} voxels'
+            )
+        if diagonal is not None:
+            if diagonal not in DIAGONALS:
+                raise ValueError(
+                    f'Diagonal symmetry must be one of {DIAGONALS}; got {diagonal!r}'
+                )
+            if self.shape[0] != self.shape[1]:
+                raise ValueError(
+                    'Diagonal symmetry requires a square xy-plane; got '
+                    f'{self.shape[:2]}'
+                )
+        self.num_layers = None if num_layers is None else int(num_layers)
+        self.vertical_axis = vertical_axis
+        self.tied_axes = tuple(tied_axes)
+        self.mirror = tuple(mirror)
+        self.diagonal = diagonal
+
+        index = self._parameter_index()
+        self.matrix = sparse.csr_array(
+            (np.ones(index.size), (np.arange(index.size), index)),
+            shape=(index.size, int(index.max()) + 1),
+        )
+        # Number of voxels tied to each parameter
+        self._counts = np.bincount(index)
+
+    def _parameter_index(self) -> npt.NDArray[np.intp]:
+        """Return the index of the parameter each voxel is tied to, in C order.
+
+        Voxels are the nodes of a graph, with edges joining each voxel to the first
+        voxel of its layer and to its images under each symmetry; the parameters
+        are the connected components of this graph.
+        """
+        idx = np.indices(self.shape)
+        size = idx[0].size
+        images = [self._tie(idx), *(sym(idx) for sym in self._symmetries())]
+        cols = np.concatenate([
+            np.ravel_multi_index(tuple(image), self.shape).ravel() for image in images
+        ])
+        rows = np.tile(np.arange(size), len(images))
+        graph = sparse.coo_array((np.ones(rows.size), (rows, cols)), shape=(size, size))
+        _, index = csgraph.connected_components(graph, directed=False)
+        return index
+
+    def _tie(self, idx: npt.NDArray[np.intp]) -> npt.NDArray[np.intp]:
+        """Map voxel indices to the first voxel of their layer along tied axes."""
+        idx = idx.copy()
+        for axis in self.tied_axes:
+            idx[AXES.index(axis)] = 0
+        if self.num_layers is not None:
+            a = AXES.index(self.vertical_axis)
+            splits = np.array_split(np.arange(self.shape[a]), self.num_layers)
+            first = np.concatenate([np.full(len(s), s[0]) for s in splits])
+            idx[a] = first[idx[a]]
+        return idx
+
+    def _symmetries(self) -> list[Callable[[npt.NDArray], npt.NDArray]]:
+        """Return the maps of voxel indices to their images under each symmetry."""
+        symmetries = []
+        for axis in self.mirror:
+            a = AXES.index(axis)
+            n = self.shape[a] - 1
+
+            def reflect(idx: npt.NDArray, a: int = a, n: int = n) -> npt.NDArray:
+                idx = idx.copy()
+                idx[a] = n - idx[a]
+                return idx
+
+            symmetries.append(reflect)
+        n = self.shape[0] - 1
+        if self.diagonal == 'main':
+            symmetries.append(lambda idx: idx[[1, 0, 2]])
+        elif self.diagonal == 'anti':
+            symmetries.append(lambda idx: np.stack([n - idx[1], n - idx[0], idx[2]]))
+        return symmetries
+
+    def __eq__(self, __value: object) -> bool:
+        """Test equality."""
+        if isinstance(__value, Parameterization):
+            return self.shape == __value.shape and self.as_dict() == __value.as_dict()
+        return super().__eq__(__value)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the parameterization."""
+        return (
+            f'Parameterization({self.shape}, {self.num_parameters} parameters, '
+            f'{self.as_dict()})'
+        )
+
+    @property
+    def num_parameters(self) -> int:
+        """The number of parameters in the reduced design vector."""
+        return self.matrix.shape[1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this parameterization."""
+        return {
+            'num_layers': self.num_layers,
+            'vertical_axis': self.vertical_axis,
+            'tied_axes': list(self.tied_axes),
+            'mirror': list(self.mirror),
+            'diagonal': self.diagonal,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], shape: Sequence[int]) -> Parameterization:
+        """Create a parameterization of a design with the given shape."""
+        return cls(shape, **data)
+
+    @classmethod
+    def from_config(cls, cfg: Any, shape: Sequence[int]) -> Parameterization | None:
+        """Create a parameterization from the design space settings of a config.
+
+        The settings are `tie_vertical_layers`, which ties the voxels in each of
+        the `num_vertical_layers` layers, `mirror_symmetry`, a list of mirror
+        symmetric axes, and `diagonal_symmetry`, either 'main' or 'anti'. In 2D the
+        layers are stacked along y, and the extruded z-axis is tied as well.
+
+        Returns:
+            (Parameterization | None): The parameterization, or None if the config
+                does not reduce the design space.
+        """
+        tie_layers = cfg.get('tie_vertical_layers', False)
+        mirror = cfg.get('mirror_symmetry') or ()
+        diagonal = cfg.get('diagonal_symmetry')
+        if not (tie_layers or mirror or diagonal):
+            return None
+        is_2d = cfg.get('simulator_dimension') == '2D'
+        return cls(
+            shape,
+            num_layers=cfg['num_vertical_layers'] if tie_layers else None,
+            vertical_axis='y' if is_2d else 'z',
+            tied_axes=('z',) if is_2d else (),
+            mirror=mirror,
+            diagonal=diagonal,
+        )
+
+    def expand(self, p: npt.ArrayLike) -> npt.NDArray:
+        """Return the design variable w = P p for a reduced design vector."""
+        return (self.matrix @ np.ravel(p)).reshape(self.shape)
+
+    def project(self, w: npt.ArrayLike) -> npt.NDArray:
+        """Return the reduced design vector closest to a design variable.
+
+        Each parameter is the average of the voxels tied to it.
+        """
+        return (self.matrix.T @ np.ravel(w)) / self._counts
+
+    def gradient(self, g: npt.ArrayLike) -> npt.NDArray:
+        """Return the adjoint P^T g of a gradient with respect to the design."""
+        return self.matrix.T @ np.ravel(g)
@@ -0,0 +1,220 @@
+"""Optimization of a population of designs whose simulations run together."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from copy import deepcopy
+from typing import Any
+
+import numpy as np
+
+import vipdopt
+from vipdopt.optimization.device import Device
+from vipdopt.optimization.fom import SuperFoM
+from vipdopt.optimization.optimization import LumericalOptimization
+from vipdopt.optimization.optimizer import GradientOptimizer
+
+
+class PopulationMember:
+    """A single design in a population, with its own optimizer and FoM.
+
+    Attributes:
+        index (int): Index of this member in the initial population. Used to name
+            its simulations so they can share a job queue with the other members.
+        device (Device): The member's device.
+        optimizer (GradientOptimizer): The optimizer stepping the member's device.
+        fom (SuperFoM): The member's FoM, linked to its own simulations.
+        fom_value (float | None): The member's most recent overall FoM, or None
+            if it has not been evaluated yet.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        device: Device,
+        optimizer: GradientOptimizer,
+        fom: SuperFoM,
+        fom_value: float | None = None,
+    ) -> None:
+        """Initialize a PopulationMember."""
+        self.index = index
+        self.device = device
+        self.optimizer = optimizer
+        self.fom = fom
+        self.fom_value = fom_value
+
+    def state_dict(self) -> dict[str, Any]:
+        """Return a snapshot of this member's state."""
+        return {
+            'index': self.index,
+            'w': self.device.w.copy(),
+            'optimizer': self.optimizer.state_dict(),
+            'performance_weights': np.array(self.fom.performance_weights, copy=True),
+            'fom_value': self.fom_value,
+        }
+
+    def load_state_dict(self, state: dict[str, Any]):
+        """Restore this member from the output of `state_dict()`."""
+        self.device.w = state['w'].copy()
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.fom.performance_weights = np.array(state['performance_weights'])
+        self.fom_value = state['fom_value']
+
+
+class PopulationOptimization(LumericalOptimization):
+    """Optimization advancing several designs in lockstep.
+
+    Each member starts from its own random seed and initial density. Every
+    iteration, the forward and adjoint simulations of all members are enqueued
+    together and run as a single batch, sharing the base simulation and the monitor
+    data extraction pass, so the solver's job queue is kept full.
+
+    At the start of every epoch, the members are ranked by their most recent FoM
+    and only the best `survivor_fraction` of them (and at least one) continue.
+    `device`, `optimizer`, and `fom` always refer to the current best member, so
+    histories, plots, and exports follow the leading design.
+
+    Attributes:
+        members (list[PopulationMember]): The surviving members of the population.
+        population_size (int): Number of members in the initial population.
+        survivor_fraction (float): Fraction of members kept at each epoch boundary.
+    """
+
+    def __init__(
+        self,
+        *args,
+        population_size: int = 2,
+        seeds: Sequence[int | None] | None = None,
+        init_densities: Sequence[float] | None = None,
+        survivor_fraction: float = 0.5,
+        **kwargs,
+    ):
+        """Initialize a PopulationOptimization.
+
+        Arguments:
+            *args: Positional arguments for LumericalOptimization.
+            population_size (int): Number of designs to optimize. Defaults to 2.
+            seeds (Sequence[int | None] | None): Random seed used to initialize each
+                member's design. Defaults to consecutive seeds starting from the
+                template device's `init_seed`.
+            init_densities (Sequence[float] | None): Initial density of each member.
+                Defaults to the template device's `init_density`.
+            survivor_fraction (float): Fraction of members to keep at each epoch
+                boundary. Defaults to 0.5.
+            **kwargs: Keyword arguments for LumericalOptimization.
+        """
+        super().__init__(*args, **kwargs)
+        if population_size < 1:
+            raise ValueError(
+                f'Population size must be a positive integer; got {population_size}'
+            )
+        if not 0 < survivor_fraction <= 1:
+            raise ValueError(
+                'Survivor fraction must be in the range (0, 1]; '
+                f'got {survivor_fraction}'
+            )
+        if seeds is None:
+            first_seed = self.device.init_seed or 0
+            seeds = [first_seed + k for k in range(population_size)]
+        if init_densities is None:
+            init_densities = [self.device.init_density] * population_size
+        if len(seeds) != population_size or len(init_densities) != population_size:
+            raise ValueError(
+                f'Expected {population_size} seeds and initial densities; '
+                f'got {len(seeds)} and {len(init_densities)}'
+            )
+        self.population_size = population_size
+        self.survivor_fraction = survivor_fraction
+
+        template = (self.device, self.optimizer, self.fom)
+        self.members: list[PopulationMember] = []
+        for k, (seed, density) in enumerate(zip(seeds, init_densities, strict=True)):
+            device, optimizer, fom = template if k == 0 else deepcopy(template)
+            device.init_seed = seed
+            device.init_density = density
+            device.randomize = seed is not None
+            device._init_variables()  # noqa: SLF001
+            device.update_density()
+            self.members.append(PopulationMember(k, device, optimizer, fom))
+        self.param_hist.update({'population_fom': []})
+
+    def _set_leader(self, member: PopulationMember):
+        """Make a member the design tracked by histories, plots, and exports."""
+        self.device = member.device
+        self.optimizer = member.optimizer
+        self.fom = member.fom
+
+    def _start_epoch(self, epoch: int):
+        """Select the surviving members, then prepare them for the new epoch."""
+        # Resuming re-enters the current epoch, which must not prune again
+        if epoch != self.epoch:
+            self.select_survivors()
+        super()._start_epoch(epoch)
+        for member in self.members:
+            member.optimizer.set_epoch(epoch, len(self.epoch_list))
+
+    def select_survivors(self):
+        """Keep only the best members of the population, ranked by FoM."""
+        if any(member.fom_value is None for member in self.members):
+            return
+        num_survivors = max(1, math.ceil(self.survivor_fraction * len(self.members)))
+        ranked = sorted(self.members, key=lambda m: m.fom_value, reverse=True)
+        self.members = ranked[:num_survivors]
+        self._set_leader(self.members[0])
+        vipdopt.logger.info(
+            f'Population members {[m.index for m in self.members]} survived; '
+            f'pruned {[m.index for m in ranked[num_survivors:]]}.'
+        )
+
+    def _optimization_step(self):
+        """Simulate all members in one batch, then step each along its gradient."""
+        vipdopt.logger.info('Beginning Step 1: All Simulations Setup')
+        sims = []
+        for member in self.members:
+            member.device.field_shape = self.device.field_shape
+            self._import_device(member.device)
+            sims += self._create_jobs(member.fom, f'_m{member.index}')
+        self._run_jobs(sims)
+        self._extract_monitor_data(sims)
+
+        evaluations = []
+        for member in self.members:
+            results, design_gradient = self._evaluate(member.fom, member.device)
+            member.fom_value = float(np.sum(np.real(results['fom'])))
+            evaluations.append((results, design_gradient))
+
+        # Histories follow the best member
+        best = int(np.argmax([member.fom_value for member in self.members]))
+        self._set_leader(self.members[best])
+        self.param_hist.get('design').append(self.device.get_design_variable())
+        self._record_results(evaluations[best][0])
+        population_fom = np.full(self.population_size, np.nan)
+        for member in self.members:
+            population_fom[member.index] = member.fom_value
+        self.param_hist.get('population_fom').append(population_fom)
+
+        # Step every device with its own gradient
+        vipdopt.logger.debug('Stepping devices along gradients.')
+        for member, (_, design_gradient) in zip(self.members, evaluations, strict=True):
+            member.optimizer.step(member.device, design_gradient, self.iteration)
+
+    def state_dict(self) -> dict[str, Any]:
+        """Return a snapshot of the optimization and every surviving member."""
+        state = super().state_dict()
+        state['population'] = [member.state_dict() for member in self.members]
+        state['leader'] = self.members.index(
+            next(m for m in self.members if m.device is self.device)
+        )
+        return state
+
+    def load_state_dict(self, state: dict[str, Any]):
+        """Restore the optimization and its surviving members."""
+        members = {member.index: member for member in self.members}
+        self.members = []
+        for member_state in state['population']:
+            member = members[member_state['index']]
+            member.load_state_dict(member_state)
+            self.members.append(member)
+        self._set_leader(self.members[state['leader']])
+        super().load_state_dict(state)
@@ -0,0 +1,104 @@
+"""Subsampling of the design spectrum for cheaper gradient evaluations."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+# Fractional part of the golden ratio; successive multiples are well spread in [0, 1)
+GOLDEN_FRACTION = (np.sqrt(5) - 1) / 2
+
+
+class SpectralSampler:
+    """Chooses a weight-aware subset of wavelengths to evaluate the gradient at.
+
+    The spectrum is split into `num_samples` contiguous strata containing equal
+    shares of the spectral weight, so important bands are sampled more densely, and
+    one wavelength is picked from every stratum. A sum over the whole spectrum is
+    then approximated by the quadrature rule sum_k n_k g(f_k), where n_k is the
+    number of wavelengths in the k-th stratum.
+
+    If `rotate` is set, the sample picked from each stratum changes every
+    iteration, following a low-discrepancy sequence, so that over several
+    iterations every wavelength contributes to the optimization.
+
+    Attributes:
+        num_samples (int): The number of wavelengths to sample.
+        weights (npt.NDArray | None): Relative importance of each wavelength; if
+            None, all wavelengths are equally important.
+        rotate (bool): Whether to change the sampled wavelengths every iteration.
+    """
+
+    def __init__(
+        self,
+        num_samples: int,
+        weights: npt.ArrayLike | None = None,
+        rotate: bool = True,
+    ) -> None:
+        """Initialize a SpectralSampler."""
+        if num_samples < 1:
+            raise ValueError(
+                f'Number of spectral samples must be positive; got {num_samples}'
+            )
+        self.num_samples = int(num_samples)
+        self.weights = None if weights is None else np.abs(np.asarray(weights))
+        self.rotate = rotate
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this sampler."""
+        return {
+            'num_samples': self.num_samples,
+            'weights': self.weights,
+            'rotate': self.rotate,
+        }
+
+    def strata(self, num_freqs: int) -> npt.NDArray:
+        """Return the boundaries of the strata the spectrum is split into.
+
+        Returns:
+            (npt.NDArray): Array of length num_samples + 1 such that the k-th stratum
+                contains the wavelengths in [edges[k], edges[k + 1]).
+        """
+        n = min(self.num_samples, num_freqs)
+        if self.weights is None:
+            density = np.ones(num_freqs)
+        else:
+            if len(self.weights) != num_freqs:
+                raise ValueError(
+                    f'Expected {num_freqs} spectral weights; got {len(self.weights)}'
+                )
+            # Keep a floor so that unweighted bands are still covered
+            density = self.weights + 1e-3 * np.max(self.weights, initial=0.0) + 1e-12
+        cdf = np.cumsum(density) / np.sum(density)
+        edges = np.empty(n + 1, dtype=int)
+        edges[0] = 0
+        edges[-1] = num_freqs
+        edges[1:-1] = np.searchsorted(cdf, np.arange(1, n) / n, side='right')
+
+        # Make every stratum non-empty
+        k = np.arange(n + 1)
+        edges = np.clip(edges, k, num_freqs - n + k)
+        return np.maximum.accumulate(edges - k) + k
+
+    def sample(
+        self, iteration: int, num_freqs: int
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        """Choose the wavelengths to evaluate the gradient at in an iteration.
+
+        Arguments:
+            iteration (int): The current iteration; used to rotate the samples.
+            num_freqs (int): The number of wavelengths in the full spectrum.
+
+        Returns:
+            (tuple[npt.NDArray, npt.NDArray]): The (sorted) sampled indices and the
+                quadrature weight of each.
+        """
+        if self.num_samples >= num_freqs:
+            return np.arange(num_freqs), np.ones(num_freqs)
+        edges = self.strata(num_freqs)
+        sizes = np.diff(edges)
+        offset = (iteration * GOLDEN_FRACTION) % 1.0 if self.rotate else 0.5
+        indices = edges[:-1] + np.floor(offset * sizes).astype(int)
+        return indices, sizes.astype(float)
@@ -0,0 +1,219 @@
+"""Adaptive control of the step size to keep design changes within bounds."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from vipdopt.diagnostics import metrics
+from vipdopt.optimization.device import Device
+
+
+class StepSizeController:
+    """Scales step sizes so the maximum design change stays within a window.
+
+    The window [min change, max change] is linearly interpolated from the bounds at
+    the start of the first epoch to the bounds at the start of the last epoch, as in
+    Eq. S2 of the supplement of https://doi.org/10.1364/OPTICA.384228. If the
+    maximum change produced by the current step size already lies in the window,
+    the step size is left alone; otherwise it is set to the step size producing a
+    maximum change at the nearest edge of the window.
+
+    The maximum change is computed analytically rather than by repeatedly stepping
+    the design: with clipping, each variable changes by min(s |d_i|, r_i) for a step
+    size s, direction d and room to the bound r. So the maximum change is a
+    piecewise linear, non-decreasing function of s with breakpoints at s = r_i/|d_i|.
+    Evaluating it at every breakpoint at once and bisecting over those candidates
+    (`np.searchsorted`) gives the exact step size without a per-trial Python loop.
+
+    Attributes:
+        epoch_start_design_change_min (float): Minimum change in the first epoch.
+        epoch_start_design_change_max (float): Maximum change in the first epoch.
+        epoch_end_design_change_min (float): Minimum change in the last epoch.
+        epoch_end_design_change_max (float): Maximum change in the last epoch.
+        progress (float): Fraction of the epochs completed, in [0, 1].
+    """
+
+    def __init__(
+        self,
+        epoch_start_design_change_min: float = 0.05,
+        epoch_start_design_change_max: float = 0.15,
+        epoch_end_design_change_min: float = 0.0,
+        epoch_end_design_change_max: float = 0.05,
+        progress: float = 0.0,
+    ) -> None:
+        """Initialize a StepSizeController."""
+        if epoch_start_design_change_min > epoch_start_design_change_max:
+            raise ValueError(
+                'Minimum design change must not exceed the maximum; got '
+                f'{epoch_start_design_change_min} > {epoch_start_design_change_max}'
+            )
+        if epoch_end_design_change_min > epoch_end_design_change_max:
+            raise ValueError(
+                'Minimum design change must not exceed the maximum; got '
+                f'{epoch_end_design_change_min} > {epoch_end_design_change_max}'
+            )
+        self.epoch_start_design_change_min = float(epoch_start_design_change_min)
+        self.epoch_start_design_change_max = float(epoch_start_design_change_max)
+        self.epoch_end_design_change_min = float(epoch_end_design_change_min)
+        self.epoch_end_design_change_max = float(epoch_end_design_change_max)
+        self.progress = float(progress)
+
+    def __eq__(self, __value: object) -> bool:
+        """Test equality."""
+        if isinstance(__value, StepSizeController):
+            return self.as_dict() == __value.as_dict()
+        return super().__eq__(__value)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dictionary representation of this controller."""
+        return {
+            'epoch_start_design_change_min': self.epoch_start_design_change_min,
+            'epoch_start_design_change_max': self.epoch_start_design_change_max,
+            'epoch_end_design_change_min': self.epoch_end_design_change_min,
+            'epoch_end_design_change_max': self.epoch_end_design_change_max,
+            'progress': self.progress,
+        }
+
+    @classmethod
+    def from_config(cls, cfg: Any) -> StepSizeController | None:
+        """Create a controller from the epoch design change settings in a config.
+
+        Returns:
+            (StepSizeController | None): The controller, or None if the config uses
+                a fixed step size or does not specify the design change bounds.
+        """
+        keys = [
+            'epoch_start_design_change_min',
+            'epoch_start_design_change_max',
+            'epoch_end_design_change_min',
+            'epoch_end_design_change_max',
+        ]
+        if cfg.get('use_fixed_step_size', True) or any(k not in cfg for k in keys):
+            return None
+        return cls(**{k: cfg[k] for k in keys})
+
+    def set_epoch(self, epoch: int, num_epochs: int):
+        """Update the design change bounds for the start of an epoch."""
+        self.progress = epoch / (num_epochs - 1) if num_epochs > 1 else 0.0
+
+    def bounds(self) -> tuple[float, float]:
+        """Return the allowed (min, max) design change at the current progress."""
+        t = self.progress
+        lo = (
+            self.epoch_start_design_change_min
+            + (self.epoch_end_design_change_min - self.epoch_start_design_change_min)
+            * t
+        )
+        hi = (
+            self.epoch_start_design_change_max
+            + (self.epoch_end_design_change_max - self.epoch_start_design_change_max)
+            * t
+        )
+        return lo, hi
+
+    def scale(
+        self, device: Device, direction: npt.ArrayLike, step_size: float
+    ) -> float:
+        """Return a step size for moving the device's design along a direction.
+
+        Arguments:
+            device (Device): The device whose parameters will be stepped.
+            direction (npt.ArrayLike): The (unscaled) step direction, with the same
+                shape as the device's parameters.
+            step_size (float): The step size to start from.
+
+        Returns:
+            (float): A step size whose maximum design change, after clipping, lies
+                within `bounds()`, or as close to it as clipping allows.
+        """
+        w = np.real(device.get_parameters())
+        lower = np.real(device.clip(np.full(w.shape, -np.inf)))
+        upper = np.real(device.clip(np.full(w.shape, np.inf)))
+        curve = MaxChangeCurve(w, direction, lower, upper)
+
+        lo, hi = self.bounds()
+        change = float(curve(step_size))
+        new_step_size = step_size
+        if not lo <= change <= hi:
+            new_step_size = curve.inverse(float(np.clip(change, lo, hi)))
+
+        metrics.record(
+            'step_control',
+            bounds=(lo, hi),
+            step_size=new_step_size,
+            max_change=lambda: float(curve(new_step_size)),
+        )
+        return new_step_size
+
+
+class MaxChangeCurve:
+    """The maximum clipped change in a design as a function of the step size."""
+
+    def __init__(
+        self,
+        x: npt.ArrayLike,
+        direction: npt.ArrayLike,
+        lower: npt.ArrayLike,
+        upper: npt.ArrayLike,
+    ) -> None:
+        """Precompute the breakpoints of the curve.
+
+        Arguments:
+            x (npt.ArrayLike): The current design.
+            direction (npt.ArrayLike): The step direction.
+            lower (npt.ArrayLike): Lower bounds for the design.
+            upper (npt.ArrayLike): Upper bounds for the design.
+        """
+        x = np.ravel(np.real(x))
+        d = np.ravel(np.real(direction))
+        room = np.where(d > 0, np.ravel(upper) - x, x - np.ravel(lower))
+        room = np.maximum(room, 0.0)
+        moving = d != 0
+        speed = np.abs(d[moving])
+        room = room[moving]
+
+        # Step size at which each variable reaches its bound, in increasing order
+        saturation = room / speed
+        order = np.argsort(saturation)
+        self.breakpoints = saturation[order]
+        speed = speed[order]
+        room = room[order]
+
+        # For a step size past k breakpoints, the first k variables are clipped and
+        # contribute their room, while the rest move at their speed
+        self._max_speed = np.zeros(len(speed) + 1)
+        self._max_speed[:-1] = np.maximum.accumulate(speed[::-1])[::-1]
+        self._max_room = np.zeros(len(room) + 1)
+        self._max_room[1:] = np.maximum.accumulate(room)
+
+    def __call__(self, step_sizes: npt.ArrayLike) -> npt.NDArray:
+        """Evaluate the maximum design change for one or more step sizes."""
+        s = np.asarray(step_sizes, dtype=float)
+        k = np.searchsorted(self.breakpoints, s, side='right')
+        return np.maximum(s * self._max_speed[k], self._max_room[k])
+
+    def inverse(self, change: float) -> float:
+        """Return the smallest step size producing a given maximum change.
+
+        If the change is unreachable because every variable saturates first, the
+        smallest step size that saturates all of them is returned instead.
+        """
+        if len(self.breakpoints) == 0:
+            return 0.0
+        k = int(np.searchsorted(self(self.breakpoints), change, side='left'))
+        if k == len(self.breakpoints):
+            return float(self.breakpoints[-1])
+        # Between breakpoints k-1 and k, the change is linear in the step size
+        return float(change / self._max_speed[k])
+
+
+def load_step_controller(
+    controller: StepSizeController | dict | None,
+) -> StepSizeController | None:
+    """Create a StepSizeController from its dictionary representation if needed."""
+    if controller is None or isinstance(controller, StepSizeController):
+        return controller
+    return StepSizeController(**controller)
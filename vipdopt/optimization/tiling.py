@@ -0,0 +1,388 @@
+"""Optimization of a large design region split into overlapping tiles."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from copy import deepcopy
+from itertools import pairwise
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+import vipdopt
+from vipdopt.optimization.continuation import epoch_progress
+from vipdopt.optimization.device import Device
+from vipdopt.optimization.fidelity import FidelitySchedule
+from vipdopt.optimization.fom import FoMEvaluation, SuperFoM
+from vipdopt.optimization.optimization import LumericalOptimization
+from vipdopt.simulation import LumericalSimulation
+from vipdopt.utils import convert_path
+
+# Lateral axes along which a design region can be split
+TILED_AXES = 'xy'
+
+
+def _core_bounds(n: int, num_tiles: int) -> npt.NDArray[np.intp]:
+    """Return the boundaries between the cores of tiles splitting n voxels."""
+    return np.cumsum([0] + [len(s) for s in np.array_split(np.arange(n), num_tiles)])
+
+
+def tile_slices(
+    shape: Sequence[int], num_tiles: Sequence[int], overlap: int = 0
+) -> list[tuple[slice, slice, slice]]:
+    """Split a design region laterally into a grid of overlapping tiles.
+
+    Each axis is first split into cores of (nearly) equal size, and each core is
+    then extended by `overlap` voxels into its neighbours, so that neighbouring
+    tiles share 2 * `overlap` voxels.
+
+    Arguments:
+        shape (Sequence[int]): The shape of the design region.
+        num_tiles (Sequence[int]): The number of tiles along x and y.
+        overlap (int): The number of voxels each tile extends into its neighbours.
+            Defaults to 0.
+
+    Raises:
+        ValueError: If the tiles would be too small for the overlap.
+
+    Returns:
+        (list[tuple[slice, slice, slice]]): The slices of the design region in each
+            tile, with the tiles ordered by x index and then by y index.
+    """
+    axes = []
+    for a, n_tiles in enumerate(num_tiles):
+        bounds = _core_bounds(shape[a], n_tiles)
+        if n_tiles > 1 and 2 * overlap > np.min(np.diff(bounds)):
+            raise ValueError(
+                f'Tiles of {np.min(np.diff(bounds))} voxels along '
+                f'{TILED_AXES[a]} are too small for an overlap of {overlap} voxels'
+            )
+        axes.append([
+            slice(max(lo - overlap, 0), min(hi + overlap, shape[a]))
+            for lo, hi in pairwise(bounds)
+        ])
+    return [(sx, sy, slice(None)) for sx in axes[0] for sy in axes[1]]
+
+
+def blend_weights(
+    shape: Sequence[int],
+    num_tiles: Sequence[int],
+    overlap: int,
+    index: Sequence[int],
+) -> npt.NDArray:
+    """Return the weights blending a tile's gradient into the full design region.
+
+    Across each band shared by two tiles, the weights ramp linearly from one tile
+    to the other, so the weights of all tiles sum to one at every voxel and a tile
+    contributes less the closer a voxel is to its (truncated) simulation's edge.
+
+    Arguments:
+        shape (Sequence[int]): The shape of the design region.
+        num_tiles (Sequence[int]): The number of tiles along x and y.
+        overlap (int): The number of voxels each tile extends into its neighbours.
+        index (Sequence[int]): The (x, y) index of the tile.
+
+    Returns:
+        (npt.NDArray): The weights of the tile's voxels, with shape (nx, ny, 1).
+    """
+    profiles = []
+    for a, (n_tiles, k) in enumerate(zip(num_tiles, index, strict=True)):
+        bounds = _core_bounds(shape[a], n_tiles)
+        i = np.arange(
+            max(bounds[k] - overlap, 0), min(bounds[k + 1] + overlap, shape[a])
+        )
+        profile = np.ones(len(i))
+        if overlap > 0:
+            if k > 0:
+                profile = np.minimum(
+                    profile, (i - bounds[k] + overlap + 0.5) / (2 * overlap)
+                )
+            if k < n_tiles - 1:
+                profile = np.minimum(
+                    profile, (bounds[k + 1] + overlap - i - 0.5) / (2 * overlap)
+                )
+        profiles.append(profile)
+    return (
+        profiles[0][:, np.newaxis, np.newaxis] * profiles[1][np.newaxis, :, np.newaxis]
+    )
+
+
+def tile_simulation(
+    sim: LumericalSimulation,
+    bounds: dict[str, tuple[float, float]],
+    name: str,
+) -> LumericalSimulation:
+    """Return a copy of a simulation cropped laterally to a window.
+
+    Every object extending past the window along one of its axes (e.g. the FDTD
+    region, sources, and field monitors) is cropped to the window. Objects lying
+    entirely outside of the window are left alone.
+
+    Arguments:
+        sim (LumericalSimulation): The simulation to crop.
+        bounds (dict[str, tuple[float, float]]): The (min, max) extent of the window
+            in meters along each axis to crop.
+        name (str): The name of the new simulation.
+
+    Returns:
+        (LumericalSimulation): The cropped simulation.
+    """
+    new_sim = sim.copy()
+    new_sim.info['name'] = name
+    for obj in new_sim.objects.values():
+        props = obj.properties
+        for axis, (lo, hi) in bounds.items():
+            if f'{axis} min' in props and f'{axis} max' in props:
+                obj_lo, obj_hi = props[f'{axis} min'], props[f'{axis} max']
+            elif f'{axis} span' in props:
+                center = props.get(axis, 0.0)
+                obj_lo = center - 0.5 * props[f'{axis} span']
+                obj_hi = center + 0.5 * props[f'{axis} span']
+            else:
+                continue
+            new_lo, new_hi = max(obj_lo, lo), min(obj_hi, hi)
+            if new_lo >= new_hi or (new_lo == obj_lo and new_hi == obj_hi):
+                continue
+            if f'{axis} span' in props:
+                obj.update(**{
+                    axis: 0.5 * (new_lo + new_hi),
+                    f'{axis} span': new_hi - new_lo,
+                })
+            else:
+                obj.update(**{f'{axis} min': new_lo, f'{axis} max': new_hi})
+    return new_sim
+
+
+def combine_evaluations(evaluations: Sequence[FoMEvaluation]) -> FoMEvaluation:
+    """Combine the evaluations of the tiles' FoMs into one for the histories.
+
+    The FoMs are summed and the other quantities (e.g. transmission) averaged. The
+    gradients are left as those of the first tile, since the tiles' gradients are
+    only combined after interpolating them onto the design region.
+    """
+    return {
+        **evaluations[0],
+        'fom': np.sum([e['fom'] for e in evaluations], axis=0),
+        'foms': np.sum([e['foms'] for e in evaluations], axis=0),
+        'quantities': {
+            key: np.mean([e['quantities'][key] for e in evaluations], axis=0)
+            for key in evaluations[0]['quantities']
+        },
+    }
+
+
+class Tile:
+    """A tile of a large design region, with its own simulations.
+
+    Attributes:
+        index (tuple[int, int]): The (x, y) index of the tile in the grid of tiles.
+        slices (tuple[slice, slice, slice]): The tile's part of the design region.
+        weights (npt.NDArray): The weights blending the tile's gradient into the
+            gradient of the full design region.
+        device (Device): The tile's device. Its `w` is a view into the `w` of the
+            full device, so the tile always sees the current design.
+        sim (LumericalSimulation): The tile's base simulation.
+        fom (SuperFoM): The tile's FoM, linked to its own simulations.
+        fidelity_schedule (FidelitySchedule | None): The fidelity schedule updating
+            the tile's base simulation, if any.
+    """
+
+    def __init__(
+        self,
+        index: tuple[int, int],
+        slices: tuple[slice, slice, slice],
+        weights: npt.NDArray,
+        device: Device,
+        sim: LumericalSimulation,
+        fom: SuperFoM,
+        fidelity_schedule: FidelitySchedule | None = None,
+    ) -> None:
+        """Initialize a Tile."""
+        self.index = index
+        self.slices = slices
+        self.weights = weights
+        self.device = device
+        self.sim = sim
+        self.fom = fom
+        self.fidelity_schedule = fidelity_schedule
+
+    @property
+    def name(self) -> str:
+        """The name of the tile, used to name its simulations."""
+        return f't{self.index[0]}_{self.index[1]}'
+
+    def link(self, device: Device):
+        """Make the tile's design a view into the design of the full device."""
+        self.device.w = device.w[self.slices]
+
+
+class TiledOptimization(LumericalOptimization):
+    """Optimization of a large design region split into overlapping tiles.
+
+    The design region is split laterally into a grid of tiles, each extending
+    `overlap` voxels into its neighbours. Every tile has its own device, whose
+    design is a view into the full device's, and its own base simulation, cropped
+    to the tile and a `margin_um` wide border around it. Every iteration, the
+    forward and adjoint simulations of all tiles are enqueued together and run as
+    a single batch, so no simulation has to hold the full design region.
+
+    The gradients of the tiles are then stitched into a gradient of the full design
+    region, blending them linearly across the overlaps, and the optimizer steps the
+    full device. The recorded FoM is the sum of the tiles' FoMs, and the recorded
+    transmission is their mean.
+
+    Attributes:
+        tiles (list[Tile]): The tiles of the design region.
+        num_tiles (tuple[int, int]): The number of tiles along x and y.
+        overlap (int): The number of voxels each tile extends into its neighbours.
+        margin_um (float): The width of the border around each tile that its
+            simulation includes.
+    """
+
+    def __init__(
+        self,
+        *args,
+        num_tiles: Sequence[int] = (2, 2),
+        overlap: int = 0,
+        margin_um: float = 0.0,
+        tile_sims: Sequence[LumericalSimulation] | None = None,
+        **kwargs,
+    ):
+        """Initialize a TiledOptimization.
+
+        Arguments:
+            *args: Positional arguments for LumericalOptimization.
+            num_tiles (Sequence[int]): The number of tiles along x and y. Defaults
+                to (2, 2).
+            overlap (int): The number of voxels each tile extends into its
+                neighbours. Defaults to 0.
+            margin_um (float): The width of the border around each tile that its
+                simulation includes. Defaults to 0.
+            tile_sims (Sequence[LumericalSimulation] | None): The base simulation of
+                each tile, in the order of `tile_slices`. Defaults to the base
+                simulation cropped to each tile.
+            **kwargs: Keyword arguments for LumericalOptimization.
+        """
+        super().__init__(*args, **kwargs)
+        if len(num_tiles) != len(TILED_AXES) or any(n < 1 for n in num_tiles):
+            raise ValueError(
+                f'Expected a positive number of tiles along x and y; got {num_tiles}'
+            )
+        if overlap < 0:
+            raise ValueError(f'Tile overlap must be non-negative; got {overlap}')
+        self.num_tiles = (int(num_tiles[0]), int(num_tiles[1]))
+        self.overlap = int(overlap)
+        self.margin_um = float(margin_um)
+
+        slices = tile_slices(self.device.size, self.num_tiles, self.overlap)
+        if tile_sims is not None and len(tile_sims) != len(slices):
+            raise ValueError(
+                f'Expected {len(slices)} tile simulations; got {len(tile_sims)}'
+            )
+        indices = np.ndindex(self.num_tiles)
+        self.tiles: list[Tile] = []
+        for k, (index, tile_slice) in enumerate(zip(indices, slices, strict=True)):
+            name = f't{index[0]}_{index[1]}'
+            device = self._tile_device(tile_slice, name)
+            sim = self._tile_sim(device, name) if tile_sims is None else tile_sims[k]
+            self.tiles.append(
+                Tile(
+                    index,
+                    tile_slice,
+                    blend_weights(self.device.size, self.num_tiles, overlap, index),
+                    device,
+                    sim,
+                    deepcopy(self.fom),
+                    deepcopy(self.fidelity_schedule),
+                )
+            )
+            self.tiles[-1].link(self.device)
+
+    def _tile_device(self, tile_slice: tuple[slice, slice, slice], name: str) -> Device:
+        """Create a device for part of the design region."""
+        return Device(
+            self.device.w[tile_slice].shape[:-1],
+            self.device.permittivity_constraints,
+            {
+                axis: np.asarray(self.device.coords[axis])[s]
+                for axis, s in zip('xyz', tile_slice, strict=True)
+            },
+            name=f'{self.device.name}_{name}',
+            # Filters are shared, so they are updated along with the full device's
+            filters=self.device.filters,
+        )
+
+    def _tile_sim(self, device: Device, name: str) -> LumericalSimulation:
+        """Crop the base simulation to a tile's device and the margin around it."""
+        margin = 1e-6 * self.margin_um
+        window = {
+            axis: (lo - margin, hi + margin)
+            for axis, (lo, hi) in device.get_bounds().items()
+            if axis in TILED_AXES and self.num_tiles[TILED_AXES.index(axis)] > 1
+        }
+        sim = tile_simulation(
+            self.base_sim, window, f'{self.base_sim.info["name"]}_{name}'
+        )
+        base_path = self.base_sim.get_path()
+        if base_path:
+            base_path = convert_path(base_path)
+            sim.set_path(
+                base_path.with_name(f'{base_path.stem}_{name}{base_path.suffix}')
+            )
+        else:
+            sim.set_path(self.dirs['temp'] / f'{sim.info["name"]}.fsp')
+        return sim
+
+    def _start_epoch(self, epoch: int):
+        """Prepare the base simulation and every tile's simulation for an epoch."""
+        super()._start_epoch(epoch)
+        for tile in self.tiles:
+            if tile.fidelity_schedule is not None:
+                tile.fidelity_schedule.apply(tile.sim, epoch)
+
+    def _update_field_shape(self):
+        """Read the shape of each tile's design index monitor fields."""
+        for tile in self.tiles:
+            tile.sim.disable(tile.sim.indexmonitor_names())
+            self.fdtd.save(tile.sim.get_path(), tile.sim)
+            tile.device.field_shape = self.fdtd.import_field_shape(tile.sim)
+
+    def _optimization_step(self):
+        """Simulate all tiles in one batch, then step along the stitched gradient."""
+        # The tiles share the full device's filters and design
+        if self.continuation_schedule is not None:
+            self.continuation_schedule.apply(
+                self.device, epoch_progress(self.iteration, self.epoch_list)
+            )
+
+        vipdopt.logger.info('Beginning Step 1: All Simulations Setup')
+        tile_sims = []
+        for tile in self.tiles:
+            self._import_device(tile.device, tile.sim)
+            tile_sims.append(self._create_jobs(tile.fom, base_sim=tile.sim))
+        self.param_hist.get('design').append(self.device.get_design_variable())
+        self._run_jobs([sim for sims in tile_sims for sim in sims])
+
+        gradient = np.zeros(self.device.size)
+        evaluations = []
+        for tile, sims in zip(self.tiles, tile_sims, strict=True):
+            self._extract_monitor_data(sims, tile.fom, tile.device)
+            results, tile_gradient = self._evaluate(
+                tile.fom, tile.device, symmetrize=False
+            )
+            gradient[tile.slices] += tile.weights * tile_gradient
+            evaluations.append(results)
+        self._record_results(combine_evaluations(evaluations))
+
+        vipdopt.logger.debug('Stepping device along stitched gradient.')
+        self.optimizer.step(
+            self.device, self._symmetrize_gradient(gradient), self.iteration
+        )
+
+    def load_state_dict(self, state: dict[str, Any]):
+        """Restore the optimization, relinking the tiles to the restored design."""
+        super().load_state_dict(state)
+        for tile in self.tiles:
+            tile.link(self.device)
+            tile.fom.performance_weights = np.array(self.fom.performance_weights)
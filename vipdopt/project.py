@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import contextlib
+import inspect
 import os
 import shutil
 import sys
@@ -16,18 +17,34 @@
 import vipdopt
 from vipdopt.configuration import Config, SonyBayerConfig
 from vipdopt.optimization import (
+    ContinuationSchedule,
     Device,
+    FidelitySchedule,
     FoM,
     GradientOptimizer,
     LumericalOptimization,
+    Parameterization,
+    PopulationOptimization,
+    SpectralSampler,
+    StepSizeController,
     SuperFoM,
+    TiledOptimization,
 )
 from vipdopt.optimization.filter import Scale, Sigmoid
-from vipdopt.simulation import LumericalEncoder, LumericalSimulation
+from vipdopt.simulation import (
+    LumericalSimulation,
+    Monitor,
+    solver_from_config,
+)
+from vipdopt.snapshot import is_snapshot, read_snapshot, write_snapshot
 from vipdopt.utils import Coordinates, PathLike, ensure_path, flatten, glob_first
 
 sys.path.append(os.getcwd())
 
+# Snapshot of the project's settings written by `Project.save_as`
+PROJECT_SNAPSHOT_NAME = 'project'
+SNAPSHOT_KIND = 'project'
+
 
 def create_internal_folder_structure(root_dir: Path, pull_files_debug_mode=False):
     """Create the subdirectories of the project folder.
@@ -139,10 +156,16 @@ def from_dir(
     def load_project(self, project_dir: Path, config_name: str = 'config.yaml'):
         """Load settings from a project directory - or create them if initializing.
 
-        MUST have a config file in the project directory.
+        MUST have a config file or a project snapshot in the project directory.
         """
         self.dir = project_dir
         cfg_file = project_dir / config_name
+        if not cfg_file.exists() and is_snapshot(project_dir / PROJECT_SNAPSHOT_NAME):
+            cfg_file = project_dir / PROJECT_SNAPSHOT_NAME
+        if is_snapshot(cfg_file):
+            # Snapshots written by `save_as` include the base simulation
+            self._load_config(Config(read_snapshot(cfg_file, kind=SNAPSHOT_KIND)))
+            return
         if not cfg_file.exists():
             # Search the directory for a configuration file
             cfg_file = glob_first(project_dir, '**/*config*.{yaml,yml,json}')
@@ -166,6 +189,10 @@ def _load_optimizer(self, cfg: Config):
             raise NotImplementedError(
                 f'Optimizer {optimizer} not currently supported'
             ) from None
+        if 'step_control' not in optimizer_settings and (
+            'step_control' in inspect.signature(optimizer_type).parameters
+        ):
+            optimizer_settings['step_control'] = StepSizeController.from_config(cfg)
         self.optimizer = optimizer_type(**optimizer_settings)
 
     def _load_base_sim(self, cfg: Config):
@@ -193,9 +220,8 @@ def _load_base_sim(self, cfg: Config):
         }  # key, value types here are Dict( str : LumericalSimulation )
         self.base_sim.set_path(self.dir / 'base_sim.fsp')
 
-        # TODO: Partitioning the base_sim into simulations: i.e. a list of Simulation objects
-        # TODO: And the same with devices
-        # Multiple simulations may be created here due to the need for large-area simulation segmentation, or genetic optimizations
+        # Large-area designs are segmented into tiles, each with its own simulation
+        # and device, by TiledOptimization; see the `tile_grid` setting.
 
     def _load_foms(self, cfg: Config):
         """Load figures of merit from a config."""
@@ -363,9 +389,45 @@ def _load_device(self, cfg: Config):
                         cfg['max_device_permittivity'],
                     )),
                 ],
+                parameterization=Parameterization.from_config(cfg, voxel_array_size),
             )
         vipdopt.logger.info('Device loaded.')
 
+    def _optimization_type(
+        self, cfg: Config, env_vars: dict
+    ) -> tuple[type[LumericalOptimization], dict[str, Any]]:
+        """Return the type of optimization to run and its extra arguments.
+
+        The number of simulations in `env_vars` is scaled by the number of designs
+        or tiles simulated at once.
+        """
+        # Several designs can be optimized together to fill the job queue
+        population_size = cfg.get('population_size', 1)
+        # Large design regions can be split into tiles that are simulated separately
+        num_tiles = cfg.get('tile_grid', [1, 1])
+        optimization_type: type[LumericalOptimization] = LumericalOptimization
+        optimization_kwargs: dict[str, Any] = {}
+        if population_size > 1 and np.prod(num_tiles) > 1:
+            raise ValueError('Cannot optimize a population of tiled designs')
+        if population_size > 1:
+            optimization_type = PopulationOptimization
+            optimization_kwargs = {
+                'population_size': population_size,
+                'seeds': cfg.get('population_seeds'),
+                'init_densities': cfg.get('population_init_densities'),
+                'survivor_fraction': cfg.get('survivor_fraction', 0.5),
+            }
+            env_vars['nsims'] *= population_size
+        elif np.prod(num_tiles) > 1:
+            optimization_type = TiledOptimization
+            optimization_kwargs = {
+                'num_tiles': num_tiles,
+                'overlap': cfg.get('tile_overlap_voxels', 0),
+                'margin_um': cfg.get('tile_margin_um', 0.0),
+            }
+            env_vars['nsims'] *= int(np.prod(num_tiles))
+        return optimization_type, optimization_kwargs
+
     def _load_config(self, config: Config | dict):
         """Load and setup optimization from an appropriate JSON config file."""
         # Load config file
@@ -378,7 +440,6 @@ def _load_config(self, config: Config | dict):
         self._load_optimizer(cfg)
         # Load base simulation.
         self._load_base_sim(cfg)
-        sims = list(self.src_to_sim_map.values())
 
         # Load Figures of Merit (FoMs)
         self._load_foms(cfg)
@@ -432,9 +493,27 @@ def _load_config(self, config: Config | dict):
         else:
             vipdopt.logger.warning('Warning! Solver path does not exist.')
 
-        self.optimization = LumericalOptimization(
+        # The monitor data cache is shared by every optimization in the process, so
+        # its memory budget is set once here rather than by each optimization
+        if cfg.get('monitor_cache_bytes') is not None:
+            Monitor.cache.max_bytes = cfg['monitor_cache_bytes']
+
+        optimization_type, optimization_kwargs = self._optimization_type(
+            cfg, env_vars
+        )
+
+        # Optionally compute the gradient at only a few wavelengths per iteration,
+        # sampling more densely where the spectral weights are large
+        spectral_sampler = None
+        if cfg.get('num_gradient_wavelengths') is not None:
+            spectral_sampler = SpectralSampler(
+                cfg['num_gradient_wavelengths'],
+                weights=np.sum(np.abs(self.weights), axis=0),
+                rotate=cfg.get('rotate_gradient_wavelengths', True),
+            )
+
+        self.optimization = optimization_type(
             self.base_sim,
-            sims,
             self.device,
             self.optimizer,
             full_fom,
@@ -446,6 +525,13 @@ def _load_config(self, config: Config | dict):
             true_iteration=iteration,
             env_vars=env_vars,
             dirs=self.subdirectories,
+            checkpoint_frequency=cfg.get('checkpoint_frequency', 1),
+            spectral_sampler=spectral_sampler,
+            fidelity_schedule=FidelitySchedule.from_config(cfg),
+            continuation_schedule=ContinuationSchedule.from_config(cfg),
+            # Optionally record the solver's results, or replay recorded ones
+            solver=solver_from_config(cfg, self.dir),
+            **optimization_kwargs,
         )
         vipdopt.logger.info('Optimization initialized.')
 
@@ -473,7 +559,7 @@ def current_device_path(self) -> Path:
         assert self.optimization is not None
         epoch = self.optimization.epoch
         iteration = self.optimization.iteration
-        return self.dir / 'device' / f'e_{epoch}_i_{iteration}.npy'
+        return self.dir / 'device' / f'e_{epoch}_i_{iteration}'
 
     def save(self):
         """Save this project to it's pre-assigned directory."""
@@ -490,46 +576,61 @@ def save_as(self, project_dir: Path):
 
         # Save device to file for current epoch/iter
         self.device.save(self.current_device_path())
-        cfg.save(project_dir / 'config.json', cls=LumericalEncoder)
+        write_snapshot(project_dir / PROJECT_SNAPSHOT_NAME, cfg.data, SNAPSHOT_KIND)
 
         # ! TODO: Save histories and plots
 
     def _generate_config(self) -> Config:
         """Create a JSON config for this project's settings."""
-        cfg = copy(self.config)
+        cfg = self.config.derive()
         assert self.optimization is not None
         assert self.optimizer is not None
         assert self.base_sim is not None
 
-        # Miscellaneous Settings
-        cfg['current_epoch'] = self.optimization.epoch
-        cfg['current_iteration'] = self.optimization.iteration
-
-        # Optimizer
-        cfg['optimizer'] = type(self.optimizer).__name__
-        cfg['optimizer_settings'] = vars(self.optimizer)
-
-        # FoMs
-        foms = []
-        for i, fom in enumerate(self.foms):
-            data = fom.as_dict()
-            data['weight'] = self.weights[i]
-            foms.append(data)
-        cfg['figures_of_merit'] = {fom.name: foms[i] for i, fom in enumerate(self.foms)}
-
-        # Device
-        cfg['device'] = self.current_device_path()
-
-        # Simulation
-        cfg['base_simulation'] = self.base_sim.as_dict()
+        # Validate the config once, after all of the settings are written
+        with cfg.batch():
+            # Miscellaneous Settings
+            cfg['current_epoch'] = self.optimization.epoch
+            cfg['current_iteration'] = self.optimization.iteration
+
+            # Optimizer
+            cfg['optimizer'] = type(self.optimizer).__name__
+            cfg['optimizer_settings'] = vars(self.optimizer)
+
+            # FoMs
+            foms = []
+            for i, fom in enumerate(self.foms):
+                data = fom.as_dict()
+                data['weight'] = self.weights[i]
+                foms.append(data)
+            cfg['figures_of_merit'] = {
+                fom.name: foms[i] for i, fom in enumerate(self.foms)
+            }
+
+            # Device
+            cfg['device'] = self.current_device_path()
+            # An empty schedule keeps the device's filters fixed
+            schedule = self.optimization.continuation_schedule
+            cfg['filter_schedule'] = [] if schedule is None else schedule.as_dict()
+
+            # Simulation
+            cfg['base_simulation'] = self.base_sim.as_dict()
 
         return cfg
 
+    def resume_optimization(self) -> bool:
+        """Restore this project's optimization from its latest checkpoint."""
+        assert self.optimization is not None
+        return self.optimization.resume()
+
     def start_optimization(self):
         """Start this project's optimization."""
         self.optimization.loop = True
         # self.optimization.run()
         self.optimization.run()
+        # Population optimizations finish with the best member's design
+        self.device = self.optimization.device
+        self.optimizer = self.optimization.optimizer
 
         #! DEBUG 20240721 ian - uncomment this block for the git push
         # try:
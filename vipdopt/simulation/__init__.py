@@ -2,6 +2,12 @@
 
 from vipdopt.simulation.fdtd import ISolver, LumericalFDTD
 from vipdopt.simulation.monitor import Monitor, Power, Profile
+from vipdopt.simulation.replay import (
+    RecordingFDTD,
+    ReplayFDTD,
+    SessionArchive,
+    solver_from_config,
+)
 from vipdopt.simulation.simobject import (
     Import,
     LumericalSimObject,
@@ -30,4 +36,8 @@
     'Import',
     'ISolver',
     'LumericalFDTD',
+    'RecordingFDTD',
+    'ReplayFDTD',
+    'SessionArchive',
+    'solver_from_config',
 ]
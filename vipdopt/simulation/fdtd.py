@@ -18,16 +18,21 @@
 from vipdopt.simulation.simobject import Import, LumericalSimObjectType
 from vipdopt.simulation.simulation import ISimulation, LumericalSimulation
 from vipdopt.utils import (
+    Coordinates,
     P,
     Path,
     PathLike,
     R,
+    bounding_slice,
     convert_path,
     ensure_path,
     import_lumapi,
     setup_logger,
 )
 
+# Saved simulations smaller than this did not run to completion
+MIN_COMPLETED_JOB_BYTES = 2e7
+
 
 class ISolver(abc.ABC):
     """Class representing FDTD solver software."""
@@ -44,6 +49,10 @@ def addjob(self, *args, **kwargs) -> None:
     def clearjobs(self, *args, **kwargs):
         """Remove all queued jobs."""
 
+    @abc.abstractmethod
+    def listjobs(self, *args, **kwargs) -> list[str]:
+        """Return the jobs still in the queue."""
+
     @abc.abstractmethod
     def runjobs(self, *args, **kwargs):
         """Run all queued jobs."""
@@ -89,6 +98,40 @@ def save(self, path: Path, sim: ISimulation): ...
     def save(self, path: Path, sim: ISimulation | None = None):
         """Save a simulation using the FDTD solver software."""
 
+    def set_iteration(self, iteration: int) -> None:  # noqa: B027
+        """Notify the solver that a new optimization iteration is starting."""
+
+    def job_completed(self, path: Path) -> bool:  # noqa: ARG002
+        """Return whether the job saved at `path` ran to completion."""
+        return True
+
+    def runjobs_to_completion(self, sims: list[LumericalSimulation]):
+        """Run all enqueued jobs, re-adding any that did not run to completion.
+
+        Arguments:
+            sims (list[LumericalSimulation]): The simulations that were enqueued.
+        """
+        while self.listjobs():  # Existing job list still occupied
+            # Run simulations from existing job list
+            self.runjobs()
+
+            # Check if there are any jobs that didn't run
+            for sim in sims:
+                sim_file = sim.get_path()
+                if not self.job_completed(sim_file):
+                    self.addjob(sim_file)
+                    vipdopt.logger.info(
+                        f'Failed to run: {sim_file.name}. Re-adding ...'
+                    )
+
+    @abc.abstractmethod
+    def import_field_shape(self, sim: ISimulation) -> tuple[int, ...]:
+        """Return the shape of the fields from a simulation's design index monitors."""
+
+    @abc.abstractmethod
+    def reformat_monitor_data(self, sims: list[LumericalSimulation], **kwargs):
+        """Save the data of each simulation's monitors to their own files."""
+
 
 def _check_lum_fdtd(
     func: Callable[Concatenate[LumericalFDTD, P], R],
@@ -167,6 +210,19 @@ def addjob(self, fname: Path):
     def clearjobs(self):
         self.fdtd.clearjobs('FDTD')  # type: ignore
 
+    @_check_lum_fdtd
+    # @override
+    def listjobs(self) -> list[str]:
+        """Return the FDTD jobs still in the queue."""
+        return self.fdtd.listjobs('FDTD')  # type: ignore
+
+    @ensure_path
+    # @override
+    def job_completed(self, path: Path) -> bool:
+        """Return whether the job saved at `path` is large enough to have finished."""
+        # Arbitrary 20MB filesize for simulations that didn't run completely
+        return path.stat().st_size > MIN_COMPLETED_JOB_BYTES
+
     @_sync_lum_fdtd_solver
     # @override
     def runjobs(self, option: int = 1):
@@ -407,8 +463,25 @@ def getresult(
 
     @_check_lum_fdtd
     @typing.no_type_check
-    def get_field(self, monitor_name: str, field_indicator: str) -> npt.NDArray:
-        """Return the E or H field or Poynting vector (P) from a monitor."""
+    def get_field(
+        self,
+        monitor_name: str,
+        field_indicator: str,
+        region: tuple[slice, slice, slice] | None = None,
+        freqs: npt.ArrayLike | None = None,
+    ) -> npt.NDArray:
+        """Return the E or H field or Poynting vector (P) from a monitor.
+
+        Arguments:
+            monitor_name (str): Name of the monitor to get the field from.
+            field_indicator (str): One of "E", "H", or "P".
+            region (tuple[slice, slice, slice] | None): If provided, only this
+                (x, y, z) index region of the field is transferred from the solver.
+                Defaults to None, returning the full monitor extent.
+            freqs (npt.ArrayLike | None): If provided, only the field at these
+                frequency indices is transferred from the solver. Defaults to None,
+                returning every frequency.
+        """
         if field_indicator not in 'EHP':
             raise ValueError(
                 f'Expected field_indicator to be "E", "H" or "P"; got {field_indicator}'
@@ -417,8 +490,14 @@ def get_field(self, monitor_name: str, field_indicator: str) -> npt.NDArray:
 
         start = time.time()
         vipdopt.logger.debug(f'Getting {polarizations} from monitor "{monitor_name}"')
+        if region is None and freqs is None:
+            getter = partial(self.fdtd.getdata, monitor_name)
+        else:
+            getter = partial(
+                self._getdata_region, monitor_name, region=region, freqs=freqs
+            )
         fields = np.array(
-            list(map(partial(self.fdtd.getdata, monitor_name), polarizations)),
+            list(map(getter, polarizations)),
             dtype=np.complex128,
         )
         data_xfer_size_mb = fields.nbytes / (1024**2)
@@ -429,18 +508,83 @@ def get_field(self, monitor_name: str, field_indicator: str) -> npt.NDArray:
 
         return fields
 
-    def get_hfield(self, monitor_name: str) -> npt.NDArray:
+    @_check_lum_fdtd
+    @typing.no_type_check
+    def _getdata_region(
+        self,
+        monitor_name: str,
+        dataset: str,
+        region: tuple[slice, slice, slice] | None = None,
+        freqs: npt.ArrayLike | None = None,
+    ) -> npt.NDArray:
+        """Get a sub-region of a monitor dataset without transferring all of it.
+
+        The slicing is done by the solver's scripting engine, so only the requested
+        spatial region and frequencies are sent back to Python.
+        """
+        # Lumerical script indexing is 1-based and inclusive
+        idx = (
+            ':, :, :'
+            if region is None
+            else ', '.join(f'{s.start + 1}:{s.stop}' for s in region)
+        )
+        fidx = (
+            ':'
+            if freqs is None
+            else '[' + ', '.join(str(f + 1) for f in np.ravel(freqs)) + ']'
+        )
+        self.fdtd.eval(
+            f"_vipdopt_region = getdata('{monitor_name}', '{dataset}');"
+            f'_vipdopt_region = _vipdopt_region({idx}, {fidx});'
+        )
+        data = self.fdtd.getv('_vipdopt_region')
+        self.fdtd.eval('clear(_vipdopt_region);')
+        return data
+
+    @_check_lum_fdtd
+    # @override
+    def import_field_shape(self, sim: LumericalSimulation) -> tuple[int, ...]:
+        """Return the shape of the fields from the simulation's design index monitor."""
+        index_prev = self.getresult(
+            next(iter(sim.indexmonitor_names())), 'index preview'
+        )
+        return np.squeeze(index_prev['index_x']).shape
+
+    @_check_lum_fdtd
+    @typing.no_type_check
+    def get_axes(self, monitor_name: str) -> Coordinates:
+        """Return the x, y, and z sample positions of a monitor in meters."""
+        return Coordinates(**{
+            axis: np.ravel(self.fdtd.getdata(monitor_name, axis)) for axis in 'xyz'
+        })
+
+    def get_hfield(
+        self,
+        monitor_name: str,
+        region: tuple[slice, slice, slice] | None = None,
+        freqs: npt.ArrayLike | None = None,
+    ) -> npt.NDArray:
         """Return the H field from a monitor."""
-        return self.get_field(monitor_name, 'H')
+        return self.get_field(monitor_name, 'H', region, freqs)
 
-    def get_efield(self, monitor_name: str) -> npt.NDArray:
+    def get_efield(
+        self,
+        monitor_name: str,
+        region: tuple[slice, slice, slice] | None = None,
+        freqs: npt.ArrayLike | None = None,
+    ) -> npt.NDArray:
         """Return the E field from a monitor."""
-        return self.get_field(monitor_name, 'E')
+        return self.get_field(monitor_name, 'E', region, freqs)
 
     @_check_lum_fdtd
-    def get_poynting(self, monitor_name: str) -> npt.NDArray:
+    def get_poynting(
+        self,
+        monitor_name: str,
+        region: tuple[slice, slice, slice] | None = None,
+        freqs: npt.ArrayLike | None = None,
+    ) -> npt.NDArray:
         """Return the Poynting vector from a monitor."""
-        return self.get_field(monitor_name, 'P')
+        return self.get_field(monitor_name, 'P', region, freqs)
 
     @_check_lum_fdtd
     def transmission(self, monitor_name: str) -> npt.NDArray:
@@ -466,7 +610,12 @@ def get_overall_power(self, monitor_name) -> npt.NDArray:
         return t.T * sp
 
     @_check_lum_fdtd
-    def reformat_monitor_data(self, sims: list[LumericalSimulation]):
+    def reformat_monitor_data(
+        self,
+        sims: list[LumericalSimulation],
+        crop_bounds: dict[str, dict[str, tuple[float, float]]] | None = None,
+        freq_indices: dict[str, npt.ArrayLike] | None = None,
+    ):
         """Reformat simulation data so it can be loaded independent of the solver.
 
         This method does the following for each provided simulation.
@@ -474,11 +623,27 @@ def reformat_monitor_data(self, sims: list[LumericalSimulation]):
             * Creates a .npz file for each monitor in the simulation, containing all
                 of the returned values (E, H, P, T, Source Power)
 
+        Monitors named in `crop_bounds` only have the part of their fields that
+        covers the given region transferred and saved. Their (cropped) x, y, and z
+        axes are saved alongside the fields so that the true physical coordinates
+        of the data are known when loading it.
+
+        Likewise, monitors named in `freq_indices` only have their fields at the
+        given frequencies transferred and saved, along with the indices themselves.
+
         Arguments:
             sims (list[LumericalSimulation]): The simulations to load data from. Must
                 have the `info['path']` field populated.
+            crop_bounds (dict[str, dict[str, tuple[float, float]]] | None): Map of
+                monitor names to the (min, max) bounds in meters to keep along each
+                axis. Axes missing from the bounds are not cropped. Defaults to None.
+            freq_indices (dict[str, npt.ArrayLike] | None): Map of monitor names to
+                the (sorted) frequency indices to keep the fields at. Defaults to
+                None.
         """
         vipdopt.logger.info('Reformatting monitor data...')
+        crop_bounds = {} if crop_bounds is None else crop_bounds
+        freq_indices = {} if freq_indices is None else freq_indices
         for sim in sims:
             self.fdtd.switchtolayout()
             sim_path: Path | None = sim.get_path()
@@ -493,9 +658,29 @@ def reformat_monitor_data(self, sims: list[LumericalSimulation]):
                 # vipdopt.logger.debug(self.fdtd.getdata(mname))
                 data = self.fdtd.getdata(mname).split()
                 # vipdopt.logger.debug(data)
-                e = self.get_efield(mname) if 'Ex' in data else None
-                h = self.get_hfield(mname) if 'Hx' in data else None
-                p = self.get_poynting(mname) if 'Px' in data else None
+                region = None
+                axes: dict[str, npt.NDArray] = {}
+                if mname in crop_bounds:
+                    full_axes = self.get_axes(mname)
+                    region = tuple(
+                        bounding_slice(full_axes[ax], crop_bounds[mname][ax])
+                        if ax in crop_bounds[mname]
+                        else slice(0, len(full_axes[ax]))
+                        for ax in 'xyz'
+                    )
+                    axes = {
+                        ax: full_axes[ax][region[i]] for i, ax in enumerate('xyz')
+                    }
+                    vipdopt.logger.debug(
+                        f'Cropping monitor "{mname}" to region {region}'
+                    )
+                freqs = None
+                if mname in freq_indices:
+                    freqs = np.asarray(freq_indices[mname], dtype=int)
+                    axes['freq_indices'] = freqs
+                e = self.get_efield(mname, region, freqs) if 'Ex' in data else None
+                h = self.get_hfield(mname, region, freqs) if 'Hx' in data else None
+                p = self.get_poynting(mname, region, freqs) if 'Px' in data else None
                 # if monitor['monitor type'] == '2D Z-normal':
                 #     t = self.get_transmission(mname)
                 # else:
@@ -508,7 +693,9 @@ def reformat_monitor_data(self, sims: list[LumericalSimulation]):
                 power = self.fdtd.getdata(mname, 'power') if 'power' in data else None
 
                 with monitor.src.open('wb') as f:
-                    np.savez(f, e=e, h=h, p=p, t=t, sp=sp, power=power)
+                    np.savez(f, e=e, h=h, p=p, t=t, sp=sp, power=power, **axes)
+                # Any data previously loaded from this file is now stale
+                monitor.cache.invalidate(monitor.src)
                 monitor.reset()
 
                 # vipdopt.logger.debug(f'E field: {monitor.e}')
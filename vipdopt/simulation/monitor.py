@@ -1,7 +1,13 @@
 """Class for general sources in a simulation."""
 
+from __future__ import annotations
+
 import json
+import threading
+import weakref
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, ClassVar
 
 import numpy as np
 import numpy.typing as npt
@@ -12,12 +18,123 @@
     LumericalSimObject,
     LumericalSimObjectType,
 )
-from vipdopt.utils import ensure_path
+from vipdopt.utils import Coordinates, ensure_path
+
+DEFAULT_CACHE_BYTES = 4 * 1024**3  # 4 GiB
+
+
+class MonitorDataCache:
+    """Memory-bounded LRU cache of monitor data files, shared by all monitors.
+
+    Several FoMs typically link monitors to the same simulation output, so every
+    monitor reading a given file shares one in-memory copy. Entries stay valid for
+    an entire iteration and are all dropped when the iteration counter changes.
+    When the total size exceeds `max_bytes`, the least recently used files are
+    evicted and the monitors holding their data are reset so the memory is freed.
+
+    Attributes:
+        max_bytes (int): Memory budget for the cached arrays.
+        iteration (int | None): The iteration the cached data belongs to.
+        hits (int): Number of requests served from memory.
+        misses (int): Number of requests that had to read from disk.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        """Initialize a MonitorDataCache."""
+        self.max_bytes = max_bytes
+        self.iteration: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Path, dict[str, Any]] = OrderedDict()
+        self._sizes: dict[Path, int] = {}
+        self._owners: dict[Path, list[weakref.ref[Monitor]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Return the number of files currently cached."""
+        return len(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        """Return whether the data for a file is currently cached."""
+        return path in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        """Return the total size of all cached arrays."""
+        return sum(self._sizes.values())
+
+    def get(self, path: Path, owner: Monitor | None = None) -> dict[str, Any]:
+        """Return the data saved in a monitor file, reading it if necessary.
+
+        Arguments:
+            path (Path): The .npz file to load.
+            owner (Monitor | None): Monitor that will hold on to the data. It will be
+                reset if the entry is evicted or invalidated.
+
+        Returns:
+            (dict[str, Any]): Mapping of array names to arrays in the file.
+        """
+        with self._lock:
+            if path in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(path)
+            else:
+                self.misses += 1
+                vipdopt.logger.debug(f'Loading monitor data from {path} into memory...')
+                with np.load(path, allow_pickle=True) as data:
+                    self._entries[path] = {key: data[key] for key in data.files}
+                self._sizes[path] = sum(
+                    arr.nbytes
+                    for arr in self._entries[path].values()
+                    if isinstance(arr, np.ndarray)
+                )
+                self._evict()
+            owners = self._owners.setdefault(path, [])
+            if owner is not None and all(ref() is not owner for ref in owners):
+                owners.append(weakref.ref(owner))
+            return self._entries[path]
+
+    def invalidate(self, path: Path):
+        """Drop the data for a file, e.g. because it has been overwritten."""
+        with self._lock:
+            self._drop(path)
+
+    def clear(self):
+        """Drop all cached data."""
+        with self._lock:
+            for path in list(self._entries):
+                self._drop(path)
+
+    def set_iteration(self, iteration: int):
+        """Start a new iteration, invalidating all data from previous ones."""
+        with self._lock:
+            if iteration != self.iteration:
+                self.clear()
+                self.iteration = iteration
+
+    def _evict(self):
+        """Remove least recently used entries until within the memory budget."""
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            vipdopt.logger.debug(f'Evicting {oldest} from the monitor data cache')
+            self._drop(oldest)
+
+    def _drop(self, path: Path):
+        """Remove an entry and reset every monitor holding on to its data."""
+        self._entries.pop(path, None)
+        self._sizes.pop(path, None)
+        for ref in self._owners.pop(path, []):
+            mon = ref()
+            if mon is not None and mon.src == path:
+                mon.reset()
 
 
 class Monitor(LumericalSimObject):
     """Class representing the different source monitors in a simulation."""
 
+    # Shared by every monitor so that data from one file is only loaded once
+    cache: ClassVar[MonitorDataCache] = MonitorDataCache()
+
     def __init__(
         self,
         name: str,
@@ -70,6 +187,8 @@ def reset(self):
         self._t = None  # Transmission
         self._sp = None  # Source Power
         self._power = None  # Power
+        self._coords = None  # Spatial axes of the fields, if saved
+        self._freq_indices = None  # Frequencies the fields were saved at, if cropped
 
         self._sync = self.src is not None  # Only set to sync if the source file exists
 
@@ -77,14 +196,17 @@ def load_source(self):
         """Load the monitor's data from its source file."""
         if self.src is None:
             raise RuntimeError(f'Monitor {self} has no source to load data from.')
-        vipdopt.logger.debug(f'Loading monitor data from {self.src} into memory...')
-        data: npt.NDArray = np.load(self.src, allow_pickle=True)
+        data = Monitor.cache.get(self.src, owner=self)
         self._e = data['e']
         self._h = data['h']
         self._p = data['p']
         self._t = data['t']
         self._sp = data['sp']
         self._power = data['power']
+        if all(axis in data for axis in 'xyz'):
+            self._coords = Coordinates(x=data['x'], y=data['y'], z=data['z'])
+        if 'freq_indices' in data:
+            self._freq_indices = data['freq_indices']
         self._tshape = self._t.shape
         self._fshape = self._e.shape
 
@@ -146,6 +268,57 @@ def power(self) -> npt.NDArray:
             self.load_source()
         return self._power
 
+    @property
+    def coords(self) -> Coordinates | None:
+        """Return the x, y, z positions (in meters) of this monitor's field samples.
+
+        Only available if the fields were cropped during extraction; otherwise None.
+        """
+        if self._sync:
+            self.load_source()
+        return self._coords
+
+    @property
+    def freq_indices(self) -> npt.NDArray | None:
+        """Return the indices of the frequencies this monitor's fields were saved at.
+
+        Only available if the fields were cropped in frequency during extraction;
+        otherwise None, meaning every frequency was saved.
+        """
+        if self._sync:
+            self.load_source()
+        return self._freq_indices
+
+    def spectral_positions(self, freqs: npt.ArrayLike) -> npt.NDArray | slice:
+        """Return where frequencies are located along the last axis of the fields.
+
+        Arguments:
+            freqs (npt.ArrayLike): Indices into the simulation's full spectrum.
+
+        Returns:
+            (npt.NDArray | slice): Indices into the last axis of the saved fields, or
+                a full slice if they select every saved frequency in order.
+
+        Raises:
+            ValueError: If any of the frequencies were not saved.
+        """
+        freqs = np.asarray(freqs, dtype=int)
+        saved = self.freq_indices
+        if saved is None:
+            if np.array_equal(freqs, np.arange(self.fshape[-1])):
+                return slice(None)
+            return freqs
+        positions = np.searchsorted(saved, freqs).clip(max=len(saved) - 1)
+        missing = saved[positions] != freqs
+        if np.any(missing):
+            raise ValueError(
+                f'Frequencies {freqs[missing]} were not saved for monitor '
+                f'"{self.name}"; only {saved} are available'
+            )
+        if np.array_equal(positions, np.arange(len(saved))):
+            return slice(None)
+        return positions
+
     @property
     def trans_mag(self) -> npt.NDArray:
         """Return the transmission magnitude measured by this monitor."""
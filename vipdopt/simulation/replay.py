@@ -0,0 +1,399 @@
+"""Recording of solver sessions to disk and replaying them without the solver."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import time
+from typing import Any, overload
+
+import vipdopt
+from vipdopt.simulation.fdtd import ISolver, LumericalFDTD
+from vipdopt.simulation.simulation import ISimulation, LumericalSimulation
+from vipdopt.utils import Path, PathLike, convert_path, ensure_path
+
+SESSION_VERSION = 1
+MANIFEST_NAME = 'session.json'
+
+
+class SessionArchive:
+    """Folder of recorded simulation results, indexed by iteration and sim name.
+
+    The data of iteration `k` is stored in `iteration_{k:04d}/<sim name>/`, holding
+    one file per monitor in the format written by
+    `LumericalFDTD.reformat_monitor_data` and, optionally, the saved simulation
+    model. A JSON manifest alongside records what each iteration contains, how long
+    its jobs took to run, and the shape of the design fields.
+
+    Attributes:
+        root (Path): The folder containing the archive.
+        manifest (dict): The contents of the manifest file.
+    """
+
+    def __init__(self, root: PathLike) -> None:
+        """Initialize a SessionArchive, reading its manifest if it exists."""
+        self.root = convert_path(root)
+        manifest_path = self.root / MANIFEST_NAME
+        if manifest_path.exists():
+            with manifest_path.open() as f:
+                self.manifest = json.load(f)
+            if self.manifest.get('version') != SESSION_VERSION:
+                raise ValueError(
+                    f'Session archive {self.root} has version '
+                    f'{self.manifest.get("version")}; expected {SESSION_VERSION}'
+                )
+        else:
+            self.manifest = {'version': SESSION_VERSION, 'iterations': {}}
+
+    def iterations(self) -> list[int]:
+        """Return the recorded iterations in increasing order."""
+        return sorted(int(k) for k in self.manifest['iterations'])
+
+    def entry(self, iteration: int) -> dict[str, Any]:
+        """Return the manifest entry of an iteration, creating it if needed."""
+        return self.manifest['iterations'].setdefault(
+            str(iteration), {'runtime_s': 0.0, 'field_shape': None, 'sims': {}}
+        )
+
+    def sim_dir(self, iteration: int, sim_name: str) -> Path:
+        """Return the folder holding the data of one simulation."""
+        return self.root / f'iteration_{iteration:04d}' / sim_name
+
+    def recorded_sims(self, iteration: int) -> dict[str, dict[str, Any]]:
+        """Return the manifest entries of the simulations recorded at an iteration."""
+        return self.manifest['iterations'].get(str(iteration), {}).get('sims', {})
+
+    def add_sim(
+        self,
+        iteration: int,
+        sim_name: str,
+        monitor_files: dict[str, Path],
+        model: Path | None = None,
+    ):
+        """Copy the results of a simulation into the archive.
+
+        Arguments:
+            iteration (int): The iteration the simulation was run at.
+            sim_name (str): The name of the simulation.
+            monitor_files (dict[str, Path]): Map of monitor names to their data files.
+            model (Path | None): The saved simulation model to archive too, if any.
+                Defaults to None.
+        """
+        folder = self.sim_dir(iteration, sim_name)
+        folder.mkdir(parents=True, exist_ok=True)
+        for name, src in monitor_files.items():
+            shutil.copyfile(src, folder / f'{name}.npz')
+        if model is not None:
+            shutil.copyfile(model, folder / model.name)
+        self.entry(iteration)['sims'][sim_name] = {
+            'monitors': sorted(monitor_files),
+            'model': None if model is None else model.name,
+        }
+
+    def monitor_file(self, iteration: int, sim_name: str, monitor_name: str) -> Path:
+        """Return the archived data file of a monitor.
+
+        Raises:
+            FileNotFoundError: If the monitor was not recorded.
+        """
+        sims = self.recorded_sims(iteration)
+        if sim_name not in sims or monitor_name not in sims[sim_name]['monitors']:
+            raise FileNotFoundError(
+                f'No data recorded for monitor "{monitor_name}" of simulation '
+                f'"{sim_name}" at iteration {iteration} in {self.root}'
+            )
+        return self.sim_dir(iteration, sim_name) / f'{monitor_name}.npz'
+
+    def save(self):
+        """Write the manifest to disk."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with (self.root / MANIFEST_NAME).open('w') as f:
+            json.dump(self.manifest, f, indent=4)
+
+
+class RecordingFDTD(LumericalFDTD):
+    """LumericalFDTD that records every iteration's results into a SessionArchive.
+
+    Attributes:
+        archive (SessionArchive): Where the results are recorded.
+        save_models (bool): Whether to archive the simulation models as well as the
+            monitor data.
+        iteration (int): The optimization iteration currently being recorded.
+    """
+
+    def __init__(self, archive: PathLike, save_models: bool = True) -> None:
+        """Initialize a RecordingFDTD."""
+        super().__init__()
+        self.archive = SessionArchive(archive)
+        self.save_models = save_models
+        self.iteration = 0
+
+    # @override
+    def set_iteration(self, iteration: int) -> None:
+        """Set the optimization iteration being recorded."""
+        self.iteration = iteration
+
+    def runjobs(self, option: int = 1):
+        """Run all simulations in the job queue, recording how long they took."""
+        start = time.perf_counter()
+        super().runjobs(option)
+        # Jobs that failed are re-run, so accumulate over the iteration
+        self.archive.entry(self.iteration)['runtime_s'] += time.perf_counter() - start
+        self.archive.save()
+
+    def import_field_shape(self, sim: LumericalSimulation) -> tuple[int, ...]:
+        """Return the shape of the design index fields, recording it in the archive."""
+        shape = super().import_field_shape(sim)
+        self.archive.entry(self.iteration)['field_shape'] = list(shape)
+        self.archive.save()
+        return shape
+
+    def reformat_monitor_data(
+        self,
+        sims: list[LumericalSimulation],
+        crop_bounds: dict[str, dict[str, tuple[float, float]]] | None = None,
+        freq_indices: dict | None = None,
+    ):
+        """Reformat the monitor data of each simulation and archive the results."""
+        super().reformat_monitor_data(
+            sims, crop_bounds=crop_bounds, freq_indices=freq_indices
+        )
+        for sim in sims:
+            sim_path = sim.get_path()
+            if sim_path is None:
+                continue
+            self.archive.add_sim(
+                self.iteration,
+                sim.info['name'],
+                {mon.name: mon.src for mon in sim.monitors()},
+                model=sim_path if self.save_models else None,
+            )
+        self.archive.save()
+        vipdopt.logger.debug(
+            f'Recorded {len(sims)} simulations for iteration {self.iteration}.'
+        )
+
+
+class ReplayFDTD(ISolver):
+    """Solver that plays back a session recorded by RecordingFDTD.
+
+    No solver software is needed: enqueued jobs are looked up in the archive by
+    simulation name and the current iteration, and their monitor data is copied to
+    where the solver would have written it. Running the job queue only waits for a
+    simulated latency, so that the timing of the optimization loop is realistic.
+
+    Attributes:
+        archive (SessionArchive): The recorded session.
+        latency_s (float | None): Time to wait each time the job queue is run. If
+            None, the recorded runtime of the replayed iteration is used.
+        time_scale (float): Factor applied to the latency; 0 disables waiting.
+        loop (bool): Whether to cycle through the recorded iterations when the
+            optimization runs for longer than the recording.
+        iteration (int): The current optimization iteration.
+        current_sim (ISimulation | None): The last simulation loaded or saved.
+    """
+
+    def __init__(
+        self,
+        archive: PathLike,
+        latency_s: float | None = None,
+        time_scale: float = 1.0,
+        loop: bool = True,
+    ) -> None:
+        """Initialize a ReplayFDTD."""
+        self.archive = SessionArchive(archive)
+        if not self.archive.iterations():
+            raise FileNotFoundError(f'No recorded session found in {archive}')
+        self.latency_s = latency_s
+        self.time_scale = time_scale
+        self.loop = loop
+        self.iteration = 0
+        self.current_sim: ISimulation | None = None
+        self._jobs: list[Path] = []
+
+    # @override
+    def set_iteration(self, iteration: int) -> None:
+        """Set the current optimization iteration."""
+        self.iteration = iteration
+
+    def replayed_iteration(self) -> int:
+        """Return the recorded iteration that stands in for the current one.
+
+        Raises:
+            FileNotFoundError: If the iteration was not recorded and `loop` is False.
+        """
+        recorded = self.archive.iterations()
+        if self.iteration in recorded:
+            return self.iteration
+        if not self.loop:
+            raise FileNotFoundError(
+                f'Iteration {self.iteration} was not recorded in {self.archive.root}'
+            )
+        return recorded[self.iteration % len(recorded)]
+
+    # @override
+    def connect(self, *args, **kwargs) -> None:
+        """Log the replayed session; there is no solver software to connect to."""
+        vipdopt.logger.info(f'Replaying solver session from {self.archive.root}')
+
+    # @override
+    @ensure_path
+    def addjob(self, fname: Path):
+        """Enqueue a job to replay."""
+        self._jobs.append(fname.absolute())
+
+    # @override
+    def clearjobs(self):
+        """Remove all queued jobs."""
+        self._jobs.clear()
+
+    # @override
+    def listjobs(self) -> list[str]:
+        """Return the jobs still in the queue."""
+        return [str(job) for job in self._jobs]
+
+    def runjobs(self, option: int = 1):  # noqa: ARG002
+        """Wait for the simulated solver latency and empty the job queue.
+
+        Raises:
+            FileNotFoundError: If any of the queued jobs were not recorded.
+        """
+        iteration = self.replayed_iteration()
+        recorded = self.archive.recorded_sims(iteration)
+        missing = [job.stem for job in self._jobs if job.stem not in recorded]
+        if missing:
+            raise FileNotFoundError(
+                f'Simulations {missing} were not recorded at iteration {iteration} '
+                f'in {self.archive.root}'
+            )
+        latency = self.latency_s
+        if latency is None:
+            latency = self.archive.entry(iteration)['runtime_s']
+        vipdopt.logger.info(f'Replaying simulations: {self.listjobs()}')
+        time.sleep(latency * self.time_scale)
+        self._jobs.clear()
+        vipdopt.logger.info('Finished running job queue')
+
+    # @override
+    def run(self):
+        """Replay the job queue."""
+        self.runjobs()
+
+    # @override
+    def close(self):
+        """Empty the job queue."""
+        self._jobs.clear()
+
+    @overload
+    @ensure_path
+    def load(self, path: Path): ...
+
+    @overload
+    def load(self, sim: ISimulation): ...
+
+    @overload
+    @ensure_path
+    def load(self, path: Path, sim: ISimulation): ...
+
+    # @override
+    def load(self, path: PathLike | None = None, sim: ISimulation | None = None):
+        """Make a simulation current, and set its path if one is given."""
+        if sim is not None:
+            self.current_sim = sim
+        if path is not None and isinstance(self.current_sim, LumericalSimulation):
+            self.current_sim.set_path(convert_path(path))
+
+    @overload
+    @ensure_path
+    def save(self, path: Path): ...
+
+    @overload
+    @ensure_path
+    def save(self, path: Path, sim: ISimulation): ...
+
+    @ensure_path
+    def save(self, path: Path, sim: ISimulation | None = None):
+        """Set the path of a simulation, as saving it with the solver would."""
+        self.load(path, sim)
+
+    # @override
+    @ensure_path
+    def job_completed(self, path: Path) -> bool:
+        """Return whether the job at `path` was recorded in the replayed iteration."""
+        return path.stem in self.archive.recorded_sims(self.replayed_iteration())
+
+    def import_field_shape(self, sim: ISimulation) -> tuple[int, ...]:  # noqa: ARG002
+        """Return the field shape recorded at or most recently before this iteration.
+
+        Raises:
+            FileNotFoundError: If no field shape was recorded.
+        """
+        iteration = self.replayed_iteration()
+        for i in reversed(self.archive.iterations()):
+            shape = self.archive.entry(i)['field_shape']
+            if i <= iteration and shape is not None:
+                return tuple(shape)
+        raise FileNotFoundError(
+            f'No field shape recorded at or before iteration {iteration} in '
+            f'{self.archive.root}'
+        )
+
+    def reformat_monitor_data(
+        self,
+        sims: list[LumericalSimulation],
+        crop_bounds: dict | None = None,  # noqa: ARG002
+        freq_indices: dict | None = None,  # noqa: ARG002
+    ):
+        """Copy the recorded monitor data of each simulation into place.
+
+        The data is replayed as it was extracted while recording, so any cropping
+        and frequency subsampling are those of the recorded session; monitors check
+        that the frequencies they are asked for were saved.
+        """
+        vipdopt.logger.info('Replaying monitor data...')
+        iteration = self.replayed_iteration()
+        for sim in sims:
+            if sim.get_path() is None:
+                continue
+            sim.link_monitors()
+            for monitor in sim.monitors():
+                name = sim.info['name']
+                src = self.archive.monitor_file(iteration, name, monitor.name)
+                shutil.copyfile(src, monitor.src)
+                # Any data previously loaded from this file is now stale
+                monitor.cache.invalidate(monitor.src)
+                monitor.reset()
+        vipdopt.logger.info('Finished reformatting monitor data.')
+
+
+def solver_from_config(cfg: Any, root: PathLike = '.') -> ISolver:
+    """Create the solver selected by a config.
+
+    A `replay_session` folder replays a recorded session instead of running the
+    solver, with optional `replay_latency_s`, `replay_time_scale`, and
+    `replay_loop` settings. Otherwise, a `record_session` folder records the
+    session while running Lumerical, also saving the simulation models unless
+    `record_models` is False. Relative folders are resolved against `root`.
+
+    Arguments:
+        cfg (Any): The config to read.
+        root (PathLike): The folder relative paths are resolved against. Defaults
+            to the working directory.
+
+    Returns:
+        (ISolver): The solver to use.
+    """
+    root = convert_path(root)
+    if cfg.get('replay_session') is not None:
+        return ReplayFDTD(
+            root / cfg['replay_session'],
+            latency_s=cfg.get('replay_latency_s'),
+            time_scale=cfg.get('replay_time_scale', 1.0),
+            loop=cfg.get('replay_loop', True),
+        )
+    if cfg.get('record_session') is not None:
+        return RecordingFDTD(
+            root / cfg['record_session'],
+            save_models=cfg.get('record_models', True),
+        )
+    return LumericalFDTD()
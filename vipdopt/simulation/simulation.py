@@ -62,6 +62,8 @@ def default(self, o: Any) -> Any:
             return o.tolist()
         if isinstance(o, Path):
             return str(o)
+        if callable(getattr(o, 'as_dict', None)):
+            return o.as_dict()
         return super().default(o)
 
 
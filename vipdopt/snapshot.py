@@ -0,0 +1,252 @@
+"""Binary snapshots of nested data, stored as a JSON manifest plus raw arrays.
+
+A snapshot is a directory (or an uncompressed .zip archive of one) containing a
+`manifest.json` file and one `.npy` file per NumPy array in the data. The manifest
+holds the rest of the data as plain JSON, with each array replaced by a reference
+to its file, so arrays never go through `tolist` and nothing is pickled. Arrays are
+written little-endian, and large arrays in snapshot directories are memory-mapped
+when loaded, so that only the parts that are used get read from disk.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections.abc import Mapping
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from vipdopt.utils import PathLike, convert_path
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+ARRAYS_FOLDER = 'arrays'
+# Arrays at least this large are memory-mapped instead of read into memory
+DEFAULT_MMAP_BYTES = 1 << 20
+
+# Keys marking values that JSON can't represent directly
+_ARRAY_TAG = '__array__'
+_TUPLE_TAG = '__tuple__'
+_COMPLEX_TAG = '__complex__'
+
+
+def is_snapshot(path: PathLike) -> bool:
+    """Return whether a path is a snapshot directory or archive."""
+    path = convert_path(path)
+    if path.is_dir():
+        return (path / MANIFEST_NAME).exists()
+    if path.suffix == '.zip' and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            return MANIFEST_NAME in zf.namelist()
+    return False
+
+
+class _Encoder:
+    """Converts nested data into JSON values, collecting its arrays."""
+
+    def __init__(self) -> None:
+        self.arrays: dict[str, npt.NDArray] = {}
+
+    def encode(self, value: Any, path: tuple[str, ...]) -> Any:
+        """Return the JSON representation of the value at a path in the data."""
+        if isinstance(value, np.ndarray):
+            return {_ARRAY_TAG: self._add_array(value, path)}
+        if isinstance(value, Mapping):
+            if any(not isinstance(k, str) for k in value):
+                raise TypeError(f'Snapshot keys must be strings; got {list(value)}')
+            return {k: self.encode(v, (*path, k)) for k, v in value.items()}
+        if isinstance(value, list | tuple):
+            items = [self.encode(v, (*path, str(i))) for i, v in enumerate(value)]
+            return {_TUPLE_TAG: items} if isinstance(value, tuple) else items
+        if callable(getattr(value, 'as_dict', None)):
+            return self.encode(value.as_dict(), path)
+        return _encode_scalar(value, path)
+
+    def _add_array(self, a: npt.NDArray, path: tuple[str, ...]) -> str:
+        """Add an array to the snapshot, returning its key."""
+        if a.dtype.hasobject:
+            raise TypeError(
+                f'Cannot store array of objects at "{"/".join(path)}" in a snapshot'
+            )
+        if a.dtype.byteorder == '>':
+            a = a.astype(a.dtype.newbyteorder('<'))
+        base = re.sub(r'[^A-Za-z0-9_.-]', '_', '.'.join(path)) or 'array'
+        key = base
+        i = 1
+        while key in self.arrays:
+            key = f'{base}_{i}'
+            i += 1
+        self.arrays[key] = a
+        return key
+
+
+def _encode_scalar(value: Any, path: tuple[str, ...]) -> Any:
+    """Return the JSON representation of a scalar value."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, bool | int | float | str):
+        return value.value if isinstance(value, Enum) else value
+    if isinstance(value, complex):
+        return {_COMPLEX_TAG: [value.real, value.imag]}
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(
+        f'Cannot store value of type {type(value)} at "{"/".join(path)}" in a snapshot'
+    )
+
+
+def _decode(value: Any, arrays: Mapping[str, npt.NDArray]) -> Any:
+    """Restore the data represented by a JSON value."""
+    if isinstance(value, list):
+        return [_decode(v, arrays) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if _ARRAY_TAG in value:
+        return arrays[value[_ARRAY_TAG]]
+    if _TUPLE_TAG in value:
+        return tuple(_decode(v, arrays) for v in value[_TUPLE_TAG])
+    if _COMPLEX_TAG in value:
+        return complex(*value[_COMPLEX_TAG])
+    return {k: _decode(v, arrays) for k, v in value.items()}
+
+
+def write_snapshot(path: PathLike, data: Mapping[str, Any], kind: str = 'data') -> Path:
+    """Write nested data to a snapshot.
+
+    Values may be dictionaries with string keys, lists, tuples, scalars, strings,
+    paths, NumPy arrays, or objects with an `as_dict` method. The snapshot is
+    written in full next to `path` and then moved into place, replacing any
+    existing snapshot, so that readers never see partial data.
+
+    Arguments:
+        path (PathLike): The snapshot to write; a .zip archive if it has that
+            suffix, otherwise a directory.
+        data (Mapping[str, Any]): The data to store.
+        kind (str): What the snapshot contains, checked when it is read. Defaults
+            to 'data'.
+
+    Raises:
+        TypeError: If the data contains a value that can't be stored.
+
+    Returns:
+        (Path): The path of the snapshot.
+    """
+    path = convert_path(path)
+    encoder = _Encoder()
+    manifest = {
+        'schema_version': SNAPSHOT_VERSION,
+        'kind': kind,
+        'data': encoder.encode(data, ()),
+        'arrays': {
+            key: {
+                'file': f'{ARRAYS_FOLDER}/{key}.npy',
+                'dtype': a.dtype.str,
+                'shape': list(a.shape),
+            }
+            for key, a in encoder.arrays.items()
+        },
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix=f'.{path.name}.'))
+    try:
+        if path.suffix == '.zip':
+            tmp_zip = tmp / path.name
+            with zipfile.ZipFile(tmp_zip, 'w', zipfile.ZIP_STORED) as zf:
+                zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=4))
+                for key, a in encoder.arrays.items():
+                    with zf.open(manifest['arrays'][key]['file'], 'w') as f:
+                        np.save(f, a, allow_pickle=False)
+            os.replace(tmp_zip, path)
+            shutil.rmtree(tmp)
+        else:
+            (tmp / ARRAYS_FOLDER).mkdir()
+            for key, a in encoder.arrays.items():
+                np.save(tmp / manifest['arrays'][key]['file'], a, allow_pickle=False)
+            # The manifest is written last, so it only exists for complete snapshots
+            with (tmp / MANIFEST_NAME).open('w') as f:
+                json.dump(manifest, f, indent=4)
+            if path.exists():
+                old = path.with_name(f'.{path.name}.old')
+                shutil.rmtree(old, ignore_errors=True)
+                os.replace(path, old)
+                os.replace(tmp, path)
+                shutil.rmtree(old)
+            else:
+                os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def read_snapshot(
+    path: PathLike,
+    kind: str | None = None,
+    mmap_bytes: int | None = DEFAULT_MMAP_BYTES,
+) -> dict[str, Any]:
+    """Read the data stored in a snapshot.
+
+    Arguments:
+        path (PathLike): The snapshot directory or .zip archive.
+        kind (str | None): The kind of snapshot expected; if None, any kind is
+            accepted.
+        mmap_bytes (int | None): Arrays at least this many bytes are memory-mapped
+            copy-on-write, so changing them never modifies the snapshot; None reads
+            every array into memory. Arrays in archives are always read into
+            memory.
+
+    Raises:
+        FileNotFoundError: If there is no snapshot at the path.
+        ValueError: If the snapshot has a different schema version or kind.
+
+    Returns:
+        (dict[str, Any]): The stored data.
+    """
+    path = convert_path(path)
+    if not is_snapshot(path):
+        raise FileNotFoundError(f'No snapshot found at {path}')
+
+    zf = None if path.is_dir() else zipfile.ZipFile(path)
+    try:
+        if zf is None:
+            with (path / MANIFEST_NAME).open() as f:
+                manifest = json.load(f)
+        else:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+        if manifest.get('schema_version') != SNAPSHOT_VERSION:
+            raise ValueError(
+                f'Snapshot {path} has schema version '
+                f'{manifest.get("schema_version")}; expected {SNAPSHOT_VERSION}'
+            )
+        if kind is not None and manifest.get('kind') != kind:
+            raise ValueError(
+                f'Snapshot {path} contains {manifest.get("kind")}; expected {kind}'
+            )
+
+        arrays: dict[str, npt.NDArray] = {}
+        for key, entry in manifest['arrays'].items():
+            if zf is not None:
+                arrays[key] = np.load(
+                    io.BytesIO(zf.read(entry['file'])), allow_pickle=False
+                )
+                continue
+            nbytes = np.dtype(entry['dtype']).itemsize * int(np.prod(entry['shape']))
+            mmap = mmap_bytes is not None and nbytes >= mmap_bytes and nbytes > 0
+            arrays[key] = np.load(
+                path / entry['file'],
+                mmap_mode='c' if mmap else None,
+                allow_pickle=False,
+            )
+    finally:
+        if zf is not None:
+            zf.close()
+    return _decode(manifest['data'], arrays)
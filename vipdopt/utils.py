@@ -66,7 +66,7 @@ def setup_logger(
 ) -> logging.Logger:
     """Setup logger to use across the program."""
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(min(logging.DEBUG, level))
     logger.propagate = False
 
     Path(log_file).touch()
@@ -266,6 +266,30 @@ class Coordinates(TypedDict):
     z: npt.NDArray
 
 
+def bounding_slice(axis: npt.ArrayLike, bounds: tuple[float, float]) -> slice:
+    """Return the smallest slice of a sorted axis that brackets the given bounds.
+
+    The first and last points of the slice lie on or outside of `bounds` whenever
+    the axis allows it, so that data sampled on the sliced axis can still be
+    interpolated anywhere inside of `bounds`.
+
+    Arguments:
+        axis (npt.ArrayLike): Monotonically increasing sample positions.
+        bounds (tuple[float, float]): The (min, max) region to keep.
+
+    Returns:
+        (slice): Slice into `axis` covering `bounds`.
+    """
+    ax = np.ravel(axis)
+    lo, hi = min(bounds), max(bounds)
+    start = max(int(np.searchsorted(ax, lo, side='right')) - 1, 0)
+    stop = min(int(np.searchsorted(ax, hi, side='left')) + 1, len(ax))
+    if stop <= start:  # Bounds are outside of the axis; keep nearest sample
+        start = min(start, len(ax) - 1)
+        stop = start + 1
+    return slice(start, stop)
+
+
 def starmap_with_kwargs(
     function: Callable[P, R],
     args_iter: Iterable[Iterable],